@@ -0,0 +1,508 @@
+"""
+Async Service Layer (Model)
+
+asyncio counterpart of ApiService for high fan-out work, such as polling
+dozens of Jenkins jobs and GitLab pipelines at once. Hundreds of requests
+share a single event loop thread instead of one worker thread each.
+Like ApiService, it knows nothing about the GUI or the Controller.
+
+Requires the optional 'aiohttp' package.
+"""
+
+import asyncio
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Coroutine, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+except ImportError:  # Optional dependency, checked when the service is created
+    aiohttp = None
+
+from requests.utils import parse_header_links
+from app.bulk import BulkResult, BulkTarget
+from app.github_client import GITHUB_API_URL, PER_PAGE, GitHubClient
+from app.jenkins_index import jenkins_job_path
+from app.metrics import Metrics
+from app.rate_governor import RateGovernor, host_of
+from app.request_coalescer import RequestCoalescer, request_key
+from app.service import (
+    BACKENDS, COALESCED_KWARGS, CRUMB_TIMEOUT, DEFAULT_MAX_RETRIES, DEFAULT_RETRY_BACKOFF,
+    DEFAULT_TIMEOUT, JENKINS_BUILD_TREE, RATE_LIMIT_RETRIES, RETRY_STATUS_CODES,
+)
+
+DEFAULT_CONNECTION_LIMIT = 100
+DEFAULT_BULK_CONCURRENCY = 16     # Bulk requests in flight per host
+# Bulk requests started per second per host; 0 leaves pacing to the RateGovernor,
+# which already paces every host (and honours its budget and Retry-After)
+DEFAULT_BULK_RATE = 0.0
+
+# True inside a bulk trigger's task: a user action, so the governor doesn't pace it as
+# background fan-out (429s, Retry-After and exhausted budgets still hold it back)
+_interactive = contextvars.ContextVar("unici_async_interactive", default=False)
+
+
+class HostLimiter:
+    """
+    Caps requests to one host: at most `concurrency` in flight and at most
+    `rate` started per second. Use as `async with limiter: ...`.
+    """
+    def __init__(self, concurrency: int, rate: float):
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_start = 0.0
+        self._rate_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        if self._interval:
+            async with self._rate_lock:
+                now = time.monotonic()
+                delay = self._next_start - now
+                self._next_start = max(now, self._next_start) + self._interval
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._semaphore.release()
+
+
+class AsyncApiService:
+    """
+    Async variant of ApiService with the same method surface:
+    branches, pipeline trigger, build trigger and status polling.
+    All coroutines must run on the same event loop (see AsyncLoopThread).
+    Requests are recorded in `metrics`, paced by `governor` and GETs are
+    shared through `coalescer`; all three may be shared with ApiService.
+    Its fan-out counts as background work, except bulk triggers, which
+    the user asked for.
+    """
+    def __init__(self, metrics: Optional[Metrics] = None, governor: Optional[RateGovernor] = None,
+                 coalescer: Optional[RequestCoalescer] = None):
+        if aiohttp is None:
+            raise RuntimeError("The async service requires aiohttp. Install it with: pip install aiohttp")
+
+        self.github_token: Optional[str] = None
+        self.github_api_url: str = GITHUB_API_URL
+        self.gitlab_url: Optional[str] = None
+        self.gitlab_token: Optional[str] = None
+        self.jenkins_url: Optional[str] = None
+        self.jenkins_user: Optional[str] = None
+        self.jenkins_token: Optional[str] = None
+
+        self.connection_limit: int = DEFAULT_CONNECTION_LIMIT
+        self.max_retries: int = DEFAULT_MAX_RETRIES
+        self.retry_backoff: float = DEFAULT_RETRY_BACKOFF
+        self.timeouts: Dict[str, float] = {backend: DEFAULT_TIMEOUT for backend in BACKENDS}
+
+        self._sessions: Dict[str, "aiohttp.ClientSession"] = {}
+        self._session_keys: Dict[str, Tuple] = {}
+        self._crumb_cache: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._crumb_lock: Optional[asyncio.Lock] = None
+        self.bulk_concurrency: int = DEFAULT_BULK_CONCURRENCY
+        self.bulk_rate: float = DEFAULT_BULK_RATE
+        self.crumb_stats: Dict[str, int] = {"hits": 0, "misses": 0, "refreshes": 0}
+        self.metrics = metrics or Metrics()
+        self.governor = governor or RateGovernor()
+        self.coalescer = coalescer or RequestCoalescer()
+
+    async def update_config(self, config_data: Dict[str, str]):
+        """Updates the API credentials. Sessions whose settings changed are closed."""
+        jenkins_credentials = (self.jenkins_url, self.jenkins_user, self.jenkins_token)
+        self.github_token = config_data.get("github_token")
+        self.github_api_url = (config_data.get("github_api_url") or GITHUB_API_URL).rstrip('/')
+        self.gitlab_url = (config_data.get("gitlab_url") or "").rstrip('/')
+        self.gitlab_token = config_data.get("gitlab_token")
+        self.jenkins_url = (config_data.get("jenkins_url") or "").rstrip('/')
+        self.jenkins_user = config_data.get("jenkins_user")
+        self.jenkins_token = config_data.get("jenkins_token")
+        if (self.jenkins_url, self.jenkins_user, self.jenkins_token) != jenkins_credentials:
+            self._crumb_cache.clear()   # A crumb is tied to the credentials it was issued for
+
+        self.connection_limit = int(config_data.get("async_connection_limit") or DEFAULT_CONNECTION_LIMIT)
+        self.max_retries = int(config_data.get("max_retries") or DEFAULT_MAX_RETRIES)
+        self.retry_backoff = float(config_data.get("retry_backoff") or DEFAULT_RETRY_BACKOFF)
+        self.bulk_concurrency = int(config_data.get("bulk_max_concurrency") or DEFAULT_BULK_CONCURRENCY)
+        self.bulk_rate = float(config_data.get("bulk_rate_per_second") or DEFAULT_BULK_RATE)
+        for backend in BACKENDS:
+            self.timeouts[backend] = float(config_data.get(f"{backend}_timeout") or DEFAULT_TIMEOUT)
+
+        for backend in BACKENDS:
+            if backend in self._sessions and self._session_keys.get(backend) != self._session_key(backend):
+                await self._sessions.pop(backend).close()
+
+    async def close(self):
+        """Closes all sessions and their connection pools."""
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+        self._session_keys.clear()
+
+    # --- Session Management ---
+
+    def _session_key(self, backend: str) -> Tuple:
+        """Everything that, when changed, requires a fresh session."""
+        if backend == "jenkins":
+            return (self.jenkins_url, self.jenkins_user, self.jenkins_token, self.connection_limit)
+        if backend == "github":
+            return (self.github_token, self.connection_limit)
+        return (self.gitlab_url, self.gitlab_token, self.connection_limit)
+
+    def _get_session(self, backend: str) -> "aiohttp.ClientSession":
+        """Returns the backend's session, creating it on the running loop on first use."""
+        session = self._sessions.get(backend)
+        if session is not None and not session.closed:
+            return session
+
+        headers = {}
+        auth = None
+        if backend == "jenkins" and self.jenkins_user and self.jenkins_token:
+            auth = aiohttp.BasicAuth(self.jenkins_user, self.jenkins_token)
+        elif backend == "github" and self.github_token:
+            headers = {
+                "Authorization": f"token {self.github_token}",
+                "Accept": "application/vnd.github.v3+json",
+            }
+        elif backend == "gitlab" and self.gitlab_token:
+            headers = {"PRIVATE-TOKEN": self.gitlab_token}
+
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.connection_limit),
+            headers=headers,
+            auth=auth,
+            timeout=aiohttp.ClientTimeout(total=self.timeouts[backend]),
+        )
+        self._sessions[backend] = session
+        self._session_keys[backend] = self._session_key(backend)
+        return session
+
+    async def _request(self, backend: str, method: str, url: str, **kwargs) -> Tuple[int, Any, Dict[str, str]]:
+        """Sends a request and returns (status, parsed body, cookies); see _request_with_headers."""
+        status, body, cookies, _ = await self._request_with_headers(backend, method, url, **kwargs)
+        return status, body, cookies
+
+    async def _request_with_headers(self, backend: str, method: str, url: str,
+                                    **kwargs) -> Tuple[int, Any, Dict[str, str], Mapping[str, str]]:
+        """
+        Sends a request and returns (status, parsed body, cookies, response headers).
+        Identical GETs share one request through the coalescer; the body is
+        parsed for each caller, so callers never see each other's changes.
+        Writes drop what the backend's GETs left in the micro-cache.
+        """
+        if method == "GET" and COALESCED_KWARGS.issuperset(kwargs):
+            key = request_key(method, url, kwargs.get("params"), kwargs.get("headers"))
+            sent = await self.coalescer.fetch_async(backend, key, partial(self._send, backend, method, url, **kwargs),
+                                                    cacheable=lambda result: result[0] < 400)
+        elif method in ("GET", "HEAD"):
+            sent = await self._send(backend, method, url, **kwargs)
+        else:
+            sent = await self._send_write(backend, method, url, **kwargs)
+        status, payload, content_type, charset, cookies, headers = sent
+        return status, self._parse_body(payload, content_type, charset), dict(cookies), headers
+
+    async def _send_write(self, backend: str, method: str, url: str, **kwargs) -> Tuple:
+        """_send for a write, dropping what the backend's GETs left in the micro-cache before and after it."""
+        self.coalescer.invalidate(backend)
+        try:
+            return await self._send(backend, method, url, **kwargs)
+        finally:
+            self.coalescer.invalidate(backend)
+
+    async def _send(self, backend: str, method: str, url: str,
+                    **kwargs) -> Tuple[int, bytes, str, str, Dict[str, str], Mapping[str, str]]:
+        """
+        Sends a request and returns (status, raw body, content type, charset, cookies, headers).
+        Idempotent requests are retried with backoff on 5xx and connection
+        errors, matching the retry policy of the threaded ApiService, and
+        like there, requests refused for rate limiting are retried once the
+        governor lets the host be used again.
+        """
+        retries = self.max_retries if method in ("GET", "HEAD") else 0
+        timeout = kwargs.pop("timeout", None)
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        started = time.perf_counter()
+        attempt = limited = 0
+        while True:
+            delay = self.governor.reserve(url, interactive=_interactive.get())
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                async with self._get_session(backend).request(method, url, **kwargs) as response:
+                    if response.status in RETRY_STATUS_CODES and attempt < retries:
+                        self.governor.observe(url, response.status, response.headers)
+                        await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+                        attempt += 1
+                        continue
+                    payload = await response.read()
+                    charset = response.charset or "utf-8"
+                    cookies = {name: morsel.value for name, morsel in response.cookies.items()}
+                    self._observe(backend, method, url, response, started, attempt)
+                    text = payload.decode(charset, "replace") if response.status == 403 else ""
+                    retry_after = self.governor.observe(url, response.status, response.headers, text)
+                    if retry_after is None or limited == RATE_LIMIT_RETRIES:
+                        return (response.status, payload, response.content_type, charset, cookies,
+                                response.headers.copy())
+                    limited += 1
+                    self.metrics.event(backend, "rate_limited", f"{host_of(url)} answered {response.status}; "
+                                                                f"retrying in {retry_after:.0f} s")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= retries:
+                    self.metrics.observe_request(backend, method, url, None, started, time.perf_counter() - started,
+                                                 retries=attempt, error=e.__class__.__name__, overlapping=True)
+                    raise
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+                attempt += 1
+
+    @staticmethod
+    def _parse_body(payload: bytes, content_type: str, charset: str) -> Any:
+        """What response.json() / response.text() would have returned."""
+        text = payload.decode(charset, "replace")
+        if content_type == "application/json":
+            return json.loads(text) if text.strip() else None
+        return text
+
+    def _observe(self, backend: str, method: str, url: str, response: "aiohttp.ClientResponse",
+                 started: float, retries: int = 0):
+        """Records a finished request; requests on the loop overlap, so they are traced as async spans."""
+        sent = int(response.request_info.headers.get("Content-Length") or 0)
+        self.metrics.observe_request(backend, method, url, response.status, started, time.perf_counter() - started,
+                                     sent, response.content_length or 0, retries, overlapping=True)
+
+    @staticmethod
+    def _raise_for_status(status: int, body: Any, url: str):
+        """aiohttp equivalent of requests' raise_for_status."""
+        if status >= 400:
+            raise Exception(f"HTTP {status} for {url}: {body}")
+
+    # --- API Calls ---
+
+    async def get_github_branches(self, repo_name: str) -> List[Dict[str, Any]]:
+        """
+        Fetches all branches for a GitHub repository (e.g., 'owner/repo'),
+        paginated like ApiService's: once page 1 names the last page, the
+        rest are fetched concurrently, otherwise "next" links are followed.
+        """
+        if not self.github_token:
+            raise ValueError("GitHub token is not set.")
+        if not repo_name:
+            raise ValueError("Repository name is required.")
+
+        url = f"{self.github_api_url}/repos/{repo_name.strip()}/branches"
+        branches, links = await self._github_page(url, {"per_page": PER_PAGE})
+        last_page = GitHubClient._page_number(links.get("last"))
+        if last_page and last_page > 1:
+            pages = await asyncio.gather(*(self._github_page(url, {"per_page": PER_PAGE, "page": page})
+                                           for page in range(2, last_page + 1)))
+            for page_items, _ in pages:
+                branches.extend(page_items)
+            return branches
+
+        next_url = links.get("next")
+        while next_url:
+            page_items, links = await self._github_page(next_url)
+            branches.extend(page_items)
+            next_url = links.get("next")
+        return branches
+
+    async def _github_page(self, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[List[Any], Dict[str, str]]:
+        """One page of a GitHub listing and its Link header as {rel: url}."""
+        status, body, _, headers = await self._request_with_headers("github", "GET", url, params=params)
+        self._raise_for_status(status, body, url)
+        links = {link["rel"]: link["url"] for link in parse_header_links(headers.get("Link", "")) if "rel" in link}
+        return list(body), links
+
+    async def trigger_gitlab_pipeline(self, project_id: str, ref: str) -> Dict[str, Any]:
+        """Triggers a new pipeline for a GitLab project on a specific ref (branch/tag)."""
+        if not self.gitlab_url or not self.gitlab_token:
+            raise ValueError("GitLab URL or token is not set.")
+        if not project_id:
+            raise ValueError("Project ID is required.")
+        if not ref:
+            raise ValueError("Branch/Ref is required.")
+
+        url = f"{self.gitlab_url}/api/v4/projects/{project_id}/pipeline"
+        status, body, _ = await self._request("gitlab", "POST", url, json={"ref": ref})
+        self._raise_for_status(status, body, url)
+        return body
+
+    async def trigger_jenkins_build(self, job_name: str) -> Dict[str, Any]:
+        """Triggers a build for a Jenkins job, reusing the cached CSRF crumb."""
+        if not self.jenkins_url or not self.jenkins_user or not self.jenkins_token:
+            raise ValueError("Jenkins URL, user, or token is not set.")
+        if not job_name:
+            raise ValueError("Job name is required.")
+
+        url = f"{self.jenkins_url}/{jenkins_job_path(job_name)}/build"
+        crumb = await self._get_jenkins_crumb()
+        status, body, headers = await self._post_with_headers(url, crumb)
+        if status == 403 or (status >= 400 and "No valid crumb" in str(body)):
+            crumb = await self._get_jenkins_crumb(force_refresh=True)
+            status, body, headers = await self._post_with_headers(url, crumb)
+
+        if status == 201:
+            return {
+                "message": f"Build successfully triggered for {job_name}.",
+                "queue_url": headers.get("Location"),
+            }
+        raise Exception(f"Failed to trigger build. Status: {status}, Text: {body}")
+
+    async def get_jenkins_build_status(self, job_name: str, build_number: str = "lastBuild") -> Dict[str, Any]:
+        """Fetches the status of a Jenkins build (defaults to the job's last build)."""
+        if not self.jenkins_url or not self.jenkins_user or not self.jenkins_token:
+            raise ValueError("Jenkins URL, user, or token is not set.")
+        if not job_name:
+            raise ValueError("Job name is required.")
+
+        url = f"{self.jenkins_url}/{jenkins_job_path(job_name)}/{build_number}/api/json"
+        status, body, _ = await self._request("jenkins", "GET", url, params={"tree": JENKINS_BUILD_TREE})
+        self._raise_for_status(status, body, url)
+        return body
+
+    async def get_gitlab_pipeline_status(self, project_id: str, pipeline_id: str) -> Dict[str, Any]:
+        """Fetches a single GitLab pipeline, including its current status."""
+        if not self.gitlab_url or not self.gitlab_token:
+            raise ValueError("GitLab URL or token is not set.")
+        if not project_id or not pipeline_id:
+            raise ValueError("Project ID and pipeline ID are required.")
+
+        url = f"{self.gitlab_url}/api/v4/projects/{project_id}/pipelines/{pipeline_id}"
+        status, body, _ = await self._request("gitlab", "GET", url)
+        self._raise_for_status(status, body, url)
+        return body
+
+    async def get_statuses(self, jenkins_builds: List[Tuple[str, str]],
+                           gitlab_pipelines: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Polls many Jenkins builds ((job, build number or "lastBuild")) and
+        GitLab pipelines ((project, pipeline)) concurrently. Returns
+        {"jenkins": {(job, build): status|exception}, "gitlab": {(project, pipeline): status|exception}}.
+        """
+        jenkins_results = await asyncio.gather(
+            *(self.get_jenkins_build_status(job, build) for job, build in jenkins_builds), return_exceptions=True
+        )
+        gitlab_results = await asyncio.gather(
+            *(self.get_gitlab_pipeline_status(p, pid) for p, pid in gitlab_pipelines), return_exceptions=True
+        )
+        return {
+            "jenkins": dict(zip(jenkins_builds, jenkins_results)),
+            "gitlab": dict(zip(gitlab_pipelines, gitlab_results)),
+        }
+
+    # --- Bulk Triggers ---
+
+    async def bulk_trigger(self, targets: List[BulkTarget]) -> List[BulkResult]:
+        """
+        Triggers every target concurrently, under per-host concurrency and
+        rate limits. All Jenkins targets share one session and one crumb,
+        as do all GitLab targets. Returns one result per target, in order;
+        a failing target never aborts the others.
+        """
+        limiters: Dict[str, HostLimiter] = {}
+
+        async def trigger(target: BulkTarget) -> BulkResult:
+            _interactive.set(True)   # Each gathered task has its own context
+            base_url = self.jenkins_url if target.backend == "jenkins" else self.gitlab_url
+            host = urlparse(base_url or "").netloc
+            limiter = limiters.setdefault(host, HostLimiter(self.bulk_concurrency, self.bulk_rate))
+            queued_at = time.perf_counter()
+            async with limiter:
+                started = time.perf_counter()
+                run_id = ""
+                try:
+                    if target.backend == "jenkins":
+                        response = await self.trigger_jenkins_build(target.name)
+                        run_id = response.get("queue_url") or ""
+                        detail = run_id or response["message"]
+                    else:
+                        response = await self.trigger_gitlab_pipeline(target.name, target.ref)
+                        run_id = str(response.get("id") or "")
+                        detail = response.get("web_url") or f"pipeline #{run_id}"
+                    ok = True
+                except Exception as e:
+                    ok, detail = False, str(e) or e.__class__.__name__
+                finished = time.perf_counter()
+            return BulkResult(target, ok, detail, (finished - started) * 1000,
+                              (started - queued_at) * 1000, run_id)
+
+        # Fetch the crumb once up front instead of racing for it
+        if any(target.backend == "jenkins" for target in targets) and self.jenkins_url:
+            await self._get_jenkins_crumb()
+        return list(await asyncio.gather(*(trigger(target) for target in targets)))
+
+    # --- Jenkins CSRF Crumbs ---
+
+    async def _post_with_headers(self, url: str, crumb: Dict[str, Any]) -> Tuple[int, str, Mapping[str, str]]:
+        """
+        POSTs to Jenkins with a crumb and returns (status, text, response headers).
+        Goes through _send like every other request, so it is paced, 429s are
+        retried after Retry-After, and connection errors are recorded.
+        """
+        status, payload, _, charset, _, headers = await self._send_write(
+            "jenkins", "POST", url, headers=crumb["header"], cookies=crumb["cookies"])
+        return status, payload.decode(charset, "replace"), headers
+
+    async def _get_jenkins_crumb(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """Returns the cached crumb for the current Jenkins URL and user."""
+        key = (self.jenkins_url, self.jenkins_user)
+        if force_refresh:
+            self._crumb_cache.pop(key, None)
+            self.crumb_stats["refreshes"] += 1
+        crumb = self._crumb_cache.get(key)
+        if crumb is not None:
+            self.crumb_stats["hits"] += 1
+            return crumb
+
+        # Concurrent triggers wait for one crumb fetch instead of each starting their own
+        if self._crumb_lock is None:
+            self._crumb_lock = asyncio.Lock()
+        async with self._crumb_lock:
+            crumb = self._crumb_cache.get(key)
+            if crumb is not None:
+                self.crumb_stats["hits"] += 1
+                return crumb
+            return await self._fetch_jenkins_crumb(key)
+
+    async def _fetch_jenkins_crumb(self, key: Tuple[str, str]) -> Dict[str, Any]:
+        self.crumb_stats["misses"] += 1
+        crumb_url = f"{self.jenkins_url}/crumbIssuer/api/json"
+        try:
+            status, body, cookies = await self._request("jenkins", "GET", crumb_url, timeout=CRUMB_TIMEOUT)
+            self._raise_for_status(status, body, crumb_url)
+            crumb = {"header": {body["crumbRequestField"]: body["crumb"]}, "cookies": cookies}
+        except Exception as e:
+            self.metrics.event("jenkins", "crumb_fallback", f"Could not get a Jenkins crumb, proceeding without it: {e}")
+            crumb = {"header": {}, "cookies": {}}
+        self._crumb_cache[key] = crumb
+        return crumb
+
+
+class AsyncLoopThread:
+    """
+    Runs an asyncio event loop on one daemon thread so that coroutines can
+    be submitted from the GUI thread or worker threads without blocking them.
+    """
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="UniCI-asyncio", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedules a coroutine on the loop and returns a thread-safe Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops the loop and waits for its thread to exit."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
@@ -0,0 +1,65 @@
+"""
+UniCI Bulk Trigger Model
+Targets and results of a bulk trigger (the same ref across many GitLab
+projects and/or many Jenkins jobs), plus the text formats used by the
+GUI: a pasted list of targets in, an aggregated result table out.
+"""
+from typing import List, NamedTuple, Optional
+
+class BulkTarget(NamedTuple):
+    backend: str            # "jenkins" or "gitlab"
+    name: str               # Jenkins job name or GitLab project ID/path
+    ref: str = ""           # GitLab branch/tag; unused for Jenkins
+
+class BulkResult(NamedTuple):
+    target: BulkTarget
+    ok: bool
+    detail: str             # Queue/pipeline URL on success, the error otherwise
+    latency_ms: float       # Time spent in the trigger request(s)
+    queued_ms: float        # Time spent waiting for the per-host limits
+    run_id: str = ""        # Jenkins queue item URL or GitLab pipeline ID, for monitoring
+
+def parse_targets(text: str, backend: str, default_ref: str = "") -> List[BulkTarget]:
+    """
+    Parses a pasted list, one target per line. Blank lines and lines
+    starting with '#' are skipped. A line may override the backend with a
+    'jenkins:' or 'gitlab:' prefix and the ref with '@ ref', e.g.
+
+        app-build
+        gitlab: group/service-a @ release-1.4
+    """
+    targets = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        line_backend = backend
+        prefix, _, rest = line.partition(":")
+        if rest and prefix.strip().lower() in ("jenkins", "gitlab"):
+            line_backend, line = prefix.strip().lower(), rest.strip()
+        name, _, ref = line.partition("@")
+        target = BulkTarget(line_backend, name.strip(), ref.strip() or default_ref)
+        if target.name and target not in targets:
+            targets.append(target)
+    return targets
+
+def format_results(results: List[BulkResult], elapsed_ms: Optional[float] = None) -> str:
+    """Fixed-width table of results, failures first."""
+    rows = sorted(results, key=lambda result: (result.ok, result.target.backend, result.target.name))
+    name_width = max([len("Target")] + [len(result.target.name) for result in rows])
+    lines = [f"{'Backend':<8} {'Target':<{name_width}} {'Ref':<16} {'Result':<6} {'Latency':>9} {'Queued':>9}  Detail"]
+    for result in rows:
+        target = result.target
+        lines.append(
+            f"{target.backend:<8} {target.name:<{name_width}} {target.ref[:16]:<16} "
+            f"{'OK' if result.ok else 'FAIL':<6} {result.latency_ms:>7.0f}ms {result.queued_ms:>7.0f}ms  {result.detail}"
+        )
+    succeeded = sum(1 for result in results if result.ok)
+    summary = f"{succeeded}/{len(results)} triggered"
+    if results:
+        latencies = sorted(result.latency_ms for result in results)
+        summary += f", latency p50 {latencies[len(latencies) // 2]:.0f} ms, max {latencies[-1]:.0f} ms"
+    if elapsed_ms is not None:
+        summary += f", {elapsed_ms:.0f} ms total"
+    lines.append(summary)
+    return "\n".join(lines)
@@ -1,55 +1,256 @@
 """
 UniCI Configuration Manager
 Handles non-sensitive configuration data (e.g., URLs, last-used values).
-Sensitive data (API tokens) is handled by keyring in settings_tab.py.
+Sensitive data (API tokens) is kept in the system keyring by the
+CredentialStore (credential_store.py), never in config.json.
+
+config.json lives in the per-user config directory (see config_dir()).
+Changes are written behind: set_setting() only updates memory and a
+debounced flush writes the file once, off the GUI thread. Every write is
+atomic (temp file, fsync, rename), so a crash never leaves a truncated
+file, and changes made to the file by another process are picked up by
+its modification time. A write that fails keeps its changes pending, so
+the next flush (at the latest, the one on exit) tries again.
 """
 import json
 import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Set
 
 CONFIG_FILE = "config.json"
+APP_DIR_NAME = "UniCI"
+CONFIG_DIR_ENV = "UNICI_CONFIG_DIR"   # Overrides the per-user directory (portable installs, tests)
+FLUSH_DELAY = 0.5                     # Seconds of quiet before pending changes are written
+MTIME_CHECK_INTERVAL = 1.0            # Seconds between checks for external edits
+
+DEFAULT_CONFIG = {
+    "jenkins_url": "",
+    "gitlab_url": "https://gitlab.com",
+    "github_repo": ""
+}
+
+def config_dir() -> str:
+    """
+    Per-user directory holding config.json; other local state files live
+    next to it. %APPDATA%\\UniCI on Windows, ~/Library/Application Support/UniCI
+    on macOS and $XDG_CONFIG_HOME/unici (default ~/.config/unici) elsewhere.
+    """
+    path = os.environ.get(CONFIG_DIR_ENV)
+    if not path:
+        if sys.platform == "win32":
+            base = os.environ.get("APPDATA") or os.path.expanduser("~\\AppData\\Roaming")
+            path = os.path.join(base, APP_DIR_NAME)
+        elif sys.platform == "darwin":
+            path = os.path.join(os.path.expanduser("~/Library/Application Support"), APP_DIR_NAME)
+        else:
+            base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+            path = os.path.join(base, APP_DIR_NAME.lower())
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def config_path() -> str:
+    return os.path.join(config_dir(), CONFIG_FILE)
+
+def write_json_atomic(path: str, data: Any):
+    """Writes JSON to a temp file in the same directory, fsyncs it and renames it over `path`."""
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def _log_to_stderr(message: str, level: str):
+    print(f"{level}: {message}", file=sys.stderr)
 
 class ConfigManager:
     """
     Manages loading and saving of non-sensitive JSON configuration.
+    Thread-safe; call close() on exit to flush pending changes.
+    `log(message, level)` reports errors and migrations; by default they go
+    to stderr, never stdout, which headless mode keeps for its JSON events.
     """
-    def __init__(self):
+    def __init__(self, path: Optional[str] = None, log: Optional[Callable[[str, str], None]] = None):
+        self.path = path or config_path()
+        self._log = log or _log_to_stderr
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._pending: Set[str] = set()      # Keys changed since the last flush
+        self._local = threading.local()      # Per-thread transaction: staged changes and depth
+        self._mtime: Optional[float] = None
+        self._last_check = time.monotonic()
+        self._migrate_legacy_config()
         self.config_data = self.load_config()
 
-    def load_config(self):
+    def load_config(self) -> Dict[str, Any]:
         """Loads config.json from disk."""
-        if not os.path.exists(CONFIG_FILE):
+        if not os.path.exists(self.path):
             # Create a default config if one doesn't exist
-            default_config = {
-                "jenkins_url": "",
-                "gitlab_url": "https://gitlab.com",
-                "github_repo": ""
-            }
+            default_config = dict(DEFAULT_CONFIG)
             self.save_config(default_config)
             return default_config
 
         try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            print(f"Error: Could not decode {CONFIG_FILE}. Reverting to default.")
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._mtime = mtime
+            return data
+        except (json.JSONDecodeError, OSError) as e:
+            self._log(f"Could not read {self.path}: {e}. Reverting to default.", "ERROR")
             return {} # Return empty dict to avoid crash, will be repopulated
 
-    def save_config(self, data=None):
-        """Saves the current config data to config.json."""
-        if data is None:
-            data = self.config_data
+    def save_config(self, data: Optional[Dict[str, Any]] = None):
+        """Atomically writes the config (or `data`) to disk right away."""
+        with self._write_lock:
+            with self._lock:
+                if data is None:
+                    data = dict(self.config_data)
+                written = self._pending
+                self._pending = set()
+            try:
+                write_json_atomic(self.path, data)
+                self._mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                # Keep the changes pending; the next flush (or close()) writes them
+                with self._lock:
+                    self._pending |= written
+                self._log(f"Could not write to {self.path}: {e}", "ERROR")
+
+    def get_setting(self, key: str, default=None):
+        """Gets a specific setting from the config."""
+        staged = getattr(self._local, "staged", None)
+        if staged is not None and key in staged:
+            return staged[key]
+        self.reload_if_changed()
+        with self._lock:
+            return self.config_data.get(key, default)
 
+    def set_setting(self, key: str, value):
+        """Sets a specific setting; it is written to disk by the next flush."""
+        staged = getattr(self._local, "staged", None)
+        if staged is not None:
+            staged[key] = value   # Applied when the transaction ends
+            return
+        with self._lock:
+            self._apply({key: value})
+
+    @contextmanager
+    def transaction(self) -> Iterator["ConfigManager"]:
+        """
+        Groups several set_setting() calls so they land in the same write.
+        Changes are staged on the calling thread (where get_setting() sees
+        them) and applied together when the block ends, so other threads
+        never wait for the block; if it raises, they are discarded.
+        """
+        outer = getattr(self._local, "staged", None)
+        staged = dict(outer) if outer is not None else {}
+        self._local.staged = staged
         try:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4)
-        except IOError as e:
-            print(f"Error: Could not write to {CONFIG_FILE}: {e}")
+            yield self
+        except BaseException:
+            self._local.staged = outer
+            raise
+        if outer is not None:
+            # Nested: the outermost transaction applies everything
+            outer.update(staged)
+            self._local.staged = outer
+            return
+        self._local.staged = None
+        with self._lock:
+            self._apply(staged)
 
-    def get_setting(self, key, default=None):
-        """Gets a specific setting from the config."""
-        return self.config_data.get(key, default)
+    def flush(self):
+        """Writes pending changes now, merged over any external edits."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            self._merge_external_changes()
+        self.save_config()
+
+    def reload_if_changed(self):
+        """Picks up edits made to config.json by another process, at most once per MTIME_CHECK_INTERVAL."""
+        now = time.monotonic()
+        if now - self._last_check < MTIME_CHECK_INTERVAL:
+            return
+        self._last_check = now
+        with self._lock:
+            self._merge_external_changes()
+
+    def close(self):
+        """Flushes pending changes; called on exit."""
+        self.flush()
+
+    # --- Internals ---
+
+    def _apply(self, changes: Dict[str, Any]):
+        """Stores changed values and schedules a flush. Caller must hold the lock."""
+        changed = [key for key, value in changes.items()
+                   if key not in self.config_data or self.config_data[key] != value]
+        if not changed:
+            return
+        for key in changed:
+            self.config_data[key] = changes[key]
+        self._pending.update(changed)
+        self._schedule_flush()
 
-    def set_setting(self, key, value):
-        """Sets a specific setting and saves to disk."""
-        self.config_data[key] = value
-        self.save_config()
\ No newline at end of file
+    def _schedule_flush(self):
+        """(Re)starts the debounce timer. Caller must hold the lock."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(FLUSH_DELAY, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _merge_external_changes(self):
+        """Reloads the file if its mtime moved; our unflushed keys win. Caller must hold the lock."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                external = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return  # Half-written by a non-atomic editor; try again later
+        self._mtime = mtime
+        for key in self._pending:
+            external[key] = self.config_data.get(key)
+        self.config_data = external
+
+    def _migrate_legacy_config(self):
+        """Older versions kept config.json in the working directory; copy it over once."""
+        legacy_path = os.path.abspath(CONFIG_FILE)
+        if os.path.exists(self.path) or not os.path.exists(legacy_path) or legacy_path == os.path.abspath(self.path):
+            return
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                write_json_atomic(self.path, json.load(f))
+            self._log(f"Migrated {legacy_path} to {self.path}", "INFO")
+        except (json.JSONDecodeError, OSError) as e:
+            self._log(f"Could not migrate {legacy_path}: {e}", "ERROR")
@@ -5,62 +5,407 @@ Manages application logic, state, and threading.
 Connects the View (App) to the Service (ApiService).
 """
 
-import threading
+import os
 import queue
-from typing import Dict, Any, Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional, Tuple
+from app.config_manager import ConfigManager, config_dir
+from app.credential_store import CredentialError, CredentialStore
+from app.response_cache import CACHE_FILE, ResponseCache
 from app.service import ApiService  # Import from our package
+from app.scheduler import JobScheduler, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from app.monitor import (BuildMonitor, GitLabPipelineWatch, GitLabTraceWatch, JenkinsBuildWatch,
+                         JenkinsLogWatch, Watch, WatchStatus, gitlab_pipeline_status, jenkins_build_status)
+from app.jenkins_index import JobIndex
+from app.log_buffer import ChunkedLogBuffer
+from app.metrics import Metrics, MetricsServer, Tracer, callable_name
+from app.pr_inbox import PullRequestInbox, parse_sources
+from app.bulk import BulkResult, BulkTarget, format_results
+from app.startup_profile import PROFILE
+from app.workflow import WorkflowRunner, list_workflows, load_workflow
+
+if TYPE_CHECKING:
+    from app.async_service import AsyncApiService, AsyncLoopThread
+    from app.webhooks import WebhookServer
+
+# Keyring service names used for API tokens
+JENKINS_CREDENTIAL = "UniCI_Jenkins"        # username = Jenkins user
+GITHUB_CREDENTIAL = ("UniCI_GitHub", "github_token")
+GITLAB_CREDENTIAL = ("UniCI_GitLab", "gitlab_token")
+WEBHOOK_CREDENTIAL = ("UniCI_Webhooks", "webhook_secret")  # Shared by all three backends' hooks
+CREDENTIAL_LOAD_TIMEOUT = 30.0              # Seconds a worker waits for the startup keyring load
+MAX_REPLAYED_STATUSES = 50                  # Per backend, for tabs built after a watch started
+FINISHED_STATUSES_RESOURCE = "finished_statuses"  # Response cache entry per backend, painted at startup
+WORKFLOWS_DIR = "workflows"                 # Under the config dir; holds .yaml/.json workflow files
+CHECKPOINTS_DIR = ".checkpoints"            # Under WORKFLOWS_DIR
+WEBHOOK_LATENCY_SAMPLES = 200               # Event arrival -> GUI update latencies kept for stats
 
 class AppController:
     """
     Acts as the intermediary between the GUI (View) and the API (Service).
     Handles user actions from the GUI and dispatches them to the ApiService
-    in background threads.
+    on a bounded pool of background threads.
+
+    Requests, jobs and GUI updates are recorded in `metrics`; with a
+    trace_path they are also traced to that file on shutdown.
     """
-    def __init__(self, gui_queue: queue.Queue):
-        self.api_service = ApiService()
+    def __init__(self, gui_queue: queue.Queue, trace_path: Optional[str] = None):
         self.gui_queue = gui_queue  # Thread-safe queue to log to the GUI
+        PROFILE.begin("config load")
+        self.config_manager = ConfigManager(log=self.log_to_gui)
+        PROFILE.end("config load")
+        self.metrics = Metrics(Tracer(trace_path) if trace_path else None)
+        self.metrics.on_event = self._on_metrics_event
+        self.api_service = ApiService(self.metrics)
+        self.response_cache = ResponseCache(os.path.join(config_dir(), CACHE_FILE))
+        self.api_service.attach_cache(self.response_cache)
+        # Open PRs of every repository the GitHub tab follows, indexed in memory
+        self.pr_inbox = PullRequestInbox(self.response_cache)
+        # Every Jenkins job (folders included), for autocomplete and name resolution
+        self.jenkins_jobs = JobIndex(self.response_cache)
+        # Background jobs wait in the queue while their backend's host is being paced
+        self.scheduler = JobScheduler(on_change=self.notify_gui, on_job_done=self.metrics.observe_job,
+                                      admission=self.api_service.background_delay)
+
+        # Follows triggered builds/pipelines; polls run as background jobs
+        self.monitor = BuildMonitor(self.api_service, self._submit_monitor_poll, self._on_watch_transition)
+        self._status_listeners: Dict[str, List[Callable]] = {}
+        # Watch key -> what get_statuses needs to re-read it, for "Refresh All"
+        self._status_targets: Dict[str, Tuple[str, str]] = {}
+        # Final statuses of watches, kept across sessions so the tabs don't start empty
+        self._finished_statuses = self._load_finished_statuses()
+        self._finished_lock = threading.Lock()
+        # Latest status per watch, replayed to tabs that are built later
+        self._last_statuses: Dict[str, Dict[str, Tuple[str, str, str]]] = {
+            backend: dict(statuses) for backend, statuses in self._finished_statuses.items()
+        }
+        # Callers blocked on a watch's final status, by watch key
+        self._watch_waiters: Dict[str, List[Tuple[Future, Optional[Callable[[Watch, WatchStatus], None]]]]] = {}
+        self._waiters_lock = threading.Lock()
+
+        # The async service and its event loop thread are only started, on a
+        # worker, the first time a high fan-out operation needs them.
+        self.async_service: Optional["AsyncApiService"] = None
+        self._async_loop: Optional["AsyncLoopThread"] = None
+        self._async_lock = threading.Lock()
+        self._api_config: Dict[str, str] = {}
+
+        # Secrets are read from the keyring once, off the GUI thread
+        self.credentials = CredentialStore()
+        self._credential_listeners: Optional[List[Callable[[], None]]] = []  # None once loaded
+        self._credential_lock = threading.Lock()
+
+        # Workflow runs in progress, by workflow file name
+        self._workflow_runs: Dict[str, WorkflowRunner] = {}
+
+        # Optional webhook listener, started by load_api_config when enabled
+        self._webhook_server: Optional["WebhookServer"] = None
+        self._webhook_lock = threading.Lock()
+        self._webhook_events = 0
+        self._webhook_latencies: deque = deque(maxlen=WEBHOOK_LATENCY_SAMPLES)
 
-    def log_to_gui(self, message: str):
+        # Optional Prometheus endpoint, started by load_api_config when metrics_port is set
+        self._metrics_server: Optional[MetricsServer] = None
+        self._metrics_lock = threading.Lock()
+        self.trace_saved_to: Optional[str] = None
+        self.run_in_thread(self._load_credentials_worker)
+
+    def log_to_gui(self, message: str, level: str = "INFO"):
         """Safely puts a log message into the GUI's update queue."""
-        self.gui_queue.put(message)
+        self.gui_queue.put((message, level))
+
+    def run_on_gui(self, func: Callable, *args):
+        """Queues func(*args) to be called on the main GUI thread."""
+        self.gui_queue.put(partial(func, *args))
+
+    def notify_gui(self):
+        """Wakes the GUI so it can refresh job metrics, if the queue supports it."""
+        notify = getattr(self.gui_queue, "notify", None)
+        if notify is not None:
+            notify()
+
+    def run_in_thread(self, target_func, *args, backend: Optional[str] = None,
+                      priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> Future:
+        """
+        Helper function to run a given function on the scheduler's worker pool.
+        This prevents the GUI from freezing during network requests while
+        keeping the number of threads hitting each backend bounded.
+        """
+        return self.scheduler.submit(target_func, args, backend=backend, priority=priority, timeout=timeout)
+
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """Queue depth, running jobs and wait times, for display in the GUI."""
+        return self.scheduler.stats()
+
+    def shutdown(self, timeout: Optional[float] = 5.0):
+        """
+        Called by the GUI on exit. Drops work that hasn't started yet, waits
+        for running jobs to finish and closes pooled connections.
+        """
+        for runner in list(self._workflow_runs.values()):
+            runner.cancel()  # Their checkpoints stay, so they can be resumed
+        self.monitor.stop()
+        with self._webhook_lock:
+            if self._webhook_server is not None:
+                self._webhook_server.stop()
+                self._webhook_server = None
+        with self._metrics_lock:
+            if self._metrics_server is not None:
+                self._metrics_server.stop()
+                self._metrics_server = None
+        self.scheduler.shutdown(wait=True, cancel_pending=True, timeout=timeout)
+        self.api_service.close()
+        self.response_cache.close()
+        self.config_manager.close()
+        try:
+            if self._async_loop is not None:
+                try:
+                    self._async_loop.submit(self.async_service.close()).result(timeout)
+                finally:
+                    self._async_loop.stop(timeout)
+        finally:
+            if self.metrics.tracer is not None:
+                self.trace_saved_to = self.metrics.tracer.save()
 
-    def run_in_thread(self, target_func, *args):
+    def run_async(self, coro_factory, *args) -> Future:
         """
-        Helper function to run a given function in a daemon thread.
-        This prevents the GUI from freezing during network requests.
+        Runs coro_factory(async_service, *args) on the asyncio loop thread.
+        The returned Future is thread-safe; results should be passed back to
+        the GUI through the queue, never by touching widgets directly.
         """
-        thread = threading.Thread(target=target_func, args=args, daemon=True)
-        thread.start()
+        if self._async_loop is not None:
+            return self._async_loop.submit(coro_factory(self.async_service, *args))
+        # aiohttp is slow to import, so the loop is started on a worker and the
+        # job is handed to it from there; the caller (often the GUI) never waits.
+        future: Future = Future()
+
+        def relay(done: Future):
+            if done.cancelled():
+                future.cancel()
+            elif done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(done.result())
+
+        def start_and_submit():
+            try:
+                loop = self._start_async()
+                loop.submit(coro_factory(self.async_service, *args)).add_done_callback(relay)
+            except Exception as e:
+                future.set_exception(e)
+
+        # Dropped at shutdown before it ran: nothing else would settle the future
+        self.run_in_thread(start_and_submit).add_done_callback(lambda job: job.cancelled() and future.cancel())
+        return future
+
+    def _start_async(self) -> "AsyncLoopThread":
+        """Imports aiohttp and starts the loop thread and async service, once. Call from a worker."""
+        with self._async_lock:
+            if self._async_loop is None:
+                from app.async_service import AsyncApiService, AsyncLoopThread
+                loop = AsyncLoopThread()
+                self.async_service = AsyncApiService(self.metrics, self.api_service.governor,
+                                                     self.api_service.coalescer)
+                # Scheduled before any job, and the loop runs coroutines in order
+                loop.submit(self.async_service.update_config(self._api_config))
+                self._async_loop = loop
+            return self._async_loop
 
     def update_api_config(self, config_data: Dict[str, str]):
         """Public method called by the GUI to update config."""
         try:
-            self.api_service.update_config(config_data)
+            self._apply_api_config(config_data)
             self.log_to_gui("Configuration saved successfully.")
         except Exception as e:
             self.log_to_gui(f"Error saving config: {e}")
 
+    def handle_reload_api_config(self):
+        """Public method called by GUI. Reloads saved config/tokens into the service in the background."""
+        self.run_in_thread(self.load_api_config)
+
+    def load_api_config(self, overrides: Optional[Dict[str, str]] = None):
+        """
+        Builds the service configuration from config.json and the keyring.
+        Called at startup and after the Settings tab saves. `overrides`
+        (e.g. tokens from the environment in headless mode) win over both.
+        """
+        try:
+            jenkins_user = self.get_config_setting("jenkins_user", "")
+            config_data = {key: value for key, value in self.config_manager.config_data.items()
+                           if isinstance(value, (str, int, float))}
+            config_data["jenkins_token"] = self.get_credential(JENKINS_CREDENTIAL, jenkins_user) if jenkins_user else None
+            config_data["github_token"] = self.get_credential(*GITHUB_CREDENTIAL)
+            config_data["gitlab_token"] = self.get_credential(*GITLAB_CREDENTIAL)
+            config_data["webhook_secret"] = self.get_credential(*WEBHOOK_CREDENTIAL)
+            config_data.update({key: value for key, value in (overrides or {}).items() if value})
+            self._configure_webhooks(config_data.pop("webhook_secret", None))
+            self._configure_metrics_endpoint()
+            self._apply_api_config(config_data)
+        except Exception as e:
+            self.log_to_gui(f"Error loading config: {e}", "ERROR")
+
+    def _apply_api_config(self, config_data: Dict[str, str]):
+        """Pushes configuration to both the threaded and async services."""
+        self.api_service.update_config(config_data)
+        with self._async_lock:
+            self._api_config = dict(config_data)
+            if self._async_loop is not None:
+                self._async_loop.submit(self.async_service.update_config(self._api_config))
+
+    # --- Config and Credentials ---
+
+    def get_config_setting(self, key: str, default=None):
+        """Reads a non-sensitive setting from config.json."""
+        return self.config_manager.get_setting(key, default)
+
+    def set_config_setting(self, key: str, value):
+        """Writes a non-sensitive setting to config.json (debounced, off the GUI thread)."""
+        self.config_manager.set_setting(key, value)
+
+    def config_transaction(self):
+        """Context manager: settings changed inside it are saved together."""
+        return self.config_manager.transaction()
+
+    def _load_credentials_worker(self):
+        """Loads all UniCI secrets into the credential cache, then notifies listeners."""
+        entries = [GITHUB_CREDENTIAL, GITLAB_CREDENTIAL, WEBHOOK_CREDENTIAL]
+        jenkins_user = self.get_config_setting("jenkins_user", "")
+        if jenkins_user:
+            entries.insert(0, (JENKINS_CREDENTIAL, jenkins_user))
+        start = time.perf_counter()
+        try:
+            self.credentials.load(entries)
+            PROFILE.record("keyring (background)", start, time.perf_counter())
+            for error in self.credentials.errors:
+                self.log_to_gui(f"Keyring Error: {error}", "ERROR")
+        finally:
+            # Listeners are told even if loading blew up, so nothing waits forever
+            with self._credential_lock:
+                listeners, self._credential_listeners = self._credential_listeners, None
+            for callback in listeners:
+                self.run_on_gui(callback)
+
+    def when_credentials_loaded(self, callback: Callable[[], None]):
+        """
+        Calls callback() on the GUI thread once the startup keyring load has
+        finished (right away if it already has). Must be called on the GUI thread.
+        """
+        with self._credential_lock:
+            if self._credential_listeners is not None:
+                self._credential_listeners.append(callback)
+                return
+        callback()
+
+    def has_credential(self, service_name: str, username: str) -> bool:
+        """True if a secret is stored for the entry. Served from memory; safe on the GUI thread."""
+        return self.credentials.has(service_name, username)
+
+    def get_credential(self, service_name: str, username: str) -> Optional[str]:
+        """
+        Reads a secret through the credential cache. Returns None if unavailable.
+        Waits for the startup load, so only call it from worker threads.
+        """
+        self.credentials.wait_loaded(CREDENTIAL_LOAD_TIMEOUT)
+        try:
+            return self.credentials.get(service_name, username)
+        except CredentialError as e:
+            self.log_to_gui(f"Keyring Error: {e}", "ERROR")
+            return None
+
+    def set_credential(self, service_name: str, username: str, secret: str):
+        """Caches a secret right away and writes it through to the OS keyring in the background."""
+        self.credentials.set(service_name, username, secret)
+        self.run_in_thread(self._write_credential_worker, service_name, username, secret)
+
+    def _write_credential_worker(self, service_name: str, username: str, secret: str):
+        try:
+            self.credentials.write(service_name, username, secret)
+        except CredentialError as e:
+            self.log_to_gui(f"Keyring Error: could not save {service_name}: {e}", "ERROR")
+
     # --- Jenkins Handlers ---
 
     def handle_jenkins_build(self, job_name: str):
-        """Public method called by GUI. Runs the worker in a thread."""
+        """Public method called by GUI. Runs the worker on the scheduler."""
+        job_name = self.resolve_jenkins_job(job_name)
         self.log_to_gui(f"Attempting to trigger Jenkins job: {job_name}...")
-        self.run_in_thread(self._jenkins_build_worker, job_name)
+        self.run_in_thread(self._jenkins_build_worker, job_name, backend="jenkins")
 
     def _jenkins_build_worker(self, job_name: str):
         """Worker function that runs in a thread."""
         try:
-            result_message = self.api_service.trigger_jenkins_build(job_name)
-            self.log_to_gui(f"Jenkins Success: {result_message}")
+            result = self.api_service.trigger_jenkins_build(job_name)
+            self.log_to_gui(f"Jenkins Success: {result['message']}")
+            if result.get("queue_url"):
+                self.monitor.watch(JenkinsBuildWatch(job_name, result["queue_url"]))
         except Exception as e:
             self.log_to_gui(f"Jenkins Error: {e}")
 
+    def handle_jenkins_trigger(self, job_name: str):
+        """Called by the Jenkins tab."""
+        self.handle_jenkins_build(job_name)
+
+    # --- Jenkins Job Index ---
+
+    def handle_jenkins_refresh_jobs(self, on_done: Optional[Callable[[bool], None]] = None, force: bool = False):
+        """
+        Public method called by GUI. Re-crawls the Jenkins job tree in the
+        background (only stale folders, unless force) and calls on_done(ok)
+        on the GUI thread.
+        """
+        self.run_in_thread(self._jenkins_refresh_jobs_worker, on_done, force, backend="jenkins",
+                           priority=PRIORITY_BACKGROUND)
+
+    def _jenkins_refresh_jobs_worker(self, on_done: Optional[Callable], force: bool):
+        """Worker function that runs in a thread."""
+        # A crawl already running will deliver the same result
+        if not self.jenkins_jobs.refresh_lock.acquire(blocking=False):
+            return
+        ok = False
+        try:
+            started = time.perf_counter()
+            stats = self.jenkins_jobs.refresh(self.api_service.jenkins_url, self.api_service.get_jenkins_folder,
+                                              force=force)
+            self.log_to_gui(f"Jenkins Success: Indexed {len(self.jenkins_jobs)} jobs in "
+                            f"{(time.perf_counter() - started) * 1000:.0f} ms ({stats['listed']} folders listed, "
+                            f"{stats['reused']} reused, {stats['failed']} failed).")
+            ok = True
+        except Exception as e:
+            self.log_to_gui(f"Jenkins Error: could not index jobs: {e}", "ERROR")
+        finally:
+            self.jenkins_jobs.refresh_lock.release()
+        if on_done is not None:
+            self.run_on_gui(on_done, ok)
+
+    def load_cached_jenkins_jobs(self) -> bool:
+        """Restores the last job index of the configured Jenkins. Safe to call on the GUI thread."""
+        try:
+            return self.jenkins_jobs.load(self.get_config_setting("jenkins_url", "").rstrip("/"))
+        except Exception:
+            return False
+
+    def search_jenkins_jobs(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Prefix/fuzzy job search for autocomplete. Safe to call on the GUI thread."""
+        return self.jenkins_jobs.search(query, limit)
+
+    def get_jenkins_index_info(self) -> Dict[str, Any]:
+        """Size and age of the job index, for display in the GUI."""
+        return {"jobs": len(self.jenkins_jobs), "refreshed_at": self.jenkins_jobs.refreshed_at}
+
+    def resolve_jenkins_job(self, job_name: str) -> str:
+        """The full folder path of a job typed by its own name, if the index knows exactly one."""
+        return self.jenkins_jobs.resolve(job_name)
+
     # --- GitHub Handlers ---
 
     def handle_github_list_branches(self, repo_name: str):
         """Public method called by GUI."""
         self.log_to_gui(f"Attempting to fetch branches for: {repo_name}...")
-        self.run_in_thread(self._github_list_branches_worker, repo_name)
+        self.run_in_thread(self._github_list_branches_worker, repo_name, backend="github")
 
     def _github_list_branches_worker(self, repo_name: str):
         """Worker function that runs in a thread."""
@@ -72,12 +417,98 @@ class AppController:
         except Exception as e:
             self.log_to_gui(f"GitHub Error: {e}")
 
+    def handle_github_approve_pr(self, pr_data: Dict[str, Any]):
+        """Public method called by GUI."""
+        repo_name = pr_data["base"]["repo"]["full_name"]
+        self.log_to_gui(f"Approving PR #{pr_data['number']} in {repo_name}...")
+        self.run_in_thread(self._github_approve_pr_worker, repo_name, pr_data["number"], backend="github")
+
+    def _github_approve_pr_worker(self, repo_name: str, pr_number: int):
+        """Worker function that runs in a thread."""
+        try:
+            self.api_service.approve_github_pull_request(repo_name, pr_number)
+            self.log_to_gui(f"GitHub Success: Approved PR #{pr_number}.", "SUCCESS")
+        except Exception as e:
+            self.log_to_gui(f"GitHub Error: {e}", "ERROR")
+
+    # --- Pull Request Inbox ---
+
+    def handle_github_sync_inbox(self, sources: str, on_result: Callable[[bool], None]):
+        """
+        Public method called by GUI. Syncs the open PRs of every repository
+        in `sources` (see parse_sources) into the inbox index, fetching only
+        what changed since the last sync. on_result(ok) runs on the GUI thread.
+        """
+        self.set_config_setting("github_repo", sources)
+        self.log_to_gui(f"Syncing pull requests for: {sources}...")
+        self.run_in_thread(self._github_sync_inbox_worker, sources, on_result, backend="github")
+
+    def _github_sync_inbox_worker(self, sources: str, on_result: Callable):
+        """Worker function that runs in a thread."""
+        try:
+            base_url = self.api_service.github.base_url
+            with self.pr_inbox.sync_lock:
+                repos, owners = parse_sources(sources)
+                for owner in owners:
+                    repos.extend(self.api_service.get_github_owner_repos(owner))
+                repos = list(dict.fromkeys(repos))
+                self.pr_inbox.set_repos(base_url, sources, repos)
+                updates = self.api_service.sync_github_pull_requests(dict(self.pr_inbox.cursors))
+                changed = 0
+                for repo, update in updates.items():
+                    if "error" in update:
+                        self.log_to_gui(f"GitHub Warning: {update['error']}", "WARN")
+                        continue
+                    changed += self.pr_inbox.apply(base_url, repo, update)
+            self.log_to_gui(f"GitHub Success: Synced {len(repos)} repositories, {changed} pull requests changed, "
+                            f"{len(self.pr_inbox.index)} open.")
+            self.run_on_gui(on_result, True)
+        except Exception as e:
+            self.log_to_gui(f"GitHub Error: {e}", "ERROR")
+            self.run_on_gui(on_result, False)
+
+    def load_cached_inbox(self, sources: str) -> bool:
+        """Restores the inbox of `sources` from the local cache. Safe to call on the GUI thread."""
+        # Never block the GUI behind a running sync; it will deliver fresher data anyway
+        if not self.pr_inbox.sync_lock.acquire(blocking=False):
+            return False
+        try:
+            return self.pr_inbox.load(self.api_service.github.base_url, sources)
+        except Exception:
+            return False
+        finally:
+            self.pr_inbox.sync_lock.release()
+
+    def query_pull_requests(self, **filters) -> List[Dict[str, Any]]:
+        """Filters and sorts the inbox in memory (see PullRequestIndex.query). Safe to call on the GUI thread."""
+        return self.pr_inbox.index.query(**filters)
+
+    def get_inbox_facet(self, name: str) -> List[str]:
+        """Distinct repos, authors, base branches or review decisions in the inbox."""
+        return self.pr_inbox.index.facet(name)
+
+    def get_inbox_count(self) -> int:
+        """Open PRs in the inbox, before filtering."""
+        return len(self.pr_inbox.index)
+
+    def get_inbox_repos(self) -> List[str]:
+        """The repositories the inbox currently follows."""
+        return list(self.pr_inbox.repos)
+
+    def get_github_rate_limit(self) -> Dict[str, Optional[int]]:
+        """Remaining GitHub API budget, for display in the GUI."""
+        return self.api_service.get_github_rate_limit()
+
+    def get_github_graphql_rate_limit(self) -> Dict[str, Optional[int]]:
+        """Remaining GraphQL point budget and the last query's cost, for display in the GUI."""
+        return self.api_service.get_github_graphql_rate_limit()
+
     # --- GitLab Handlers ---
 
     def handle_gitlab_trigger_pipeline(self, project_id: str, ref: str):
         """Public method called by GUI."""
         self.log_to_gui(f"Attempting to trigger pipeline for project {project_id} on ref {ref}...")
-        self.run_in_thread(self._gitlab_trigger_pipeline_worker, project_id, ref)
+        self.run_in_thread(self._gitlab_trigger_pipeline_worker, project_id, ref, backend="gitlab")
 
     def _gitlab_trigger_pipeline_worker(self, project_id: str, ref: str):
         """Worker function that runs in a thread."""
@@ -86,5 +517,414 @@ class AppController:
             self.log_to_gui(f"GitLab Success: Pipeline created.")
             self.log_to_gui(f"  ID: {response.get('id')}, Status: {response.get('status')}")
             self.log_to_gui(f"  Web URL: {response.get('web_url')}")
+            if response.get("id"):
+                self.monitor.watch(GitLabPipelineWatch(project_id, str(response["id"])))
         except Exception as e:
-            self.log_to_gui(f"GitLab Error: {e}")
\ No newline at end of file
+            self.log_to_gui(f"GitLab Error: {e}")
+
+    def handle_gitlab_trigger(self, project_id: str, ref: str):
+        """Called by the GitLab tab."""
+        self.handle_gitlab_trigger_pipeline(project_id, ref)
+
+    # --- Bulk Triggers ---
+
+    def handle_bulk_trigger(self, targets: List[BulkTarget],
+                            on_done: Optional[Callable[[List[BulkResult], str], None]] = None,
+                            monitor: bool = True) -> Optional[Future]:
+        """
+        Triggers many Jenkins jobs and/or GitLab pipelines at once on the
+        async service. on_done(results, table) is called on the GUI thread
+        with the aggregated result table. Triggered runs are monitored.
+        """
+        if not targets:
+            self.log_to_gui("Bulk Trigger: no targets given.", "WARN")
+            return None
+        targets = [target._replace(name=self.resolve_jenkins_job(target.name)) if target.backend == "jenkins"
+                   else target for target in targets]
+        self.log_to_gui(f"Bulk triggering {len(targets)} targets...")
+        started = time.perf_counter()
+        future = self.run_async(lambda service: service.bulk_trigger(targets))
+        future.add_done_callback(partial(self._bulk_trigger_done, started, on_done, monitor))
+        return future
+
+    def _bulk_trigger_done(self, started: float, on_done, monitor: bool, future: Future):
+        """Runs on the asyncio thread; only talks to the GUI through the queue."""
+        try:
+            results = future.result()
+        except Exception as e:
+            self.log_to_gui(f"Bulk Trigger Error: {e}", "ERROR")
+            if on_done is not None:
+                self.run_on_gui(on_done, [], f"Bulk Trigger Error: {e}")
+            return
+
+        table = format_results(results, (time.perf_counter() - started) * 1000)
+        failed = sum(1 for result in results if not result.ok)
+        self.log_to_gui(f"Bulk trigger finished:\n{table}", "ERROR" if failed else "SUCCESS")
+        if monitor:
+            for result in results:
+                if result.ok and result.run_id:
+                    if result.target.backend == "jenkins":
+                        self.monitor.watch(JenkinsBuildWatch(result.target.name, result.run_id))
+                    else:
+                        self.monitor.watch(GitLabPipelineWatch(result.target.name, result.run_id))
+        if on_done is not None:
+            self.run_on_gui(on_done, results, table)
+
+    # --- Build Monitoring ---
+
+    def add_status_listener(self, backend: str, callback: Callable[[str, str, str, str], None]):
+        """
+        Registers callback(key, label, state, detail) for status transitions
+        of a backend's watches. It is always called on the GUI thread.
+        Statuses reported before registration are replayed right away.
+        """
+        self._status_listeners.setdefault(backend, []).append(callback)
+        for key, (label, state, detail) in list(self._last_statuses.get(backend, {}).items()):
+            callback(key, label, state, detail)
+
+    def _submit_monitor_poll(self, poll: Callable, backend: str) -> Future:
+        """Monitor polls are background work and yield to interactive actions."""
+        return self.scheduler.submit(poll, backend=backend, priority=PRIORITY_BACKGROUND)
+
+    def _on_watch_transition(self, watch: Watch, status: WatchStatus):
+        """Reports a status change to the console and the backend's tab."""
+        target = watch.status_target()
+        if target is not None:
+            self._status_targets[watch.key] = target
+        self._report_status(watch.backend, watch.key, watch.label, status)
+
+        with self._waiters_lock:
+            waiters = self._watch_waiters.pop(watch.key, []) if status.done else self._watch_waiters.get(watch.key, [])
+        for future, on_status in list(waiters):
+            if on_status is not None:
+                on_status(watch, status)
+            if status.done and not future.done():
+                future.set_result(status)
+
+    def _report_status(self, backend: str, key: str, label: str, status: WatchStatus):
+        """Logs a status and passes it to the backend's listeners (polled or pushed alike)."""
+        level = {"Success": "SUCCESS", "Failed": "ERROR", "Monitor Error": "ERROR"}.get(status.state, "INFO")
+        detail = f"  {status.detail}" if status.detail else ""
+        self.log_to_gui(f"{backend.title()} {label}: {status.state}{detail}", level)
+        statuses = self._last_statuses.setdefault(backend, {})
+        statuses[key] = (label, status.state, status.detail)
+        if len(statuses) > MAX_REPLAYED_STATUSES:
+            oldest = next(iter(statuses))
+            statuses.pop(oldest)
+            self._forget_target(backend, oldest)
+        for callback in self._status_listeners.get(backend, []):
+            self.run_on_gui(callback, key, label, status.state, status.detail)
+        if status.done:
+            self._save_finished_status(backend, key, (label, status.state, status.detail))
+        if status.received_at is not None:
+            # Queued after the listeners, so it runs once the GUI has shown the update
+            self.run_on_gui(self._record_webhook_latency, status.received_at)
+
+    def _load_finished_statuses(self) -> Dict[str, Dict[str, Tuple[str, str, str]]]:
+        """Final statuses saved by earlier sessions, oldest first, by backend."""
+        finished = {}
+        for backend in ("jenkins", "gitlab"):
+            entry = self.response_cache.get(backend, FINISHED_STATUSES_RESOURCE, backend)
+            if entry is not None:
+                finished[backend] = {row[0]: tuple(row[1:4]) for row in entry["body"]}
+                self._status_targets.update((row[0], tuple(row[4])) for row in entry["body"]
+                                            if len(row) > 4 and row[4])
+        return finished
+
+    def _save_finished_status(self, backend: str, key: str, status: Tuple[str, str, str]):
+        """Persists a watch's final (label, state, detail) for the next launch. Runs on workers."""
+        with self._finished_lock:
+            finished = self._finished_statuses.setdefault(backend, {})
+            finished.pop(key, None)   # Re-inserted last, so the dict stays oldest first
+            finished[key] = status
+            while len(finished) > MAX_REPLAYED_STATUSES:
+                oldest = next(iter(finished))
+                finished.pop(oldest)
+                self._forget_target(backend, oldest)
+            rows = [[key, *status, self._status_targets.get(key)] for key, status in finished.items()]
+        self.response_cache.put(backend, FINISHED_STATUSES_RESOURCE, backend, rows)
+
+    def _forget_target(self, backend: str, key: str):
+        """Drops a watch's refresh target once neither the tab nor the saved statuses show it."""
+        if key not in self._last_statuses.get(backend, {}) and key not in self._finished_statuses.get(backend, {}):
+            self._status_targets.pop(key, None)
+
+    def wait_for_watch(self, watch: Watch,
+                       on_status: Optional[Callable[[Watch, WatchStatus], None]] = None) -> Future:
+        """
+        Follows a watch until it is done and returns a Future for its final
+        WatchStatus. A watch with the same key that is already being
+        followed is reused instead of polling twice. on_status(watch,
+        status) is called from a worker thread on every transition.
+        """
+        future: Future = Future()
+        with self._waiters_lock:
+            self._watch_waiters.setdefault(watch.key, []).append((future, on_status))
+        # Registered first, so a watch that finishes right now still resolves the future
+        if not any(active.key == watch.key for active in self.monitor.active_watches()):
+            self.monitor.watch(watch)
+        return future
+
+    # --- Webhooks ---
+
+    def _configure_webhooks(self, secret: Optional[str]):
+        """Starts, stops or re-keys the webhook listener to match the settings."""
+        from app.webhooks import DEFAULT_WEBHOOK_BIND, DEFAULT_WEBHOOK_PORT, WebhookServer
+        enabled = bool(self.get_config_setting("webhook_enabled", False))
+        bind = self.get_config_setting("webhook_bind", DEFAULT_WEBHOOK_BIND)
+        port = int(self.get_config_setting("webhook_port", DEFAULT_WEBHOOK_PORT))
+        with self._webhook_lock:
+            server = self._webhook_server
+            if server is not None and (not enabled or (server.bind, server.requested_port) != (bind, port)):
+                server.stop()
+                server = self._webhook_server = None
+            if not enabled:
+                return
+            if not secret:
+                self.log_to_gui("Webhooks are enabled but no webhook secret is set; not listening.", "WARN")
+                return
+            if server is not None:
+                server.secret = secret
+                return
+            try:
+                self._webhook_server = WebhookServer(bind, port, secret, self._on_webhook_event)
+            except OSError as e:
+                self.log_to_gui(f"Webhook Error: cannot listen on {bind}:{port}: {e}", "ERROR")
+                return
+        self.log_to_gui(f"Listening for webhooks on http://{bind}:{self._webhook_server.port}/hooks/<jenkins|github|gitlab>")
+
+    def _on_webhook_event(self, backend: str, kind: str, payload: Dict[str, Any], received_at: float):
+        """Runs on the listener's thread: feeds a verified event into the monitor's state."""
+        from app.webhooks import translate
+        self.monitor.note_event(backend)
+        pushed = translate(backend, kind, payload, received_at)
+        if pushed is None:
+            return
+        self._webhook_events += 1
+        if pushed.matches is not None and self.monitor.push(backend, pushed.matches, pushed.status):
+            return
+        # Nothing here follows it (e.g. a run started elsewhere, or a GitHub event)
+        self._report_status(backend, pushed.key, pushed.label, pushed.status)
+
+    def _record_webhook_latency(self, received_at: float):
+        self._webhook_latencies.append((time.perf_counter() - received_at) * 1000)
+
+    def get_webhook_stats(self) -> Dict[str, Any]:
+        """Listener state, event counts and arrival -> GUI update latency. Safe on the GUI thread."""
+        server = self._webhook_server
+        latencies = sorted(self._webhook_latencies)
+        stats: Dict[str, Any] = {"listening": server.port if server else None, "events": self._webhook_events}
+        stats.update(server.stats if server else {"accepted": 0, "rejected": 0, "invalid": 0})
+        if latencies:
+            stats["latency_ms"] = {"p50": latencies[len(latencies) // 2],
+                                   "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                                   "max": latencies[-1]}
+        return stats
+
+    # --- Diagnostics ---
+
+    def get_diagnostics(self) -> Dict[str, Any]:
+        """Request, job and GUI-queue metrics, for the Diagnostics tab. Safe on the GUI thread."""
+        diagnostics = self.metrics.snapshot()
+        diagnostics["scheduler"] = self.scheduler.stats()
+        diagnostics["rate_limits"] = self.api_service.governor.snapshot()
+        diagnostics["coalescing"] = self.api_service.coalescer.snapshot()
+        server = self._metrics_server
+        diagnostics["metrics_endpoint"] = f"http://127.0.0.1:{server.port}/metrics" if server else None
+        return diagnostics
+
+    def reset_metrics(self):
+        """Starts the diagnostics over; the trace, if any, keeps everything."""
+        self.metrics.reset()
+        self.api_service.governor.reset_stats()
+        self.api_service.coalescer.reset_stats()
+
+    def record_gui_update(self, hop: float, func: Optional[Callable] = None,
+                          started: float = 0.0, duration: float = 0.0):
+        """Called by the GUI for each queued update it ran, with how long it waited and ran."""
+        self.metrics.observe_gui(hop, callable_name(func) if func is not None else None, started, duration)
+
+    def record_gui_messages(self, hops: List[float]):
+        """Called by the GUI with the queue waits of a batch of console messages."""
+        self.metrics.observe_gui_hops(hops)
+
+    def _on_metrics_event(self, source: str, kind: str, message: str):
+        """Runs on the recording thread: warnings the services raise go to the console."""
+        self.log_to_gui(f"{source.capitalize()} Warning: {message}", "WARN")
+
+    def _configure_metrics_endpoint(self):
+        """Starts or stops the Prometheus endpoint to match metrics_port (0 or unset: off)."""
+        port = int(self.get_config_setting("metrics_port", 0) or 0)
+        with self._metrics_lock:
+            server = self._metrics_server
+            if server is not None and server.requested_port != port:
+                server.stop()
+                server = self._metrics_server = None
+            if not port or server is not None:
+                return
+            try:
+                self._metrics_server = MetricsServer(port, self.metrics.prometheus_text)
+            except OSError as e:
+                self.log_to_gui(f"Metrics Error: cannot listen on 127.0.0.1:{port}: {e}", "ERROR")
+                return
+        self.log_to_gui(f"Serving metrics on http://127.0.0.1:{port}/metrics")
+
+    # --- Build Logs ---
+
+    def handle_open_jenkins_log(self, job_name: str, build_number: str,
+                                on_update: Callable[[bool], None]) -> Optional[Watch]:
+        """
+        Starts streaming a Jenkins console log into a new ChunkedLogBuffer
+        (the returned watch's .buffer). on_update(done) is called on the
+        GUI thread whenever new text has arrived.
+        """
+        if not job_name or not build_number:
+            self.log_to_gui("Jenkins Error: Job name and build number are required.", "ERROR")
+            return None
+        job_name = self.resolve_jenkins_job(job_name)
+        watch = JenkinsLogWatch(job_name, build_number, ChunkedLogBuffer(),
+                                partial(self.run_on_gui, on_update))
+        self.log_to_gui(f"Streaming console log of {job_name} #{build_number}...")
+        return self.monitor.watch(watch)
+
+    def handle_open_gitlab_trace(self, project_id: str, job_id: str,
+                                 on_update: Callable[[bool], None]) -> Optional[Watch]:
+        """Same as handle_open_jenkins_log, for a GitLab job trace."""
+        if not project_id or not job_id:
+            self.log_to_gui("GitLab Error: Project ID and job ID are required.", "ERROR")
+            return None
+        watch = GitLabTraceWatch(project_id, job_id, ChunkedLogBuffer(),
+                                 partial(self.run_on_gui, on_update))
+        self.log_to_gui(f"Streaming trace of GitLab job #{job_id}...")
+        return self.monitor.watch(watch)
+
+    def close_log_stream(self, watch: Watch):
+        """Stops streaming a log and deletes its buffer."""
+        self.monitor.cancel(watch.key)
+        watch.buffer.close()
+
+    # --- Workflows ---
+
+    def get_workflows_dir(self) -> str:
+        path = os.path.join(config_dir(), WORKFLOWS_DIR)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def list_workflows(self) -> List[str]:
+        """Workflow file names in the workflows directory."""
+        return list_workflows(self.get_workflows_dir())
+
+    def _checkpoint_path(self, file_name: str) -> str:
+        return os.path.join(self.get_workflows_dir(), CHECKPOINTS_DIR, os.path.splitext(file_name)[0] + ".json")
+
+    def has_workflow_checkpoint(self, file_name: str) -> bool:
+        """True if an interrupted run of this workflow can be resumed."""
+        return os.path.exists(self._checkpoint_path(file_name))
+
+    def is_workflow_running(self, file_name: str) -> bool:
+        return file_name in self._workflow_runs
+
+    def handle_run_workflow(self, file_name: str, resume: bool,
+                            on_event: Callable[[str, str, str], None]) -> Optional[List[str]]:
+        """
+        Loads and starts a workflow. on_event(step_id, state, detail) is
+        called on the GUI thread as steps progress. Returns the step ids in
+        definition order, or None if the workflow could not be started.
+        """
+        if file_name in self._workflow_runs:
+            self.log_to_gui(f"Workflow {file_name} is already running.", "WARN")
+            return None
+        try:
+            workflow = load_workflow(os.path.join(self.get_workflows_dir(), file_name))
+        except (OSError, ValueError) as e:
+            self.log_to_gui(f"Workflow Error: {file_name}: {e}", "ERROR")
+            return None
+
+        checkpoint = self._checkpoint_path(file_name)
+        if not resume and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        runner = WorkflowRunner(workflow, self.api_service, checkpoint,
+                                partial(self._on_workflow_event, workflow.name, on_event))
+        resumed = resume and runner.resume_from_checkpoint()
+        self._workflow_runs[file_name] = runner
+        self.log_to_gui(f"{'Resuming' if resumed else 'Starting'} workflow '{workflow.name}'...")
+        # A run can take hours, so it gets its own thread instead of a scheduler worker
+        threading.Thread(target=self._workflow_worker, args=(file_name, runner),
+                         name="UniCI-workflow-run", daemon=True).start()
+        return list(workflow.steps)
+
+    def handle_cancel_workflow(self, file_name: str):
+        runner = self._workflow_runs.get(file_name)
+        if runner is not None:
+            self.log_to_gui(f"Cancelling workflow '{runner.workflow.name}'...", "WARN")
+            runner.cancel()
+
+    def _workflow_worker(self, file_name: str, runner: WorkflowRunner):
+        try:
+            succeeded = runner.run()
+            if succeeded:
+                self.log_to_gui(f"Workflow '{runner.workflow.name}' finished.", "SUCCESS")
+            else:
+                self.log_to_gui(f"Workflow '{runner.workflow.name}' did not complete. "
+                                f"It can be resumed from its checkpoint.", "ERROR")
+        except Exception as e:
+            self.log_to_gui(f"Workflow Error: {runner.workflow.name}: {e}", "ERROR")
+        finally:
+            self._workflow_runs.pop(file_name, None)
+
+    def _on_workflow_event(self, workflow_name: str, on_event: Callable[[str, str, str], None],
+                           step_id: str, state: str, detail: str):
+        """Runs on workflow threads; forwards step progress to the GUI."""
+        if state in ("Success", "Failed", "Skipped"):
+            level = {"Success": "SUCCESS", "Failed": "ERROR"}.get(state, "WARN")
+            self.log_to_gui(f"Workflow '{workflow_name}' step {step_id}: {state}  {detail}".rstrip(), level)
+        self.run_on_gui(on_event, step_id, state, detail)
+
+    # --- Status Refresh ---
+
+    def handle_refresh_statuses(self, backend: str) -> Optional[Future]:
+        """
+        Re-reads every build ("jenkins") or pipeline ("gitlab") in the
+        backend's status list at once on the async service, including rows
+        restored from the last session. Rows whose state changed are updated
+        through the status listeners.
+        """
+        targets = {key: self._status_targets[key] for key in list(self._last_statuses.get(backend, {}))
+                   if key in self._status_targets}
+        if not targets:
+            self.log_to_gui(f"{backend.title()}: no statuses to refresh.", "WARN")
+            return None
+        self.log_to_gui(f"Refreshing {len(targets)} {backend.title()} statuses...")
+        lookups = sorted(set(targets.values()))
+        if backend == "jenkins":
+            future = self.run_async(lambda service: service.get_statuses(lookups, []))
+        else:
+            future = self.run_async(lambda service: service.get_statuses([], lookups))
+        future.add_done_callback(partial(self._refresh_statuses_done, backend, targets))
+        return future
+
+    def _refresh_statuses_done(self, backend: str, targets: Dict[str, Tuple[str, str]], future: Future):
+        """Runs on the asyncio thread; only talks to the GUI through the queue."""
+        try:
+            results = future.result()[backend]
+        except Exception as e:
+            self.log_to_gui(f"Status Refresh Error: {e}", "ERROR")
+            return
+
+        to_status = jenkins_build_status if backend == "jenkins" else gitlab_pipeline_status
+        shown = self._last_statuses.get(backend, {})
+        changed = failed = 0
+        for key, target in targets.items():
+            label, state, _ = shown.get(key, (key, None, None))
+            result = results[target]
+            if isinstance(result, Exception):
+                failed += 1
+                self.log_to_gui(f"  {backend.title()} {label}: Error: {result}", "ERROR")
+                continue
+            status = to_status(result)
+            # Only the state: a watch's detail (e.g. the failed job) is richer than a plain re-read
+            if status.state != state:
+                changed += 1
+                self._report_status(backend, key, label, status)
+        summary = f"Refreshed {len(targets) - failed} {backend.title()} statuses, {changed} changed"
+        self.log_to_gui(f"{summary}, {failed} failed" if failed else summary, "ERROR" if failed else "INFO")
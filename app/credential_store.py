@@ -0,0 +1,109 @@
+"""
+UniCI Credential Store
+In-memory cache in front of the OS keyring.
+
+Keyring lookups can take tens to hundreds of milliseconds each (a D-Bus
+round trip to the Secret Service on Linux) or block on an unlock prompt,
+so all UniCI secrets are loaded once, on a worker thread, at startup.
+After that, reads are served from memory. Writes update memory and go
+through to the keyring. Secrets are never written anywhere else.
+The keyring package itself is imported on first use, on that worker,
+since importing it costs noticeable startup time.
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+class CredentialError(Exception):
+    """The OS keyring could not be read or written."""
+
+def _keyring():
+    try:
+        import keyring
+        import keyring.errors
+    except ImportError as e:
+        raise CredentialError("the keyring package is not installed (pip install keyring)") from e
+    return keyring
+
+class CredentialStore:
+    """
+    Thread-safe cache of (service_name, username) -> secret.
+    `timings` records how long each keyring lookup took, in milliseconds.
+    """
+    def __init__(self):
+        self._secrets: Dict[Tuple[str, str], Optional[str]] = {}
+        self._changed: Set[Tuple[str, str]] = set()   # Entries set() since startup; load() must not overwrite them
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self.timings: Dict[str, float] = {}
+        self.load_ms = 0.0
+        self.errors: List[str] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    def load(self, entries: Iterable[Tuple[str, str]]):
+        """Reads every (service_name, username) entry from the keyring. Blocking; run it off the GUI thread."""
+        load_start = time.perf_counter()
+        try:
+            for service_name, username in entries:
+                start = time.perf_counter()
+                try:
+                    secret = self._get_password(service_name, username)
+                except CredentialError as e:
+                    self.errors.append(f"{service_name}: {e}")
+                    secret = None
+                self.timings[service_name] = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    if (service_name, username) not in self._changed:
+                        self._secrets[(service_name, username)] = secret
+        finally:
+            self.load_ms = (time.perf_counter() - load_start) * 1000
+            self._loaded.set()
+
+    def wait_loaded(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until load() has finished. Never call this on the GUI thread."""
+        return self._loaded.wait(timeout)
+
+    def get(self, service_name: str, username: str) -> Optional[str]:
+        """
+        Returns a secret, asking the keyring only on a cache miss (e.g. a
+        Jenkins user that was changed after startup). May raise CredentialError.
+        """
+        key = (service_name, username)
+        with self._lock:
+            if key in self._secrets:
+                return self._secrets[key]
+        secret = self._get_password(service_name, username)
+        with self._lock:
+            self._secrets[key] = secret
+        return secret
+
+    def has(self, service_name: str, username: str) -> bool:
+        """True if a secret is cached for the entry. Never touches the keyring."""
+        with self._lock:
+            return bool(self._secrets.get((service_name, username)))
+
+    def set(self, service_name: str, username: str, secret: str):
+        """Updates the cache; pair it with write() to persist the secret."""
+        with self._lock:
+            self._secrets[(service_name, username)] = secret
+            self._changed.add((service_name, username))
+
+    def write(self, service_name: str, username: str, secret: str):
+        """Writes a secret through to the keyring. Blocking; may raise CredentialError."""
+        keyring = _keyring()
+        try:
+            keyring.set_password(service_name, username, secret)
+        except keyring.errors.KeyringError as e:
+            raise CredentialError(str(e)) from e
+        self.set(service_name, username, secret)
+
+    @staticmethod
+    def _get_password(service_name: str, username: str) -> Optional[str]:
+        keyring = _keyring()
+        try:
+            return keyring.get_password(service_name, username)
+        except keyring.errors.KeyringError as e:
+            raise CredentialError(str(e)) from e
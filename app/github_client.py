@@ -0,0 +1,428 @@
+"""
+GitHub REST Client
+
+Thin layer over ApiService's pooled GitHub session that:
+- follows Link headers (per_page=100) so listings are never truncated,
+  fetching the remaining pages concurrently once the last page is known;
+- remembers ETag / Last-Modified per URL and sends conditional requests,
+  so unchanged resources come back as 304s that don't cost rate limit;
+- tracks the remaining rate-limit budget from the response headers;
+- fetches the PR dashboard (PRs with their check rollup, review decision,
+  mergeability and labels) with one paginated GraphQL query instead of
+  N+1 REST calls, tracking each query's cost against the GraphQL budget;
+- syncs the PR inbox of many repositories incrementally, batching them
+  into aliased GraphQL queries and reading only PRs updated since the
+  last sync.
+When a ResponseCache is attached, validators and bodies survive restarts,
+so the first refresh after launch is usually a cheap 304 as well.
+It knows nothing about the GUI or the Controller.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+from app.response_cache import ResponseCache
+from app.scheduler import current_priority, run_with_priority
+
+GITHUB_API_URL = "https://api.github.com"
+PER_PAGE = 100
+PAGE_FETCH_WORKERS = 4
+ETAG_CACHE_SIZE = 256        # URLs whose validators and bodies stay in memory; the rest are in the store
+GRAPHQL_PAGE_SIZE = 50      # PRs per query; keeps each query's cost at a point or two
+
+# Everything the PR dashboard shows about one PR
+PULL_REQUEST_FIELDS = """
+fragment DashboardFields on PullRequest {
+  number title url isDraft state createdAt updatedAt mergeable reviewDecision
+  author { login }
+  headRefName headRefOid baseRefName
+  labels(first: 20) { nodes { name color } }
+  commits(last: 1) { nodes { commit { statusCheckRollup { state } } } }
+}
+"""
+
+# One page of a repository's open PRs per query
+PULL_REQUESTS_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $cursor: String) {
+  rateLimit { cost limit remaining resetAt }
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: OPEN, first: $first, after: $cursor, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { ...DashboardFields }
+    }
+  }
+}
+""" + PULL_REQUEST_FIELDS
+
+# Inbox sync: many repositories per query (one alias each), most recently updated PRs first
+INBOX_BATCH_SIZE = 20           # Repositories per query
+INBOX_PAGE_SIZE = 50            # PRs per repository on a full sync or follow-up page
+INBOX_INCREMENTAL_PAGE_SIZE = 10  # First page of an incremental sync; usually nothing changed
+INBOX_PAGE_FRAGMENT = """
+fragment InboxPage on PullRequestConnection {
+  pageInfo { hasNextPage endCursor }
+  nodes { ...DashboardFields }
+}
+""" + PULL_REQUEST_FIELDS
+
+
+class GraphQLError(Exception):
+    """The GraphQL API refused a query (errors, exhausted budget, or not available)."""
+
+
+def pull_request_from_node(node: Dict[str, Any], repo_name: str) -> Dict[str, Any]:
+    """
+    Converts a GraphQL PR node to the REST pull request shape the GUI
+    already uses, plus the dashboard fields review_decision, checks_state
+    and mergeable_state (GraphQL enum values, or None).
+    """
+    commits = (node.get("commits") or {}).get("nodes") or []
+    rollup = commits[0]["commit"].get("statusCheckRollup") if commits else None
+    return {
+        "number": node["number"],
+        "title": node["title"],
+        "html_url": node.get("url"),
+        "draft": node.get("isDraft", False),
+        "state": (node.get("state") or "OPEN").lower(),
+        "created_at": node.get("createdAt"),
+        "updated_at": node.get("updatedAt"),
+        "user": {"login": (node.get("author") or {}).get("login", "ghost")},
+        "head": {"ref": node.get("headRefName"), "sha": node.get("headRefOid")},
+        "base": {"ref": node.get("baseRefName"), "repo": {"full_name": repo_name}},
+        "labels": [{"name": label["name"], "color": label.get("color")}
+                   for label in (node.get("labels") or {}).get("nodes") or []],
+        "review_decision": node.get("reviewDecision"),
+        "checks_state": rollup.get("state") if rollup else None,
+        "mergeable_state": node.get("mergeable"),
+    }
+
+
+class GitHubClient:
+    """
+    Paginating, conditional-request GitHub client.
+    `request` is ApiService._request bound to the "github" backend.
+    """
+    def __init__(self, request: Callable[..., Any], store: Optional[ResponseCache] = None):
+        self._request = request
+        self.store = store
+        self.base_url = GITHUB_API_URL   # Overridden for GitHub Enterprise
+        # url -> {"etag", "last_modified", "body", "links"}, least recently used first
+        self._etag_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.rate_limit: Dict[str, Optional[int]] = {"limit": None, "remaining": None, "reset": None}
+        self.stats: Dict[str, int] = {"requests": 0, "not_modified": 0, "graphql_queries": 0, "graphql_cost": 0,
+                                     "graphql_fallbacks": 0}
+        # The GraphQL API has its own point budget, separate from the REST one
+        self.graphql_rate_limit: Dict[str, Optional[int]] = {"limit": None, "remaining": None, "reset": None,
+                                                             "last_cost": None}
+
+    def close(self):
+        """Stops the page-fetch worker threads."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    # --- Requests ---
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """GETs a single resource, revalidating it with the cached ETag."""
+        body, _ = self._conditional_get(self._url(path, params))
+        return body
+
+    def get_paginated(self, path: str, params: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        GETs every page of a listing. Page 1 is fetched first; if its Link
+        header names the last page, pages 2..N are fetched concurrently,
+        otherwise "next" links are followed one by one.
+        """
+        params = dict(params or {})
+        params.setdefault("per_page", PER_PAGE)
+        first_url = self._url(path, params)
+        items, links = self._conditional_get(first_url)
+        items = list(items)
+
+        last_page = self._page_number(links.get("last"))
+        if last_page and last_page > 1:
+            page_urls = [self._url(path, dict(params, page=page)) for page in range(2, last_page + 1)]
+            # Pages are fetched with the priority of the job that asked for the listing
+            fetch = partial(run_with_priority, current_priority(), self._conditional_get)
+            for page_items, _ in self._get_executor().map(fetch, page_urls):
+                items.extend(page_items)
+            return items
+
+        next_url = links.get("next")
+        while next_url:
+            page_items, links = self._conditional_get(next_url)
+            items.extend(page_items)
+            next_url = links.get("next")
+        return items
+
+    # --- GraphQL ---
+
+    def graphql(self, query: str, variables: Dict[str, Any], allow_partial: bool = False) -> Dict[str, Any]:
+        """
+        Runs a GraphQL query and returns its data. Tracks the query's cost if
+        it asks for rateLimit. With allow_partial, errors that still left some
+        data (e.g. one aliased repository not found) are not raised; the
+        failed fields are simply null.
+        """
+        budget = self.graphql_rate_limit
+        if (budget["remaining"] is not None and budget["last_cost"] is not None
+                and budget["remaining"] < budget["last_cost"] and time.time() < (budget["reset"] or 0)):
+            raise GraphQLError(f"GraphQL budget exhausted ({budget['remaining']} points left)")
+
+        response = self._request("POST", self._graphql_url(), json={"query": query, "variables": variables})
+        if response.status_code in (401, 403, 404):
+            raise GraphQLError(f"GraphQL API unavailable: HTTP {response.status_code}")
+        response.raise_for_status()
+        payload = response.json()
+        data = payload.get("data") or {}
+        rate = data.get("rateLimit")
+        with self._cache_lock:
+            self.stats["graphql_queries"] += 1
+            if rate:
+                self.stats["graphql_cost"] += rate.get("cost") or 0
+                self.graphql_rate_limit.update(
+                    limit=rate.get("limit"), remaining=rate.get("remaining"), last_cost=rate.get("cost"),
+                    reset=self._parse_reset(rate.get("resetAt")),
+                )
+        if payload.get("errors") and not (allow_partial and payload.get("data")):
+            raise GraphQLError("; ".join(error.get("message", "unknown error") for error in payload["errors"]))
+        return data
+
+    def get_pull_requests_graphql(self, repo_name: str) -> List[Dict[str, Any]]:
+        """All open PRs of 'owner/repo' with their dashboard fields, in REST shape, newest first."""
+        owner, _, name = repo_name.partition("/")
+        prs: List[Dict[str, Any]] = []
+        cursor = None
+        while True:
+            data = self.graphql(PULL_REQUESTS_QUERY, {"owner": owner, "name": name,
+                                                      "first": GRAPHQL_PAGE_SIZE, "cursor": cursor})
+            if not data.get("repository"):
+                raise GraphQLError(f"Repository {repo_name} not found")
+            page = data["repository"]["pullRequests"]
+            prs.extend(pull_request_from_node(node, repo_name) for node in page["nodes"])
+            if not page["pageInfo"]["hasNextPage"]:
+                break
+            cursor = page["pageInfo"]["endCursor"]
+
+        return prs
+
+    # --- Inbox Sync ---
+
+    def get_pull_request_updates(self, cursors: Dict[str, Optional[str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Incremental PR sync for many repositories over GraphQL. `cursors` maps
+        'owner/repo' to the newest updated_at seen by its last sync, or None
+        for a full sync of its open PRs. PRs are read most recently updated
+        first and a repository's paging stops at its cursor, so an unchanged
+        repository costs one small page inside a shared, aliased query.
+
+        Returns {repo: {"full", "open", "closed", "cursor"}} where "open" are
+        the new or changed open PRs and "closed" the numbers of PRs closed or
+        merged since the cursor; or {repo: {"error"}} if it can't be read.
+        """
+        results = {repo: {"full": since is None, "open": [], "closed": [], "cursor": since}
+                   for repo, since in cursors.items()}
+        pending = {repo: None for repo in cursors}   # repo -> pagination cursor of its next page
+        while pending:
+            next_pending = {}
+            batches = list(pending.items())
+            for start in range(0, len(batches), INBOX_BATCH_SIZE):
+                batch = batches[start:start + INBOX_BATCH_SIZE]
+                data = self.graphql(self._inbox_query(batch, cursors), {}, allow_partial=True)
+                for i, (repo, _) in enumerate(batch):
+                    repository = data.get(f"r{i}")
+                    if not repository:
+                        results[repo] = {"error": f"Repository {repo} not found or not accessible"}
+                        continue
+                    page = repository["pullRequests"]
+                    if self._apply_inbox_page(results[repo], cursors[repo], page["nodes"], repo) \
+                            and page["pageInfo"]["hasNextPage"]:
+                        next_pending[repo] = page["pageInfo"]["endCursor"]
+            pending = next_pending
+        return results
+
+    def get_pull_request_updates_rest(self, repo_name: str, since: Optional[str]) -> Dict[str, Any]:
+        """
+        REST version of get_pull_request_updates for one repository. A full
+        sync lists the open PRs; an incremental one pages through all PRs
+        sorted by last update until the cursor. Its first page is usually an
+        unchanged 304, which doesn't cost rate limit.
+        """
+        path = f"/repos/{repo_name}/pulls"
+        if since is None:
+            prs = self.get_paginated(path, {"state": "open"})
+            return {"full": True, "open": prs, "closed": [],
+                    "cursor": max((pr["updated_at"] for pr in prs), default=None)}
+
+        result = {"full": False, "open": [], "closed": [], "cursor": since}
+        page = 1
+        while True:
+            prs = self.get(path, {"state": "all", "sort": "updated", "direction": "desc",
+                                  "per_page": INBOX_INCREMENTAL_PAGE_SIZE, "page": page})
+            if not self._apply_inbox_page(result, since, prs) or len(prs) < INBOX_INCREMENTAL_PAGE_SIZE:
+                return result
+            page += 1
+
+    @staticmethod
+    def _apply_inbox_page(result: Dict[str, Any], since: Optional[str], prs: List[Dict[str, Any]],
+                          repo_name: Optional[str] = None) -> bool:
+        """
+        Sorts one page of PRs (GraphQL nodes if repo_name is given, else REST)
+        into result. Returns False once a PR older than the cursor was seen.
+        PRs updated exactly at the cursor are read again, since another PR may
+        share that timestamp.
+        """
+        for pr in prs:
+            if repo_name is not None:
+                pr = pull_request_from_node(pr, repo_name)
+            if since is not None and pr["updated_at"] < since:
+                return False
+            if pr["state"] == "open":
+                result["open"].append(pr)
+            else:
+                result["closed"].append(pr["number"])
+            if result["cursor"] is None or pr["updated_at"] > result["cursor"]:
+                result["cursor"] = pr["updated_at"]
+        return True
+
+    @staticmethod
+    def _inbox_query(batch: List[Tuple[str, Optional[str]]], cursors: Dict[str, Optional[str]]) -> str:
+        """One aliased pullRequests page per repository. Values are JSON-quoted, which GraphQL accepts."""
+        fields = []
+        for i, (repo, after) in enumerate(batch):
+            owner, _, name = repo.partition("/")
+            full = cursors[repo] is None
+            args = [f"first: {INBOX_PAGE_SIZE if full or after else INBOX_INCREMENTAL_PAGE_SIZE}",
+                    "orderBy: {field: UPDATED_AT, direction: DESC}"]
+            if after:
+                args.append(f"after: {json.dumps(after)}")
+            if full:
+                args.append("states: OPEN")
+            fields.append(f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) "
+                          f"{{ pullRequests({', '.join(args)}) {{ ...InboxPage }} }}")
+        return ("query {\n  rateLimit { cost limit remaining resetAt }\n  " + "\n  ".join(fields) + "\n}\n"
+                + INBOX_PAGE_FRAGMENT)
+
+    def _graphql_url(self) -> str:
+        # GitHub Enterprise serves REST under /api/v3 but GraphQL under /api/graphql
+        if self.base_url.endswith("/v3"):
+            return f"{self.base_url[:-len('/v3')]}/graphql"
+        return f"{self.base_url}/graphql"
+
+    @staticmethod
+    def _parse_reset(reset_at: Optional[str]) -> Optional[int]:
+        """'2026-10-18T10:00:00Z' -> epoch seconds, like X-RateLimit-Reset."""
+        if not reset_at:
+            return None
+        return int(datetime.fromisoformat(reset_at.replace("Z", "+00:00")).timestamp())
+
+    def _cached(self, url: str) -> Optional[Dict[str, Any]]:
+        """Looks a URL up in memory, then in the persistent store."""
+        with self._cache_lock:
+            cached = self._etag_cache.get(url)
+            if cached is not None:
+                self._etag_cache.move_to_end(url)
+        if cached is not None or self.store is None:
+            return cached
+        entry = self.store.get("github", self._resource(url), url, allow_stale=True)
+        if entry is None:
+            return None
+        cached = dict(entry["meta"], body=entry["body"])
+        self._remember(url, cached)
+        return cached
+
+    def _remember(self, url: str, cached: Dict[str, Any]):
+        """Keeps a response in memory, dropping the least recently used past ETAG_CACHE_SIZE."""
+        with self._cache_lock:
+            self._etag_cache[url] = cached
+            self._etag_cache.move_to_end(url)
+            while len(self._etag_cache) > ETAG_CACHE_SIZE:
+                self._etag_cache.popitem(last=False)
+
+    def _conditional_get(self, url: str) -> Tuple[Any, Dict[str, str]]:
+        """
+        GETs a URL with If-None-Match / If-Modified-Since when we have a
+        cached copy. Returns (body, {rel: url} links).
+        """
+        cached = self._cached(url)
+
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = self._request("GET", url, headers=headers)
+        self._update_rate_limit(response.headers)
+        not_modified = response.status_code == 304 and cached is not None
+        with self._cache_lock:
+            self.stats["requests"] += 1
+            if not_modified:
+                self.stats["not_modified"] += 1
+        if not_modified:
+            return cached["body"], cached["links"]
+
+        response.raise_for_status()  # Raises HTTPError for bad responses
+        body = response.json()
+        links = {rel: link["url"] for rel, link in response.links.items()}
+        meta = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "links": links,
+        }
+        self._remember(url, dict(meta, body=body))
+        if self.store is not None:
+            self.store.put("github", self._resource(url), url, body, meta)
+        return body, links
+
+    # --- Helpers ---
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Small shared pool for concurrent page fetches, created on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=PAGE_FETCH_WORKERS, thread_name_prefix="UniCI-github-pages"
+                )
+            return self._executor
+
+    def _update_rate_limit(self, headers):
+        """Records X-RateLimit-* headers from the latest response."""
+        for key, header in (("limit", "X-RateLimit-Limit"),
+                            ("remaining", "X-RateLimit-Remaining"),
+                            ("reset", "X-RateLimit-Reset")):
+            value = headers.get(header)
+            if value is not None:
+                self.rate_limit[key] = int(value)
+
+    def _url(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Builds an absolute API URL with a stable query string (the ETag cache key)."""
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return url
+
+    @staticmethod
+    def _resource(url: str) -> str:
+        """Cache resource name: the last non-numeric path segment, e.g. 'pulls'."""
+        segments = [part for part in urlparse(url).path.split("/") if part and not part.isdigit()]
+        return segments[-1] if segments else "root"
+
+    @staticmethod
+    def _page_number(url: Optional[str]) -> Optional[int]:
+        """Extracts ?page=N from a Link URL."""
+        if not url:
+            return None
+        pages = parse_qs(urlparse(url).query).get("page")
+        return int(pages[0]) if pages else None
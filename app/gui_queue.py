@@ -0,0 +1,70 @@
+"""
+GUI Update Queue
+
+Thread-safe queue between the controller's worker threads and the GUI.
+Instead of the GUI polling it on a timer, every put() wakes the GUI
+through a callback, so updates render as soon as they arrive and an idle
+app does no periodic work.
+
+Items are stamped when queued, so the GUI can tell how long each one
+waited for it (`last_wait`) without changing what is queued.
+"""
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+
+class GuiQueue(queue.Queue):
+    """
+    A queue.Queue that calls a "waker" when new items arrive.
+
+    Wakeups are coalesced: after one wakeup, no further ones are sent until
+    the GUI calls acknowledge() at the start of its drain. Acknowledging
+    before draining guarantees no item is left behind without a wakeup.
+    """
+    def __init__(self):
+        super().__init__()
+        self._waker: Optional[Callable[[], None]] = None
+        self._wake_pending = False
+        self._wake_lock = threading.Lock()
+        self.last_wait = 0.0    # Seconds the item last taken spent in the queue
+
+    def set_waker(self, waker: Optional[Callable[[], None]]):
+        """Sets (or clears, with None) the callback used to wake the GUI."""
+        with self._wake_lock:
+            self._waker = waker
+            self._wake_pending = False
+
+    def put(self, item, block: bool = True, timeout: Optional[float] = None):
+        """Queues an item and wakes the GUI if it isn't already awake."""
+        super().put(item, block, timeout)
+        self.notify()
+
+    def _put(self, item):
+        self.queue.append((time.perf_counter(), item))
+
+    def _get(self):
+        queued_at, item = self.queue.popleft()
+        self.last_wait = time.perf_counter() - queued_at
+        return item
+
+    def notify(self):
+        """Wakes the GUI without queueing anything, e.g. to refresh the status bar."""
+        with self._wake_lock:
+            waker = self._waker
+            if waker is None or self._wake_pending:
+                return
+            self._wake_pending = True
+        try:
+            waker()
+        except Exception:
+            # The GUI isn't ready to be woken (e.g. before mainloop starts or
+            # while closing). Its next drain will pick the item up anyway.
+            with self._wake_lock:
+                self._wake_pending = False
+
+    def acknowledge(self):
+        """Called by the GUI right before it drains the queue."""
+        with self._wake_lock:
+            self._wake_pending = False
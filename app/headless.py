@@ -0,0 +1,437 @@
+"""
+UniCI Headless Mode
+Drives the same controller and services as the GUI without Tk, for cron
+jobs, SSH sessions and CI containers. Every command prints JSON Lines
+(one JSON object per line) to stdout; log messages go to stderr.
+
+    python cli.py trigger jenkins app-build --wait
+    python cli.py daemon &          # keeps pools, caches and watches warm
+    python cli.py status gitlab group/service 1234
+
+While a daemon is listening on the Unix socket, commands are forwarded
+to it and skip startup, the keyring load and TLS handshakes. Without
+one, they run in-process.
+
+    python cli.py metrics           # request/job latency of the daemon (or this run)
+    python cli.py --profile trace.json trigger jenkins app-build --wait
+"""
+import argparse
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+from app.config_manager import config_dir
+from app.controller import AppController
+from app.monitor import JENKINS_RESULTS, GitLabPipelineWatch, JenkinsBuildWatch, Watch, WatchStatus
+
+SOCKET_NAME = "unici.sock"          # In the config dir, unless UNICI_SOCKET is set
+SOCKET_ENV = "UNICI_SOCKET"
+# Tokens from the environment win over the keyring (CI containers rarely have one)
+TOKEN_ENV = {
+    "jenkins_token": "UNICI_JENKINS_TOKEN",
+    "github_token": "UNICI_GITHUB_TOKEN",
+    "gitlab_token": "UNICI_GITLAB_TOKEN",
+    "webhook_secret": "UNICI_WEBHOOK_SECRET",
+}
+
+EXIT_OK = 0
+EXIT_FAILED = 1                     # Command error, or the build/pipeline did not succeed
+EXIT_USAGE = 2
+EXIT_TIMEOUT = 124                  # Same as coreutils' timeout(1)
+
+Emit = Callable[[Dict[str, Any]], None]
+
+def default_socket_path() -> str:
+    return os.environ.get(SOCKET_ENV) or os.path.join(config_dir(), SOCKET_NAME)
+
+def to_json_line(event: Dict[str, Any]) -> str:
+    return json.dumps(event, default=str, separators=(",", ":")) + "\n"
+
+class HeadlessSession:
+    """
+    An AppController without a GUI. The "GUI queue" is drained by a pump
+    thread: log messages go to `log_sink`, queued callbacks run on the
+    pump thread. execute() runs one command and reports through `emit`.
+    """
+    def __init__(self, log_sink: Emit, trace_path: Optional[str] = None):
+        self.log_sink = log_sink
+        self.gui_queue: queue.Queue = queue.Queue()
+        self.controller = AppController(self.gui_queue, trace_path)
+        self._pump = threading.Thread(target=self._pump_loop, name="UniCI-headless-pump", daemon=True)
+        self._pump.start()
+        self.controller.load_api_config(self._env_overrides())
+        self._config_snapshot = dict(self.controller.config_manager.config_data)
+        self.started_at = time.time()
+        self.commands: Dict[str, Callable[[Dict[str, Any], Emit], int]] = {
+            "trigger": self._cmd_trigger,
+            "wait": self._cmd_wait,
+            "status": self._cmd_status,
+            "list-prs": self._cmd_list_prs,
+            "ping": self._cmd_ping,
+            "metrics": self._cmd_metrics,
+        }
+
+    def execute(self, command: str, args: Dict[str, Any], emit: Emit) -> int:
+        """Runs one command and returns its exit code. Never raises."""
+        handler = self.commands.get(command)
+        if handler is None:
+            emit({"event": "error", "message": f"Unknown command: {command}"})
+            return EXIT_USAGE
+        self._reload_config()
+        try:
+            return handler(args, emit)
+        except Exception as e:
+            emit({"event": "error", "command": command, "message": str(e) or e.__class__.__name__})
+            return EXIT_FAILED
+
+    def close(self):
+        self.controller.shutdown()
+        self.gui_queue.put(None)
+
+    # --- Internals ---
+
+    def _env_overrides(self) -> Dict[str, str]:
+        return {key: os.environ[name] for key, name in TOKEN_ENV.items() if os.environ.get(name)}
+
+    def _reload_config(self):
+        """Re-applies settings if config.json was edited (e.g. in the GUI) since the last command."""
+        config_manager = self.controller.config_manager
+        config_manager.reload_if_changed()
+        if config_manager.config_data != self._config_snapshot:
+            self._config_snapshot = dict(config_manager.config_data)
+            self.controller.load_api_config(self._env_overrides())
+
+    def _pump_loop(self):
+        while True:
+            item = self.gui_queue.get()
+            if item is None:
+                return
+            if callable(item):
+                try:
+                    item()
+                except Exception as e:
+                    self.log_sink({"event": "log", "level": "ERROR", "message": f"Callback error: {e}"})
+            else:
+                message, level = item
+                if level == "ERROR" and message.startswith("Keyring Error") and self._env_overrides():
+                    level = "WARN"  # Expected in containers without a keyring; the tokens came from the environment
+                self.log_sink({"event": "log", "level": level, "message": message})
+
+    def _call(self, func: Callable, *args, backend: str) -> Any:
+        """Runs a service call on the scheduler, so it shares the per-backend limits."""
+        return self.controller.run_in_thread(func, *args, backend=backend).result()
+
+    def _jenkins_job(self, name: str) -> str:
+        """A job typed by its own name, resolved to its folder path through the GUI's cached job index."""
+        if self.controller.get_jenkins_index_info()["refreshed_at"] is None:
+            self.controller.load_cached_jenkins_jobs()
+        return self.controller.resolve_jenkins_job(name)
+
+    def _wait(self, watch: Watch, timeout: Optional[float], emit: Emit) -> int:
+        def on_status(watch: Watch, status: WatchStatus):
+            emit({"event": "status", "backend": watch.backend, "label": watch.label,
+                  "state": status.state, "detail": status.detail})
+
+        future = self.controller.wait_for_watch(watch, on_status)
+        try:
+            status = future.result(timeout or None)
+        except FutureTimeoutError:
+            emit({"event": "timeout", "backend": watch.backend, "label": watch.label, "state": watch.state})
+            return EXIT_TIMEOUT
+        ok = status.state == "Success"
+        emit({"event": "done", "backend": watch.backend, "label": watch.label,
+              "state": status.state, "detail": status.detail, "ok": ok})
+        return EXIT_OK if ok else EXIT_FAILED
+
+    # --- Commands ---
+
+    def _cmd_trigger(self, args: Dict[str, Any], emit: Emit) -> int:
+        service = self.controller.api_service
+        target = args["target"]
+        if args["backend"] == "jenkins":
+            target = self._jenkins_job(target)
+            result = self._call(service.trigger_jenkins_build, target, backend="jenkins")
+            emit({"event": "triggered", "backend": "jenkins", "job": target, "queue_url": result.get("queue_url")})
+            if not args.get("wait"):
+                return EXIT_OK
+            if not result.get("queue_url"):
+                emit({"event": "error", "message": "Jenkins did not return a queue item to wait for."})
+                return EXIT_FAILED
+            watch: Watch = JenkinsBuildWatch(target, result["queue_url"])
+        else:
+            if not args.get("ref"):
+                emit({"event": "error", "message": "GitLab triggers need --ref."})
+                return EXIT_USAGE
+            pipeline = self._call(service.trigger_gitlab_pipeline, target, args["ref"], backend="gitlab")
+            emit({"event": "triggered", "backend": "gitlab", "project": target, "ref": args["ref"],
+                  "pipeline_id": pipeline.get("id"), "status": pipeline.get("status"), "web_url": pipeline.get("web_url")})
+            if not args.get("wait"):
+                return EXIT_OK
+            watch = GitLabPipelineWatch(target, str(pipeline["id"]))
+        return self._wait(watch, args.get("timeout"), emit)
+
+    def _cmd_wait(self, args: Dict[str, Any], emit: Emit) -> int:
+        run = str(args["run"])
+        if args["backend"] == "jenkins":
+            # A queue item URL (as printed by trigger) or a build number
+            job_name = self._jenkins_job(args["target"])
+            watch: Watch = (JenkinsBuildWatch(job_name, "", int(run)) if run.isdigit()
+                            else JenkinsBuildWatch(job_name, run))
+        else:
+            watch = GitLabPipelineWatch(args["target"], run)
+        return self._wait(watch, args.get("timeout"), emit)
+
+    def _cmd_status(self, args: Dict[str, Any], emit: Emit) -> int:
+        service = self.controller.api_service
+        target = args["target"]
+        if args["backend"] == "jenkins":
+            target = self._jenkins_job(target)
+            build = self._call(service.get_jenkins_build_status, target, str(args.get("run") or "lastBuild"),
+                               backend="jenkins")
+            result = build.get("result")
+            state = "Running" if build.get("building") or result is None else JENKINS_RESULTS.get(result, result.title())
+            emit({"event": "status", "backend": "jenkins", "job": target, "number": build.get("number"),
+                  "state": state, "url": build.get("url"), "timestamp": build.get("timestamp"),
+                  "duration": build.get("duration")})
+        else:
+            if not args.get("run"):
+                emit({"event": "error", "message": "GitLab status needs a pipeline ID."})
+                return EXIT_USAGE
+            pipeline = self._call(service.get_gitlab_pipeline_status, target, str(args["run"]), backend="gitlab")
+            emit({"event": "status", "backend": "gitlab", "project": target, "pipeline_id": pipeline.get("id"),
+                  "state": str(pipeline.get("status", "unknown")).replace("_", " ").title(),
+                  "ref": pipeline.get("ref"), "web_url": pipeline.get("web_url")})
+        return EXIT_OK
+
+    def _cmd_list_prs(self, args: Dict[str, Any], emit: Emit) -> int:
+        prs = self._call(self.controller.api_service.get_github_pull_requests, args["repo"], backend="github")
+        for pr in prs:
+            emit({"event": "pr", "repo": args["repo"], "number": pr.get("number"), "title": pr.get("title"),
+                  "author": (pr.get("user") or {}).get("login"), "draft": pr.get("draft", False),
+                  "head": (pr.get("head") or {}).get("ref"), "base": (pr.get("base") or {}).get("ref"),
+                  "labels": [label.get("name") for label in pr.get("labels") or []],
+                  "checks": pr.get("checks_state"), "review_decision": pr.get("review_decision"),
+                  "mergeable": pr.get("mergeable_state"),
+                  "updated_at": pr.get("updated_at"), "url": pr.get("html_url")})
+        return EXIT_OK
+
+    def _cmd_ping(self, args: Dict[str, Any], emit: Emit) -> int:
+        emit({"event": "pong", "pid": os.getpid(), "uptime": round(time.time() - self.started_at, 1),
+              "watches": len(self.controller.monitor.active_watches()),
+              "scheduler": self.controller.get_scheduler_stats()})
+        return EXIT_OK
+
+    def _cmd_metrics(self, args: Dict[str, Any], emit: Emit) -> int:
+        diagnostics = self.controller.get_diagnostics()
+        if args.get("prometheus"):
+            emit({"event": "metrics", "format": "prometheus", "text": self.controller.metrics.prometheus_text()})
+        else:
+            emit({"event": "metrics", **diagnostics})
+        return EXIT_OK
+
+
+# --- Daemon ---
+
+class HeadlessDaemon:
+    """
+    Serves one command per connection over a Unix socket. The client
+    sends one JSON line {"command": ..., "args": {...}}; the daemon
+    streams the command's JSON Lines back, ending with
+    {"event": "exit", "code": N}.
+    """
+    def __init__(self, session: HeadlessSession, socket_path: str):
+        if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+            raise RuntimeError("Daemon mode needs Unix domain sockets, which this platform lacks.")
+        self.session = session
+        self.socket_path = socket_path
+        self._remove_stale_socket()
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                write_lock = threading.Lock()
+
+                def emit(event: Dict[str, Any]):
+                    # Watch callbacks may still fire after a client hung up
+                    try:
+                        with write_lock:
+                            self.wfile.write(to_json_line(event).encode())
+                            self.wfile.flush()
+                    except (OSError, ValueError):
+                        pass
+
+                try:
+                    request = json.loads(self.rfile.readline() or b"{}")
+                    command, args = request.get("command"), request.get("args") or {}
+                except ValueError as e:
+                    emit({"event": "error", "message": f"Bad request: {e}"})
+                    command, args = None, {}
+                if command == "stop":
+                    emit({"event": "stopping", "pid": os.getpid()})
+                    code = EXIT_OK
+                    daemon.stop()
+                elif command is None:
+                    code = EXIT_USAGE
+                else:
+                    code = daemon.session.execute(command, args, emit)
+                emit({"event": "exit", "code": code})
+
+        self.server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+        self.server.daemon_threads = True
+        os.chmod(socket_path, 0o600)  # Only this user may drive their CI credentials
+
+    def serve_forever(self):
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def stop(self):
+        # shutdown() blocks until serve_forever returns, so never call it on the serving thread
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)  # Left behind by a daemon that died
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"A UniCI daemon is already listening on {self.socket_path}")
+
+def send_request(socket_path: str, command: str, args: Dict[str, Any], out) -> Optional[int]:
+    """
+    Forwards a command to a running daemon and copies its JSON Lines to
+    `out`. Returns the exit code, or None if no daemon is listening.
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+    with client, client.makefile("rwb") as stream:
+        stream.write(to_json_line({"command": command, "args": args}).encode())
+        stream.flush()
+        for line in stream:
+            event = json.loads(line)
+            if event.get("event") == "exit":
+                return int(event.get("code", EXIT_FAILED))
+            out.write(line.decode())
+            out.flush()
+    # The daemon went away mid-command
+    out.write(to_json_line({"event": "error", "message": "Connection to the daemon was lost."}))
+    return EXIT_FAILED
+
+
+# --- Command Line ---
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="UniCI headless mode. Prints JSON Lines.")
+    parser.add_argument("--socket", default=None, help="Daemon socket path (default: <config dir>/unici.sock)")
+    parser.add_argument("--no-daemon", action="store_true", help="Run in-process even if a daemon is listening")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Also print INFO log messages to stderr")
+    parser.add_argument("--profile", metavar="TRACE_FILE", default=None,
+                        help="Write a trace of requests and jobs to TRACE_FILE (runs in-process, or in the daemon)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    trigger = commands.add_parser("trigger", help="Trigger a Jenkins build or GitLab pipeline")
+    trigger.add_argument("backend", choices=["jenkins", "gitlab"])
+    trigger.add_argument("target", help="Jenkins job name or GitLab project ID/path")
+    trigger.add_argument("--ref", help="GitLab branch or tag")
+    trigger.add_argument("--wait", action="store_true", help="Follow the run until it finishes")
+    trigger.add_argument("--timeout", type=float, default=0, help="Seconds to wait (0 = no limit)")
+
+    wait = commands.add_parser("wait", help="Follow a build or pipeline until it finishes")
+    wait.add_argument("backend", choices=["jenkins", "gitlab"])
+    wait.add_argument("target", help="Jenkins job name or GitLab project ID/path")
+    wait.add_argument("run", help="Jenkins queue item URL or build number, or GitLab pipeline ID")
+    wait.add_argument("--timeout", type=float, default=0, help="Seconds to wait (0 = no limit)")
+
+    status = commands.add_parser("status", help="Show the status of a build or pipeline")
+    status.add_argument("backend", choices=["jenkins", "gitlab"])
+    status.add_argument("target", help="Jenkins job name or GitLab project ID/path")
+    status.add_argument("run", nargs="?", help="Jenkins build number (default: last build) or GitLab pipeline ID")
+
+    list_prs = commands.add_parser("list-prs", help="List open pull requests of a GitHub repository")
+    list_prs.add_argument("repo", help="owner/repo")
+
+    commands.add_parser("daemon", help="Serve commands over the socket, keeping connections warm")
+    commands.add_parser("ping", help="Check that the daemon (or an in-process session) works")
+    metrics = commands.add_parser("metrics", help="Show request, job and queue latency metrics")
+    metrics.add_argument("--prometheus", action="store_true", help="In the Prometheus text format")
+    commands.add_parser("stop", help="Stop the daemon")
+    return parser
+
+def main(argv=None) -> int:
+    options = build_parser().parse_args(argv)
+    socket_path = options.socket or default_socket_path()
+    args = {key: value for key, value in vars(options).items()
+            if key not in ("socket", "no_daemon", "verbose", "command", "profile")}
+
+    def log_sink(event: Dict[str, Any]):
+        if options.verbose or event.get("level") == "ERROR":
+            sys.stderr.write(to_json_line(dict(event, ts=round(time.time(), 3))))
+            sys.stderr.flush()
+
+    def emit(event: Dict[str, Any]):
+        sys.stdout.write(to_json_line(event))
+        sys.stdout.flush()
+
+    def close(session: HeadlessSession):
+        session.close()
+        if session.controller.trace_saved_to:
+            sys.stderr.write(to_json_line({"event": "trace", "path": session.controller.trace_saved_to}))
+
+    if options.command == "daemon":
+        session = HeadlessSession(log_sink, options.profile)
+        try:
+            daemon = HeadlessDaemon(session, socket_path)
+        except RuntimeError as e:
+            emit({"event": "error", "message": str(e)})
+            close(session)
+            return EXIT_FAILED
+        emit({"event": "listening", "socket": socket_path, "pid": os.getpid()})
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            close(session)
+        return EXIT_OK
+
+    # A profiled command is traced in this process, not in the daemon
+    if not options.no_daemon and not options.profile:
+        code = send_request(socket_path, options.command, args, sys.stdout)
+        if code is not None:
+            return code
+    if options.command == "stop":
+        emit({"event": "error", "message": f"No daemon is listening on {socket_path}"})
+        return EXIT_FAILED
+
+    session = HeadlessSession(log_sink, options.profile)
+    try:
+        return session.execute(options.command, args, emit)
+    except KeyboardInterrupt:
+        return EXIT_FAILED
+    finally:
+        close(session)
@@ -0,0 +1,264 @@
+"""
+UniCI Jenkins Job Index
+Every job of a Jenkins instance, including those inside folders and
+multibranch projects, for autocomplete and name resolution.
+
+The index is built by crawling folder listings (one tree=-projected
+request per folder, several folders at a time) and saved to the
+ResponseCache. A refresh only re-lists the folders whose listing is older
+than its maximum age; the rest of the tree is reused from the last crawl.
+
+Search is answered from a snapshot built once per crawl: prefix matches
+come from two presorted name lists via bisect, substring matches scan all
+names joined into one string with str.find, and fuzzy (subsequence)
+matches run a compiled regex only over the names that contain every
+character of the query, found by ANDing per-character bitmasks.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote, unquote, urlparse
+from app.response_cache import ResponseCache
+from app.scheduler import current_priority, run_with_priority
+
+CRAWL_WORKERS = 8                 # Folder listings fetched at a time
+FOLDER_MAX_AGE = 15 * 60          # Seconds a folder listing is reused by incremental refreshes
+BRANCH_PROJECT_MAX_AGE = 2 * 60   # Multibranch projects gain and lose branches more often
+DEFAULT_SEARCH_LIMIT = 20
+
+
+def jenkins_job_path(job_name: str) -> str:
+    """
+    'team/service/main' -> 'job/team/job/service/job/main', each name
+    URL-quoted (a branch 'feature%2Fx' becomes 'feature%252Fx', as Jenkins
+    expects). Names that already spell out the /job/ path are kept.
+    """
+    name = job_name.strip().strip("/")
+    if name.startswith("job/"):
+        return name
+    if "/job/" in name:
+        return f"job/{name}"
+    return "/".join(f"job/{quote(part, safe='')}" for part in name.split("/") if part)
+
+
+def jenkins_full_name(url: str) -> str:
+    """The inverse of jenkins_job_path: '.../job/team/job/service/' -> 'team/service'."""
+    parts = urlparse(url).path.strip("/").split("/")
+    names = []
+    i = 0
+    while i < len(parts) - 1:
+        if parts[i] == "job":
+            names.append(unquote(parts[i + 1]))
+            i += 2
+        else:
+            i += 1
+    return "/".join(names)
+
+
+def is_folder(item: Dict[str, Any]) -> bool:
+    """Folders, multibranch and organization projects have no build color."""
+    return "color" not in item
+
+
+def _join(folder: str, name: str) -> str:
+    return f"{folder}/{name}" if folder else name
+
+
+def _max_age(item: Dict[str, Any]) -> float:
+    return BRANCH_PROJECT_MAX_AGE if "MultiBranch" in item.get("_class", "") else FOLDER_MAX_AGE
+
+
+class _Snapshot:
+    """Immutable search structures for one crawl; replaced as a whole, so searches need no lock."""
+    def __init__(self, jobs: List[Dict[str, Any]]):
+        self.jobs = sorted(jobs, key=lambda job: job["name"].lower())
+        self.names = [job["name"].lower() for job in self.jobs]
+        self.exact = {job["name"]: job for job in self.jobs}
+        self.bases = sorted((name.rsplit("/", 1)[-1], i) for i, name in enumerate(self.names))
+        self.base_names = [base for base, _ in self.bases]
+        # One line per job; a match's line is found by bisecting the line starts
+        self.text = "\n".join(self.names) + "\n"
+        self.starts = []
+        offset = 0
+        for name in self.names:
+            self.starts.append(offset)
+            offset += len(name) + 1
+        # Bit i of char_lines[c] is set if name i contains c; a fuzzy query
+        # only has to look at the names that contain all of its characters
+        reversed_names = self.names[::-1]
+        self.char_lines = {char: int("".join("1" if char in name else "0" for name in reversed_names), 2)
+                           for char in set(self.text) - {"\n"}}
+
+
+class JobIndex:
+    """
+    Jobs of one Jenkins instance, by full name ('folder/sub/job'). Each job
+    is {"name", "url", "color", "last_build"}. Refreshes hold
+    `refresh_lock`; search() and resolve() never block.
+    """
+    def __init__(self, store: Optional[ResponseCache] = None):
+        self.store = store
+        self.jenkins_url: Optional[str] = None
+        # Folder full name ("" for the root) -> {"fetched_at", "items": raw listing}
+        self.folders: Dict[str, Dict[str, Any]] = {}
+        self.refreshed_at: Optional[float] = None
+        self.refresh_lock = threading.Lock()
+        self._snapshot = _Snapshot([])
+
+    def __len__(self) -> int:
+        return len(self._snapshot.jobs)
+
+    # --- Crawling ---
+
+    def load(self, jenkins_url: str) -> bool:
+        """Restores the last crawl of jenkins_url from the cache. Returns False if there is none."""
+        if self.store is None or not jenkins_url:
+            return False
+        entry = self.store.get("jenkins", "job_index", jenkins_url, allow_stale=True)
+        if entry is None:
+            return False
+        self._set(jenkins_url, entry["body"]["folders"], entry["stored_at"])
+        return True
+
+    def refresh(self, jenkins_url: str, list_folder: Callable[[str], List[Dict[str, Any]]],
+                force: bool = False) -> Dict[str, int]:
+        """
+        Crawls the instance. list_folder(full_name) returns a folder's items
+        ("" is the root). The root is always listed; other folders only if
+        their last listing is older than their maximum age, or with force.
+        A folder that fails keeps its last listing. Returns crawl stats.
+        """
+        last_crawl = self.folders if jenkins_url == self.jenkins_url else {}
+        previous = {} if force else last_crawl
+        now = time.time()
+        folders: Dict[str, Dict[str, Any]] = {}
+        stats = {"listed": 0, "reused": 0, "failed": 0}
+        # Crawl threads list folders with the caller's priority, so a background
+        # refresh is paced as background work by the rate governor
+        list_with_priority = partial(run_with_priority, current_priority(), list_folder)
+
+        with ThreadPoolExecutor(max_workers=CRAWL_WORKERS, thread_name_prefix="UniCI-jenkins-crawl") as executor:
+            pending = {}
+
+            def visit(folder: str, entry: Dict[str, Any]):
+                folders[folder] = entry
+                for item in entry["items"]:
+                    if not is_folder(item):
+                        continue
+                    child = _join(folder, item["name"])
+                    old = previous.get(child)
+                    if old is not None and now - old["fetched_at"] < _max_age(item):
+                        stats["reused"] += 1
+                        visit(child, old)
+                    else:
+                        pending[executor.submit(list_with_priority, child)] = child
+
+            pending[executor.submit(list_with_priority, "")] = ""
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder = pending.pop(future)
+                    try:
+                        entry = {"fetched_at": now, "items": future.result()}
+                        stats["listed"] += 1
+                    except Exception:
+                        if folder == "":
+                            raise
+                        stats["failed"] += 1
+                        entry = last_crawl.get(folder)
+                        if entry is None:
+                            continue
+                    visit(folder, entry)
+
+        self._set(jenkins_url, folders, now)
+        if self.store is not None:
+            self.store.put("jenkins", "job_index", jenkins_url, {"folders": folders})
+        return stats
+
+    def _set(self, jenkins_url: str, folders: Dict[str, Dict[str, Any]], refreshed_at: float):
+        jobs = []
+        for folder, entry in folders.items():
+            for item in entry["items"]:
+                if not is_folder(item):
+                    jobs.append({"name": _join(folder, item["name"]), "url": item.get("url"),
+                                 "color": item.get("color"),
+                                 "last_build": (item.get("lastBuild") or {}).get("number")})
+        self.jenkins_url = jenkins_url
+        self.folders = folders
+        self.refreshed_at = refreshed_at
+        self._snapshot = _Snapshot(jobs)
+
+    # --- Lookups ---
+
+    def resolve(self, name: str) -> str:
+        """
+        The full name for what the user typed: itself if it is a full name
+        (or unknown), otherwise the one job whose own name it is.
+        """
+        snapshot = self._snapshot
+        name = name.strip()
+        if not name or name in snapshot.exact:
+            return name
+        base = name.lower()
+        lo, hi = bisect_left(snapshot.base_names, base), bisect_right(snapshot.base_names, base)
+        if hi - lo == 1:
+            return snapshot.jobs[snapshot.bases[lo][1]]["name"]
+        return name
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """
+        Jobs matching query, best first: job names starting with it, full
+        names starting with it, names containing it, then names containing
+        its characters in order (fuzzy). Case-insensitive.
+        """
+        snapshot = self._snapshot
+        query = query.strip().lower()
+        if not query or not snapshot.jobs:
+            return []
+        found: List[int] = []
+        seen = set()
+
+        def take(indices) -> bool:
+            for i in indices:
+                if i not in seen:
+                    seen.add(i)
+                    found.append(i)
+                    if len(found) >= limit:
+                        return True
+            return False
+
+        # Prefix of the job's own name, then of its full name; shortest first
+        lo = bisect_left(snapshot.base_names, query)
+        hi = bisect_left(snapshot.base_names, query + "\uffff", lo)
+        if take(sorted((snapshot.bases[j][1] for j in range(lo, min(hi, lo + limit * 4))),
+                       key=lambda i: len(snapshot.names[i]))):
+            return [snapshot.jobs[i] for i in found]
+        lo = bisect_left(snapshot.names, query)
+        hi = bisect_left(snapshot.names, query + "\uffff", lo)
+        if take(range(lo, hi)):
+            return [snapshot.jobs[i] for i in found]
+
+        # Substring, then subsequence, over the joined names
+        text, starts = snapshot.text, snapshot.starts
+        if "\n" not in query:
+            position = text.find(query)
+            while position != -1:
+                line = bisect_right(starts, position) - 1
+                if take((line,)):
+                    return [snapshot.jobs[i] for i in found]
+                position = text.find(query, starts[line + 1] if line + 1 < len(starts) else len(text))
+            candidates = (1 << len(snapshot.names)) - 1
+            for char in set(query):
+                candidates &= snapshot.char_lines.get(char, 0)
+            pattern = re.compile("".join(f"[^{re.escape(char)}]*{re.escape(char)}" for char in query))
+            bits = bin(candidates)[:1:-1]       # Character i is name i's bit
+            line = bits.find("1")
+            while line != -1:
+                if pattern.match(snapshot.names[line]) and take((line,)):
+                    break
+                line = bits.find("1", line + 1)
+        return [snapshot.jobs[i] for i in found]
@@ -0,0 +1,114 @@
+"""
+UniCI Log Buffer
+Append-only store for build logs that may be hundreds of megabytes.
+
+Log bytes are spooled to an anonymous temporary file in chunks and only
+an array of line start offsets is kept in memory, so the GUI can read any
+window of lines without holding the whole log. Search scans the file in
+fixed-size chunks so it can be spread over several GUI ticks.
+"""
+import bisect
+import tempfile
+import threading
+from array import array
+from typing import Iterator, List
+
+SEARCH_CHUNK_SIZE = 1024 * 1024
+
+
+class ChunkedLogBuffer:
+    """
+    Thread-safe: a worker thread appends while the GUI thread reads lines.
+    """
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._offsets = array("Q", [0])  # Byte offset where each line starts
+        self._size = 0
+        self._lock = threading.Lock()
+        self.closed = False
+
+    @property
+    def size(self) -> int:
+        """Total bytes received so far."""
+        return self._size
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines, counting a trailing partial line."""
+        with self._lock:
+            return self._line_count()
+
+    def append(self, data: bytes):
+        """Appends raw log bytes and indexes any new line starts."""
+        if not data:
+            return
+        with self._lock:
+            if self.closed:
+                return
+            self._file.seek(self._size)
+            self._file.write(data)
+            position = data.find(b"\n")
+            while position != -1:
+                self._offsets.append(self._size + position + 1)
+                position = data.find(b"\n", position + 1)
+            self._size += len(data)
+
+    def get_lines(self, first: int, count: int) -> List[str]:
+        """Returns up to `count` decoded lines starting at line index `first`."""
+        with self._lock:
+            total = self._line_count()
+            first = max(0, min(first, total))
+            last = min(total, first + count)
+            if first >= last:
+                return []
+            start = self._offsets[first]
+            end = self._offsets[last] if last < len(self._offsets) else self._size
+            self._file.seek(start)
+            data = self._file.read(end - start)
+        return data.decode("utf-8", errors="replace").splitlines()
+
+    def search(self, needle: str, start_line: int = 0) -> Iterator[List[int]]:
+        """
+        Case-insensitive search. Yields the matching line indexes found in
+        each scanned chunk (possibly an empty list), so callers can resume
+        it a chunk at a time without blocking the GUI.
+        """
+        pattern = needle.lower().encode("utf-8")
+        if not pattern:
+            return
+        line = start_line
+        while True:
+            with self._lock:
+                total = self._line_count()
+                if line >= total or self.closed:
+                    return
+                # Read whole lines, about SEARCH_CHUNK_SIZE bytes at a time
+                start = self._offsets[line]
+                end_line = bisect.bisect_right(self._offsets, start + SEARCH_CHUNK_SIZE, lo=line + 1)
+                end_line = min(max(end_line, line + 1), total)
+                end = self._offsets[end_line] if end_line < len(self._offsets) else self._size
+                self._file.seek(start)
+                data = self._file.read(end - start).lower()
+                offsets = self._offsets[line:end_line + 1]
+
+            matches = []
+            position = data.find(pattern)
+            while position != -1:
+                index = bisect.bisect_right(offsets, start + position) - 1
+                matches.append(line + index)
+                # Skip the rest of this line: one hit per line is enough
+                next_line = offsets[index + 1] - start if index + 1 < len(offsets) else len(data)
+                position = data.find(pattern, next_line)
+            yield matches
+            line = end_line
+
+    def close(self):
+        """Deletes the temporary file."""
+        with self._lock:
+            if not self.closed:
+                self.closed = True
+                self._file.close()
+
+    def _line_count(self) -> int:
+        """Caller must hold the lock."""
+        return len(self._offsets) - (1 if self._offsets[-1] == self._size else 0)
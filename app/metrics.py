@@ -0,0 +1,439 @@
+"""
+UniCI Metrics
+Latency histograms and counters for every outbound request, scheduler job
+and GUI-queue hop, and an optional trace of the same events:
+
+    Diagnostics tab        controller.get_diagnostics()
+    Prometheus text        http://127.0.0.1:<metrics_port>/metrics   (metrics_port in config.json)
+    Trace file             python run.py --profile [trace.json]
+                           (Chrome trace format: open it in ui.perfetto.dev or chrome://tracing)
+
+Request URLs are reduced to endpoints ('/job/*/{id}/api/json') so that
+the number of series stays bounded. Like the services, this module knows
+nothing about the GUI; it only needs the standard library.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Upper bounds (seconds) of the histogram buckets, Prometheus style; the last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MAX_ENDPOINTS = 200               # Per backend; further endpoints are counted as "(other)"
+MAX_EVENTS = 100                  # Recent warnings kept for the Diagnostics tab
+MAX_TRACE_EVENTS = 500_000        # About 100 MB of trace; later events are dropped and counted
+DEFAULT_METRICS_BIND = "127.0.0.1"
+TRACE_FLAG = "--profile"
+TRACE_ENV = "UNICI_TRACE"
+
+# Path segments followed by names that would otherwise make one series per job, repo or project
+NAMED_SEGMENTS = {"job": 1, "repos": 2, "projects": 1, "users": 1, "orgs": 1, "groups": 1}
+HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+@lru_cache(maxsize=4096)
+def endpoint(url: str) -> str:
+    """
+    The endpoint of a request URL, without host, query and names:
+    'https://ci/job/team/job/app/42/api/json?tree=x' -> '/job/*/job/*/{id}/api/json'.
+    """
+    path = url.split("?", 1)[0].split("#", 1)[0]
+    scheme_end = path.find("://")
+    if scheme_end != -1:
+        host_end = path.find("/", scheme_end + 3)
+        path = path[host_end:] if host_end != -1 else "/"
+    parts = path.split("/")
+    skip = 0
+    for i, part in enumerate(parts):
+        if skip and part:
+            parts[i] = "*"
+            skip -= 1
+        elif part in NAMED_SEGMENTS:
+            skip = NAMED_SEGMENTS[part]
+        elif part.isdigit() or (len(part) == 40 and HEX_DIGITS.issuperset(part)):
+            parts[i] = "{id}"
+    return "/".join(parts) or "/"
+
+
+def trace_path_from_argv(argv: List[str]) -> Optional[str]:
+    """
+    '--profile [path]' (or UNICI_TRACE=path) -> where to write the trace.
+    Without a path, a timestamped file in the working directory.
+    """
+    if TRACE_FLAG in argv:
+        index = argv.index(TRACE_FLAG)
+        if index + 1 < len(argv) and not argv[index + 1].startswith("-"):
+            return argv[index + 1]
+        return time.strftime("unici-trace-%Y%m%d-%H%M%S.json")
+    return os.environ.get(TRACE_ENV) or None
+
+
+def callable_name(func: Callable) -> str:
+    """'AppController._jenkins_build_worker' for methods, partials and plain functions."""
+    while hasattr(func, "func"):      # functools.partial
+        func = func.func
+    return getattr(func, "__qualname__", None) or getattr(func, "__name__", None) or func.__class__.__name__
+
+
+class Histogram:
+    """Counts of observations per latency bucket, with their sum and maximum. Not thread-safe."""
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1   # First bucket whose bound is >= seconds
+        self.total += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Estimated like Prometheus' histogram_quantile: linear within the bucket, capped at the maximum."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+    def summary_ms(self) -> Dict[str, float]:
+        return {"count": self.count, "p50": self.quantile(0.5) * 1000, "p95": self.quantile(0.95) * 1000,
+                "p99": self.quantile(0.99) * 1000, "max": self.max * 1000,
+                "avg": self.total / self.count * 1000 if self.count else 0.0}
+
+
+class _RequestSeries:
+    """Everything recorded for one (backend, method, endpoint)."""
+    __slots__ = ("latency", "statuses", "bytes_sent", "bytes_received", "retries", "errors")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses: Dict[str, int] = {}    # "200", "404", or an exception name for failed requests
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.errors = 0
+
+
+class Tracer:
+    """
+    Collects spans in the Chrome trace event format and writes them to
+    `path` on save(). Times are time.perf_counter() values.
+    """
+    def __init__(self, path: str, max_events: int = MAX_TRACE_EVENTS):
+        self.path = path
+        self.max_events = max_events
+        self.dropped = 0
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _add(self, event: Dict[str, Any]):
+        thread = threading.current_thread()
+        event["pid"] = self._pid
+        event.setdefault("tid", thread.ident)
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._events.append(event)
+            if thread.ident not in self._threads:
+                self._threads[thread.ident] = thread.name
+
+    def _us(self, moment: float) -> float:
+        return round((moment - self._origin) * 1_000_000, 1)
+
+    def span(self, name: str, category: str, start: float, duration: float,
+             args: Optional[Dict[str, Any]] = None):
+        """A span on the calling thread. Spans on one thread must nest."""
+        self._add({"name": name, "cat": category, "ph": "X", "ts": self._us(start),
+                   "dur": round(duration * 1_000_000, 1), "args": args or {}})
+
+    def async_span(self, name: str, category: str, start: float, duration: float,
+                   args: Optional[Dict[str, Any]] = None):
+        """A span that may overlap others on the same thread, e.g. requests on the asyncio loop."""
+        span_id = next(self._ids)
+        self._add({"name": name, "cat": category, "ph": "b", "id": span_id, "ts": self._us(start), "args": args or {}})
+        self._add({"name": name, "cat": category, "ph": "e", "id": span_id, "ts": self._us(start + duration)})
+
+    def instant(self, name: str, category: str, args: Optional[Dict[str, Any]] = None):
+        self._add({"name": name, "cat": category, "ph": "i", "s": "t",
+                   "ts": self._us(time.perf_counter()), "args": args or {}})
+
+    def save(self) -> str:
+        """Writes the trace (atomically) and returns its path."""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in threads.items()]
+        metadata.append({"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": "UniCI"}})
+        temp_path = f"{self.path}.tmp"
+        # json.dumps encodes in C in one go; json.dump to a file would encode chunk by chunk in Python
+        text = json.dumps({"traceEvents": metadata + events, "displayTimeUnit": "ms",
+                           "otherData": {"dropped_events": self.dropped}}, separators=(",", ":"))
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, self.path)
+        return self.path
+
+
+class Metrics:
+    """
+    Thread-safe registry. The services call observe_request(), the
+    scheduler observe_job(), the GUI observe_gui(); anything worth a
+    warning goes through event(), which also calls `on_event`.
+    """
+    def __init__(self, tracer: Optional[Tracer] = None):
+        self.tracer = tracer
+        # Called with (source, kind, message) for every event(), on the recording thread
+        self.on_event: Optional[Callable[[str, str, str], None]] = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self._requests: Dict[Tuple[str, str, str], _RequestSeries] = {}
+            self._endpoints: Dict[str, set] = {}
+            self._job_wait: Dict[str, Histogram] = {}
+            self._job_run: Dict[str, Histogram] = {}
+            self._job_outcomes: Dict[Tuple[str, str], int] = {}
+            self._gui_hop = Histogram()
+            self._gui_run = Histogram()
+            self._event_counts: Dict[Tuple[str, str], int] = {}
+            self._events: Deque[Tuple[float, str, str, str]] = deque(maxlen=MAX_EVENTS)
+
+    # --- Recording ---
+
+    def observe_request(self, backend: str, method: str, url: str, status: Optional[int], started: float,
+                        duration: float, bytes_sent: int = 0, bytes_received: int = 0, retries: int = 0,
+                        error: Optional[str] = None, overlapping: bool = False):
+        """
+        One outbound request, retries included. `status` is None and `error`
+        the exception name if no response arrived. `overlapping` marks
+        requests that share a thread with others in flight (asyncio).
+        """
+        path = endpoint(url)
+        outcome = str(status) if status is not None else (error or "error")
+        with self._lock:
+            seen = self._endpoints.setdefault(backend, set())
+            if path not in seen:
+                if len(seen) >= MAX_ENDPOINTS:
+                    path = "(other)"
+                else:
+                    seen.add(path)
+            series = self._requests.get((backend, method, path))
+            if series is None:
+                series = self._requests[(backend, method, path)] = _RequestSeries()
+            series.latency.observe(duration)
+            series.statuses[outcome] = series.statuses.get(outcome, 0) + 1
+            series.bytes_sent += bytes_sent
+            series.bytes_received += bytes_received
+            series.retries += retries
+            if status is None or status >= 500:
+                series.errors += 1
+        if self.tracer is not None:
+            args = {"endpoint": path, "status": outcome, "bytes": bytes_received, "retries": retries}
+            record = self.tracer.async_span if overlapping else self.tracer.span
+            record(f"{method} {backend}", "http", started, duration, args)
+
+    def observe_job(self, backend: Optional[str], name: str, started: float, wait: float,
+                    duration: float, outcome: str):
+        """A scheduler job: time spent queued, then running."""
+        key = backend or "none"
+        with self._lock:
+            self._job_wait.setdefault(key, Histogram()).observe(wait)
+            self._job_run.setdefault(key, Histogram()).observe(duration)
+            self._job_outcomes[(key, outcome)] = self._job_outcomes.get((key, outcome), 0) + 1
+        if self.tracer is not None:
+            self.tracer.span(name, "job", started, duration,
+                             {"backend": key, "queue_wait_ms": round(wait * 1000, 3), "outcome": outcome})
+
+    def observe_gui(self, hop: float, name: Optional[str] = None, started: float = 0.0, duration: float = 0.0):
+        """
+        One item taken off the GUI queue after waiting `hop` seconds. For
+        callbacks, `name` and the time it took to run on the GUI thread.
+        """
+        with self._lock:
+            self._gui_hop.observe(hop)
+            if name is not None:
+                self._gui_run.observe(duration)
+        if self.tracer is not None and name is not None:
+            self.tracer.span(name, "gui", started, duration, {"queue_hop_ms": round(hop * 1000, 3)})
+
+    def observe_gui_hops(self, hops: List[float]):
+        """Queue waits of a batch of items that needed no callback (console messages)."""
+        with self._lock:
+            for hop in hops:
+                self._gui_hop.observe(hop)
+
+    def event(self, source: str, kind: str, message: str):
+        """A condition worth a warning, e.g. a Jenkins crumb fallback. Counted, kept and passed to on_event."""
+        with self._lock:
+            self._event_counts[(source, kind)] = self._event_counts.get((source, kind), 0) + 1
+            self._events.append((time.time(), source, kind, message))
+        if self.tracer is not None:
+            self.tracer.instant(kind, source, {"message": message})
+        if self.on_event is not None:
+            self.on_event(source, kind, message)
+
+    # --- Reporting ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything recorded so far, as plain data for the Diagnostics tab (milliseconds)."""
+        with self._lock:
+            requests = []
+            backends: Dict[str, Dict[str, Any]] = {}
+            for (backend, method, path), series in self._requests.items():
+                row = {"backend": backend, "method": method, "endpoint": path, "errors": series.errors,
+                       "retries": series.retries, "bytes_sent": series.bytes_sent,
+                       "bytes_received": series.bytes_received, "statuses": dict(series.statuses),
+                       "total_ms": series.latency.total * 1000}
+                row.update(series.latency.summary_ms())
+                requests.append(row)
+                totals = backends.setdefault(backend, {"latency": Histogram(), "errors": 0, "retries": 0,
+                                                       "bytes_received": 0})
+                totals["latency"].merge(series.latency)
+                for key in ("errors", "retries", "bytes_received"):
+                    totals[key] += row[key]
+            jobs = {}
+            for backend, wait in self._job_wait.items():
+                jobs[backend] = {"wait": wait.summary_ms(), "run": self._job_run[backend].summary_ms(),
+                                 "failed": self._job_outcomes.get((backend, "failed"), 0)}
+            snapshot = {
+                "uptime_s": time.time() - self.started_at,
+                "requests": sorted(requests, key=lambda row: row["total_ms"], reverse=True),
+                "backends": {backend: dict(totals, latency=totals["latency"].summary_ms())
+                             for backend, totals in backends.items()},
+                "jobs": jobs,
+                "gui": {"hop": self._gui_hop.summary_ms(), "run": self._gui_run.summary_ms()},
+                "events": list(self._events),
+                "event_counts": {f"{source}/{kind}": count for (source, kind), count in self._event_counts.items()},
+            }
+        if self.tracer is not None:
+            snapshot["trace"] = {"path": self.tracer.path, "dropped": self.tracer.dropped}
+        return snapshot
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name: str, labels: Dict[str, str], hist: Histogram):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), hist.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_labels(dict(labels, le=le))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {hist.total}")
+            lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+
+        with self._lock:
+            requests = sorted(self._requests.items())
+            header("unici_http_request_duration_seconds", "histogram", "Outbound request latency, retries included.")
+            for (backend, method, path), series in requests:
+                histogram("unici_http_request_duration_seconds",
+                          {"backend": backend, "method": method, "endpoint": path}, series.latency)
+            header("unici_http_requests_total", "counter", "Outbound requests by status code or exception.")
+            for (backend, method, path), series in requests:
+                for status, count in sorted(series.statuses.items()):
+                    labels = {"backend": backend, "method": method, "endpoint": path, "status": status}
+                    lines.append(f"unici_http_requests_total{_labels(labels)} {count}")
+            for name, attribute, help_text in (
+                ("unici_http_request_bytes_total", "bytes_sent", "Request body bytes sent."),
+                ("unici_http_response_bytes_total", "bytes_received", "Response bytes received."),
+                ("unici_http_retries_total", "retries", "Retries done by the transport."),
+            ):
+                header(name, "counter", help_text)
+                for (backend, method, path), series in requests:
+                    labels = {"backend": backend, "method": method, "endpoint": path}
+                    lines.append(f"{name}{_labels(labels)} {getattr(series, attribute)}")
+
+            header("unici_job_queue_wait_seconds", "histogram", "Time scheduler jobs wait for a worker.")
+            for backend, hist in sorted(self._job_wait.items()):
+                histogram("unici_job_queue_wait_seconds", {"backend": backend}, hist)
+            header("unici_job_run_seconds", "histogram", "Time scheduler jobs run.")
+            for backend, hist in sorted(self._job_run.items()):
+                histogram("unici_job_run_seconds", {"backend": backend}, hist)
+            header("unici_jobs_total", "counter", "Scheduler jobs by outcome.")
+            for (backend, outcome), count in sorted(self._job_outcomes.items()):
+                lines.append(f"unici_jobs_total{_labels({'backend': backend, 'outcome': outcome})} {count}")
+
+            header("unici_gui_queue_hop_seconds", "histogram", "Time from a worker queueing a GUI update to the GUI taking it.")
+            histogram("unici_gui_queue_hop_seconds", {}, self._gui_hop)
+            header("unici_gui_update_seconds", "histogram", "Time GUI callbacks run on the GUI thread.")
+            histogram("unici_gui_update_seconds", {}, self._gui_run)
+            header("unici_events_total", "counter", "Warnings such as Jenkins crumb fallbacks.")
+            for (source, kind), count in sorted(self._event_counts.items()):
+                lines.append(f"unici_events_total{_labels({'source': source, 'kind': kind})} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class MetricsServer:
+    """Serves render() as Prometheus text on GET /metrics. Binds to localhost only."""
+    def __init__(self, port: int, render: Callable[[], str], bind: str = DEFAULT_METRICS_BIND):
+        self.requested_port = port
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if urlparse(self.path).path.rstrip("/") != "/metrics":
+                    status, payload = 404, b"Not Found\n"
+                else:
+                    status, payload = 200, render().encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer((bind, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_port
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="UniCI-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
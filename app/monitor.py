@@ -0,0 +1,358 @@
+"""
+UniCI Build Monitor
+Follows triggered Jenkins builds and GitLab pipelines until they finish.
+
+All watches share one timer thread. When a watch is due, its poll runs
+as a background job on the controller's scheduler, so hundreds of
+watches cost one thread plus the scheduler's bounded workers. Poll
+intervals adapt: they back off while nothing changes and tighten again
+on a state change or when a build is close to its estimated end. Failed
+polls back off as well; a watch is only given up once its polls have
+kept failing for MAX_ERROR_SECONDS.
+Log watches reuse the same machinery to stream console output
+incrementally: each poll fetches only the bytes past the last offset.
+Statuses pushed by webhooks are applied like poll results; while a
+backend keeps delivering events, its polls drop to a slow safety net.
+"""
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from app.log_buffer import ChunkedLogBuffer
+
+MIN_INTERVAL = 2.0          # Seconds between polls right after a change
+MAX_INTERVAL = 60.0         # Upper bound while nothing changes
+BACKOFF_FACTOR = 1.5
+MAX_ERROR_SECONDS = 600.0   # A watch whose polls keep failing this long is given up
+MAX_WATCH_SECONDS = 12 * 3600
+WEBHOOK_FRESH_SECONDS = 300.0   # A backend counts as pushing events for this long after its last one
+WEBHOOK_SAFETY_INTERVAL = MAX_INTERVAL   # Poll interval while its events are fresh
+
+JENKINS_RESULTS = {
+    "SUCCESS": "Success",
+    "FAILURE": "Failed",
+    "UNSTABLE": "Unstable",
+    "ABORTED": "Aborted",
+    "NOT_BUILT": "Not Built",
+}
+GITLAB_DONE_STATES = {"success", "failed", "canceled", "skipped"}
+
+
+def next_interval(interval: float, changed: bool, eta: Optional[float]) -> float:
+    """Exponential backoff while unchanged, tightened near the estimated end."""
+    interval = MIN_INTERVAL if changed else min(MAX_INTERVAL, interval * BACKOFF_FACTOR)
+    if eta is not None and eta < interval:
+        interval = max(MIN_INTERVAL, eta + 1.0)
+    return interval
+
+
+class WatchStatus(NamedTuple):
+    """Result of one poll."""
+    state: str                      # e.g. "Queued", "Running", "Success", "Failed"
+    detail: str = ""                # Link or extra info shown next to the state
+    done: bool = False              # No more polling needed
+    eta: Optional[float] = None     # Seconds until the estimated end, if known
+    received_at: Optional[float] = None  # perf_counter() arrival time of a pushed (webhook) status
+
+
+class Watch:
+    """Base class: something that can be polled until it reaches a final state."""
+    backend = ""
+    quiet = False   # Quiet watches don't report transitions (e.g. log streams)
+
+    def __init__(self, key: str, label: str):
+        self.key = key
+        self.label = label
+        self.state: Optional[str] = None
+        self.detail = ""
+        self.interval = MIN_INTERVAL
+        self.errors = 0
+        self.failing_since: Optional[float] = None   # monotonic() of the first failed poll in a row
+        self.started_at = time.monotonic()
+        self.cancelled = False
+
+    def poll(self, service) -> WatchStatus:
+        raise NotImplementedError
+
+    def status_target(self) -> Optional[Tuple[str, str]]:
+        """What AsyncApiService.get_statuses needs to re-read this watch's status, if it can."""
+        return None
+
+
+def jenkins_build_status(build: Dict) -> WatchStatus:
+    """A Jenkins build's JSON (JENKINS_BUILD_TREE fields) as a WatchStatus."""
+    url = build.get("url", "")
+    if build.get("building"):
+        eta = None
+        if build.get("timestamp") and build.get("estimatedDuration", -1) > 0:
+            end = (build["timestamp"] + build["estimatedDuration"]) / 1000.0
+            eta = max(0.0, end - time.time())
+        return WatchStatus("Running", url, eta=eta)
+    result = build.get("result")
+    if result is None:
+        return WatchStatus("Running", url)
+    state = JENKINS_RESULTS.get(result, result.title())
+    # Link straight to the console log when something went wrong
+    detail = f"{url}console" if state != "Success" and url else url
+    return WatchStatus(state, detail, done=True)
+
+
+def gitlab_pipeline_status(pipeline: Dict) -> WatchStatus:
+    """A GitLab pipeline's JSON as a WatchStatus linking to the pipeline."""
+    status = pipeline.get("status", "unknown")
+    return WatchStatus(status.replace("_", " ").title(), pipeline.get("web_url", ""),
+                       done=status in GITLAB_DONE_STATES)
+
+
+class JenkinsBuildWatch(Watch):
+    """Follows a Jenkins queue item to its build number, then the build itself."""
+    backend = "jenkins"
+
+    def __init__(self, job_name: str, queue_url: str, build_number: Optional[int] = None):
+        # A known build number skips the queue (e.g. following a build started elsewhere)
+        super().__init__(f"jenkins:{job_name}:{queue_url or f'#{build_number}'}",
+                         f"{job_name} #{build_number}" if build_number is not None else job_name)
+        self.job_name = job_name
+        self.queue_url = queue_url
+        self.build_number = build_number
+
+    def poll(self, service) -> WatchStatus:
+        if self.build_number is None:
+            item = service.get_jenkins_queue_item(self.queue_url)
+            if item.get("cancelled"):
+                return WatchStatus("Cancelled", "Removed from the Jenkins queue", done=True)
+            executable = item.get("executable")
+            if not executable:
+                return WatchStatus("Queued", item.get("why") or "")
+            self.build_number = executable["number"]
+            self.label = f"{self.job_name} #{self.build_number}"
+
+        return jenkins_build_status(service.get_jenkins_build_status(self.job_name, str(self.build_number)))
+
+    def status_target(self) -> Optional[Tuple[str, str]]:
+        return (self.job_name, str(self.build_number)) if self.build_number is not None else None
+
+
+class GitLabPipelineWatch(Watch):
+    """Follows a GitLab pipeline and summarises its jobs."""
+    backend = "gitlab"
+
+    def __init__(self, project_id: str, pipeline_id: str):
+        super().__init__(f"gitlab:{project_id}:{pipeline_id}", f"{project_id} pipeline #{pipeline_id}")
+        self.project_id = project_id
+        self.pipeline_id = pipeline_id
+
+    def poll(self, service) -> WatchStatus:
+        pipeline = service.get_gitlab_pipeline_status(self.project_id, self.pipeline_id)
+        status = pipeline.get("status", "unknown")
+        detail = pipeline.get("web_url", "")
+        if status == "running":
+            jobs = service.get_gitlab_pipeline_jobs(self.project_id, self.pipeline_id)
+            finished = sum(1 for job in jobs if job.get("status") in GITLAB_DONE_STATES)
+            if jobs:
+                detail = f"{finished}/{len(jobs)} jobs done  {detail}"
+        elif status == "failed":
+            jobs = service.get_gitlab_pipeline_jobs(self.project_id, self.pipeline_id)
+            failed = [job for job in jobs if job.get("status") == "failed"]
+            if failed:
+                detail = f"{failed[0].get('name')} failed: {failed[0].get('web_url', '')}"
+        return gitlab_pipeline_status(pipeline)._replace(detail=detail)
+
+    def status_target(self) -> Optional[Tuple[str, str]]:
+        return (self.project_id, self.pipeline_id)
+
+
+class JenkinsLogWatch(Watch):
+    """Streams a Jenkins console log into a ChunkedLogBuffer until the build ends."""
+    backend = "jenkins"
+    quiet = True
+
+    def __init__(self, job_name: str, build_number: str, buffer: ChunkedLogBuffer,
+                 on_update: Callable[[bool], None]):
+        super().__init__(f"jenkins-log:{job_name}:{build_number}", f"{job_name} #{build_number} log")
+        self.job_name = job_name
+        self.build_number = build_number
+        self.buffer = buffer
+        self.on_update = on_update  # Called with done=True/False whenever new text arrived
+        self.offset = 0
+
+    def poll(self, service) -> WatchStatus:
+        offset, more = service.stream_jenkins_log(self.job_name, self.build_number, self.offset, self.buffer.append)
+        grew = offset != self.offset
+        self.offset = offset
+        if grew or not more:
+            self.on_update(not more)
+        # The offset is the detail, so new output counts as a change and keeps polling tight
+        return WatchStatus("Streaming", str(offset), done=not more)
+
+
+class GitLabTraceWatch(Watch):
+    """Streams a GitLab job trace into a ChunkedLogBuffer until the job ends."""
+    backend = "gitlab"
+    quiet = True
+
+    def __init__(self, project_id: str, job_id: str, buffer: ChunkedLogBuffer,
+                 on_update: Callable[[bool], None]):
+        super().__init__(f"gitlab-trace:{project_id}:{job_id}", f"{project_id} job #{job_id} trace")
+        self.project_id = project_id
+        self.job_id = job_id
+        self.buffer = buffer
+        self.on_update = on_update
+        self.offset = 0
+
+    def poll(self, service) -> WatchStatus:
+        # Read the status first so the trace fetched afterwards is complete once it says done
+        done = service.get_gitlab_job(self.project_id, self.job_id).get("status") in GITLAB_DONE_STATES
+        offset = service.stream_gitlab_job_trace(self.project_id, self.job_id, self.offset, self.buffer.append)
+        grew = offset != self.offset
+        self.offset = offset
+        if grew or done:
+            self.on_update(done)
+        return WatchStatus("Streaming", str(offset), done=done)
+
+
+class BuildMonitor:
+    """
+    Polls all active watches from a single timer thread.
+    `submit(func, backend)` runs a poll off-thread and returns a Future
+    (the controller passes its scheduler). `on_transition(watch, status)`
+    is called whenever a watch changes state, from a worker thread.
+    """
+    def __init__(self, service, submit: Callable[[Callable, str], Future],
+                 on_transition: Callable[[Watch, WatchStatus], None]):
+        self.service = service
+        self._submit = submit
+        self._on_transition = on_transition
+        self._cond = threading.Condition()
+        self._due: List[Tuple[float, int, Watch]] = []  # heap of (next_due, seq, watch)
+        self._seq = itertools.count()
+        self._watches: Dict[str, Watch] = {}
+        self._apply_lock = threading.Lock()     # A poll result and a pushed status never interleave
+        self._event_at: Dict[str, float] = {}   # Last webhook event per backend (monotonic)
+        self._stopped = False
+        self._thread = threading.Thread(target=self._tick_loop, name="UniCI-monitor", daemon=True)
+        self._thread.start()
+
+    def watch(self, watch: Watch, delay: float = 0.0) -> Watch:
+        """Starts following a build or pipeline."""
+        with self._cond:
+            self._watches[watch.key] = watch
+            self._schedule(watch, delay)
+        return watch
+
+    def cancel(self, key: str):
+        """Stops following a watch."""
+        with self._cond:
+            watch = self._watches.pop(key, None)
+            if watch is not None:
+                watch.cancelled = True
+
+    def push(self, backend: str, matches: Callable[[Watch], bool], status: WatchStatus) -> int:
+        """
+        Applies a status pushed by a webhook to every active watch it
+        matches, exactly like a poll result. Returns the number updated.
+        """
+        self.note_event(backend)
+        with self._cond:
+            watches = [watch for watch in self._watches.values()
+                       if watch.backend == backend and not watch.quiet and matches(watch)]
+        for watch in watches:
+            self._apply(watch, status)
+        return len(watches)
+
+    def note_event(self, backend: str):
+        """Records that a backend delivered a webhook event, so its polls can back off."""
+        self._event_at[backend] = time.monotonic()
+
+    def events_fresh(self, backend: str) -> bool:
+        event_at = self._event_at.get(backend)
+        return event_at is not None and time.monotonic() - event_at < WEBHOOK_FRESH_SECONDS
+
+    def active_watches(self) -> List[Watch]:
+        with self._cond:
+            return list(self._watches.values())
+
+    def stop(self):
+        """Stops the timer thread. Polls already running finish on their own."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join(1.0)
+
+    # --- Internals ---
+
+    def _schedule(self, watch: Watch, delay: float):
+        """Caller must hold the lock."""
+        heapq.heappush(self._due, (time.monotonic() + delay, next(self._seq), watch))
+        self._cond.notify()
+
+    def _apply(self, watch: Watch, status: WatchStatus) -> bool:
+        """Records a polled or pushed status and reports it if it changed. Returns whether it did."""
+        with self._apply_lock:
+            if watch.cancelled:
+                return False  # Finished by a pushed event while this poll was in flight
+            changed = status.state != watch.state or status.detail != watch.detail
+            watch.state, watch.detail = status.state, status.detail
+            if status.done:
+                self.cancel(watch.key)
+        if (changed or status.done) and (not watch.quiet or status.state == "Monitor Error"):
+            self._on_transition(watch, status)
+        return changed
+
+    def _tick_loop(self):
+        """Sleeps until the earliest watch is due, then dispatches every due watch."""
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    now = time.monotonic()
+                    if self._due and self._due[0][0] <= now:
+                        break
+                    self._cond.wait(self._due[0][0] - now if self._due else None)
+                if self._stopped:
+                    return
+                due = []
+                while self._due and self._due[0][0] <= now:
+                    due.append(heapq.heappop(self._due)[2])
+
+            for watch in due:
+                if watch.cancelled:
+                    continue
+                try:
+                    self._submit(lambda w=watch: self._poll(w), watch.backend)
+                except RuntimeError:
+                    return  # Scheduler shut down
+
+    def _poll(self, watch: Watch):
+        """Runs on a scheduler worker: polls once and reschedules the watch."""
+        try:
+            status, error = watch.poll(self.service), None
+        except Exception as e:
+            status, error = None, e
+
+        if error is None:
+            watch.errors, watch.failing_since = 0, None
+            changed, eta = self._apply(watch, status), status.eta
+        else:
+            # Not a change: the last known state stays and polls keep backing
+            # off, so a short server restart doesn't end the watch
+            watch.errors += 1
+            if watch.failing_since is None:
+                watch.failing_since = time.monotonic()
+            changed, eta = False, None
+            if time.monotonic() - watch.failing_since >= MAX_ERROR_SECONDS:
+                self._apply(watch, WatchStatus("Monitor Error", str(error), done=True))
+        if watch.cancelled:
+            return
+        if time.monotonic() - watch.started_at > MAX_WATCH_SECONDS:
+            self.cancel(watch.key)
+            return
+
+        watch.interval = next_interval(watch.interval, changed, eta)
+        if self.events_fresh(watch.backend):
+            # Events are arriving, so polling is only a safety net for missed ones
+            watch.interval = max(watch.interval, WEBHOOK_SAFETY_INTERVAL)
+        with self._cond:
+            if not watch.cancelled and not self._stopped:
+                self._schedule(watch, watch.interval)
@@ -0,0 +1,266 @@
+"""
+UniCI Pull Request Inbox
+Open pull requests of many repositories merged into one in-memory index.
+
+The GitHub tab filters and sorts the inbox on every keystroke, so nothing
+here rescans or re-sorts the whole list per query: the index keeps the
+set of PR keys per repository, author, base branch and review decision,
+plus a presorted key list per sort order that is only rebuilt after a
+sync changed something. A query intersects the facet sets (smallest
+first) and walks one presorted list.
+
+Each repository's PRs and sync cursor (the newest updated_at seen) are
+saved to the ResponseCache, so the inbox paints immediately on the next
+launch and its first sync is already incremental.
+"""
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from app.response_cache import ResponseCache
+
+FACETS = ("repo", "author", "base", "review")
+REVIEW_NONE = "NONE"      # No review decision: none required, or unknown (REST)
+# Sort order name -> key; orders are stored ascending and walked backwards for descending
+SORT_KEYS = {
+    "updated": lambda pr: pr.get("updated_at") or "",
+    "created": lambda pr: pr.get("created_at") or pr.get("updated_at") or "",
+    "repo": lambda pr: (pr["repo"].lower(), pr["number"]),
+    "author": lambda pr: (pr["user"]["login"].lower(), pr.get("updated_at") or ""),
+}
+SMALL_RESULT_RATIO = 8    # Below 1/8 of the index, sorting the candidates beats walking the full order
+
+
+def parse_sources(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Splits the repo entry into (repos, owners). Repositories are
+    'owner/name'; 'org:name', 'user:name' or a bare name mean every
+    repository of that organization or user. Separated by commas or spaces.
+    """
+    repos: List[str] = []
+    owners: List[str] = []
+    for term in re.split(r"[,\s]+", text.strip()):
+        if not term:
+            continue
+        if "/" in term:
+            repos.append(term.strip("/"))
+        else:
+            owners.append(term.split(":", 1)[-1])
+    return list(dict.fromkeys(repos)), list(dict.fromkeys(owners))
+
+
+def pr_key(repo: str, number: int) -> str:
+    return f"{repo}#{number}"
+
+
+def facet_values(pr: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "repo": pr["repo"],
+        "author": pr["user"]["login"],
+        "base": pr["base"]["ref"],
+        "review": pr.get("review_decision") or REVIEW_NONE,
+    }
+
+
+class PullRequestIndex:
+    """
+    Thread-safe index of open PRs keyed by 'owner/repo#number'. Every PR
+    it holds carries "repo" and "key" fields in addition to its API shape.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prs: Dict[str, Dict[str, Any]] = {}
+        self._facets: Dict[str, Dict[str, Set[str]]] = {facet: {} for facet in FACETS}
+        self._search_text: Dict[str, str] = {}
+        # Sort name -> (keys ascending, key -> position); dropped whenever a PR changes
+        self._orders: Dict[str, Tuple[List[str], Dict[str, int]]] = {}
+        self.version = 0      # Bumped on every change, so views can skip no-op refreshes
+
+    def __len__(self) -> int:
+        return len(self._prs)
+
+    # --- Updates ---
+
+    def replace_repo(self, repo: str, prs: Iterable[Dict[str, Any]]) -> int:
+        """Replaces all of a repository's PRs (after a full sync). Returns how many changed."""
+        with self._lock:
+            keep = set()
+            changed = 0
+            for pr in prs:
+                keep.add(pr_key(repo, pr["number"]))
+                changed += self._upsert(repo, pr)
+            for key in self._facets["repo"].get(repo, set()) - keep:
+                changed += self._remove(key)
+            return self._changed(changed)
+
+    def update_repo(self, repo: str, open_prs: Iterable[Dict[str, Any]], closed: Iterable[int]) -> int:
+        """Applies an incremental sync: upserts changed open PRs, drops closed ones. Returns how many changed."""
+        with self._lock:
+            changed = sum(self._upsert(repo, pr) for pr in open_prs)
+            changed += sum(self._remove(pr_key(repo, number)) for number in closed)
+            return self._changed(changed)
+
+    def retain_repos(self, repos: Iterable[str]) -> int:
+        """Drops the PRs of every repository not in repos."""
+        repos = set(repos)
+        with self._lock:
+            changed = 0
+            for repo in [repo for repo in self._facets["repo"] if repo not in repos]:
+                changed += sum(self._remove(key) for key in list(self._facets["repo"][repo]))
+            return self._changed(changed)
+
+    def repo_prs(self, repo: str) -> List[Dict[str, Any]]:
+        """A repository's PRs, for saving to the cache."""
+        with self._lock:
+            return [self._prs[key] for key in self._facets["repo"].get(repo, ())]
+
+    # --- Queries ---
+
+    def query(self, sort: str = "updated", descending: bool = True, text: str = "",
+              max_age_days: Optional[float] = None, min_age_days: Optional[float] = None,
+              **facets: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        PRs matching every given facet (repo, author, base, review), whose
+        title, repo, author or branch contains `text`, and that were opened
+        within max_age_days / more than min_age_days ago, in `sort` order.
+        """
+        needle = text.strip().lower()
+        now = datetime.now(timezone.utc)
+        newest = self._iso(now - timedelta(days=min_age_days)) if min_age_days is not None else None
+        oldest = self._iso(now - timedelta(days=max_age_days)) if max_age_days is not None else None
+        created = SORT_KEYS["created"]
+
+        with self._lock:
+            sets = [self._facets[name].get(value, set()) for name, value in facets.items() if value]
+            candidates: Optional[Set[str]] = None
+            if sets:
+                sets.sort(key=len)
+                candidates = sets[0].intersection(*sets[1:])
+
+            order, positions = self._order(sort)
+            if candidates is not None and len(candidates) * SMALL_RESULT_RATIO < len(order):
+                keys: Iterable[str] = sorted(candidates, key=positions.__getitem__, reverse=descending)
+            else:
+                keys = reversed(order) if descending else order
+                if candidates is not None:
+                    keys = (key for key in keys if key in candidates)
+
+            result = []
+            for key in keys:
+                pr = self._prs[key]
+                if needle and needle not in self._search_text[key]:
+                    continue
+                if newest is not None or oldest is not None:
+                    opened = created(pr)
+                    if (newest is not None and opened > newest) or (oldest is not None and opened < oldest):
+                        continue
+                result.append(pr)
+            return result
+
+    def facet(self, name: str) -> List[str]:
+        """The distinct values of a facet, e.g. every author with an open PR."""
+        with self._lock:
+            return sorted(self._facets[name], key=str.lower)
+
+    # --- Internals (caller holds the lock) ---
+
+    def _upsert(self, repo: str, pr: Dict[str, Any]) -> int:
+        key = pr_key(repo, pr["number"])
+        pr = dict(pr, repo=repo, key=key)
+        old = self._prs.get(key)
+        if old == pr:
+            return 0
+        if old is not None:
+            self._unindex(key, old)
+        self._prs[key] = pr
+        for name, value in facet_values(pr).items():
+            self._facets[name].setdefault(value, set()).add(key)
+        self._search_text[key] = " ".join(
+            (pr["title"], key, pr["user"]["login"], pr["head"]["ref"] or "", pr["base"]["ref"] or "")).lower()
+        return 1
+
+    def _remove(self, key: str) -> int:
+        pr = self._prs.pop(key, None)
+        if pr is None:
+            return 0
+        self._unindex(key, pr)
+        del self._search_text[key]
+        return 1
+
+    def _unindex(self, key: str, pr: Dict[str, Any]):
+        for name, value in facet_values(pr).items():
+            keys = self._facets[name][value]
+            keys.discard(key)
+            if not keys:
+                del self._facets[name][value]
+
+    def _changed(self, changed: int) -> int:
+        if changed:
+            self._orders.clear()
+            self.version += 1
+        return changed
+
+    def _order(self, sort: str) -> Tuple[List[str], Dict[str, int]]:
+        order = self._orders.get(sort)
+        if order is None:
+            sort_key = SORT_KEYS[sort]
+            keys = sorted(self._prs, key=lambda key: sort_key(self._prs[key]))
+            order = self._orders[sort] = (keys, {key: i for i, key in enumerate(keys)})
+        return order
+
+    @staticmethod
+    def _iso(moment: datetime) -> str:
+        """Same format as the API's timestamps, so they compare as strings."""
+        return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class PullRequestInbox:
+    """
+    The index plus each repository's sync cursor, persisted per repository
+    in the ResponseCache (only repositories a sync changed are rewritten).
+    Syncs hold `sync_lock`, so two never interleave their cursors.
+    """
+    def __init__(self, store: Optional[ResponseCache] = None):
+        self.store = store
+        self.index = PullRequestIndex()
+        self.cursors: Dict[str, Optional[str]] = {}
+        self.repos: List[str] = []
+        self.sync_lock = threading.Lock()
+
+    def load(self, base_url: str, sources: str) -> bool:
+        """Restores the last synced repositories of `sources` from the cache. Returns False if unknown."""
+        if self.store is None:
+            return False
+        entry = self.store.get("github", "inbox_sources", f"{base_url}#{sources}", allow_stale=True)
+        if entry is None:
+            return False
+        self.set_repos(base_url, sources, entry["body"], save=False)
+        return True
+
+    def set_repos(self, base_url: str, sources: str, repos: List[str], save: bool = True):
+        """Makes repos the inbox's repositories, restoring the ones not in memory from the cache."""
+        for repo in repos:
+            if repo in self.cursors or self.store is None:
+                continue
+            entry = self.store.get("github", "inbox", f"{base_url}#{repo}", allow_stale=True)
+            if entry is not None:
+                self.cursors[repo] = entry["body"]["cursor"]
+                self.index.replace_repo(repo, entry["body"]["prs"])
+        self.index.retain_repos(repos)
+        self.cursors = {repo: self.cursors.get(repo) for repo in repos}
+        self.repos = list(repos)
+        if save and self.store is not None:
+            self.store.put("github", "inbox_sources", f"{base_url}#{sources}", self.repos)
+
+    def apply(self, base_url: str, repo: str, update: Dict[str, Any]) -> int:
+        """Applies one repository's sync result and saves it. Returns how many PRs changed."""
+        if update["full"]:
+            changed = self.index.replace_repo(repo, update["open"])
+        else:
+            changed = self.index.update_repo(repo, update["open"], update["closed"])
+        cursor_moved = update["cursor"] != self.cursors.get(repo)
+        self.cursors[repo] = update["cursor"]
+        if (changed or cursor_moved or update["full"]) and self.store is not None:
+            self.store.put("github", "inbox", f"{base_url}#{repo}",
+                           {"cursor": update["cursor"], "prs": self.index.repo_prs(repo)})
+        return changed
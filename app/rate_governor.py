@@ -0,0 +1,245 @@
+"""
+UniCI Rate Governor
+Paces requests per host so that background work slows down before a
+server's rate limit is reached, while interactive requests go first.
+
+- Every host has a token bucket, kept as a theoretical arrival time
+  (GCRA): each request is given its start time ahead of time, so callers
+  sleep until their slot instead of failing and retrying. Interactive
+  requests start at once but still use up capacity, which pushes the
+  background requests behind them back.
+- When a server reports its budget (GitHub X-RateLimit-*, GitLab
+  RateLimit-*), background requests are paced to spread what is left,
+  minus a reserve kept for interactive requests, over the time until
+  the reset.
+- 429s, GitHub's rate-limit 403s and Retry-After close the host until the
+  given time. Waits longer than MAX_RETRY_WAIT are not slept through:
+  the request fails fast with RateLimitedError instead.
+It does no I/O itself and is shared by ApiService and AsyncApiService.
+"""
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_HOST_RATE = 20.0        # Background requests per second per host without a reported budget
+DEFAULT_HOST_BURST = 40         # Requests a host may take at once before pacing starts
+INTERACTIVE_RESERVE = 0.1       # Share of a reported budget that background work leaves alone
+MIN_INTERACTIVE_RESERVE = 20
+DEFAULT_RETRY_AFTER = 60.0      # GitHub asks for at least a minute when a limit comes without Retry-After
+MAX_RETRY_WAIT = 30.0           # Longer waits fail with RateLimitedError instead of holding a worker
+
+
+class RateLimitedError(Exception):
+    """A host refused requests for longer than the caller should wait."""
+    def __init__(self, host: str, retry_after: float):
+        minutes, seconds = divmod(int(retry_after + 0.5), 60)
+        wait = f"{minutes} min {seconds} s" if minutes else f"{seconds} s"
+        super().__init__(f"{host} is rate limited; requests resume in {wait}.")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class _Host:
+    """Bucket and reported budget of one host. Guarded by the governor's lock."""
+    __slots__ = ("tat", "blocked_until", "background_until", "rate", "burst",
+                 "limit", "remaining", "reset_at", "requests", "delayed", "delay_total", "limited")
+
+    def __init__(self, rate: float, burst: int):
+        self.tat = 0.0                  # Theoretical arrival time of the next request (monotonic)
+        self.blocked_until = 0.0        # Nobody sends before this (429 / Retry-After / exhausted budget)
+        self.background_until = 0.0     # Background requests wait for this (only the reserve is left)
+        self.rate = rate
+        self.burst = burst
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None   # Wall-clock time the reported budget resets
+        self.requests = 0
+        self.delayed = 0
+        self.delay_total = 0.0
+        self.limited = 0
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+def parse_retry_after(value: Optional[str], now: float) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or an HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+def _header_int(headers: Mapping[str, str], *names: str) -> Optional[int]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return int(float(value))
+            except ValueError:
+                return None
+    return None
+
+
+class RateGovernor:
+    """
+    Per-host token buckets shared by every request UniCI sends.
+    Call reserve() before a request (and sleep for the returned delay),
+    and observe() with the response.
+    """
+    def __init__(self, rate: float = DEFAULT_HOST_RATE, burst: int = DEFAULT_HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._hosts: Dict[str, _Host] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, rate: float, burst: int):
+        """Sets the default bucket; hosts that reported a budget keep pacing by it."""
+        with self._lock:
+            self.rate, self.burst = rate, burst
+            for host in self._hosts.values():
+                if host.remaining is None:
+                    host.rate, host.burst = rate, burst
+
+    def _host(self, url: str) -> _Host:
+        """Caller must hold the lock."""
+        key = host_of(url)
+        host = self._hosts.get(key)
+        if host is None:
+            host = self._hosts[key] = _Host(self.rate, self.burst)
+        return host
+
+    # --- Before a request ---
+
+    def reserve(self, url: str, interactive: bool) -> float:
+        """
+        Takes the next slot for a request to url's host and returns how
+        many seconds to wait before sending it (0.0 to send now).
+        Raises RateLimitedError if the host is closed for longer than MAX_RETRY_WAIT.
+        """
+        now = time.monotonic()
+        with self._lock:
+            host = self._host(url)
+            start = max(now, host.blocked_until)
+            if not interactive:
+                interval = 1.0 / host.rate if host.rate > 0 else 0.0
+                tolerance = interval * max(0, host.burst - 1)
+                start = max(start, host.tat - tolerance, host.background_until)
+            if start - now > MAX_RETRY_WAIT:
+                raise RateLimitedError(host_of(url), start - now)
+            interval = 1.0 / host.rate if host.rate > 0 else 0.0
+            host.tat = max(host.tat, start) + interval
+            host.requests += 1
+            if host.remaining is not None:
+                host.remaining = max(0, host.remaining - 1)
+            delay = start - now
+            if delay > 0:
+                host.delayed += 1
+                host.delay_total += delay
+            return delay
+
+    def background_delay(self, url: str) -> float:
+        """How long a background request to url's host would wait right now, without taking a slot."""
+        now = time.monotonic()
+        with self._lock:
+            host = self._hosts.get(host_of(url))
+            if host is None:
+                return 0.0
+            interval = 1.0 / host.rate if host.rate > 0 else 0.0
+            start = max(now, host.blocked_until, host.background_until,
+                        host.tat - interval * max(0, host.burst - 1))
+            return start - now
+
+    # --- After a response ---
+
+    def observe(self, url: str, status: int, headers: Mapping[str, str], text: str = "") -> Optional[float]:
+        """
+        Learns the host's budget from a response. Returns the seconds until
+        the request may be retried if the host refused it for rate limiting
+        (the host stays closed until then), else None.
+        """
+        now_wall = time.time()
+        now = time.monotonic()
+        limit = _header_int(headers, "X-RateLimit-Limit", "RateLimit-Limit")
+        remaining = _header_int(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+        reset = _header_int(headers, "X-RateLimit-Reset", "RateLimit-Reset")
+        retry_after = parse_retry_after(headers.get("Retry-After"), now_wall)
+        limited = status == 429 or (status == 403 and (retry_after is not None or remaining == 0
+                                                       or "rate limit" in text.lower()))
+        if retry_after is None and limited:
+            retry_after = reset - now_wall if remaining == 0 and reset else DEFAULT_RETRY_AFTER
+        if retry_after is not None:
+            retry_after = max(0.0, retry_after)
+
+        with self._lock:
+            host = self._host(url)
+            if remaining is not None:
+                self._apply_budget(host, limit, remaining, reset, now, now_wall)
+            if retry_after is not None and (limited or status == 503):
+                host.blocked_until = max(host.blocked_until, now + retry_after)
+                host.tat = max(host.tat, host.blocked_until)
+            if limited:
+                host.limited += 1
+        return retry_after if limited else None
+
+    def _apply_budget(self, host: _Host, limit: Optional[int], remaining: int, reset: Optional[int],
+                      now: float, now_wall: float):
+        """Paces background requests to what is left of the budget. Caller must hold the lock."""
+        host.limit = limit if limit is not None else host.limit
+        host.remaining = remaining
+        if reset is None:
+            return
+        # GitHub sends the reset as epoch seconds, GitLab's RateLimit-Reset too; small values are deltas
+        reset_at = float(reset) if reset > 10 ** 9 else now_wall + reset
+        host.reset_at = reset_at
+        until_reset = max(1.0, reset_at - now_wall)
+        reserve = max(MIN_INTERACTIVE_RESERVE, int((host.limit or 0) * INTERACTIVE_RESERVE))
+        if host.limit is not None:
+            reserve = min(reserve, host.limit // 2)
+        spare = remaining - reserve
+        if remaining == 0:
+            host.blocked_until = max(host.blocked_until, now + until_reset)
+        if spare <= 0:
+            # Only the interactive reserve is left
+            host.background_until = now + until_reset
+            return
+        host.background_until = 0.0
+        host.rate = min(self.rate, spare / until_reset)
+        host.burst = max(1, min(self.burst, spare))
+
+    # --- Diagnostics ---
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Budget and pacing per host, for the Diagnostics tab."""
+        now = time.monotonic()
+        now_wall = time.time()
+        with self._lock:
+            return {
+                name: {
+                    "requests": host.requests,
+                    "delayed": host.delayed,
+                    "delay_total_s": host.delay_total,
+                    "limited": host.limited,
+                    "rate": host.rate,
+                    "limit": host.limit,
+                    "remaining": host.remaining,
+                    "reset_in_s": max(0.0, host.reset_at - now_wall) if host.reset_at else None,
+                    "blocked_for_s": max(0.0, host.blocked_until - now),
+                    "background_paused_for_s": max(0.0, host.background_until - now),
+                }
+                for name, host in self._hosts.items()
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            for host in self._hosts.values():
+                host.requests = host.delayed = host.limited = 0
+                host.delay_total = 0.0
@@ -0,0 +1,196 @@
+"""
+UniCI Request Coalescer
+Single-flight layer for idempotent GETs: when several tabs, watchers or
+workflow steps ask for the same resource at the same time, only the
+first sends the request and the others wait for its response.
+
+- Requests are identified by a key built by the caller (method, URL,
+  params and headers), so requests that could get different answers
+  never share one.
+- An interactive request does not wait behind a background one, which may
+  be held back by the rate governor; it sends its own request and takes
+  over the key for later callers.
+- Completed responses are kept for `ttl` seconds (a micro-cache) to
+  absorb bursts that just miss each other. invalidate() drops a
+  backend's entries, and the responses still in flight, after a write,
+  so nothing read before a trigger is served after it.
+- Failures are shared with the requests that were waiting but never
+  cached.
+It does no I/O itself; ApiService and AsyncApiService pass in the call.
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+DEFAULT_MICRO_CACHE_TTL = 1.0   # Seconds a completed GET answers identical GETs
+MAX_CACHED_RESPONSES = 512
+
+
+class _Flight:
+    """One request in flight and the callers waiting for it."""
+    __slots__ = ("future", "interactive", "generation")
+
+    def __init__(self, future, interactive: bool, generation: int):
+        self.future = future
+        self.interactive = interactive
+        self.generation = generation
+
+
+def request_key(method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple:
+    """Hashable identity of a request; requests with equal keys get the same answer."""
+    return (method, url, tuple(sorted((params or {}).items())), tuple(sorted((headers or {}).items())))
+
+
+class RequestCoalescer:
+    """
+    Shares identical in-flight GETs and keeps their responses briefly.
+    fetch() is for threads, fetch_async() for coroutines on one event loop;
+    they keep separate entries since they return different objects.
+    """
+    def __init__(self, ttl: float = DEFAULT_MICRO_CACHE_TTL):
+        self.ttl = ttl
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._cache: Dict[Hashable, Tuple[float, Any]] = {}  # key -> (expires, response)
+        self._generations: Dict[str, int] = defaultdict(int)  # Bumped per backend by invalidate()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"requests": 0, "sent": 0, "shared": 0,
+                                                                      "cached": 0})
+
+    def configure(self, ttl: float):
+        with self._lock:
+            self.ttl = ttl
+            if ttl <= 0:
+                self._cache.clear()
+
+    # --- Threads ---
+
+    def fetch(self, backend: str, key: Tuple, send: Callable[[], Any], interactive: bool = True,
+              cacheable: Callable[[Any], bool] = lambda response: True) -> Any:
+        """
+        Returns send()'s result, or that of an identical request that is in
+        flight or finished less than `ttl` ago. Only results for which
+        cacheable(result) is true are kept after they are handed out.
+        """
+        key = ("sync", backend) + key
+        with self._lock:
+            stats = self._stats[backend]
+            stats["requests"] += 1
+            response = self._cached(key)
+            if response is not None:
+                stats["cached"] += 1
+                return response
+            flight = self._flights.get(key)
+            if flight is not None and (flight.interactive or not interactive):
+                stats["shared"] += 1
+            else:
+                if flight is not None:
+                    flight.generation = -1   # Taken over; its older answer must not replace ours in the cache
+                stats["sent"] += 1
+                flight = self._flights[key] = _Flight(Future(), interactive, self._generations[backend])
+                leader = flight
+                flight = None
+        if flight is not None:
+            return flight.future.result()
+
+        try:
+            response = send()
+        except BaseException as e:
+            self._land(backend, key, leader, None, False)
+            leader.future.set_exception(e)
+            raise
+        self._land(backend, key, leader, response, cacheable(response))
+        leader.future.set_result(response)
+        return response
+
+    # --- Coroutines ---
+
+    async def fetch_async(self, backend: str, key: Tuple, send: Callable[[], Awaitable[Any]],
+                          cacheable: Callable[[Any], bool] = lambda response: True) -> Any:
+        """fetch() for coroutines; every caller counts as background, like the async service's fan-out."""
+        key = ("async", backend) + key
+        with self._lock:
+            stats = self._stats[backend]
+            stats["requests"] += 1
+            response = self._cached(key)
+            if response is not None:
+                stats["cached"] += 1
+                return response
+            flight = self._flights.get(key)
+            if flight is not None:
+                stats["shared"] += 1
+            else:
+                stats["sent"] += 1
+                flight = self._flights[key] = _Flight(asyncio.get_running_loop().create_future(), False,
+                                                      self._generations[backend])
+                leader = flight
+                flight = None
+        if flight is not None:
+            # shield: a cancelled waiter must not cancel the request for the others
+            return await asyncio.shield(flight.future)
+
+        try:
+            response = await send()
+        except BaseException as e:
+            self._land(backend, key, leader, None, False)
+            leader.future.set_exception(e)
+            # Retrieved here so an unawaited failure is not reported as "never retrieved"
+            leader.future.exception()
+            raise
+        self._land(backend, key, leader, response, cacheable(response))
+        leader.future.set_result(response)
+        return response
+
+    # --- Invalidation ---
+
+    def invalidate(self, backend: str):
+        """Forgets the backend's cached responses, and lets nothing in flight be reused, after a write."""
+        with self._lock:
+            self._generations[backend] += 1
+            for key in [key for key in self._cache if key[1] == backend]:
+                del self._cache[key]
+            for key in [key for key in self._flights if key[1] == backend]:
+                del self._flights[key]
+
+    def _cached(self, key: Hashable) -> Any:
+        """A fresh micro-cache entry, or None. Caller must hold the lock."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._cache[key]
+            return None
+        return entry[1]
+
+    def _land(self, backend: str, key: Hashable, flight: _Flight, response: Any, cache: bool):
+        """Retires a finished flight and caches its response if nothing was written meanwhile."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if cache and self.ttl > 0 and flight.generation == self._generations[backend]:
+                self._cache.pop(key, None)   # Re-inserted last, so the dict stays oldest first
+                if len(self._cache) >= MAX_CACHED_RESPONSES:
+                    now = time.monotonic()
+                    for stale in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+                        del self._cache[stale]
+                    if len(self._cache) >= MAX_CACHED_RESPONSES:
+                        del self._cache[next(iter(self._cache))]
+                self._cache[key] = (time.monotonic() + self.ttl, response)
+
+    # --- Diagnostics ---
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per backend: GETs asked for, sent, shared with one in flight, answered from the micro-cache."""
+        with self._lock:
+            return {
+                backend: dict(stats, dedup_ratio=(stats["shared"] + stats["cached"]) / stats["requests"]
+                              if stats["requests"] else 0.0)
+                for backend, stats in self._stats.items()
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
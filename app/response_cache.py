@@ -0,0 +1,174 @@
+"""
+UniCI Response Cache
+Persistent, size-bounded cache of API responses (PR lists, branches, job
+lists, pipeline statuses) stored in SQLite next to config.json, so the
+tabs can paint the last known data immediately on startup.
+
+Only response bodies and validators (ETag / Last-Modified) are stored.
+API tokens are never written: any entry that contains a known secret is
+refused.
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+CACHE_FILE = "cache.sqlite3"
+DEFAULT_TTL = 7 * 24 * 3600       # Seconds an entry is considered fresh
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+SWEEP_EVERY = 64                  # Puts between purges of long-expired entries and recounts
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    backend       TEXT NOT NULL,
+    resource      TEXT NOT NULL,
+    url           TEXT NOT NULL,
+    body          TEXT NOT NULL,
+    meta          TEXT NOT NULL,
+    stored_at     REAL NOT NULL,
+    expires_at    REAL NOT NULL,
+    accessed_at   REAL NOT NULL,
+    size          INTEGER NOT NULL,
+    PRIMARY KEY (backend, resource, url)
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at);
+"""
+
+
+class ResponseCache:
+    """
+    Thread-safe SQLite cache keyed by (backend, resource, url), with a TTL
+    per entry and least-recently-used eviction once the cache grows past
+    `max_entries` or `max_bytes`. Entry count and size are kept as running
+    totals, so a put costs no table scan; they are recounted on every
+    SWEEP_EVERY-th put, when long-expired entries are purged.
+    """
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._secrets: List[str] = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._closed = False
+        self._puts = 0
+        self._count, self._bytes = self._totals()
+
+    def set_secrets(self, secrets: Iterable[Optional[str]]):
+        """Tokens that must never be written to disk."""
+        self._secrets = [secret for secret in secrets if secret]
+
+    def get(self, backend: str, resource: str, url: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Returns {"body", "meta", "stored_at", "fresh"} or None.
+        Expired entries are only returned with allow_stale=True, e.g. when
+        they are about to be revalidated with their ETag.
+        """
+        now = time.time()
+        with self._lock:
+            if self._closed:
+                return None
+            row = self._conn.execute(
+                "SELECT body, meta, stored_at, expires_at FROM responses "
+                "WHERE backend = ? AND resource = ? AND url = ?",
+                (backend, resource, url),
+            ).fetchone()
+            if row is None:
+                return None
+            fresh = row[3] > now
+            if not fresh and not allow_stale:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE backend = ? AND resource = ? AND url = ?",
+                (now, backend, resource, url),
+            )
+        return {"body": json.loads(row[0]), "meta": json.loads(row[1]), "stored_at": row[2], "fresh": fresh}
+
+    def put(self, backend: str, resource: str, url: str, body: Any,
+            meta: Optional[Dict[str, Any]] = None, ttl: float = DEFAULT_TTL) -> bool:
+        """
+        Stores a response. Returns False if it was refused because it
+        contains a secret, or dropped because the cache is already closed.
+        """
+        body_text = json.dumps(body, separators=(",", ":"))
+        meta_text = json.dumps(meta or {}, separators=(",", ":"))
+        if self._contains_secret(url, body_text, meta_text):
+            return False
+
+        now = time.time()
+        size = len(body_text) + len(meta_text)
+        with self._lock:
+            if self._closed:
+                return False   # A worker finishing after shutdown
+            replaced = self._conn.execute(
+                "SELECT size FROM responses WHERE backend = ? AND resource = ? AND url = ?",
+                (backend, resource, url),
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (backend, resource, url, body_text, meta_text, now, now + ttl, now, size),
+            )
+            if replaced is None:
+                self._count += 1
+            else:
+                self._bytes -= replaced[0]
+            self._bytes += size
+            self._puts += 1
+            if self._puts % SWEEP_EVERY == 0:
+                self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now - DEFAULT_TTL,))
+                self._count, self._bytes = self._totals()
+            self._evict()
+        return True
+
+    def invalidate(self, backend: Optional[str] = None):
+        """Drops all entries, or all entries of one backend."""
+        with self._lock:
+            if self._closed:
+                return
+            if backend is None:
+                self._conn.execute("DELETE FROM responses")
+            else:
+                self._conn.execute("DELETE FROM responses WHERE backend = ?", (backend,))
+            self._count, self._bytes = self._totals()
+
+    def close(self):
+        """Closes the database connection."""
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._conn.close()
+
+    # --- Internals ---
+
+    def _contains_secret(self, *texts: str) -> bool:
+        return any(secret in text for secret in self._secrets for text in texts)
+
+    def _totals(self):
+        """(entries, bytes) as stored. Caller holds the lock, or is __init__."""
+        return self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+    def _evict(self):
+        """Drops least recently used entries while over the limits. Caller holds the lock."""
+        if self._count <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+
+        excess_count = max(0, self._count - self.max_entries)
+        excess_bytes = max(0, self._bytes - self.max_bytes)
+        victims = []
+        freed = 0
+        # Walks the accessed_at index lazily, so only the victims are read
+        cursor = self._conn.execute("SELECT rowid, size FROM responses ORDER BY accessed_at")
+        for rowid, size in cursor:
+            if len(victims) >= excess_count and freed >= excess_bytes:
+                break
+            victims.append((rowid,))
+            freed += size
+        cursor.close()
+        self._conn.executemany("DELETE FROM responses WHERE rowid = ?", victims)
+        self._count -= len(victims)
+        self._bytes -= freed
@@ -0,0 +1,282 @@
+"""
+UniCI Job Scheduler
+Bounded, prioritised worker pool used by the controller to run API calls
+off the GUI thread. It knows nothing about the GUI or the APIs themselves.
+The priority of the job a thread is running is available to the code it
+calls through current_priority().
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from app.metrics import callable_name
+
+# Lower numbers run first.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_BACKEND_LIMITS = {"jenkins": 4, "github": 4, "gitlab": 4}
+WAIT_SAMPLE_SIZE = 200
+
+_current = threading.local()
+
+
+def current_priority() -> int:
+    """Priority of the job running on this thread; interactive outside the scheduler."""
+    return getattr(_current, "priority", PRIORITY_INTERACTIVE)
+
+
+def run_with_priority(priority: int, func: Callable, *args) -> Any:
+    """Calls func(*args) as if from a job of `priority`, e.g. on a helper thread pool."""
+    previous = getattr(_current, "priority", None)
+    _current.priority = priority
+    try:
+        return func(*args)
+    finally:
+        if previous is None:
+            del _current.priority
+        else:
+            _current.priority = previous
+
+
+class _Job:
+    """A unit of work waiting in, or taken from, the scheduler queue."""
+    __slots__ = ("func", "args", "backend", "priority", "deadline", "future", "submitted_at")
+
+    def __init__(self, func, args, backend, priority, deadline, future, submitted_at):
+        self.func = func
+        self.args = args
+        self.backend = backend
+        self.priority = priority
+        self.deadline = deadline
+        self.future = future
+        self.submitted_at = submitted_at
+
+
+class JobScheduler:
+    """
+    Runs submitted callables on a bounded pool of daemon threads.
+
+    - At most `max_workers` jobs run at once.
+    - Jobs tagged with a backend never exceed that backend's limit, so a
+      burst of Jenkins triggers can't starve GitHub or GitLab calls.
+    - Interactive jobs are always picked before background ones.
+    - Background jobs of a backend wait in the queue while `admission`
+      says that backend should not be sent more work yet (rate limits),
+      so they don't hold workers that interactive jobs could use.
+    - Every job returns a concurrent.futures.Future that can be cancelled
+      while it is still queued.
+    """
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 backend_limits: Optional[Dict[str, int]] = None,
+                 on_change: Optional[Callable[[], None]] = None,
+                 on_job_done: Optional[Callable[[Optional[str], str, float, float, float, str], None]] = None,
+                 admission: Optional[Callable[[str], float]] = None):
+        self.max_workers = max_workers
+        self.backend_limits = dict(DEFAULT_BACKEND_LIMITS if backend_limits is None else backend_limits)
+        # Called (outside the lock) whenever a job is queued, starts or ends
+        self.on_change = on_change
+        # Called on the worker after each job with (backend, job name, perf_counter start,
+        # queue wait, run time, "completed" | "failed"); see Metrics.observe_job
+        self.on_job_done = on_job_done
+        # Seconds until a backend takes background work again (0.0 = now); see RateGovernor
+        self.admission = admission
+
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[int, int, _Job]] = []  # heap of (priority, seq, job)
+        self._seq = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._idle_workers = 0
+        self._running = 0
+        self._running_per_backend: Dict[str, int] = defaultdict(int)
+        self._shutdown = False
+
+        # Metrics
+        self._counts = {"completed": 0, "failed": 0, "cancelled": 0, "timed_out": 0}
+        self._wait_samples: Deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self._max_wait = 0.0
+
+    def submit(self, func: Callable, args: Tuple = (), backend: Optional[str] = None,
+               priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> Future:
+        """
+        Queues func(*args) and returns its Future.
+        `timeout` bounds how long the job may wait in the queue before it is
+        abandoned with a TimeoutError. Use future.result(timeout) to also
+        bound the time spent waiting for a running job.
+        """
+        future: Future = Future()
+        now = time.monotonic()
+        deadline = now + timeout if timeout is not None else None
+        job = _Job(func, args, backend, priority, deadline, future, now)
+
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler has been shut down.")
+            heapq.heappush(self._pending, (priority, next(self._seq), job))
+            # Idle workers only count as free once woken, so a burst of
+            # submits must compare against the queue, not just "any idle"
+            if len(self._pending) > self._idle_workers and len(self._workers) < self.max_workers:
+                self._start_worker()
+            self._cond.notify()
+        self._changed()
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, concurrency and queue wait times."""
+        with self._cond:
+            waits = list(self._wait_samples)
+            stats = dict(self._counts)
+            stats.update({
+                "queued": len(self._pending),
+                "running": self._running,
+                "workers": len(self._workers),
+                "running_per_backend": dict(self._running_per_backend),
+                "avg_wait_ms": (sum(waits) / len(waits) * 1000) if waits else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+            })
+        return stats
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False, timeout: Optional[float] = None):
+        """
+        Stops accepting work. Queued jobs are either drained or cancelled,
+        then workers exit. With wait=True, blocks up to `timeout` seconds.
+        """
+        with self._cond:
+            self._shutdown = True
+            if cancel_pending:
+                for _, _, job in self._pending:
+                    if job.future.cancel():
+                        self._counts["cancelled"] += 1
+                self._pending.clear()
+            self._cond.notify_all()
+            workers = list(self._workers)
+
+        if wait:
+            end = time.monotonic() + timeout if timeout is not None else None
+            for worker in workers:
+                remaining = None if end is None else max(0.0, end - time.monotonic())
+                worker.join(remaining)
+
+    # --- Worker internals ---
+
+    def _changed(self):
+        """Tells the listener that queue depth or running jobs changed."""
+        if self.on_change is not None:
+            self.on_change()
+
+    def _start_worker(self):
+        """Starts one more worker thread. Caller must hold the lock."""
+        worker = threading.Thread(
+            target=self._worker_loop, name=f"UniCI-worker-{len(self._workers)}", daemon=True
+        )
+        self._workers.append(worker)
+        worker.start()
+
+    def _take_runnable(self) -> Tuple[Optional[_Job], Optional[float]]:
+        """
+        Pops the highest-priority job whose backend is under its limit.
+        Also expires jobs that waited past their deadline and drops
+        cancelled ones. Returns (job, seconds until the next deadline or
+        until a held backend takes background work again).
+        Caller must hold the lock.
+        """
+        now = time.monotonic()
+        skipped = []
+        job = None
+        next_deadline = None
+        held: Dict[str, float] = {}  # Admission delay per backend, asked once per pass
+
+        while self._pending:
+            entry = heapq.heappop(self._pending)
+            candidate = entry[2]
+            if candidate.future.cancelled():
+                self._counts["cancelled"] += 1
+                continue
+            if candidate.deadline is not None and now >= candidate.deadline:
+                candidate.future.set_exception(
+                    TimeoutError(f"Job waited more than {candidate.deadline - candidate.submitted_at:.1f}s in queue.")
+                )
+                self._counts["timed_out"] += 1
+                continue
+            limit = self.backend_limits.get(candidate.backend)
+            if limit is not None and self._running_per_backend[candidate.backend] >= limit:
+                skipped.append(entry)
+                if candidate.deadline is not None:
+                    wait = candidate.deadline - now
+                    next_deadline = wait if next_deadline is None else min(next_deadline, wait)
+                continue
+            if (self.admission is not None and candidate.priority > PRIORITY_INTERACTIVE
+                    and candidate.backend is not None and not self._shutdown):
+                if candidate.backend not in held:
+                    held[candidate.backend] = self.admission(candidate.backend)
+                delay = held[candidate.backend]
+                if delay > 0:
+                    skipped.append(entry)
+                    next_deadline = delay if next_deadline is None else min(next_deadline, delay)
+                    continue
+            job = candidate
+            break
+
+        for entry in skipped:
+            heapq.heappush(self._pending, entry)
+        return job, next_deadline
+
+    def _worker_loop(self):
+        """Main loop of a worker thread."""
+        while True:
+            with self._cond:
+                while True:
+                    job, next_deadline = self._take_runnable()
+                    if job is not None:
+                        break
+                    if self._shutdown and not self._pending:
+                        self._workers.remove(threading.current_thread())
+                        return
+                    self._idle_workers += 1
+                    self._cond.wait(next_deadline)
+                    self._idle_workers -= 1
+
+                if not job.future.set_running_or_notify_cancel():
+                    self._counts["cancelled"] += 1
+                    continue
+                wait = time.monotonic() - job.submitted_at
+                self._wait_samples.append(wait)
+                self._max_wait = max(self._max_wait, wait)
+                self._running += 1
+                if job.backend is not None:
+                    self._running_per_backend[job.backend] += 1
+
+            self._changed()
+            started = time.perf_counter()
+            _current.priority = job.priority
+            try:
+                result = job.func(*job.args)
+                outcome = "completed"
+            except BaseException as e:
+                result, outcome = e, "failed"
+            finally:
+                del _current.priority
+            # Recorded before the future resolves, so a caller waiting on it sees the job counted
+            if self.on_job_done is not None:
+                try:
+                    self.on_job_done(job.backend, callable_name(job.func), started, wait,
+                                     time.perf_counter() - started, outcome)
+                except Exception:
+                    pass  # Instrumentation must never leave a future unresolved
+            if outcome == "completed":
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(result)
+
+            with self._cond:
+                self._running -= 1
+                if job.backend is not None:
+                    self._running_per_backend[job.backend] -= 1
+                self._counts[outcome] += 1
+                # A backend slot freed up; wake anyone waiting on it.
+                self._cond.notify_all()
+            self._changed()
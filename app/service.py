@@ -5,16 +5,59 @@ Handles all external API communication.
 It knows nothing about the GUI or the Controller.
 """
 
+import threading
+import time
+from functools import partial
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
-from typing import Dict, Any, Optional
+from urllib3.util.retry import Retry
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from app.github_client import GITHUB_API_URL, GitHubClient, GraphQLError
+from app.jenkins_index import jenkins_job_path
+from app.metrics import Metrics
+from app.rate_governor import DEFAULT_HOST_BURST, DEFAULT_HOST_RATE, RateGovernor, host_of
+from app.request_coalescer import DEFAULT_MICRO_CACHE_TTL, RequestCoalescer, request_key
+from app.response_cache import ResponseCache
+from app.scheduler import PRIORITY_INTERACTIVE, current_priority
+
+# --- Connection pool defaults (overridable through update_config) ---
+BACKENDS = ("jenkins", "github", "gitlab")
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 10
+RETRY_STATUS_CODES = (502, 503, 504)
+CRUMB_TIMEOUT = 5
+LOG_CHUNK_SIZE = 64 * 1024   # Bytes handed to the log sink at a time
+DEFAULT_GITHUB_PR_SOURCE = "graphql"
+RATE_LIMIT_RETRIES = 2       # Retries of a request refused with 429 / a rate-limit 403
+COALESCED_KWARGS = frozenset(["params", "headers", "timeout"])  # GETs with anything else are sent as they are
+
+# Only fetch the fields the status pollers need from Jenkins.
+JENKINS_BUILD_TREE = "number,result,building,timestamp,duration,estimatedDuration,url"
+# Folder listings for the job index: a few fields per item instead of the full job descriptions
+JENKINS_JOBS_TREE = "jobs[_class,name,url,color,lastBuild[number]]"
 
 class ApiService:
     """
     Handles all API calls to Jenkins, GitHub, and GitLab.
     This class is completely decoupled from the GUI.
+
+    Each backend gets its own long-lived requests.Session so that repeated
+    calls reuse keep-alive connections instead of paying for DNS, TCP and
+    TLS on every click. Sessions are only rebuilt when a URL, credential or
+    pool setting actually changes.
+
+    Every request is recorded in `metrics` (latency, status, bytes, retries).
+    Every request also goes through `governor`, which paces background
+    work per host ahead of the servers' rate limits and retries requests
+    they refused once the host accepts requests again.
+    Identical GETs in flight at the same time share one request through
+    `coalescer`, which also answers repeats for a moment afterwards.
     """
-    def __init__(self):
+    def __init__(self, metrics: Optional[Metrics] = None, governor: Optional[RateGovernor] = None,
+                 coalescer: Optional[RequestCoalescer] = None):
         # Configuration will be stored here
         self.github_token: Optional[str] = None
         self.gitlab_url: Optional[str] = None
@@ -22,34 +65,293 @@ class ApiService:
         self.jenkins_url: Optional[str] = None
         self.jenkins_user: Optional[str] = None
         self.jenkins_token: Optional[str] = None
+        self.github_pr_source: str = DEFAULT_GITHUB_PR_SOURCE
+
+        # Connection pool settings
+        self.pool_size: int = DEFAULT_POOL_SIZE
+        self.max_retries: int = DEFAULT_MAX_RETRIES
+        self.retry_backoff: float = DEFAULT_RETRY_BACKOFF
+        self.timeouts: Dict[str, float] = {backend: DEFAULT_TIMEOUT for backend in BACKENDS}
+
+        # One session per backend, guarded by a lock so that update_config
+        # from the GUI thread can't race a worker thread picking a session.
+        self._sessions: Dict[str, requests.Session] = {}
+        self._session_keys: Dict[str, Tuple] = {}
+        self._session_lock = threading.Lock()
+
+        # Jenkins CSRF crumbs, keyed by (jenkins_url, jenkins_user). Each entry
+        # holds the crumb header and the session cookies it is bound to.
+        self._crumb_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._crumb_lock = threading.Lock()
+        self.crumb_stats: Dict[str, int] = {"hits": 0, "misses": 0, "refreshes": 0}
+
+        # Paginating, ETag-aware GitHub client on top of the pooled session
+        self.github = GitHubClient(partial(self._request, "github"))
+
+        # Optional persistent cache of the last known responses
+        self.cache: Optional[ResponseCache] = None
+        self.metrics = metrics or Metrics()
+        # Per-host pacing and rate-limit state, shared with the async service
+        self.governor = governor or RateGovernor()
+        # Single-flight GETs and their micro-cache, shared with the async service
+        self.coalescer = coalescer or RequestCoalescer()
 
     def update_config(self, config_data: Dict[str, str]):
         """Updates the API credentials from the settings panel."""
+        jenkins_credentials = (self.jenkins_url, self.jenkins_user, self.jenkins_token)
         self.github_token = config_data.get("github_token")
-        self.gitlab_url = config_data.get("gitlab_url", "").rstrip('/')
+        self.gitlab_url = (config_data.get("gitlab_url") or "").rstrip('/')
         self.gitlab_token = config_data.get("gitlab_token")
-        self.jenkins_url = config_data.get("jenkins_url", "").rstrip('/')
+        self.jenkins_url = (config_data.get("jenkins_url") or "").rstrip('/')
         self.jenkins_user = config_data.get("jenkins_user")
         self.jenkins_token = config_data.get("jenkins_token")
+        if (self.jenkins_url, self.jenkins_user, self.jenkins_token) != jenkins_credentials:
+            # A crumb is tied to the credentials it was issued for
+            with self._crumb_lock:
+                self._crumb_cache.clear()
+        self.github.base_url = (config_data.get("github_api_url") or GITHUB_API_URL).rstrip('/')
+        # "graphql" fetches the PR dashboard in one query per page; "rest" uses the plain listing
+        self.github_pr_source = config_data.get("github_pr_source") or DEFAULT_GITHUB_PR_SOURCE
+
+        self.pool_size = int(config_data.get("pool_size") or DEFAULT_POOL_SIZE)
+        self.max_retries = int(config_data.get("max_retries") or DEFAULT_MAX_RETRIES)
+        self.retry_backoff = float(config_data.get("retry_backoff") or DEFAULT_RETRY_BACKOFF)
+        for backend in BACKENDS:
+            self.timeouts[backend] = float(config_data.get(f"{backend}_timeout") or DEFAULT_TIMEOUT)
+        self.governor.configure(float(config_data.get("rate_limit_per_second") or DEFAULT_HOST_RATE),
+                                int(config_data.get("rate_limit_burst") or DEFAULT_HOST_BURST))
+        coalesce_ttl = config_data.get("coalesce_ttl")
+        self.coalescer.configure(DEFAULT_MICRO_CACHE_TTL if coalesce_ttl in (None, "") else float(coalesce_ttl))
+
+        self._refresh_sessions()
+        if self.cache is not None:
+            self.cache.set_secrets([self.github_token, self.gitlab_token, self.jenkins_token])
+
+    def attach_cache(self, cache: ResponseCache):
+        """Keeps GitHub validators and bodies in `cache`, so they survive restarts."""
+        self.cache = cache
+        self.cache.set_secrets([self.github_token, self.gitlab_token, self.jenkins_token])
+        self.github.store = cache
+
+    def close(self):
+        """Closes all pooled connections. Safe to call more than once."""
+        self.github.close()
+        with self._session_lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._session_keys.clear()
+
+    # --- Session Management ---
+
+    def _session_key(self, backend: str) -> Tuple:
+        """Everything that, when changed, requires a fresh session."""
+        pool = (self.pool_size, self.max_retries, self.retry_backoff)
+        if backend == "jenkins":
+            return (self.jenkins_url, self.jenkins_user, self.jenkins_token) + pool
+        if backend == "github":
+            return (self.github_token,) + pool
+        return (self.gitlab_url, self.gitlab_token) + pool
+
+    def _refresh_sessions(self):
+        """Rebuilds only the sessions whose URL, credentials or pool settings changed."""
+        with self._session_lock:
+            for backend in BACKENDS:
+                key = self._session_key(backend)
+                if self._session_keys.get(backend) == key:
+                    continue
+                old_session = self._sessions.pop(backend, None)
+                if old_session is not None:
+                    old_session.close()
+                self._sessions[backend] = self._build_session(backend)
+                self._session_keys[backend] = key
+
+    def _build_session(self, backend: str) -> requests.Session:
+        """Creates a pooled session with retry/backoff and backend auth applied."""
+        # Only idempotent requests are retried on 5xx. Connection errors are
+        # retried for every method since the request never reached the server.
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.retry_backoff,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        if backend == "jenkins" and self.jenkins_user and self.jenkins_token:
+            session.auth = HTTPBasicAuth(self.jenkins_user, self.jenkins_token)
+        elif backend == "github" and self.github_token:
+            session.headers.update({
+                "Authorization": f"token {self.github_token}",
+                "Accept": "application/vnd.github.v3+json",
+            })
+        elif backend == "gitlab" and self.gitlab_token:
+            session.headers["PRIVATE-TOKEN"] = self.gitlab_token
+        return session
+
+    def _get_session(self, backend: str) -> requests.Session:
+        """Returns the pooled session for a backend, building it on first use."""
+        with self._session_lock:
+            session = self._sessions.get(backend)
+            if session is None:
+                session = self._build_session(backend)
+                self._sessions[backend] = session
+                self._session_keys[backend] = self._session_key(backend)
+            return session
+
+    def _request(self, backend: str, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a request, or for a GET, joins an identical one already in
+        flight or answered within the coalescer's micro-cache window.
+        Callers of a shared GET get the same Response; its body is read
+        before it is shared. Writes drop what the backend's GETs left in
+        the micro-cache, so a status read after a trigger is always fresh.
+        """
+        interactive = current_priority() <= PRIORITY_INTERACTIVE
+        if method == "GET" and not kwargs.get("stream") and COALESCED_KWARGS.issuperset(kwargs):
+            key = request_key(method, url, kwargs.get("params"), kwargs.get("headers"))
+            return self.coalescer.fetch(backend, key, partial(self._send, backend, method, url, interactive, **kwargs),
+                                        interactive, cacheable=lambda response: response.status_code < 400)
+        if method in ("GET", "HEAD"):
+            return self._send(backend, method, url, interactive, **kwargs)
+        self.coalescer.invalidate(backend)
+        try:
+            return self._send(backend, method, url, interactive, **kwargs)
+        finally:
+            # Again, for GETs that were answered while the write was in progress
+            self.coalescer.invalidate(backend)
+
+    def _send(self, backend: str, method: str, url: str, interactive: bool, **kwargs) -> requests.Response:
+        """
+        Sends a request through the backend's pooled session with its timeout, and records it.
+        Waits for the host's next slot first (background jobs yield to
+        interactive ones), and retries a request the host refused for rate
+        limiting once it accepts requests again. Raises RateLimitedError
+        if that would take longer than MAX_RETRY_WAIT.
+        """
+        kwargs.setdefault("timeout", self.timeouts[backend])
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            delay = self.governor.reserve(url, interactive)
+            if delay > 0:
+                time.sleep(delay)
+            started = time.perf_counter()
+            try:
+                response = self._get_session(backend).request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self.metrics.observe_request(backend, method, url, None, started, time.perf_counter() - started,
+                                             error=e.__class__.__name__)
+                raise
+            self.metrics.observe_request(backend, method, url, response.status_code, started,
+                                         time.perf_counter() - started, _body_size(response.request.body),
+                                         _received_size(response, kwargs.get("stream", False)), _retry_count(response))
+            # Rate-limit 403s are told apart from permission errors by their message
+            text = response.text if response.status_code == 403 and not kwargs.get("stream") else ""
+            retry_after = self.governor.observe(url, response.status_code, response.headers, text)
+            if retry_after is None or attempt == RATE_LIMIT_RETRIES:
+                return response
+            self.metrics.event(backend, "rate_limited", f"{host_of(url)} answered {response.status_code}; "
+                                                        f"retrying in {retry_after:.0f} s")
+            response.close()
+
+    def background_delay(self, backend: str) -> float:
+        """Seconds until the backend's host takes background requests again (the scheduler's admission)."""
+        base_url = {"jenkins": self.jenkins_url, "github": self.github.base_url, "gitlab": self.gitlab_url}.get(backend)
+        return self.governor.background_delay(base_url) if base_url else 0.0
+
+    # --- API Calls ---
+
+    def get_github_branches(self, repo_name: str) -> List[Dict[str, Any]]:
+        """
+        Fetches all branches for a GitHub repository (e.g., 'owner/repo').
+        """
+        if not self.github_token:
+            raise ValueError("GitHub token is not set.")
+        if not repo_name:
+            raise ValueError("Repository name is required.")
+
+        return self.github.get_paginated(f"/repos/{repo_name.strip()}/branches")
 
-    def get_github_branches(self, repo_name: str) -> Dict[str, Any]:
+    def get_github_pull_requests(self, repo_name: str) -> List[Dict[str, Any]]:
         """
-        Fetches branches for a GitHub repository (e.g., 'owner/repo').
+        Fetches all open pull requests for a GitHub repository. With the
+        GraphQL source they include the check rollup, review decision and
+        mergeability; it falls back to REST if GraphQL is unavailable.
         """
         if not self.github_token:
             raise ValueError("GitHub token is not set.")
         if not repo_name:
             raise ValueError("Repository name is required.")
 
-        url = f"https://api.github.com/repos/{repo_name}/branches"
-        headers = {
-            "Authorization": f"token {self.github_token}",
-            "Accept": "application/vnd.github.v3+json",
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()  # Raises HTTPError for bad responses
+        if self.github_pr_source == "graphql":
+            try:
+                return self.github.get_pull_requests_graphql(repo_name.strip())
+            except GraphQLError:
+                self.github.stats["graphql_fallbacks"] += 1  # e.g. GitHub Enterprise without GraphQL
+        return self.github.get_paginated(f"/repos/{repo_name.strip()}/pulls", {"state": "open"})
+
+    def sync_github_pull_requests(self, cursors: Dict[str, Optional[str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Incremental open-PR sync for many repositories. `cursors` maps each
+        'owner/repo' to the updated_at cursor of its last sync (None for a
+        full sync). See GitHubClient.get_pull_request_updates for the result.
+        """
+        if not self.github_token:
+            raise ValueError("GitHub token is not set.")
+
+        if self.github_pr_source == "graphql":
+            try:
+                return self.github.get_pull_request_updates(cursors)
+            except GraphQLError:
+                self.github.stats["graphql_fallbacks"] += 1
+        results = {}
+        for repo, since in cursors.items():
+            try:
+                results[repo] = self.github.get_pull_request_updates_rest(repo, since)
+            except requests.HTTPError as e:
+                results[repo] = {"error": f"{repo}: {e}"}
+        return results
+
+    def get_github_owner_repos(self, owner: str) -> List[str]:
+        """
+        'owner/name' of every non-archived repository of an organization or
+        user. The listing is ETag-cached, so repeating it is cheap.
+        """
+        if not self.github_token:
+            raise ValueError("GitHub token is not set.")
+
+        try:
+            repos = self.github.get_paginated(f"/orgs/{owner}/repos", {"type": "all"})
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            repos = self.github.get_paginated(f"/users/{owner}/repos", {"type": "owner"})
+        return [repo["full_name"] for repo in repos if not repo.get("archived")]
+
+    def approve_github_pull_request(self, repo_name: str, pr_number: int) -> Dict[str, Any]:
+        """
+        Submits an approving review on a pull request.
+        """
+        if not self.github_token:
+            raise ValueError("GitHub token is not set.")
+
+        url = f"{self.github.base_url}/repos/{repo_name}/pulls/{pr_number}/reviews"
+        response = self._request("github", "POST", url, json={"event": "APPROVE"})
+        response.raise_for_status()
         return response.json()
 
+    def get_github_rate_limit(self) -> Dict[str, Optional[int]]:
+        """Remaining GitHub rate-limit budget, as of the last response."""
+        return dict(self.github.rate_limit)
+
+    def get_github_graphql_rate_limit(self) -> Dict[str, Optional[int]]:
+        """Remaining GraphQL point budget and the cost of the last query."""
+        return dict(self.github.graphql_rate_limit)
+
     def trigger_gitlab_pipeline(self, project_id: str, ref: str) -> Dict[str, Any]:
         """
         Triggers a new pipeline for a GitLab project on a specific ref (branch/tag).
@@ -62,17 +364,19 @@ class ApiService:
             raise ValueError("Branch/Ref is required.")
 
         url = f"{self.gitlab_url}/api/v4/projects/{project_id}/pipeline"
-        headers = {"PRIVATE-TOKEN": self.gitlab_token}
         data = {"ref": ref}
 
-        response = requests.post(url, headers=headers, json=data, timeout=10)
+        response = self._request("gitlab", "POST", url, json=data)
         response.raise_for_status()
         return response.json()
 
-    def trigger_jenkins_build(self, job_name: str) -> str:
+    def trigger_jenkins_build(self, job_name: str) -> Dict[str, Any]:
         """
-        Triggers a build for a Jenkins job.
+        Triggers a build for a Jenkins job. Jobs in folders are named by
+        their full name, e.g. 'team/service/main'.
         Uses /build for simple jobs. Use /buildWithParameters for parameterized jobs.
+        Returns {"message", "queue_url"}; queue_url is the queue item to follow
+        until Jenkins assigns a build number (None if Jenkins didn't send one).
         """
         if not self.jenkins_url or not self.jenkins_user or not self.jenkins_token:
             raise ValueError("Jenkins URL, user, or token is not set.")
@@ -81,25 +385,229 @@ class ApiService:
 
         # Note: This triggers a build *without* parameters.
         # For parameters, change URL to /buildWithParameters and send form data
-        url = f"{self.jenkins_url}/job/{job_name.strip()}/build"
-        auth = HTTPBasicAuth(self.jenkins_user, self.jenkins_token)
+        url = f"{self.jenkins_url}/{jenkins_job_path(job_name)}/build"
+
+        # Jenkins requires a CSRF token (crumb) for POST requests. The crumb is
+        # reused until Jenkins rejects it, then fetched again exactly once.
+        response = self._jenkins_post(url)
 
-        # Jenkins requires a CSRF token (crumb) for POST requests
+        # Successful build trigger returns 201 (Created)
+        if response.status_code == 201:
+            return {
+                "message": f"Build successfully triggered for {job_name}.",
+                "queue_url": response.headers.get("Location"),
+            }
+        else:
+            raise Exception(f"Failed to trigger build. Status: {response.status_code}, Text: {response.text}")
+
+    def get_jenkins_build_status(self, job_name: str, build_number: str = "lastBuild") -> Dict[str, Any]:
+        """
+        Fetches the status of a Jenkins build (defaults to the job's last build).
+        """
+        if not self.jenkins_url or not self.jenkins_user or not self.jenkins_token:
+            raise ValueError("Jenkins URL, user, or token is not set.")
+        if not job_name:
+            raise ValueError("Job name is required.")
+
+        url = f"{self.jenkins_url}/{jenkins_job_path(job_name)}/{build_number}/api/json"
+        response = self._request("jenkins", "GET", url, params={"tree": JENKINS_BUILD_TREE})
+        response.raise_for_status()
+        return response.json()
+
+    def get_jenkins_folder(self, folder: str = "") -> List[Dict[str, Any]]:
+        """
+        Lists the items directly inside a Jenkins folder or multibranch
+        project ("" for the top level), with only the fields in JENKINS_JOBS_TREE.
+        """
+        if not self.jenkins_url or not self.jenkins_user or not self.jenkins_token:
+            raise ValueError("Jenkins URL, user, or token is not set.")
+
+        prefix = f"{jenkins_job_path(folder)}/" if folder else ""
+        response = self._request("jenkins", "GET", f"{self.jenkins_url}/{prefix}api/json",
+                                 params={"tree": JENKINS_JOBS_TREE})
+        response.raise_for_status()
+        return response.json().get("jobs", [])
+
+    def get_jenkins_queue_item(self, queue_url: str) -> Dict[str, Any]:
+        """
+        Fetches a Jenkins queue item. Once the build has started it contains
+        "executable": {"number", "url"}; if it was dropped, "cancelled": true.
+        """
+        url = f"{queue_url.rstrip('/')}/api/json"
+        response = self._request("jenkins", "GET", url)
+        response.raise_for_status()
+        return response.json()
+
+    def get_gitlab_pipeline_status(self, project_id: str, pipeline_id: str) -> Dict[str, Any]:
+        """
+        Fetches a single GitLab pipeline, including its current status.
+        """
+        if not self.gitlab_url or not self.gitlab_token:
+            raise ValueError("GitLab URL or token is not set.")
+        if not project_id or not pipeline_id:
+            raise ValueError("Project ID and pipeline ID are required.")
+
+        url = f"{self.gitlab_url}/api/v4/projects/{project_id}/pipelines/{pipeline_id}"
+        response = self._request("gitlab", "GET", url)
+        response.raise_for_status()
+        return response.json()
+
+    def get_gitlab_pipeline_jobs(self, project_id: str, pipeline_id: str) -> List[Dict[str, Any]]:
+        """
+        Fetches the jobs of a GitLab pipeline (first 100, which covers nearly all pipelines).
+        """
+        if not self.gitlab_url or not self.gitlab_token:
+            raise ValueError("GitLab URL or token is not set.")
+
+        url = f"{self.gitlab_url}/api/v4/projects/{project_id}/pipelines/{pipeline_id}/jobs"
+        response = self._request("gitlab", "GET", url, params={"per_page": 100})
+        response.raise_for_status()
+        return response.json()
+
+    # --- Build Logs ---
+
+    def stream_jenkins_log(self, job_name: str, build_number: str, start: int,
+                           sink: Callable[[bytes], None]) -> Tuple[int, bool]:
+        """
+        Fetches the part of a Jenkins console log after byte offset `start`
+        (progressiveText) and feeds it to `sink` in chunks, so a large log
+        is never held in memory. Returns (next_offset, more_data).
+        """
+        if not self.jenkins_url or not self.jenkins_user or not self.jenkins_token:
+            raise ValueError("Jenkins URL, user, or token is not set.")
+        if not job_name:
+            raise ValueError("Job name is required.")
+
+        url = f"{self.jenkins_url}/{jenkins_job_path(job_name)}/{build_number}/logText/progressiveText"
+        with self._request("jenkins", "GET", url, params={"start": start}, stream=True) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(LOG_CHUNK_SIZE):
+                sink(chunk)
+            next_offset = int(response.headers.get("X-Text-Size", start))
+            more = response.headers.get("X-More-Data", "").lower() == "true"
+        return next_offset, more
+
+    def get_gitlab_job(self, project_id: str, job_id: str) -> Dict[str, Any]:
+        """
+        Fetches a single GitLab job, including its status.
+        """
+        if not self.gitlab_url or not self.gitlab_token:
+            raise ValueError("GitLab URL or token is not set.")
+        if not project_id or not job_id:
+            raise ValueError("Project ID and job ID are required.")
+
+        url = f"{self.gitlab_url}/api/v4/projects/{project_id}/jobs/{job_id}"
+        response = self._request("gitlab", "GET", url)
+        response.raise_for_status()
+        return response.json()
+
+    def stream_gitlab_job_trace(self, project_id: str, job_id: str, start: int,
+                                sink: Callable[[bytes], None]) -> int:
+        """
+        Fetches a GitLab job trace from byte offset `start` with a Range
+        request and feeds it to `sink` in chunks. Returns the next offset.
+        Servers that ignore Range send the whole trace; the part we already
+        have is skipped.
+        """
+        if not self.gitlab_url or not self.gitlab_token:
+            raise ValueError("GitLab URL or token is not set.")
+
+        url = f"{self.gitlab_url}/api/v4/projects/{project_id}/jobs/{job_id}/trace"
+        headers = {"Range": f"bytes={start}-"} if start else {}
+        with self._request("gitlab", "GET", url, headers=headers, stream=True) as response:
+            if response.status_code == 416:  # Nothing new past `start`
+                return start
+            response.raise_for_status()
+            skip = start if response.status_code == 200 else 0
+            offset = start - skip
+            for chunk in response.iter_content(LOG_CHUNK_SIZE):
+                offset += len(chunk)
+                if skip >= len(chunk):
+                    skip -= len(chunk)
+                    continue
+                sink(chunk[skip:])
+                skip = 0
+        return max(offset, start)
+
+    # --- Jenkins CSRF Crumbs ---
+
+    def _jenkins_post(self, url: str, **kwargs) -> requests.Response:
+        """
+        POSTs to Jenkins with a cached crumb, refreshing it transparently
+        if Jenkins answers 403 or reports an invalid crumb.
+        """
+        crumb = self._get_jenkins_crumb()
+        response = self._request(
+            "jenkins", "POST", url,
+            headers=crumb["header"], cookies=crumb["cookies"], **kwargs
+        )
+        if self._is_crumb_rejected(response):
+            crumb = self._get_jenkins_crumb(force_refresh=True)
+            response = self._request(
+                "jenkins", "POST", url,
+                headers=crumb["header"], cookies=crumb["cookies"], **kwargs
+            )
+        return response
+
+    def _get_jenkins_crumb(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """Returns the cached crumb for the current Jenkins URL and user."""
+        key = (self.jenkins_url, self.jenkins_user)
+        with self._crumb_lock:
+            if force_refresh:
+                self._crumb_cache.pop(key, None)
+                self.crumb_stats["refreshes"] += 1
+            crumb = self._crumb_cache.get(key)
+            if crumb is not None:
+                self.crumb_stats["hits"] += 1
+                return crumb
+            self.crumb_stats["misses"] += 1
+
+        crumb = self._fetch_jenkins_crumb()
+        with self._crumb_lock:
+            self._crumb_cache[key] = crumb
+        return crumb
+
+    def _fetch_jenkins_crumb(self) -> Dict[str, Any]:
+        """Asks the crumb issuer for a new crumb and the cookies it belongs to."""
         crumb_url = f"{self.jenkins_url}/crumbIssuer/api/json"
         try:
-            crumb_response = requests.get(crumb_url, auth=auth, timeout=5)
+            crumb_response = self._request("jenkins", "GET", crumb_url, timeout=CRUMB_TIMEOUT)
             crumb_response.raise_for_status()
             crumb_data = crumb_response.json()
-            crumb_header = {crumb_data["crumbRequestField"]: crumb_data["crumb"]}
+            return {
+                "header": {crumb_data["crumbRequestField"]: crumb_data["crumb"]},
+                "cookies": crumb_response.cookies.get_dict(),
+            }
         except Exception as e:
-            # Fallback if crumbs are disabled or request fails
-            print(f"Could not get Jenkins crumb, proceeding without it... Error: {e}")
-            crumb_header = {}
+            # Fallback if crumbs are disabled or request fails. The empty
+            # crumb is cached too, so a 403 will still trigger a retry.
+            self.metrics.event("jenkins", "crumb_fallback", f"Could not get a Jenkins crumb, proceeding without it: {e}")
+            return {"header": {}, "cookies": {}}
 
-        response = requests.post(url, auth=auth, headers=crumb_header, timeout=10)
+    @staticmethod
+    def _is_crumb_rejected(response: requests.Response) -> bool:
+        """True if Jenkins refused the POST because of a missing or stale crumb."""
+        if response.status_code == 403:
+            return True
+        return response.status_code >= 400 and "No valid crumb" in response.text
 
-        # Successful build trigger returns 201 (Created)
-        if response.status_code == 201:
-            return f"Build successfully triggered for {job_name}."
-        else:
-            raise Exception(f"Failed to trigger build. Status: {response.status_code}, Text: {response.text}")
\ No newline at end of file
+
+def _body_size(body: Any) -> int:
+    """Bytes of a prepared request body (0 for streamed bodies)."""
+    return len(body) if isinstance(body, (bytes, str)) else 0
+
+
+def _received_size(response: requests.Response, stream: bool) -> int:
+    """Bytes read off the wire (before decompression); streamed bodies by their Content-Length."""
+    if stream:
+        return int(response.headers.get("Content-Length") or 0)
+    try:
+        return response.raw.tell()
+    except Exception:
+        return len(response.content)
+
+
+def _retry_count(response: requests.Response) -> int:
+    """Retries urllib3 did before this response arrived."""
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
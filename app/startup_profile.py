@@ -0,0 +1,63 @@
+"""
+UniCI Startup Profile
+Records how long each startup phase takes (import, config load, widget
+build, keyring, first paint) and prints a timeline when profiling is on:
+
+    python run.py --profile-startup      (or UNICI_PROFILE_STARTUP=1)
+
+It is imported first by run.py and must stay free of heavy imports.
+"""
+import os
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_ENV = "UNICI_PROFILE_STARTUP"
+QUIT_FLAG = "--quit-after-startup"   # Used by benchmarks/bench_startup.py
+
+class StartupProfile:
+    """
+    Phases are (name, start, end) in seconds since launch. Phases may
+    overlap: the keyring load runs in the background during widget build.
+    """
+    def __init__(self):
+        self.launch = time.perf_counter()
+        self.enabled = PROFILE_FLAG in sys.argv or bool(os.environ.get(PROFILE_ENV))
+        self.quit_after_startup = QUIT_FLAG in sys.argv
+        self.phases: List[Tuple[str, float, float]] = []
+        self._open: dict = {}
+        self._lock = threading.Lock()
+
+    def begin(self, name: str):
+        self._open[name] = time.perf_counter()
+
+    def end(self, name: str):
+        start = self._open.pop(name, None)
+        if start is not None:
+            self.record(name, start, time.perf_counter())
+
+    def record(self, name: str, start: float, end: float):
+        """Records a phase measured elsewhere (e.g. on a worker thread)."""
+        with self._lock:
+            self.phases.append((name, start - self.launch, end - self.launch))
+
+    def elapsed_ms(self, name: str) -> Optional[float]:
+        """Milliseconds from launch to the end of a phase, if recorded."""
+        with self._lock:
+            ends = [end for phase, _, end in self.phases if phase == name]
+        return ends[-1] * 1000 if ends else None
+
+    def report(self) -> str:
+        """Timeline: start and duration of every phase in ms since launch."""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+        lines = ["Startup timeline (ms since launch):",
+                 f"  {'start':>8}  {'duration':>8}  phase"]
+        for name, start, end in phases:
+            lines.append(f"  {start * 1000:8.1f}  {(end - start) * 1000:8.1f}  {name}")
+        return "\n".join(lines)
+
+# Created when run.py imports this module, which is as close to process start as we get
+PROFILE = StartupProfile()
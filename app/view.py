@@ -7,7 +7,59 @@ It only calls methods on the AppController.
 
 import customtkinter as ctk
 import queue
+import sys
+import time
+from typing import Any, List, Tuple
 from app.controller import AppController # Import from our package
+from app.gui_queue import GuiQueue
+from app.metrics import trace_path_from_argv
+from app.startup_profile import PROFILE
+
+# --- Console rendering limits ---
+CONSOLE_MAX_LINES = 5000        # Scrollback ring buffer size
+FRAME_INTERVAL_MS = 16          # Reschedule delay while a backlog is draining
+FRAME_BUDGET_MS = 8.0           # Target GUI-thread time spent rendering per tick
+MIN_DRAIN_BATCH = 50
+MAX_DRAIN_BATCH = 20000
+GUI_QUEUE_EVENT = "<<GuiQueueReady>>"
+
+# Tabs in display order; each is built the first time it is selected
+TAB_NAMES = ("Settings", "Jenkins", "GitHub", "GitLab", "Workflows", "Diagnostics")
+
+class ConsolePanel(ctk.CTkTextbox):
+    """
+    Read-only console that renders many messages with a single insert.
+    Keeps at most `max_lines` lines, dropping the oldest ones first.
+    """
+    def __init__(self, master, max_lines: int = CONSOLE_MAX_LINES, **kwargs):
+        super().__init__(master, state="disabled", **kwargs)
+        self.max_lines = max_lines
+        self.line_count = 0
+
+    @staticmethod
+    def format_message(item) -> str:
+        """Queue items are either a message or a (message, level) tuple."""
+        if isinstance(item, tuple):
+            message, level = item
+            if level and level != "INFO":
+                return f"[{level}] {message}"
+            return message
+        return item
+
+    def append_messages(self, items: List):
+        """Appends a batch of messages in one insert and trims the scrollback."""
+        if not items:
+            return
+        lines = [self.format_message(item) for item in items]
+        self.configure(state="normal")
+        self.insert("end", "\n".join(lines) + "\n")
+        self.line_count += sum(line.count("\n") + 1 for line in lines)
+        excess = self.line_count - self.max_lines
+        if excess > 0:
+            self.delete("1.0", f"{excess + 1}.0")
+            self.line_count = self.max_lines
+        self.configure(state="disabled")
+        self.see("end")  # Auto-scroll once per batch
 
 class App(ctk.CTk):
     """
@@ -16,184 +68,235 @@ class App(ctk.CTk):
     to the AppController.
     """
     def __init__(self, *args, **kwargs):
+        PROFILE.begin("widget build")
         super().__init__(*args, **kwargs)
 
         self.title("Cross-Platform CI/CD Utility")
         self.geometry("900x700")
 
         # Create the thread-safe queue and the controller
-        self.gui_queue = queue.Queue()
-        self.controller = AppController(self.gui_queue)
+        self.gui_queue = GuiQueue()
+        # --profile [file] traces requests, jobs and GUI updates to a file on exit
+        self.controller = AppController(self.gui_queue, trace_path=trace_path_from_argv(sys.argv))
 
         # Configure main grid
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
-        # Create TabView
-        self.tab_view = ctk.CTkTabview(self)
+        # Create TabView. Tab contents are built on first selection.
+        self.tabs = {}
+        self.tab_view = ctk.CTkTabview(self, command=self.on_tab_selected)
         self.tab_view.grid(row=0, column=0, padx=20, pady=(0, 10), sticky="nsew")
-
-        self.tab_view.add("Settings")
-        self.tab_view.add("Jenkins")
-        self.tab_view.add("GitHub")
-        self.tab_view.add("GitLab")
+        for name in TAB_NAMES:
+            self.tab_view.add(name)
 
         # Create Console
-        self.console_textbox = ctk.CTkTextbox(self, height=150, state="disabled")
-        self.console_textbox.grid(row=1, column=0, padx=20, pady=(0, 20), sticky="nsew")
+        max_lines = int(self.controller.get_config_setting("console_max_lines", CONSOLE_MAX_LINES))
+        self.console_textbox = ConsolePanel(self, height=150, max_lines=max_lines)
+        self.console_textbox.grid(row=1, column=0, padx=20, pady=(0, 5), sticky="nsew")
         self.log_to_console("Welcome to the CI/CD Utility. Configure your services in Settings.")
 
-        # Populate tabs
-        self.create_settings_tab()
-        self.create_jenkins_tab()
-        self.create_github_tab()
-        self.create_gitlab_tab()
+        # Create Status Bar (background job queue metrics)
+        self.status_bar_label = ctk.CTkLabel(self, text="", anchor="w", text_color="gray")
+        self.status_bar_label.grid(row=2, column=0, padx=20, pady=(0, 10), sticky="ew")
+
+        # Reopen the tab that was last in use; only that one is built now
+        last_tab = self.controller.get_config_setting("last_tab", TAB_NAMES[0])
+        self.tab_view.set(last_tab if last_tab in TAB_NAMES else TAB_NAMES[0])
+        self.get_tab(self.tab_view.get())
+
+        # Load saved URLs and tokens into the service off the GUI thread
+        self.controller.handle_reload_api_config()
+        PROFILE.end("widget build")
+        self.controller.when_credentials_loaded(self._log_startup_times)
+
+        # Drain background jobs before the window goes away
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self._painted = False
+        self.bind("<Map>", self._on_first_map, add="+")
+
+        # Worker threads wake the GUI with a virtual event when they queue
+        # something, so there is no polling while the app is idle.
+        self.drain_batch = MIN_DRAIN_BATCH
+        self.last_tick_ms = 0.0
+        self._drain_after_id = None
+        self.bind(GUI_QUEUE_EVENT, self._on_gui_queue_event)
+        self.gui_queue.set_waker(self._wake_gui)
+        # Pick up anything queued before the waker was installed
+        self.after_idle(self.check_gui_queue)
+
+    # --- Tabs ---
+
+    def get_tab(self, name: str):
+        """Returns the tab object for a tab name, building it on first use."""
+        tab = self.tabs.get(name)
+        if tab is None:
+            start = time.perf_counter()
+            tab = self._create_tab(name, self.tab_view.tab(name))
+            tab.set_controller(self.controller)
+            self.tabs[name] = tab
+            PROFILE.record(f"build {name} tab", start, time.perf_counter())
+        return tab
+
+    def _create_tab(self, name: str, parent):
+        """
+        Imports and instantiates one tab. The imports are local so a tab's
+        module (and whatever it pulls in) only loads when the tab is opened.
+        """
+        if name == "Settings":
+            from app.view_tabs.settings_tab import SettingsTab
+            return SettingsTab(parent, self)
+        if name == "Jenkins":
+            from app.view_tabs.jenkins_tab import JenkinsTab
+            return JenkinsTab(parent, self)
+        if name == "GitHub":
+            from app.view_tabs.github_tab import GitHubTab
+            return GitHubTab(parent, self)
+        if name == "GitLab":
+            from app.view_tabs.gitlab_tab import GitLabTab
+            return GitLabTab(parent, self)
+        if name == "Workflows":
+            from app.view_tabs.workflows_tab import WorkflowsTab
+            return WorkflowsTab(parent, self)
+        if name == "Diagnostics":
+            from app.view_tabs.diagnostics_tab import DiagnosticsTab
+            return DiagnosticsTab(parent, self)
+        raise ValueError(f"Unknown tab: {name}")
+
+    def on_tab_selected(self):
+        """Builds the selected tab if needed and remembers it for the next launch."""
+        name = self.tab_view.get()
+        tab = self.get_tab(name)
+        # Tabs that refresh on a timer stop while hidden and resume here
+        if hasattr(tab, "on_shown"):
+            tab.on_shown()
+        self.controller.set_config_setting("last_tab", name)
+
+    # --- Startup profiling ---
+
+    def _on_first_map(self, event):
+        """The window is mapped; it is painted on the next idle pass."""
+        if event.widget is not self or self._painted:
+            return
+        self._painted = True
+        self.after_idle(self._on_first_paint)
+
+    def _on_first_paint(self):
+        PROFILE.record("first paint", PROFILE.launch, time.perf_counter())
+        if PROFILE.enabled:
+            if not self.controller.credentials.loaded:
+                self.controller.when_credentials_loaded(lambda: print(PROFILE.report(), flush=True))
+            else:
+                print(PROFILE.report(), flush=True)
+        if PROFILE.quit_after_startup:
+            self.controller.when_credentials_loaded(self.on_close)
+
+    def _log_startup_times(self):
+        """Reports how long the window took to build and how long the background keyring load took."""
+        credentials = self.controller.credentials
+        lookups = ", ".join(f"{name} {ms:.0f} ms" for name, ms in credentials.timings.items())
+        window_ms = PROFILE.elapsed_ms("widget build") or 0.0
+        self.log_to_console(
+            f"Startup: window built {window_ms:.0f} ms after launch; keyring loaded in the background "
+            f"in {credentials.load_ms:.0f} ms ({lookups or 'no entries'})"
+        )
+
+    def _wake_gui(self):
+        """
+        Called from any thread when the GUI queue has new items.
+        Tkinter forwards event_generate from worker threads to the main loop.
+        """
+        self.event_generate(GUI_QUEUE_EVENT, when="tail")
 
-        # Start the queue checker
-        self.after(100, self.check_gui_queue)
+    def _on_gui_queue_event(self, event=None):
+        """Drains right away unless a backlog drain is already scheduled."""
+        if self._drain_after_id is None:
+            self.check_gui_queue()
 
     def check_gui_queue(self):
         """
         Checks the queue for new messages from the controller/threads
         and posts them to the console. Runs on the main GUI thread.
+
+        Messages are coalesced into a single console insert per tick. The
+        number of messages taken per tick adapts so that rendering stays
+        within FRAME_BUDGET_MS; any backlog is picked up on the next frame.
+        When the queue is empty nothing is rescheduled: the next put()
+        wakes the GUI again.
         """
+        self._drain_after_id = None
+        self.gui_queue.acknowledge()
+        start = time.perf_counter()
+        batch = []
         try:
-            while True:
-                message = self.gui_queue.get_nowait()
-                self.log_to_console(message)
+            while len(batch) < self.drain_batch:
+                batch.append((self.gui_queue.get_nowait(), self.gui_queue.last_wait))
         except queue.Empty:
             pass  # No new messages
+        try:
+            self._process_batch(batch)
+            self.update_status_bar()
         finally:
-            # Reschedule itself to run again
-            self.after(100, self.check_gui_queue)
+            self.last_tick_ms = (time.perf_counter() - start) * 1000
+            self._adapt_drain_batch(len(batch))
+            # Reschedule itself on the next frame only if a backlog remains
+            if not self.gui_queue.empty():
+                self._drain_after_id = self.after(FRAME_INTERVAL_MS, self.check_gui_queue)
 
-    def log_to_console(self, message: str):
-        """Appends a message to the console text box."""
-        self.console_textbox.configure(state="normal")
-        self.console_textbox.insert("end", f"{message}\n")
-        self.console_textbox.configure(state="disabled")
-        self.console_textbox.see("end")  # Auto-scroll
-
-    def create_settings_tab(self):
-        """Creates the widgets for the 'Settings' tab."""
-        tab = self.tab_view.tab("Settings")
-        tab.grid_columnconfigure(1, weight=1)
-
-        frame = ctk.CTkFrame(tab)
-        frame.pack(pady=20, padx=20, fill="x")
-        frame.grid_columnconfigure(1, weight=1)
-
-        # --- Jenkins Settings ---
-        ctk.CTkLabel(frame, text="Jenkins URL", anchor="w").grid(row=0, column=0, padx=10, pady=5, sticky="w")
-        self.jenkins_url_entry = ctk.CTkEntry(frame, placeholder_text="http://my-jenkins.com:8080")
-        self.jenkins_url_entry.grid(row=0, column=1, padx=10, pady=5, sticky="ew")
-
-        ctk.CTkLabel(frame, text="Jenkins User", anchor="w").grid(row=1, column=0, padx=10, pady=5, sticky="w")
-        self.jenkins_user_entry = ctk.CTkEntry(frame, placeholder_text="username")
-        self.jenkins_user_entry.grid(row=1, column=1, padx=10, pady=5, sticky="ew")
-
-        ctk.CTkLabel(frame, text="Jenkins Token", anchor="w").grid(row=2, column=0, padx=10, pady=5, sticky="w")
-        self.jenkins_token_entry = ctk.CTkEntry(frame, placeholder_text="API Token", show="*")
-        self.jenkins_token_entry.grid(row=2, column=1, padx=10, pady=5, sticky="ew")
-
-        # --- GitHub Settings ---
-        ctk.CTkLabel(frame, text="GitHub Token", anchor="w").grid(row=3, column=0, padx=10, pady=(15, 5), sticky="w")
-        self.github_token_entry = ctk.CTkEntry(frame, placeholder_text="Personal Access Token", show="*")
-        self.github_token_entry.grid(row=3, column=1, padx=10, pady=(15, 5), sticky="ew")
-
-        # --- GitLab Settings ---
-        ctk.CTkLabel(frame, text="GitLab URL", anchor="w").grid(row=4, column=0, padx=10, pady=(15, 5), sticky="w")
-        self.gitlab_url_entry = ctk.CTkEntry(frame, placeholder_text="https://gitlab.com")
-        self.gitlab_url_entry.grid(row=4, column=1, padx=10, pady=(15, 5), sticky="ew")
-
-        ctk.CTkLabel(frame, text="GitLab Token", anchor="w").grid(row=5, column=0, padx=10, pady=5, sticky="w")
-        self.gitlab_token_entry = ctk.CTkEntry(frame, placeholder_text="Personal Access Token", show="*")
-        self.gitlab_token_entry.grid(row=5, column=1, padx=10, pady=5, sticky="ew")
-
-        # --- Save Button ---
-        save_button = ctk.CTkButton(tab, text="Save Configuration", command=self.save_config)
-        save_button.pack(pady=20)
-
-    def save_config(self):
+    def _process_batch(self, batch: List[Tuple[Any, float]]):
         """
-Atts        Called by the 'Save' button.
-        It collects data from entry widgets and passes it to the controller.
+        Renders log messages and runs GUI callbacks queued by the controller,
+        in the order they were queued. Each item comes with the time it
+        waited in the queue, which is recorded with the callback's run time.
         """
-        config_data = {
-            "jenkins_url": self.jenkins_url_entry.get(),
-            "jenkins_user": self.jenkins_user_entry.get(),
-            "jenkins_token": self.jenkins_token_entry.get(),
-            "github_token": self.github_token_entry.get(),
-            "gitlab_url": self.gitlab_url_entry.get(),
-            "gitlab_token": self.gitlab_token_entry.get(),
-        }
-        # The View only calls the controller, it doesn't save anything itself
-        self.controller.update_api_config(config_data)
-
-    def create_jenkins_tab(self):
-        """Creates the widgets for the 'Jenkins' tab."""
-        tab = self.tab_view.tab("Jenkins")
-        tab.grid_columnconfigure(0, weight=1)
-
-        frame = ctk.CTkFrame(tab)
-        frame.pack(pady=20, padx=20, fill="x")
-        frame.grid_columnconfigure(1, weight=1)
-
-        ctk.CTkLabel(frame, text="Job Name", anchor="w").grid(row=0, column=0, padx=10, pady=10, sticky="w")
-        self.jenkins_job_entry = ctk.CTkEntry(frame, placeholder_text="my-pipeline-job")
-        self.jenkins_job_entry.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
-
-        trigger_button = ctk.CTkButton(frame, text="Trigger Build", command=self.trigger_jenkins_build)
-        trigger_button.grid(row=1, column=0, columnspan=2, padx=10, pady=20)
-
-    def trigger_jenkins_build(self):
-        """Passes the user action to the controller."""
-        job_name = self.jenkins_job_entry.get()
-        self.controller.handle_jenkins_build(job_name)
-
-    def create_github_tab(self):
-        """Creates the widgets for the 'GitHub' tab."""
-        tab = self.tab_view.tab("GitHub")
-        tab.grid_columnconfigure(0, weight=1)
-
-        frame = ctk.CTkFrame(tab)
-        frame.pack(pady=20, padx=20, fill="x")
-        frame.grid_columnconfigure(1, weight=1)
-
-        ctk.CTkLabel(frame, text="Repo Name", anchor="w").grid(row=0, column=0, padx=10, pady=10, sticky="w")
-        self.github_repo_entry = ctk.CTkEntry(frame, placeholder_text="owner/repository-name")
-        self.github_repo_entry.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
-
-        trigger_button = ctk.CTkButton(frame, text="List Branches", command=self.list_github_branches)
-        trigger_button.grid(row=1, column=0, columnspan=2, padx=10, pady=20)
-
-    def list_github_branches(self):
-        """Passes the user action to the controller."""
-        repo_name = self.github_repo_entry.get()
-        self.controller.handle_github_list_branches(repo_name)
-
-    def create_gitlab_tab(self):
-        """Creates the widgets for the 'GitLab' tab."""
-        tab = self.tab_view.tab("GitLab")
-        tab.grid_columnconfigure(0, weight=1)
-
-        frame = ctk.CTkFrame(tab)
-        frame.pack(pady=20, padx=20, fill="x")
-        frame.grid_columnconfigure(1, weight=1)
-
-        ctk.CTkLabel(frame, text="Project ID", anchor="w").grid(row=0, column=0, padx=10, pady=10, sticky="w")
-        self.gitlab_project_entry = ctk.CTkEntry(frame, placeholder_text="12345")
-        self.gitlab_project_entry.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
-
-        ctk.CTkLabel(frame, text="Branch / Ref", anchor="w").grid(row=1, column=0, padx=10, pady=10, sticky="w")
-        self.gitlab_ref_entry = ctk.CTkEntry(frame, placeholder_text="main")
-        self.gitlab_ref_entry.grid(row=1, column=1, padx=10, pady=10, sticky="ew")
-
-        trigger_button = ctk.CTkButton(frame, text="Trigger Pipeline", command=self.trigger_gitlab_pipeline)
-        trigger_button.grid(row=2, column=0, columnspan=2, padx=10, pady=20)
-
-    def trigger_gitlab_pipeline(self):
-        """Passes the user action to the controller."""
-        project_id = self.gitlab_project_entry.get()
-        ref = self.gitlab_ref_entry.get()
-        self.controller.handle_gitlab_trigger_pipeline(project_id, ref)
\ No newline at end of file
+        messages = []
+        message_waits = []
+        for item, waited in batch:
+            if not callable(item):
+                messages.append(item)
+                message_waits.append(waited)
+                continue
+            self.console_textbox.append_messages(messages)
+            messages = []
+            started = time.perf_counter()
+            try:
+                item()
+            except Exception as e:
+                messages.append((f"GUI update failed: {e}", "ERROR"))
+            self.controller.record_gui_update(waited, item, started, time.perf_counter() - started)
+        self.console_textbox.append_messages(messages)
+        if message_waits:
+            self.controller.record_gui_messages(message_waits)
+
+    def _adapt_drain_batch(self, drained: int):
+        """Grows or shrinks the per-tick batch size towards the frame budget."""
+        if self.last_tick_ms > FRAME_BUDGET_MS and drained:
+            scaled = int(drained * FRAME_BUDGET_MS / self.last_tick_ms)
+            self.drain_batch = max(MIN_DRAIN_BATCH, scaled)
+        elif drained >= self.drain_batch and self.last_tick_ms < FRAME_BUDGET_MS / 2:
+            self.drain_batch = min(MAX_DRAIN_BATCH, self.drain_batch * 2)
+
+    def update_status_bar(self):
+        """Shows the controller's job queue depth and wait times."""
+        stats = self.controller.get_scheduler_stats()
+        text = (f"Jobs: {stats['running']} running, {stats['queued']} queued  |  "
+                f"Queue wait: avg {stats['avg_wait_ms']:.0f} ms, max {stats['max_wait_ms']:.0f} ms")
+        webhooks = self.controller.get_webhook_stats()
+        if webhooks["listening"]:
+            text += f"  |  Webhooks: {webhooks['events']} events"
+            if "latency_ms" in webhooks:
+                text += f", p50 {webhooks['latency_ms']['p50']:.0f} ms to screen"
+        self.status_bar_label.configure(text=text)
+
+    def on_close(self):
+        """Called when the window is closed. Lets running jobs finish first."""
+        # Workers must not wait on the GUI thread while it waits on them
+        self.gui_queue.set_waker(None)
+        self.controller.shutdown()
+        if self.controller.trace_saved_to:
+            print(f"Trace written to {self.controller.trace_saved_to}", flush=True)
+        self.destroy()
+
+    def log_to_console(self, message: str, level: str = "INFO"):
+        """Appends a message to the console text box."""
+        self.console_textbox.append_messages([(message, level)])
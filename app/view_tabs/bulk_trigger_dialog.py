@@ -0,0 +1,90 @@
+"""
+UniCI Bulk Trigger Dialog
+Paste a list of Jenkins jobs or GitLab projects and trigger them all at
+once; the aggregated result table (with per-target latency) is shown
+when every target has answered.
+"""
+import customtkinter as ctk
+from app.bulk import parse_targets
+
+class BulkTriggerDialog(ctk.CTkToplevel):
+    """
+    One dialog per tab. `backend` ("jenkins" or "gitlab") is the default
+    for lines without a 'jenkins:' / 'gitlab:' prefix.
+    """
+    def __init__(self, master, controller, main_view, backend: str):
+        super().__init__(master)
+        self.controller = controller
+        self.main_view = main_view
+        self.backend = backend
+
+        self.title(f"Bulk Trigger - {'Jenkins Jobs' if backend == 'jenkins' else 'GitLab Pipelines'}")
+        self.geometry("760x600")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_rowconfigure(4, weight=1)
+
+        noun = "job name" if backend == "jenkins" else "project ID or path"
+        self.help_label = ctk.CTkLabel(
+            self,
+            text=f"One {noun} per line. Lines may start with 'jenkins:' or 'gitlab:' "
+                 f"and end with '@ ref' to override the defaults.",
+            text_color="gray", anchor="w", justify="left", wraplength=700,
+        )
+        self.help_label.grid(row=0, column=0, padx=20, pady=(15, 5), sticky="ew")
+
+        self.targets_textbox = ctk.CTkTextbox(self, height=180)
+        self.targets_textbox.grid(row=1, column=0, padx=20, pady=5, sticky="nsew")
+
+        self.options_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.options_frame.grid(row=2, column=0, padx=20, pady=5, sticky="ew")
+        self.options_frame.grid_columnconfigure(1, weight=1)
+
+        self.ref_label = ctk.CTkLabel(self.options_frame, text="Default Branch/Ref:")
+        self.ref_label.grid(row=0, column=0, padx=(0, 10), pady=5, sticky="w")
+        self.ref_entry = ctk.CTkEntry(self.options_frame, width=200)
+        self.ref_entry.grid(row=0, column=1, pady=5, sticky="w")
+
+        self.monitor_var = ctk.BooleanVar(value=True)
+        self.monitor_checkbox = ctk.CTkCheckBox(self.options_frame, text="Monitor triggered runs",
+                                                variable=self.monitor_var)
+        self.monitor_checkbox.grid(row=0, column=2, padx=10, pady=5)
+
+        self.trigger_button = ctk.CTkButton(self.options_frame, text="Trigger All", command=self.on_trigger_all)
+        self.trigger_button.grid(row=0, column=3, pady=5, sticky="e")
+
+        self.results_label = ctk.CTkLabel(self, text="Results", anchor="w")
+        self.results_label.grid(row=3, column=0, padx=20, pady=(10, 0), sticky="ew")
+        self.results_textbox = ctk.CTkTextbox(self, wrap="none", font=ctk.CTkFont(family="Courier", size=12))
+        self.results_textbox.grid(row=4, column=0, padx=20, pady=(5, 20), sticky="nsew")
+        self.results_textbox.configure(state="disabled")
+
+    def on_trigger_all(self):
+        """Parses the list and hands it to the controller."""
+        targets = parse_targets(self.targets_textbox.get("1.0", "end"), self.backend, self.ref_entry.get().strip())
+        missing_ref = [target.name for target in targets if target.backend == "gitlab" and not target.ref]
+        if not targets:
+            self.main_view.log_to_console("Bulk Trigger: paste at least one target.", "WARN")
+            return
+        if missing_ref:
+            self.main_view.log_to_console(f"Bulk Trigger: no ref for GitLab project(s): {', '.join(missing_ref)}", "WARN")
+            return
+
+        self.trigger_button.configure(state="disabled", text=f"Triggering {len(targets)}...")
+        self._show_results(f"Triggering {len(targets)} targets...")
+        future = self.controller.handle_bulk_trigger(targets, self.on_results, monitor=self.monitor_var.get())
+        if future is None:
+            self.trigger_button.configure(state="normal", text="Trigger All")
+
+    def on_results(self, results, table):
+        """Called on the GUI thread with the aggregated results."""
+        if not self.winfo_exists():
+            return
+        self.trigger_button.configure(state="normal", text="Trigger All")
+        self._show_results(table)
+
+    def _show_results(self, text: str):
+        self.results_textbox.configure(state="normal")
+        self.results_textbox.delete("1.0", "end")
+        self.results_textbox.insert("1.0", text)
+        self.results_textbox.configure(state="disabled")
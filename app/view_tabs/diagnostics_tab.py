@@ -0,0 +1,173 @@
+"""
+UniCI Diagnostics Tab
+Shows where time goes: latency percentiles, status codes, bytes and
+retries per backend and endpoint, scheduler queue wait versus run time,
+rate-limit budgets and pacing per host, how many GETs were shared with
+an identical one instead of being sent, and how long updates wait for
+the GUI thread.
+
+The report is plain text, rebuilt once a second while the tab is shown;
+nothing is scheduled while it is hidden.
+"""
+import time
+from typing import Any, Dict, List
+import customtkinter as ctk
+
+REFRESH_MS = 1000
+MAX_ENDPOINT_ROWS = 40
+
+
+def format_bytes(count: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GiB"
+
+
+def format_budget(state: Dict[str, Any]) -> str:
+    """'4210/5000 left, resets in 12 min; background 1.2/s' for one host of the rate governor."""
+    if state["blocked_for_s"] > 0:
+        return f"closed for {state['blocked_for_s']:.0f} s"
+    parts = []
+    if state["remaining"] is not None:
+        budget = f"{state['remaining']}/{state['limit']} left" if state["limit"] else f"{state['remaining']} left"
+        if state["reset_in_s"] is not None:
+            budget += f", resets in {state['reset_in_s'] / 60:.0f} min"
+        parts.append(budget)
+    if state["background_paused_for_s"] > 0:
+        parts.append(f"background paused {state['background_paused_for_s']:.0f} s")
+    else:
+        parts.append(f"background {state['rate']:.1f}/s")
+    return "; ".join(parts)
+
+
+def format_report(diagnostics: Dict[str, Any]) -> str:
+    """The Diagnostics text for a controller.get_diagnostics() snapshot."""
+    lines: List[str] = [f"Since {time.strftime('%H:%M:%S', time.localtime(time.time() - diagnostics['uptime_s']))}"
+                        f" ({diagnostics['uptime_s'] / 60:.0f} min)", ""]
+
+    lines.append("Backends             requests  errors  retries      p50      p95      max   received")
+    for backend, totals in sorted(diagnostics["backends"].items()):
+        latency = totals["latency"]
+        lines.append(f"  {backend:<18} {latency['count']:>8} {totals['errors']:>7} {totals['retries']:>8} "
+                     f"{latency['p50']:>6.0f}ms {latency['p95']:>6.0f}ms {latency['max']:>6.0f}ms "
+                     f"{format_bytes(totals['bytes_received']):>10}")
+    if not diagnostics["backends"]:
+        lines.append("  No requests yet.")
+
+    lines += ["", "Endpoints (by total time)              count      p50      p95      p99  statuses"]
+    for row in diagnostics["requests"][:MAX_ENDPOINT_ROWS]:
+        name = f"{row['backend']} {row['method']} {row['endpoint']}"
+        if len(name) > 38:
+            name = "..." + name[-35:]
+        statuses = " ".join(f"{status}x{count}" for status, count in sorted(row["statuses"].items()))
+        retries = f" retries {row['retries']}" if row["retries"] else ""
+        lines.append(f"  {name:<38} {row['count']:>5} {row['p50']:>6.0f}ms {row['p95']:>6.0f}ms "
+                     f"{row['p99']:>6.0f}ms  {statuses}{retries}")
+
+    scheduler = diagnostics["scheduler"]
+    lines += ["", f"Scheduler: {scheduler['running']} running, {scheduler['queued']} queued, "
+                  f"{scheduler['workers']} workers",
+              "  backend            jobs  failed   wait p50   wait p95    run p50    run p95"]
+    for backend, job in sorted(diagnostics["jobs"].items()):
+        lines.append(f"  {backend:<16} {job['run']['count']:>6} {job['failed']:>7} {job['wait']['p50']:>8.1f}ms "
+                     f"{job['wait']['p95']:>8.1f}ms {job['run']['p50']:>8.0f}ms {job['run']['p95']:>8.0f}ms")
+
+    rate_limits = diagnostics.get("rate_limits", {})
+    if rate_limits:
+        lines += ["", "Rate limits (per host)        requests  delayed   waited  limited  budget"]
+        for host, state in sorted(rate_limits.items()):
+            name = host if len(host) <= 28 else "..." + host[-25:]
+            lines.append(f"  {name:<28} {state['requests']:>8} {state['delayed']:>8} {state['delay_total_s']:>7.1f}s "
+                         f"{state['limited']:>8}  {format_budget(state)}")
+
+    coalescing = diagnostics.get("coalescing", {})
+    if coalescing:
+        lines += ["", "Shared GETs (per backend)      asked     sent   joined  micro-cache  dedup"]
+        for backend, counts in sorted(coalescing.items()):
+            lines.append(f"  {backend:<26} {counts['requests']:>8} {counts['sent']:>8} {counts['shared']:>8} "
+                         f"{counts['cached']:>12} {counts['dedup_ratio']:>6.0%}")
+
+    gui = diagnostics["gui"]
+    lines += ["", f"GUI queue: {gui['hop']['count']} updates, waited p50 {gui['hop']['p50']:.1f} ms, "
+                  f"p95 {gui['hop']['p95']:.1f} ms, max {gui['hop']['max']:.1f} ms; "
+                  f"callbacks ran p95 {gui['run']['p95']:.1f} ms, max {gui['run']['max']:.1f} ms"]
+
+    if diagnostics["events"]:
+        lines += ["", "Recent warnings"]
+        for at, source, kind, message in reversed(diagnostics["events"][-10:]):
+            lines.append(f"  {time.strftime('%H:%M:%S', time.localtime(at))}  {source}/{kind}: {message}")
+
+    lines.append("")
+    if diagnostics["metrics_endpoint"]:
+        lines.append(f"Prometheus: {diagnostics['metrics_endpoint']}")
+    else:
+        lines.append("Prometheus endpoint off (set metrics_port in config.json to serve it on 127.0.0.1).")
+    if "trace" in diagnostics:
+        lines.append(f"Tracing to {diagnostics['trace']['path']} (written on exit)")
+    return "\n".join(lines)
+
+
+class DiagnosticsTab:
+    """
+    Encapsulates the GUI and logic for the Diagnostics tab.
+    """
+    def __init__(self, parent_tab, main_view):
+        self.parent = parent_tab
+        self.main_view = main_view
+        self.controller = None
+
+        self.parent.grid_columnconfigure(0, weight=1)
+        self.parent.grid_rowconfigure(1, weight=1)
+
+        self.button_frame = ctk.CTkFrame(self.parent, fg_color="transparent")
+        self.button_frame.grid(row=0, column=0, padx=20, pady=(20, 5), sticky="ew")
+        self.button_frame.grid_columnconfigure(0, weight=1)
+
+        self.title_label = ctk.CTkLabel(self.button_frame, text="Requests, jobs and GUI updates",
+                                        font=ctk.CTkFont(weight="bold"))
+        self.title_label.grid(row=0, column=0, padx=10, pady=5, sticky="w")
+        self.reset_button = ctk.CTkButton(self.button_frame, text="Reset", width=80, command=self.on_reset)
+        self.reset_button.grid(row=0, column=1, padx=10, pady=5, sticky="e")
+
+        self.report_textbox = ctk.CTkTextbox(self.parent, font=ctk.CTkFont(family="Courier", size=12), wrap="none")
+        self.report_textbox.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
+        self.report_textbox.configure(state="disabled")
+        self._last_report = ""
+        self._refresh_id = None
+
+    def set_controller(self, controller):
+        """Set the controller and start refreshing."""
+        self.controller = controller
+        self.refresh()
+
+    def on_shown(self):
+        """Called by the main view when the tab is selected again."""
+        if self._refresh_id is None:
+            self.refresh()
+
+    def refresh(self):
+        """Rebuilds the report every REFRESH_MS for as long as the tab is visible."""
+        self._refresh_id = None
+        if self.main_view.tab_view.get() != "Diagnostics":
+            return
+        self.show_report()
+        self._refresh_id = self.parent.after(REFRESH_MS, self.refresh)
+
+    def show_report(self):
+        report = format_report(self.controller.get_diagnostics())
+        # Rewriting identical text would reset the scroll position for nothing
+        if report == self._last_report:
+            return
+        self._last_report = report
+        position = self.report_textbox.yview()[0]
+        self.report_textbox.configure(state="normal")
+        self.report_textbox.delete("1.0", "end")
+        self.report_textbox.insert("1.0", report)
+        self.report_textbox.configure(state="disabled")
+        self.report_textbox.yview_moveto(position)
+
+    def on_reset(self):
+        self.controller.reset_metrics()
+        self.show_report()
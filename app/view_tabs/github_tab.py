@@ -1,8 +1,39 @@
 """
 UniCI GitHub Tab
 GUI for interacting with GitHub, e.g., viewing Pull Requests.
+
+The PR list is an inbox over any number of repositories (or every
+repository of an organization or user). Filtering and sorting run against
+the controller's in-memory index, so they are applied on every keystroke.
 """
+import time
 import customtkinter as ctk
+from app.pr_inbox import REVIEW_NONE
+from app.view_tabs.pr_list import PullRequestList
+
+EVENT_REFRESH_DELAY_MS = 1000   # Coalesces bursts of pull_request webhook events into one sync
+# Menu label -> query arguments
+REVIEW_FILTERS = {
+    "Any review": None,
+    "Review required": "REVIEW_REQUIRED",
+    "Changes requested": "CHANGES_REQUESTED",
+    "Approved": "APPROVED",
+    "No decision": REVIEW_NONE,
+}
+AGE_FILTERS = {
+    "Any age": {},
+    "Opened today": {"max_age_days": 1},
+    "Opened this week": {"max_age_days": 7},
+    "Older than 30 days": {"min_age_days": 30},
+}
+SORT_ORDERS = {
+    "Recently updated": {"sort": "updated", "descending": True},
+    "Least recently updated": {"sort": "updated", "descending": False},
+    "Newest": {"sort": "created", "descending": True},
+    "Oldest": {"sort": "created", "descending": False},
+    "Repository": {"sort": "repo", "descending": False},
+    "Author": {"sort": "author", "descending": False},
+}
 
 class GitHubTab:
     """
@@ -12,7 +43,9 @@ class GitHubTab:
         self.parent = parent_tab
         self.main_view = main_view
         self.controller = None
-        self.pr_data_cache = [] # To store full PR data
+        self.pr_data_cache = [] # The PRs currently shown
+        self._event_refresh_id = None
+        self._syncing = False
 
         # Configure grid
         self.parent.grid_columnconfigure(0, weight=1)
@@ -23,7 +56,7 @@ class GitHubTab:
         self.repo_frame.grid(row=0, column=0, padx=20, pady=20, sticky="ew")
         self.repo_frame.grid_columnconfigure(1, weight=1)
 
-        self.repo_label = ctk.CTkLabel(self.repo_frame, text="GitHub Repo (owner/name):")
+        self.repo_label = ctk.CTkLabel(self.repo_frame, text="Repos (owner/name, org:name):")
         self.repo_label.grid(row=0, column=0, padx=10, pady=10, sticky="w")
 
         self.repo_entry = ctk.CTkEntry(self.repo_frame, width=300)
@@ -32,72 +65,165 @@ class GitHubTab:
         self.refresh_button = ctk.CTkButton(self.repo_frame, text="Refresh PRs", command=self.on_refresh_prs)
         self.refresh_button.grid(row=0, column=2, padx=10, pady=10, sticky="e")
 
+        self.rate_limit_label = ctk.CTkLabel(self.repo_frame, text="", text_color="gray", anchor="w")
+        self.rate_limit_label.grid(row=1, column=0, columnspan=3, padx=10, pady=(0, 5), sticky="w")
+
         # --- PR List Frame ---
-        self.pr_frame = ctk.CTkScrollableFrame(self.parent, label_text="Open Pull Requests")
+        self.pr_frame = ctk.CTkFrame(self.parent)
         self.pr_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
         self.pr_frame.grid_columnconfigure(0, weight=1)
-
-        # This widget will be populated by display_pull_requests
-        self.no_prs_label = ctk.CTkLabel(self.pr_frame, text="Refresh to see pull requests.")
-        self.no_prs_label.grid(row=0, column=0, padx=10, pady=10)
+        self.pr_frame.grid_rowconfigure(2, weight=1)
+
+        self.pr_header = ctk.CTkLabel(self.pr_frame, text="Open Pull Requests", font=ctk.CTkFont(weight="bold"))
+        self.pr_header.grid(row=0, column=0, padx=10, pady=5)
+
+        # --- Filters ---
+        self.filter_frame = ctk.CTkFrame(self.pr_frame, fg_color="transparent")
+        self.filter_frame.grid(row=1, column=0, padx=5, pady=(0, 5), sticky="ew")
+        self.filter_frame.grid_columnconfigure(0, weight=1)
+
+        self.search_entry = ctk.CTkEntry(self.filter_frame, placeholder_text="Filter by title, repo, author or branch")
+        self.search_entry.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
+        self.search_entry.bind("<KeyRelease>", lambda event: self.apply_filters())
+
+        self.repo_menu = ctk.CTkOptionMenu(self.filter_frame, values=["Any repo"], width=140,
+                                           command=lambda choice: self.apply_filters())
+        self.repo_menu.grid(row=0, column=1, padx=5, pady=5)
+        self.author_menu = ctk.CTkOptionMenu(self.filter_frame, values=["Any author"], width=120,
+                                             command=lambda choice: self.apply_filters())
+        self.author_menu.grid(row=0, column=2, padx=5, pady=5)
+        self.base_menu = ctk.CTkOptionMenu(self.filter_frame, values=["Any base"], width=110,
+                                           command=lambda choice: self.apply_filters())
+        self.base_menu.grid(row=0, column=3, padx=5, pady=5)
+        self.review_menu = ctk.CTkOptionMenu(self.filter_frame, values=list(REVIEW_FILTERS), width=140,
+                                             command=lambda choice: self.apply_filters())
+        self.review_menu.grid(row=0, column=4, padx=5, pady=5)
+        self.age_menu = ctk.CTkOptionMenu(self.filter_frame, values=list(AGE_FILTERS), width=140,
+                                          command=lambda choice: self.apply_filters())
+        self.age_menu.grid(row=0, column=5, padx=5, pady=5)
+        self.sort_menu = ctk.CTkOptionMenu(self.filter_frame, values=list(SORT_ORDERS), width=150,
+                                           command=lambda choice: self.apply_filters())
+        self.sort_menu.grid(row=0, column=6, padx=5, pady=5)
+        # Index facet -> (its menu, the menu's "no filter" label)
+        self.facet_menus = {
+            "repo": (self.repo_menu, "Any repo"),
+            "author": (self.author_menu, "Any author"),
+            "base": (self.base_menu, "Any base"),
+        }
+
+        # Only the visible rows exist as widgets; refreshes are applied as a diff
+        self.pr_list_frame = ctk.CTkFrame(self.pr_frame, fg_color="transparent")
+        self.pr_list_frame.grid(row=2, column=0, padx=5, pady=5, sticky="nsew")
+        self.pr_list = PullRequestList(self.pr_list_frame, self.on_approve_pr, key="key")
+        self.pr_list.show_message("Refresh to see pull requests.")
 
     def set_controller(self, controller):
         """Set the controller and load initial data."""
         self.controller = controller
-        # Load last used repo from config
-        self.repo_entry.insert(0, self.controller.get_config_setting("github_repo", ""))
+        # Load last used repos from config
+        sources = self.controller.get_config_setting("github_repo", "")
+        self.repo_entry.insert(0, sources)
+
+        # Paint the last known inbox right away, then sync what changed since
+        if sources and self.controller.load_cached_inbox(sources):
+            self.on_inbox_synced(True)
+            self.pr_header.configure(text=f"{self.pr_header.cget('text')} (cached, refreshing...)")
+            self._sync(sources)
+
+        # Pull request webhooks (if enabled) sync the inbox instead of waiting for a click
+        self.controller.add_status_listener("github", self.on_github_event)
+
+    def on_github_event(self, key, label, state, detail):
+        """Called on the GUI thread for pushed GitHub events."""
+        repo_name = key[len("github:"):].split("#", 1)[0] if key.startswith("github:") else ""
+        if repo_name not in self.controller.get_inbox_repos() or self._event_refresh_id is not None:
+            return
+        self._event_refresh_id = self.parent.after(EVENT_REFRESH_DELAY_MS, self._refresh_after_event)
+
+    def _refresh_after_event(self):
+        self._event_refresh_id = None
+        sources = self.repo_entry.get().strip()
+        if sources and not self._syncing:
+            self._sync(sources)
 
     def on_refresh_prs(self):
         """Handle the refresh PRs button click."""
-        repo_name = self.repo_entry.get()
-        if self.controller and repo_name:
-            self.controller.handle_github_refresh_prs(repo_name)
-            # Clear current view
-            for widget in self.pr_frame.winfo_children():
-                widget.destroy()
-            self.loading_label = ctk.CTkLabel(self.pr_frame, text="Loading...")
-            self.loading_label.grid(row=0, column=0, padx=10, pady=10)
-        elif not repo_name:
-            self.main_view.log_to_console("Please enter a GitHub Repo Name.", "WARN")
-
-    def display_pull_requests(self, pr_list):
+        sources = self.repo_entry.get().strip()
+        if self.controller and sources:
+            self._sync(sources)
+            # Keep showing the current PRs while they sync
+            if self.pr_data_cache:
+                self.pr_header.configure(text="Open Pull Requests (refreshing...)")
+            else:
+                self.pr_list.show_message("Loading...")
+        elif not sources:
+            self.main_view.log_to_console("Please enter a GitHub repo, e.g. owner/name or org:name.", "WARN")
+
+    def _sync(self, sources: str):
+        self._syncing = True
+        self.controller.handle_github_sync_inbox(sources, self.on_inbox_synced)
+
+    def on_inbox_synced(self, ok):
         """
-        Called by the controller to populate the scrollable frame with PRs.
-        This method MUST run on the main GUI thread.
+        Called by the controller once a sync finished (ok is False if it
+        failed). This method MUST run on the main GUI thread.
         """
-        # Clear "Loading..." or old PRs
-        for widget in self.pr_frame.winfo_children():
-            widget.destroy()
+        self._syncing = False
+        self.update_rate_limit()
+        self.update_facet_menus()
+        self.apply_filters()
+        if not ok:
+            self.pr_header.configure(text="Open Pull Requests (refresh failed)")
+            if not self.pr_data_cache:
+                self.pr_list.show_message("Could not load pull requests. See the console.")
+
+    def update_facet_menus(self):
+        """Offers the repos, authors and base branches currently in the inbox."""
+        for facet, (menu, any_label) in self.facet_menus.items():
+            values = [any_label] + self.controller.get_inbox_facet(facet)
+            menu.configure(values=values)
+            if menu.get() not in values:
+                menu.set(any_label)
+
+    def apply_filters(self):
+        """Queries the in-memory inbox with the current filters and shows the result."""
+        if not self.controller:
+            return
+        filters = {"text": self.search_entry.get(), "review": REVIEW_FILTERS[self.review_menu.get()]}
+        for facet, (menu, any_label) in self.facet_menus.items():
+            filters[facet] = None if menu.get() == any_label else menu.get()
+        filters.update(AGE_FILTERS[self.age_menu.get()])
+        filters.update(SORT_ORDERS[self.sort_menu.get()])
+        self.display_pull_requests(self.controller.query_pull_requests(**filters))
 
+    def display_pull_requests(self, pr_list):
+        """Shows a filtered, sorted slice of the inbox."""
+        total = self.controller.get_inbox_count()
         self.pr_data_cache = pr_list
+        repos = len(self.controller.get_inbox_repos())
+        shown = f"{len(pr_list)}" if len(pr_list) == total else f"{len(pr_list)} of {total}"
+        self.pr_header.configure(text=f"Open Pull Requests ({shown} in {repos} repos)")
 
         if not pr_list:
-            self.no_prs_label = ctk.CTkLabel(self.pr_frame, text="No open pull requests found.")
-            self.no_prs_label.grid(row=0, column=0, padx=10, pady=10)
+            self.pr_list.show_message("No open pull requests found." if not total else
+                                      "No pull requests match the filters.")
             return
 
-        for i, pr in enumerate(pr_list):
-            pr_frame = ctk.CTkFrame(self.pr_frame, fg_color=("gray85", "gray17"))
-            pr_frame.grid(row=i, column=0, padx=5, pady=5, sticky="ew")
-            pr_frame.grid_columnconfigure(1, weight=1)
-
-            title = f"#{pr['number']}: {pr['title']}"
-            author = pr['user']['login']
-            pr_info = f"by @{author}  |  {pr['head']['ref']} -> {pr['base']['ref']}"
-
-            title_label = ctk.CTkLabel(pr_frame, text=title, font=ctk.CTkFont(weight="bold"), anchor="w")
-            title_label.grid(row=0, column=0, columnspan=2, padx=10, pady=(5,0), sticky="w")
-
-            info_label = ctk.CTkLabel(pr_frame, text=pr_info, text_color="gray", anchor="w")
-            info_label.grid(row=1, column=0, columnspan=2, padx=10, pady=(0,5), sticky="w")
-
-            approve_button = ctk.CTkButton(
-                pr_frame,
-                text="Approve",
-                width=80,
-                command=lambda p=pr: self.on_approve_pr(p)
-            )
-            approve_button.grid(row=0, column=2, rowspan=2, padx=10, pady=5, sticky="e")
+        # Only rows whose PR was added, removed or changed are touched
+        self.pr_list.set_items(pr_list)
+
+    def update_rate_limit(self):
+        """Shows the remaining GitHub API budget under the repo entry."""
+        parts = []
+        rate = self.controller.get_github_rate_limit()
+        if rate["remaining"] is not None:
+            reset = time.strftime("%H:%M", time.localtime(rate["reset"])) if rate["reset"] else "?"
+            parts.append(f"API rate limit: {rate['remaining']}/{rate['limit']} remaining, resets at {reset}")
+        graphql = self.controller.get_github_graphql_rate_limit()
+        if graphql["remaining"] is not None:
+            parts.append(f"GraphQL: {graphql['remaining']}/{graphql['limit']} points, last query cost {graphql['last_cost']}")
+        if parts:
+            self.rate_limit_label.configure(text="  |  ".join(parts))
 
     def on_approve_pr(self, pr_data):
         """Handle the approve button click for a specific PR."""
@@ -3,6 +3,9 @@ UniCI GitLab Tab
 GUI for triggering and monitoring GitLab pipelines.
 """
 import customtkinter as ctk
+from app.view_tabs.bulk_trigger_dialog import BulkTriggerDialog
+from app.view_tabs.log_viewer import LogViewer
+from app.view_tabs.status_list import StatusList
 
 class GitLabTab:
     """
@@ -15,6 +18,7 @@ class GitLabTab:
 
         # Configure grid
         self.parent.grid_columnconfigure(0, weight=1)
+        self.parent.grid_rowconfigure(2, weight=1)
 
         # --- Pipeline Trigger Frame ---
         self.trigger_frame = ctk.CTkFrame(self.parent)
@@ -36,15 +40,47 @@ class GitLabTab:
         self.trigger_button = ctk.CTkButton(self.trigger_frame, text="Trigger Pipeline", command=self.on_trigger_pipeline)
         self.trigger_button.grid(row=0, column=2, rowspan=2, padx=10, pady=10, sticky="e")
 
-        # --- Placeholder for future features ---
+        self.bulk_button = ctk.CTkButton(self.trigger_frame, text="Bulk Trigger...", width=110,
+                                         command=self.on_bulk_trigger)
+        self.bulk_button.grid(row=0, column=3, rowspan=2, padx=(0, 10), pady=10, sticky="e")
+        self.bulk_dialog = None
+
+        # --- Live status of monitored runs ---
         self.status_frame = ctk.CTkFrame(self.parent)
         self.status_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
-        self.status_label = ctk.CTkLabel(self.status_frame, text="Pipeline status will appear in the console log below.")
+        self.status_bar = ctk.CTkFrame(self.status_frame, fg_color="transparent")
+        self.status_bar.pack(fill="x", padx=10, pady=(5, 0))
+        self.refresh_statuses_button = ctk.CTkButton(self.status_bar, text="Refresh All", width=110,
+                                                     command=self.on_refresh_statuses)
+        self.refresh_statuses_button.pack(side="right")
+        self.status_label = ctk.CTkLabel(self.status_frame, text="Pipeline status will appear here and in the console log below.")
         self.status_label.pack(padx=10, pady=10)
+        self.status_list = StatusList(self.status_frame, self.status_label)
+
+        # --- Trace of a job ---
+        self.log_frame = ctk.CTkFrame(self.parent)
+        self.log_frame.grid(row=2, column=0, padx=20, pady=10, sticky="nsew")
+        self.log_frame.grid_columnconfigure(0, weight=1)
+        self.log_frame.grid_rowconfigure(1, weight=1)
+
+        self.log_bar = ctk.CTkFrame(self.log_frame, fg_color="transparent")
+        self.log_bar.grid(row=0, column=0, padx=5, pady=(5, 0), sticky="ew")
+        self.job_id_label = ctk.CTkLabel(self.log_bar, text="Job ID:")
+        self.job_id_label.grid(row=0, column=0, padx=5)
+        self.job_id_entry = ctk.CTkEntry(self.log_bar, width=120)
+        self.job_id_entry.grid(row=0, column=1, padx=5)
+        self.open_trace_button = ctk.CTkButton(self.log_bar, text="Open Job Trace", command=self.on_open_trace)
+        self.open_trace_button.grid(row=0, column=2, padx=5)
+
+        self.viewer_frame = ctk.CTkFrame(self.log_frame, fg_color="transparent")
+        self.viewer_frame.grid(row=1, column=0, sticky="nsew")
+        self.log_viewer = LogViewer(self.viewer_frame, self.main_view)
 
     def set_controller(self, controller):
         """Set the controller for this tab."""
         self.controller = controller
+        self.controller.add_status_listener("gitlab", self.status_list.show_status)
+        self.log_viewer.set_controller(controller)
 
     def on_trigger_pipeline(self):
         """Handle the trigger pipeline button click."""
@@ -54,4 +90,30 @@ class GitLabTab:
         if self.controller and project_id and ref:
             self.controller.handle_gitlab_trigger(project_id, ref)
         else:
-            self.main_view.log_to_console("Please enter a Project ID and Branch/Ref.", "WARN")
\ No newline at end of file
+            self.main_view.log_to_console("Please enter a Project ID and Branch/Ref.", "WARN")
+
+    def on_open_trace(self):
+        """Starts streaming the trace of the chosen job."""
+        project_id = self.project_id_entry.get()
+        job_id = self.job_id_entry.get().strip()
+        if not project_id or not job_id:
+            self.main_view.log_to_console("Please enter a Project ID and Job ID.", "WARN")
+            return
+        if self.controller:
+            self.log_viewer.close()
+            watch = self.controller.handle_open_gitlab_trace(project_id, job_id, self.log_viewer.on_update)
+            if watch is not None:
+                self.log_viewer.attach(watch)
+
+    def on_refresh_statuses(self):
+        """Re-reads every pipeline in the list at once, including those from the last session."""
+        if self.controller:
+            self.controller.handle_refresh_statuses("gitlab")
+
+    def on_bulk_trigger(self):
+        """Opens (or focuses) the paste-a-list bulk trigger dialog."""
+        if not self.controller:
+            return
+        if self.bulk_dialog is None or not self.bulk_dialog.winfo_exists():
+            self.bulk_dialog = BulkTriggerDialog(self.parent, self.controller, self.main_view, "gitlab")
+        self.bulk_dialog.focus()
@@ -2,7 +2,12 @@
 UniCI Jenkins Tab
 GUI for triggering and monitoring Jenkins jobs.
 """
+import time
 import customtkinter as ctk
+from app.view_tabs.bulk_trigger_dialog import BulkTriggerDialog
+from app.view_tabs.job_search import JobAutocomplete
+from app.view_tabs.log_viewer import LogViewer
+from app.view_tabs.status_list import StatusList
 
 class JenkinsTab:
     """
@@ -15,13 +20,14 @@ class JenkinsTab:
 
         # Configure grid
         self.parent.grid_columnconfigure(0, weight=1)
+        self.parent.grid_rowconfigure(2, weight=1)
 
         # --- Job Trigger Frame ---
         self.trigger_frame = ctk.CTkFrame(self.parent)
         self.trigger_frame.grid(row=0, column=0, padx=20, pady=20, sticky="ew")
         self.trigger_frame.grid_columnconfigure(1, weight=1)
 
-        self.job_label = ctk.CTkLabel(self.trigger_frame, text="Jenkins Job Name:")
+        self.job_label = ctk.CTkLabel(self.trigger_frame, text="Jenkins Job (folder/name):")
         self.job_label.grid(row=0, column=0, padx=10, pady=10, sticky="w")
 
         self.job_entry = ctk.CTkEntry(self.trigger_frame, width=300)
@@ -30,15 +36,86 @@ class JenkinsTab:
         self.trigger_button = ctk.CTkButton(self.trigger_frame, text="Trigger Build", command=self.on_trigger_build)
         self.trigger_button.grid(row=0, column=2, padx=10, pady=10, sticky="e")
 
-        # --- Placeholder for future features ---
+        self.bulk_button = ctk.CTkButton(self.trigger_frame, text="Bulk Trigger...", width=110,
+                                         command=self.on_bulk_trigger)
+        self.bulk_button.grid(row=0, column=3, padx=(0, 10), pady=10, sticky="e")
+        self.bulk_dialog = None
+
+        # Suggestions from the job index, including jobs inside folders
+        self.suggestion_frame = ctk.CTkFrame(self.trigger_frame)
+        self.suggestion_frame.grid(row=1, column=1, columnspan=3, padx=10, pady=(0, 5), sticky="ew")
+
+        self.index_label = ctk.CTkLabel(self.trigger_frame, text="", text_color="gray", anchor="w")
+        self.index_label.grid(row=2, column=0, columnspan=3, padx=10, pady=(0, 5), sticky="w")
+        self.refresh_jobs_button = ctk.CTkButton(self.trigger_frame, text="Refresh Jobs", width=110,
+                                                 command=self.on_refresh_jobs)
+        self.refresh_jobs_button.grid(row=2, column=3, padx=(0, 10), pady=(0, 5), sticky="e")
+        self.autocomplete = None
+
+        # --- Live status of monitored runs ---
         self.status_frame = ctk.CTkFrame(self.parent)
         self.status_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
-        self.status_label = ctk.CTkLabel(self.status_frame, text="Build status will appear in the console log below.")
+        self.status_bar = ctk.CTkFrame(self.status_frame, fg_color="transparent")
+        self.status_bar.pack(fill="x", padx=10, pady=(5, 0))
+        self.refresh_statuses_button = ctk.CTkButton(self.status_bar, text="Refresh All", width=110,
+                                                     command=self.on_refresh_statuses)
+        self.refresh_statuses_button.pack(side="right")
+        self.status_label = ctk.CTkLabel(self.status_frame, text="Build status will appear here and in the console log below.")
         self.status_label.pack(padx=10, pady=10)
+        self.status_list = StatusList(self.status_frame, self.status_label)
+
+        # --- Console log of a build ---
+        self.log_frame = ctk.CTkFrame(self.parent)
+        self.log_frame.grid(row=2, column=0, padx=20, pady=10, sticky="nsew")
+        self.log_frame.grid_columnconfigure(0, weight=1)
+        self.log_frame.grid_rowconfigure(1, weight=1)
+
+        self.log_bar = ctk.CTkFrame(self.log_frame, fg_color="transparent")
+        self.log_bar.grid(row=0, column=0, padx=5, pady=(5, 0), sticky="ew")
+        self.build_label = ctk.CTkLabel(self.log_bar, text="Build #:")
+        self.build_label.grid(row=0, column=0, padx=5)
+        self.build_entry = ctk.CTkEntry(self.log_bar, width=120, placeholder_text="lastBuild")
+        self.build_entry.grid(row=0, column=1, padx=5)
+        self.open_log_button = ctk.CTkButton(self.log_bar, text="Open Console Log", command=self.on_open_log)
+        self.open_log_button.grid(row=0, column=2, padx=5)
+
+        self.viewer_frame = ctk.CTkFrame(self.log_frame, fg_color="transparent")
+        self.viewer_frame.grid(row=1, column=0, sticky="nsew")
+        self.log_viewer = LogViewer(self.viewer_frame, self.main_view)
 
     def set_controller(self, controller):
         """Set the controller for this tab."""
         self.controller = controller
+        self.controller.add_status_listener("jenkins", self.status_list.show_status)
+        self.log_viewer.set_controller(controller)
+        self.autocomplete = JobAutocomplete(self.job_entry, self.suggestion_frame, self.controller.search_jenkins_jobs)
+
+        # Autocomplete from the last index right away, then refresh its stale folders
+        if self.controller.load_cached_jenkins_jobs():
+            self.show_index_status()
+        if self.controller.get_config_setting("jenkins_url", ""):
+            self.controller.when_credentials_loaded(
+                lambda: self.controller.handle_jenkins_refresh_jobs(self.on_jobs_indexed))
+
+    def on_refresh_jobs(self):
+        """Re-lists every folder, not just the stale ones."""
+        if self.controller:
+            self.index_label.configure(text="Indexing jobs...")
+            self.controller.handle_jenkins_refresh_jobs(self.on_jobs_indexed, force=True)
+
+    def on_jobs_indexed(self, ok):
+        """Called on the GUI thread when a crawl of the job tree finished."""
+        self.show_index_status()
+        if not ok:
+            self.index_label.configure(text=f"{self.index_label.cget('text')} (refresh failed)")
+
+    def show_index_status(self):
+        info = self.controller.get_jenkins_index_info()
+        if info["refreshed_at"] is None:
+            self.index_label.configure(text="No job index yet.")
+            return
+        updated = time.strftime("%H:%M", time.localtime(info["refreshed_at"]))
+        self.index_label.configure(text=f"{info['jobs']} jobs indexed, updated {updated}. Type to search.")
 
     def on_trigger_build(self):
         """Handle the trigger build button click."""
@@ -47,3 +124,29 @@ class JenkinsTab:
             self.controller.handle_jenkins_trigger(job_name)
         elif not job_name:
             self.main_view.log_to_console("Please enter a Jenkins Job Name.", "WARN")
+
+    def on_open_log(self):
+        """Starts streaming the console log of the chosen build."""
+        job_name = self.job_entry.get()
+        build_number = self.build_entry.get().strip() or "lastBuild"
+        if not job_name:
+            self.main_view.log_to_console("Please enter a Jenkins Job Name.", "WARN")
+            return
+        if self.controller:
+            self.log_viewer.close()
+            watch = self.controller.handle_open_jenkins_log(job_name, build_number, self.log_viewer.on_update)
+            if watch is not None:
+                self.log_viewer.attach(watch)
+
+    def on_refresh_statuses(self):
+        """Re-reads every build in the list at once, including those from the last session."""
+        if self.controller:
+            self.controller.handle_refresh_statuses("jenkins")
+
+    def on_bulk_trigger(self):
+        """Opens (or focuses) the paste-a-list bulk trigger dialog."""
+        if not self.controller:
+            return
+        if self.bulk_dialog is None or not self.bulk_dialog.winfo_exists():
+            self.bulk_dialog = BulkTriggerDialog(self.parent, self.controller, self.main_view, "jenkins")
+        self.bulk_dialog.focus()
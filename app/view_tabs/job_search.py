@@ -0,0 +1,113 @@
+"""
+UniCI Job Autocomplete
+Suggestion list under the Jenkins tab's job entry, filled from the
+controller's job index on every keystroke.
+
+A fixed pool of row buttons is reconfigured in place; Up/Down move the
+selection, Return or a click picks a job, Escape closes the list.
+"""
+from typing import Any, Callable, Dict, List
+import customtkinter as ctk
+
+MAX_SUGGESTIONS = 8
+# Jenkins ball colors -> what they mean; "_anime" means a build is running
+COLOR_STATES = {
+    "blue": "success",
+    "red": "failed",
+    "yellow": "unstable",
+    "aborted": "aborted",
+    "notbuilt": "not built",
+    "disabled": "disabled",
+}
+SELECTED_COLOR = ("gray75", "gray25")
+NAVIGATION_KEYS = ("Up", "Down", "Return", "Escape", "Tab")
+
+def describe_color(color: str) -> str:
+    """'red_anime' -> 'failed, building'."""
+    if not color:
+        return ""
+    state = COLOR_STATES.get(color.replace("_anime", ""), "")
+    if color.endswith("_anime"):
+        return f"{state}, building" if state else "building"
+    return state
+
+
+class JobAutocomplete:
+    """
+    Shows search(text, limit) results in `frame` (gridded by the tab) below
+    `entry`. The frame is hidden whenever there is nothing to suggest.
+    """
+    def __init__(self, entry: ctk.CTkEntry, frame: ctk.CTkFrame,
+                 search: Callable[[str, int], List[Dict[str, Any]]]):
+        self.entry = entry
+        self.frame = frame
+        self.search = search
+        self.jobs: List[Dict[str, Any]] = []
+        self.selected = -1
+        self.buttons: List[ctk.CTkButton] = []
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_remove()
+
+        entry.bind("<KeyRelease>", self.on_key_release)
+        entry.bind("<Down>", lambda event: self.move(1))
+        entry.bind("<Up>", lambda event: self.move(-1))
+        entry.bind("<Return>", self.on_return)
+        entry.bind("<Escape>", lambda event: self.hide())
+
+    def on_key_release(self, event):
+        if event.keysym not in NAVIGATION_KEYS:
+            self.refresh()
+
+    def refresh(self):
+        """Searches for the entry's text and shows the matches."""
+        self.jobs = self.search(self.entry.get(), MAX_SUGGESTIONS)
+        # Nothing to suggest once the entry holds exactly the only match
+        if not self.jobs or (len(self.jobs) == 1 and self.jobs[0]["name"] == self.entry.get().strip()):
+            self.hide()
+            return
+        self.selected = -1
+        while len(self.buttons) < len(self.jobs):
+            index = len(self.buttons)
+            button = ctk.CTkButton(self.frame, text="", anchor="w", height=24, fg_color="transparent",
+                                   text_color=("gray10", "gray90"), hover_color=SELECTED_COLOR,
+                                   command=lambda i=index: self.pick(i))
+            self.buttons.append(button)
+        for i, button in enumerate(self.buttons):
+            if i < len(self.jobs):
+                job = self.jobs[i]
+                state = describe_color(job.get("color") or "")
+                button.configure(text=f"{job['name']}    {state}" if state else job["name"], fg_color="transparent")
+                button.grid(row=i, column=0, padx=2, pady=0, sticky="ew")
+            else:
+                button.grid_remove()
+        self.frame.grid()
+
+    def move(self, step: int):
+        """Moves the keyboard selection through the suggestions."""
+        if not self.jobs:
+            return "break"
+        if 0 <= self.selected < len(self.jobs):
+            self.buttons[self.selected].configure(fg_color="transparent")
+        self.selected = (self.selected + step) % len(self.jobs)
+        self.buttons[self.selected].configure(fg_color=SELECTED_COLOR)
+        return "break"
+
+    def on_return(self, event):
+        if self.jobs and 0 <= self.selected < len(self.jobs):
+            self.pick(self.selected)
+            return "break"
+        return None
+
+    def pick(self, index: int):
+        """Puts the chosen job's full name into the entry."""
+        if index >= len(self.jobs):
+            return
+        self.entry.delete(0, "end")
+        self.entry.insert(0, self.jobs[index]["name"])
+        self.hide()
+        self.entry.focus_set()
+
+    def hide(self):
+        self.jobs = []
+        self.selected = -1
+        self.frame.grid_remove()
@@ -0,0 +1,242 @@
+"""
+UniCI Log Viewer
+Shared widget for the Jenkins and GitLab tabs: shows a streamed build log
+from a ChunkedLogBuffer. Only the window of lines that fits on screen is
+ever inserted into the textbox, so a 200 MB log scrolls as smoothly as a
+small one. Search runs a chunk at a time between GUI events.
+"""
+import time
+import customtkinter as ctk
+
+SEARCH_SLICE_MS = 8      # GUI time spent per search step before yielding
+WHEEL_LINES = 3
+MIN_VISIBLE_LINES = 5
+
+class LogViewer:
+    """
+    Renders a log viewer into an existing frame.
+    attach(watch) shows the buffer of a JenkinsLogWatch / GitLabTraceWatch;
+    on_update(done) must be called on the GUI thread when it grows.
+    """
+    def __init__(self, frame, main_view):
+        self.frame = frame
+        self.main_view = main_view
+        self.controller = None
+        self.watch = None
+        self.top = 0                 # Index of the first visible line
+        self.visible_lines = 30
+        self.follow = True           # Stick to the end while the log grows
+        self.matches = []            # Line indexes containing the search text
+        self.match_index = -1
+        self.needle = ""
+        self._search = None          # Running search generator
+        self._search_job = None
+
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(1, weight=1)
+
+        # --- Search bar ---
+        self.search_bar = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.search_bar.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+        self.search_bar.grid_columnconfigure(0, weight=1)
+
+        self.search_entry = ctk.CTkEntry(self.search_bar, placeholder_text="Search log...")
+        self.search_entry.grid(row=0, column=0, padx=5, sticky="ew")
+        self.search_entry.bind("<Return>", lambda event: self.on_find())
+
+        self.find_button = ctk.CTkButton(self.search_bar, text="Find", width=60, command=self.on_find)
+        self.find_button.grid(row=0, column=1, padx=5)
+        self.next_button = ctk.CTkButton(self.search_bar, text="Next", width=60, command=self.on_next_match)
+        self.next_button.grid(row=0, column=2, padx=5)
+
+        self.search_label = ctk.CTkLabel(self.search_bar, text="", width=140, anchor="w")
+        self.search_label.grid(row=0, column=3, padx=5)
+
+        self.follow_var = ctk.BooleanVar(value=True)
+        self.follow_checkbox = ctk.CTkCheckBox(self.search_bar, text="Follow", variable=self.follow_var,
+                                               command=self.on_follow_toggled)
+        self.follow_checkbox.grid(row=0, column=4, padx=5)
+
+        # --- Log window ---
+        self.font = ctk.CTkFont(family="Courier", size=12)
+        self.textbox = ctk.CTkTextbox(self.frame, wrap="none", font=self.font, activate_scrollbars=False)
+        self.textbox.grid(row=1, column=0, padx=(5, 0), pady=5, sticky="nsew")
+        self.textbox.tag_config("match", background="#5a4a00")
+        self.textbox.tag_config("current", background="#a07800")
+        self.textbox.configure(state="disabled")
+
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self.on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, padx=(0, 5), pady=5, sticky="ns")
+
+        self.textbox.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.textbox.bind("<Button-4>", lambda event: self.scroll_lines(-WHEEL_LINES))
+        self.textbox.bind("<Button-5>", lambda event: self.scroll_lines(WHEEL_LINES))
+        self.textbox.bind("<Configure>", self.on_resize)
+
+        self.status_label = ctk.CTkLabel(self.frame, text="No log open.", text_color="gray", anchor="w")
+        self.status_label.grid(row=2, column=0, columnspan=2, padx=10, pady=(0, 5), sticky="ew")
+
+    def set_controller(self, controller):
+        self.controller = controller
+
+    # --- Streaming ---
+
+    def attach(self, watch):
+        """Shows a new log stream, closing the previous one."""
+        self.close()
+        self.watch = watch
+        self.top = 0
+        self.follow = True
+        self.follow_var.set(True)
+        self._reset_search()
+        self.status_label.configure(text=f"{watch.label}: waiting for output...")
+        self.render()
+
+    def close(self):
+        """Stops the current stream and frees its buffer."""
+        self._cancel_search()
+        if self.watch is not None and self.controller:
+            self.controller.close_log_stream(self.watch)
+        self.watch = None
+
+    def on_update(self, done: bool):
+        """Called on the GUI thread when the buffer grew or the stream ended."""
+        if self.watch is None or self.watch.buffer.closed:
+            return
+        buffer = self.watch.buffer
+        state = "finished" if done else "streaming"
+        self.status_label.configure(
+            text=f"{self.watch.label}: {state}, {buffer.line_count:,} lines ({buffer.size / 1024:,.0f} KB)"
+        )
+        if self.follow:
+            self.top = max(0, buffer.line_count - self.visible_lines)
+        self.render()
+
+    # --- Rendering ---
+
+    def render(self):
+        """Replaces the textbox content with the visible window of lines."""
+        lines = []
+        total = 0
+        if self.watch is not None and not self.watch.buffer.closed:
+            total = self.watch.buffer.line_count
+            lines = self.watch.buffer.get_lines(self.top, self.visible_lines)
+
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("1.0", "\n".join(lines))
+        if self.needle:
+            current = self.matches[self.match_index] if self.match_index >= 0 else None
+            for offset, line in enumerate(lines):
+                if self.needle in line.lower():
+                    tag = "current" if self.top + offset == current else "match"
+                    self.textbox.tag_add(tag, f"{offset + 1}.0", f"{offset + 1}.end")
+        self.textbox.configure(state="disabled")
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_lines) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, line: int):
+        """Moves the window so that `line` is the first visible line."""
+        total = self.watch.buffer.line_count if self.watch is not None and not self.watch.buffer.closed else 0
+        self.top = max(0, min(line, total - self.visible_lines))
+        # Scrolling away from the end pauses follow mode; reaching it resumes
+        self.follow = self.top + self.visible_lines >= total
+        self.follow_var.set(self.follow)
+        self.render()
+
+    def scroll_lines(self, delta: int):
+        self.scroll_to(self.top + delta)
+        return "break"
+
+    # --- Events ---
+
+    def on_scrollbar(self, *args):
+        """Handles ("moveto", fraction) and ("scroll", n, "units"|"pages") from the scrollbar."""
+        if self.watch is None or self.watch.buffer.closed:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.watch.buffer.line_count))
+        elif args[0] == "scroll":
+            step = self.visible_lines if args[2] == "pages" else 1
+            self.scroll_lines(int(args[1]) * step)
+
+    def on_mouse_wheel(self, event):
+        return self.scroll_lines(-WHEEL_LINES if event.delta > 0 else WHEEL_LINES)
+
+    def on_resize(self, event):
+        visible = max(MIN_VISIBLE_LINES, event.height // max(1, self.font.metrics("linespace")))
+        if visible != self.visible_lines:
+            self.visible_lines = visible
+            if self.follow and self.watch is not None and not self.watch.buffer.closed:
+                self.top = max(0, self.watch.buffer.line_count - visible)
+            self.render()
+
+    def on_follow_toggled(self):
+        self.follow = self.follow_var.get()
+        if self.follow and self.watch is not None and not self.watch.buffer.closed:
+            self.scroll_to(self.watch.buffer.line_count)
+
+    # --- Search ---
+
+    def on_find(self):
+        """Starts an incremental search over the whole buffer."""
+        self._reset_search()
+        needle = self.search_entry.get().strip().lower()
+        if not needle or self.watch is None:
+            self.render()
+            return
+        self.needle = needle
+        self._search = self.watch.buffer.search(needle)
+        self.search_label.configure(text="Searching...")
+        self._search_step()
+
+    def on_next_match(self):
+        if not self.matches:
+            return
+        self.match_index = (self.match_index + 1) % len(self.matches)
+        self._show_current_match()
+
+    def _search_step(self):
+        """Scans chunks for up to SEARCH_SLICE_MS, then yields to the event loop."""
+        self._search_job = None
+        deadline = time.perf_counter() + SEARCH_SLICE_MS / 1000.0
+        finished = False
+        try:
+            while time.perf_counter() < deadline:
+                found = next(self._search)
+                if found and not self.matches:
+                    self.matches.extend(found)
+                    self.match_index = 0
+                    self._show_current_match()
+                else:
+                    self.matches.extend(found)
+        except StopIteration:
+            finished = True
+
+        suffix = "" if finished else " (searching...)"
+        self.search_label.configure(text=f"{len(self.matches):,} matches{suffix}")
+        if finished:
+            self._search = None
+            self.render()
+        else:
+            self._search_job = self.frame.after(1, self._search_step)
+
+    def _show_current_match(self):
+        line = self.matches[self.match_index]
+        self.scroll_to(line - self.visible_lines // 2)
+
+    def _cancel_search(self):
+        if self._search_job is not None:
+            self.frame.after_cancel(self._search_job)
+            self._search_job = None
+        self._search = None
+
+    def _reset_search(self):
+        self._cancel_search()
+        self.matches = []
+        self.match_index = -1
+        self.needle = ""
+        self.search_label.configure(text="")
@@ -0,0 +1,205 @@
+"""
+UniCI Pull Request List
+Virtualized list of pull requests for the GitHub tab.
+
+Only as many row widgets as fit on screen are ever created; scrolling
+rebinds those rows to other PRs instead of creating new ones. A refresh
+is applied as a keyed diff by PR number (or inbox key), and a row is
+only reconfigured when the PR it shows was added, removed or changed.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import customtkinter as ctk
+
+ROW_HEIGHT = 62          # Pixels per PR row, including padding
+WHEEL_ROWS = 3
+MIN_VISIBLE_ROWS = 3
+
+def pr_signature(pr: Dict[str, Any]) -> Tuple[str, str]:
+    """The (title, info) text a row shows for a PR; rows are reconfigured only when it changes."""
+    # Inbox PRs carry their repository, since the list can span many
+    title = f"{pr.get('repo', '')}#{pr['number']}: {pr['title']}"
+    info = f"by @{pr['user']['login']}  |  {pr['head']['ref']} -> {pr['base']['ref']}"
+    # Dashboard fields are only present when the PRs came from the GraphQL query
+    if pr.get("checks_state"):
+        info += f"  |  checks: {pr['checks_state'].lower()}"
+    if pr.get("review_decision"):
+        info += f"  |  {pr['review_decision'].replace('_', ' ').lower()}"
+    if pr.get("mergeable_state") == "CONFLICTING":
+        info += "  |  conflicts"
+    if pr.get("labels"):
+        info += f"  |  {', '.join(label['name'] for label in pr['labels'])}"
+    return title, info
+
+def diff_by_key(old: Iterable[Dict[str, Any]], new: Iterable[Dict[str, Any]],
+                key: str = "number") -> Tuple[Set[Any], Set[Any], Set[Any]]:
+    """Returns the (added, removed, changed) keys between two lists of PRs."""
+    old_by_key = {item[key]: item for item in old}
+    new_by_key = {item[key]: item for item in new}
+    added = new_by_key.keys() - old_by_key.keys()
+    removed = old_by_key.keys() - new_by_key.keys()
+    changed = {k for k in new_by_key.keys() & old_by_key.keys()
+               if pr_signature(new_by_key[k]) != pr_signature(old_by_key[k])}
+    return set(added), set(removed), changed
+
+
+class PullRequestRow:
+    """One recycled row: a frame with a title, an info line and an Approve button."""
+    def __init__(self, master, on_approve: Callable[["PullRequestRow"], None], on_wheel: Callable):
+        self.frame = ctk.CTkFrame(master, height=ROW_HEIGHT - 6, fg_color=("gray85", "gray17"))
+        self.frame.grid_columnconfigure(1, weight=1)
+        self.frame.grid_propagate(False)
+        self.title_label = ctk.CTkLabel(self.frame, text="", font=ctk.CTkFont(weight="bold"), anchor="w")
+        self.title_label.grid(row=0, column=0, columnspan=2, padx=10, pady=(5, 0), sticky="w")
+        self.info_label = ctk.CTkLabel(self.frame, text="", text_color="gray", anchor="w")
+        self.info_label.grid(row=1, column=0, columnspan=2, padx=10, pady=(0, 5), sticky="w")
+        self.approve_button = ctk.CTkButton(self.frame, text="Approve", width=80,
+                                            command=lambda: on_approve(self))
+        self.approve_button.grid(row=0, column=2, rowspan=2, padx=10, pady=5, sticky="e")
+        self.pr: Optional[Dict[str, Any]] = None
+        self.signature: Optional[Tuple[str, str]] = None
+        self.gridded = False
+        for widget in (self.frame, self.title_label, self.info_label):
+            widget.bind("<MouseWheel>", on_wheel)
+            widget.bind("<Button-4>", on_wheel)
+            widget.bind("<Button-5>", on_wheel)
+
+    def show(self, pr: Dict[str, Any]) -> bool:
+        """Binds the row to a PR. Returns True if any widget had to be reconfigured."""
+        self.pr = pr
+        signature = pr_signature(pr)
+        if signature == self.signature:
+            return False
+        if self.signature is None or signature[0] != self.signature[0]:
+            self.title_label.configure(text=signature[0])
+        if self.signature is None or signature[1] != self.signature[1]:
+            self.info_label.configure(text=signature[1])
+        self.signature = signature
+        return True
+
+
+class PullRequestList:
+    """
+    Renders PRs into an existing frame. set_items() applies a refresh;
+    `on_approve(pr)` is called when a row's Approve button is clicked.
+    PRs are matched across refreshes by their `key` field ("number" for a
+    single repository, "key" for the multi-repository inbox).
+    """
+    def __init__(self, frame, on_approve: Callable[[Dict[str, Any]], None], key: str = "number"):
+        self.frame = frame
+        self.on_approve = on_approve
+        self.key = key
+        self.items: List[Dict[str, Any]] = []
+        self.top = 0                       # Index of the PR in the first row
+        self.visible_rows = MIN_VISIBLE_ROWS
+        self.rows: List[PullRequestRow] = []
+        self.rows_configured = 0           # Widget updates done by the last render, for benchmarks
+
+        self.frame.grid_columnconfigure(0, weight=1)
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.body = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.body.grid_columnconfigure(0, weight=1)
+        self.scrollbar = ctk.CTkScrollbar(self.frame, command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.message_label = ctk.CTkLabel(self.body, text="")
+        self.body.bind("<Configure>", self.on_resize)
+        self.body.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.body.bind("<Button-4>", self.on_mouse_wheel)
+        self.body.bind("<Button-5>", self.on_mouse_wheel)
+
+    def show_message(self, text: str):
+        """Replaces the rows with a single message (e.g. 'Loading...')."""
+        self.items = []
+        self.top = 0
+        for row in self.rows:
+            row.frame.grid_remove()
+            row.gridded = False
+        self.message_label.configure(text=text)
+        self.message_label.grid(row=0, column=0, padx=10, pady=10)
+        self.scrollbar.set(0.0, 1.0)
+
+    def set_items(self, items: List[Dict[str, Any]]) -> Tuple[Set[Any], Set[Any], Set[Any]]:
+        """
+        Applies a new PR list and returns its (added, removed, changed) diff.
+        The first visible PR stays in place if it is still open.
+        """
+        diff = diff_by_key(self.items, items, self.key)
+        first = self.items[self.top][self.key] if self.top < len(self.items) else None
+        self.items = list(items)
+        self.message_label.grid_remove()
+        if first is not None:
+            positions = {pr[self.key]: i for i, pr in enumerate(self.items)}
+            self.top = positions.get(first, self.top)
+        self.top = self._clamp(self.top)
+        self.render()
+        return diff
+
+    def render(self):
+        """Binds the pooled rows to the PRs in view, touching only rows that differ."""
+        self._ensure_rows()
+        configured = 0
+        for slot, row in enumerate(self.rows):
+            index = self.top + slot
+            if index < len(self.items):
+                configured += row.show(self.items[index])
+                if not row.gridded:
+                    row.frame.grid(row=slot, column=0, padx=5, pady=3, sticky="ew")
+                    row.gridded = True
+            elif row.gridded:
+                row.pr = None
+                row.frame.grid_remove()
+                row.gridded = False
+        self.rows_configured = configured
+
+        total = len(self.items)
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, index: int):
+        top = self._clamp(index)
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    # --- Events ---
+
+    def on_scrollbar(self, *args):
+        """Handles ("moveto", fraction) and ("scroll", n, "units"|"pages") from the scrollbar."""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.items)))
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+
+    def on_mouse_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.top - WHEEL_ROWS)
+        else:
+            self.scroll_to(self.top + WHEEL_ROWS)
+        return "break"
+
+    def on_resize(self, event):
+        visible = max(MIN_VISIBLE_ROWS, event.height // ROW_HEIGHT)
+        if visible != self.visible_rows:
+            self.visible_rows = visible
+            self.top = self._clamp(self.top)
+            self.render()
+
+    def _on_row_approve(self, row: PullRequestRow):
+        if row.pr is not None:
+            self.on_approve(row.pr)
+
+    # --- Internals ---
+
+    def _ensure_rows(self):
+        """Grows or shrinks the row pool to the number of rows that fit."""
+        while len(self.rows) < self.visible_rows:
+            self.rows.append(PullRequestRow(self.body, self._on_row_approve, self.on_mouse_wheel))
+        while len(self.rows) > self.visible_rows:
+            self.rows.pop().frame.destroy()
+
+    def _clamp(self, index: int) -> int:
+        return max(0, min(index, len(self.items) - self.visible_rows))
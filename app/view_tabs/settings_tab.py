@@ -59,9 +59,29 @@ class SettingsTab:
         self.gitlab_token_entry = ctk.CTkEntry(self.parent, width=400, show="*")
         self.gitlab_token_entry.grid(row=8, column=1, padx=20, pady=5, sticky="ew")
 
+        # --- Webhook Settings ---
+        self.webhook_label = ctk.CTkLabel(self.parent, text="Webhooks", font=ctk.CTkFont(size=16, weight="bold"))
+        self.webhook_label.grid(row=9, column=0, columnspan=2, padx=20, pady=(20, 10), sticky="w")
+
+        self.webhook_enabled_var = ctk.BooleanVar(value=False)
+        self.webhook_enabled_checkbox = ctk.CTkCheckBox(
+            self.parent, text="Receive build events (polls less while events arrive)", variable=self.webhook_enabled_var
+        )
+        self.webhook_enabled_checkbox.grid(row=10, column=1, padx=20, pady=5, sticky="w")
+
+        self.webhook_port_label = ctk.CTkLabel(self.parent, text="Listen on Port:")
+        self.webhook_port_label.grid(row=11, column=0, padx=20, pady=5, sticky="w")
+        self.webhook_port_entry = ctk.CTkEntry(self.parent, width=120)
+        self.webhook_port_entry.grid(row=11, column=1, padx=20, pady=5, sticky="w")
+
+        self.webhook_secret_label = ctk.CTkLabel(self.parent, text="Webhook Secret:")
+        self.webhook_secret_label.grid(row=12, column=0, padx=20, pady=5, sticky="w")
+        self.webhook_secret_entry = ctk.CTkEntry(self.parent, width=400, show="*")
+        self.webhook_secret_entry.grid(row=12, column=1, padx=20, pady=5, sticky="ew")
+
         # --- Save Button ---
         self.save_button = ctk.CTkButton(self.parent, text="Save Configuration", command=self.save_settings)
-        self.save_button.grid(row=9, column=1, padx=20, pady=20, sticky="e")
+        self.save_button.grid(row=13, column=1, padx=20, pady=20, sticky="e")
 
     def set_controller(self, controller):
         """Set the controller and load initial data."""
@@ -74,18 +94,28 @@ class SettingsTab:
         self.jenkins_url_entry.insert(0, self.controller.get_config_setting("jenkins_url", ""))
         self.jenkins_user_entry.insert(0, self.controller.get_config_setting("jenkins_user", ""))
         self.gitlab_url_entry.insert(0, self.controller.get_config_setting("gitlab_url", "https://gitlab.com"))
+        self.webhook_enabled_var.set(bool(self.controller.get_config_setting("webhook_enabled", False)))
+        self.webhook_port_entry.insert(0, str(self.controller.get_config_setting("webhook_port", 8765)))
 
-        # Load sensitive tokens from keyring
-        # We put placeholder text if a token is found, but don't display the token
-        jenkins_user = self.controller.get_config_setting("jenkins_user", "")
-        if jenkins_user and self.controller.get_credential("UniCI_Jenkins", jenkins_user):
-            self.jenkins_token_entry.insert(0, "********")
-
-        if self.controller.get_credential("UniCI_GitHub", "github_token"):
-            self.github_token_entry.insert(0, "********")
+        # Tokens are read from the keyring in the background at startup
+        self.controller.when_credentials_loaded(self.show_token_placeholders)
 
-        if self.controller.get_credential("UniCI_GitLab", "gitlab_token"):
-            self.gitlab_token_entry.insert(0, "********")
+    def show_token_placeholders(self):
+        """
+        Puts placeholder text in the token fields that have a stored token,
+        without ever displaying the token itself.
+        """
+        jenkins_user = self.controller.get_config_setting("jenkins_user", "")
+        fields = (
+            (self.jenkins_token_entry, "UniCI_Jenkins", jenkins_user),
+            (self.github_token_entry, "UniCI_GitHub", "github_token"),
+            (self.gitlab_token_entry, "UniCI_GitLab", "gitlab_token"),
+            (self.webhook_secret_entry, "UniCI_Webhooks", "webhook_secret"),
+        )
+        for entry, service_name, username in fields:
+            # Don't overwrite anything the user typed while the keyring was loading
+            if username and not entry.get() and self.controller.has_credential(service_name, username):
+                entry.insert(0, "********")
 
     def save_settings(self):
         """Save all settings to config or keyring."""
@@ -93,10 +123,19 @@ class SettingsTab:
             return
 
         try:
-            # Save non-sensitive config
-            self.controller.set_config_setting("jenkins_url", self.jenkins_url_entry.get())
-            self.controller.set_config_setting("jenkins_user", self.jenkins_user_entry.get())
-            self.controller.set_config_setting("gitlab_url", self.gitlab_url_entry.get())
+            webhook_port = int(self.webhook_port_entry.get() or 8765)
+        except ValueError:
+            self.main_view.log_to_console("Webhook port must be a number.", "ERROR")
+            return
+
+        try:
+            # Save non-sensitive config in a single write
+            with self.controller.config_transaction():
+                self.controller.set_config_setting("jenkins_url", self.jenkins_url_entry.get())
+                self.controller.set_config_setting("jenkins_user", self.jenkins_user_entry.get())
+                self.controller.set_config_setting("gitlab_url", self.gitlab_url_entry.get())
+                self.controller.set_config_setting("webhook_enabled", self.webhook_enabled_var.get())
+                self.controller.set_config_setting("webhook_port", webhook_port)
 
             # Save sensitive tokens to keyring
             # Only update the token if the user entered something new (not the placeholder)
@@ -118,6 +157,14 @@ class SettingsTab:
                 self.gitlab_token_entry.delete(0, "end")
                 self.gitlab_token_entry.insert(0, "********")
 
+            webhook_secret = self.webhook_secret_entry.get()
+            if webhook_secret and webhook_secret != "********":
+                self.controller.set_credential("UniCI_Webhooks", "webhook_secret", webhook_secret)
+                self.webhook_secret_entry.delete(0, "end")
+                self.webhook_secret_entry.insert(0, "********")
+
+            # Push the new URLs and tokens to the API service
+            self.controller.handle_reload_api_config()
             self.main_view.log_to_console("Configuration saved successfully.", "SUCCESS")
         except Exception as e:
             self.main_view.log_to_console(f"Error saving settings: {e}", "ERROR")
\ No newline at end of file
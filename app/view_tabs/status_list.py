@@ -0,0 +1,72 @@
+"""
+UniCI Status List
+Shared widget for the Jenkins and GitLab tabs: one row per monitored
+build or pipeline, updated in place as its status changes.
+"""
+import customtkinter as ctk
+
+STATE_COLORS = {
+    "Success": ("green", "#4caf50"),
+    "Failed": ("red", "#f44336"),
+    "Monitor Error": ("red", "#f44336"),
+    "Running": ("#1f6aa5", "#3b8ed0"),
+    "Unstable": ("orange", "#ff9800"),
+    "Cancelled": ("orange", "#ff9800"),
+}
+MAX_ROWS = 20
+
+class StatusList:
+    """
+    Renders status rows into an existing frame, newest first.
+    `placeholder` is hidden once the first status arrives.
+    """
+    def __init__(self, frame, placeholder, max_rows: int = MAX_ROWS):
+        self.frame = frame
+        self.placeholder = placeholder
+        self.max_rows = max_rows
+        self.rows = {}  # key -> (row frame, name label, state label, detail label)
+        self.order = []
+
+    def show_status(self, key, label, state, detail):
+        """Adds or updates the row for a watch. Must run on the GUI thread."""
+        if self.placeholder is not None:
+            self.placeholder.pack_forget()
+            self.placeholder = None
+
+        if key not in self.rows:
+            row = ctk.CTkFrame(self.frame, fg_color=("gray85", "gray17"))
+            row.grid_columnconfigure(2, weight=1)
+            name_label = ctk.CTkLabel(row, text="", font=ctk.CTkFont(weight="bold"), anchor="w")
+            name_label.grid(row=0, column=0, padx=10, pady=5, sticky="w")
+            state_label = ctk.CTkLabel(row, text="", width=90, anchor="w")
+            state_label.grid(row=0, column=1, padx=10, pady=5, sticky="w")
+            detail_label = ctk.CTkLabel(row, text="", text_color="gray", anchor="w")
+            detail_label.grid(row=0, column=2, padx=10, pady=5, sticky="ew")
+            self.rows[key] = (row, name_label, state_label, detail_label)
+            self.order.insert(0, key)
+            self._trim()
+            self._repack()
+
+        _, name_label, state_label, detail_label = self.rows[key]
+        name_label.configure(text=label)
+        state_label.configure(text=state, text_color=STATE_COLORS.get(state, ("gray10", "gray90")))
+        detail_label.configure(text=detail)
+
+    def clear(self):
+        """Removes every row."""
+        for row in self.rows.values():
+            row[0].destroy()
+        self.rows = {}
+        self.order = []
+
+    def _trim(self):
+        """Keeps only the newest MAX_ROWS rows."""
+        while len(self.order) > self.max_rows:
+            row = self.rows.pop(self.order.pop())[0]
+            row.destroy()
+
+    def _repack(self):
+        for key in self.order:
+            row = self.rows[key][0]
+            row.pack_forget()
+            row.pack(fill="x", padx=10, pady=2)
@@ -1,9 +1,14 @@
 """
 UniCI Workflows Tab
-GUI for configuring and running multi-step "macro" workflows.
-(This is a placeholder implementation)
+GUI for running multi-step "macro" workflows.
+Workflows are YAML or JSON files in the workflows folder of the config
+directory; see app/workflow.py for the format.
 """
 import customtkinter as ctk
+from app.view_tabs.status_list import StatusList
+
+NO_WORKFLOWS = "(no workflows)"
+MAX_STEP_ROWS = 200
 
 class WorkflowsTab:
     """
@@ -15,37 +20,90 @@ class WorkflowsTab:
         self.controller = None
 
         self.parent.grid_columnconfigure(0, weight=1)
-        self.parent.grid_rowconfigure(0, weight=1)
-
-        # --- Placeholder Frame ---
-        self.placeholder_frame = ctk.CTkFrame(self.parent)
-        self.placeholder_frame.grid(row=0, column=0, padx=20, pady=20, sticky="nsew")
-
-        self.placeholder_label = ctk.CTkLabel(
-            self.placeholder_frame,
-            text="Feature Coming Soon: Workflow Macros",
-            font=ctk.CTkFont(size=18, weight="bold")
-        )
-        self.placeholder_label.pack(pady=(50, 10))
-
-        self.placeholder_desc = ctk.CTkLabel(
-            self.placeholder_frame,
-            text="This tab will allow you to chain multiple actions together into a single button.\n\n"
-                 "Example: 'Promote to Staging'\n"
-                 "1. Trigger Jenkins Build\n"
-                 "2. Monitor Build Status\n"
-                 "3. If Success, Trigger Jenkins Deploy\n"
-                 "4. Post 'Success' to Slack",
-            justify="left",
-            text_color="gray"
-        )
-        self.placeholder_desc.pack(pady=10, padx=20)
+        self.parent.grid_rowconfigure(1, weight=1)
+
+        # --- Workflow Picker Frame ---
+        self.run_frame = ctk.CTkFrame(self.parent)
+        self.run_frame.grid(row=0, column=0, padx=20, pady=20, sticky="ew")
+        self.run_frame.grid_columnconfigure(1, weight=1)
+
+        self.workflow_label = ctk.CTkLabel(self.run_frame, text="Workflow:")
+        self.workflow_label.grid(row=0, column=0, padx=10, pady=10, sticky="w")
+
+        self.workflow_menu = ctk.CTkOptionMenu(self.run_frame, values=[NO_WORKFLOWS], command=self.on_workflow_selected)
+        self.workflow_menu.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
+
+        self.reload_button = ctk.CTkButton(self.run_frame, text="Reload", width=80, command=self.reload_workflows)
+        self.reload_button.grid(row=0, column=2, padx=5, pady=10)
+
+        self.run_button = ctk.CTkButton(self.run_frame, text="Run Workflow", command=self.on_run_workflow)
+        self.run_button.grid(row=0, column=3, padx=5, pady=10)
+
+        self.cancel_button = ctk.CTkButton(self.run_frame, text="Cancel", width=80, command=self.on_cancel_workflow,
+                                           fg_color="gray40", hover_color="gray30")
+        self.cancel_button.grid(row=0, column=4, padx=(5, 10), pady=10)
+
+        self.resume_var = ctk.BooleanVar(value=True)
+        self.resume_checkbox = ctk.CTkCheckBox(self.run_frame, text="Resume from checkpoint (skip completed steps)",
+                                               variable=self.resume_var)
+        self.resume_checkbox.grid(row=1, column=1, columnspan=4, padx=10, pady=(0, 10), sticky="w")
+
+        self.dir_label = ctk.CTkLabel(self.run_frame, text="", text_color="gray", anchor="w")
+        self.dir_label.grid(row=2, column=0, columnspan=5, padx=10, pady=(0, 5), sticky="w")
+
+        # --- Step status ---
+        self.steps_frame = ctk.CTkScrollableFrame(self.parent, label_text="Steps")
+        self.steps_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
+        self.steps_label = ctk.CTkLabel(self.steps_frame, text="Step progress will appear here.", text_color="gray")
+        self.steps_label.pack(padx=10, pady=10)
+        self.step_list = StatusList(self.steps_frame, self.steps_label, max_rows=MAX_STEP_ROWS)
 
     def set_controller(self, controller):
         """Set the controller for this tab."""
         self.controller = controller
+        self.dir_label.configure(text=f"Workflow files (.yaml, .json) are read from {self.controller.get_workflows_dir()}")
+        self.reload_workflows()
+
+    def reload_workflows(self):
+        """Lists the workflow files again."""
+        names = self.controller.list_workflows() or [NO_WORKFLOWS]
+        self.workflow_menu.configure(values=names)
+        if self.workflow_menu.get() not in names:
+            self.workflow_menu.set(names[0])
+        self.on_workflow_selected(self.workflow_menu.get())
+
+    def on_workflow_selected(self, file_name):
+        """Offers resuming only when the workflow has a checkpoint."""
+        if file_name != NO_WORKFLOWS and self.controller.has_workflow_checkpoint(file_name):
+            self.resume_checkbox.configure(state="normal")
+        else:
+            self.resume_checkbox.configure(state="disabled")
 
     def on_run_workflow(self):
-        """Placeholder for a workflow button."""
-        if self.controller:
-            self.main_view.log_to_console("Workflow execution not yet implemented.", "WARN")
\ No newline at end of file
+        """Starts the selected workflow."""
+        file_name = self.workflow_menu.get()
+        if not self.controller:
+            return
+        if file_name == NO_WORKFLOWS:
+            self.main_view.log_to_console("Add a workflow file to the workflows folder first.", "WARN")
+            return
+
+        resume = self.resume_var.get() and self.controller.has_workflow_checkpoint(file_name)
+        step_ids = self.controller.handle_run_workflow(file_name, resume, self.show_step)
+        if step_ids is None:
+            return
+        self.step_list.clear()
+        # StatusList shows the newest row first; add in reverse so the first step is on top
+        for step_id in reversed(step_ids):
+            self.show_step(step_id, "Pending", "")
+
+    def on_cancel_workflow(self):
+        file_name = self.workflow_menu.get()
+        if self.controller and self.controller.is_workflow_running(file_name):
+            self.controller.handle_cancel_workflow(file_name)
+
+    def show_step(self, step_id, state, detail):
+        """Called on the GUI thread as steps progress."""
+        self.step_list.show_status(step_id, step_id, state, detail)
+        if state in ("Failed", "Cancelled"):
+            self.on_workflow_selected(self.workflow_menu.get())
@@ -0,0 +1,228 @@
+"""
+UniCI Webhook Receiver
+An optional local HTTP listener for events pushed by the CI servers:
+
+    POST /hooks/gitlab     Pipeline Hook, verified by X-Gitlab-Token
+    POST /hooks/github     pull_request / check_run, verified by X-Hub-Signature-256
+    POST /hooks/jenkins    Notification plugin JSON, verified by X-UniCI-Token or ?token=
+
+Verified events are translated into the same WatchStatus values the
+monitor's polls produce and pushed into the BuildMonitor, which then
+polls the covered backend only as a safety net while events keep coming.
+"""
+import hashlib
+import hmac
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from urllib.parse import parse_qs, quote, urlparse
+from app.jenkins_index import jenkins_full_name
+from app.monitor import (GITLAB_DONE_STATES, JENKINS_RESULTS, GitLabPipelineWatch, JenkinsBuildWatch,
+                         Watch, WatchStatus)
+
+DEFAULT_WEBHOOK_BIND = "127.0.0.1"
+DEFAULT_WEBHOOK_PORT = 8765
+MAX_BODY_BYTES = 5 * 1024 * 1024    # GitLab pipeline hooks with many jobs stay well below this
+HOOK_BACKENDS = ("jenkins", "github", "gitlab")
+
+GITHUB_CONCLUSIONS = {
+    "success": "Success",
+    "failure": "Failed",
+    "timed_out": "Failed",
+    "cancelled": "Cancelled",
+    "action_required": "Action Required",
+}
+
+
+class PushedStatus(NamedTuple):
+    """A status carried by a webhook event."""
+    backend: str
+    key: str                                        # Watch key for reporting when no watch matches
+    label: str
+    status: WatchStatus
+    matches: Optional[Callable[[Watch], bool]] = None   # Selects the monitor watches it updates
+
+
+def verify(backend: str, secret: str, headers, body: bytes, query: str = "") -> bool:
+    """Checks an event's signature or token against the shared secret, in constant time."""
+    if not secret:
+        return False  # Unauthenticated events are never accepted
+    if backend == "github":
+        signature = headers.get("X-Hub-Signature-256") or ""
+        expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature, expected)
+    if backend == "gitlab":
+        return hmac.compare_digest(headers.get("X-Gitlab-Token") or "", secret)
+    token = headers.get("X-UniCI-Token") or (parse_qs(query).get("token") or [""])[0]
+    return hmac.compare_digest(token, secret)
+
+
+def translate(backend: str, kind: str, payload: Dict[str, Any], received_at: float) -> Optional[PushedStatus]:
+    """Turns a verified event into a PushedStatus, or None for events UniCI doesn't follow."""
+    if backend == "gitlab" and payload.get("object_kind") == "pipeline":
+        return _gitlab_pipeline(payload, received_at)
+    if backend == "jenkins" and isinstance(payload.get("build"), dict):
+        return _jenkins_build(payload, received_at)
+    if backend == "github" and kind == "pull_request":
+        return _github_pull_request(payload, received_at)
+    if backend == "github" and kind == "check_run":
+        return _github_check_run(payload, received_at)
+    return None
+
+def _gitlab_pipeline(payload: Dict[str, Any], received_at: float) -> PushedStatus:
+    pipeline = payload.get("object_attributes") or {}
+    project = payload.get("project") or {}
+    pipeline_id = str(pipeline.get("id"))
+    status = pipeline.get("status") or "unknown"
+    url = pipeline.get("url") or f"{project.get('web_url', '')}/-/pipelines/{pipeline_id}"
+    # Same detail formats as GitLabPipelineWatch.poll, so a later poll isn't reported as a change
+    jobs = payload.get("builds") or []
+    detail = url
+    if status == "running" and jobs:
+        finished = sum(1 for job in jobs if job.get("status") in GITLAB_DONE_STATES)
+        detail = f"{finished}/{len(jobs)} jobs done  {url}"
+    elif status == "failed":
+        failed = [job for job in jobs if job.get("status") == "failed"]
+        if failed:
+            detail = f"{failed[0].get('name')} failed: {project.get('web_url', '')}/-/jobs/{failed[0].get('id')}"
+
+    project_ids = {str(project.get("id")), project.get("path_with_namespace") or "",
+                   quote(project.get("path_with_namespace") or "", safe="")}
+
+    def matches(watch: Watch) -> bool:
+        return (isinstance(watch, GitLabPipelineWatch) and watch.pipeline_id == pipeline_id
+                and watch.project_id in project_ids)
+
+    return PushedStatus("gitlab", f"gitlab:{project.get('id')}:{pipeline_id}",
+                        f"{project.get('path_with_namespace', project.get('id'))} pipeline #{pipeline_id}",
+                        WatchStatus(status.replace("_", " ").title(), detail, done=status in GITLAB_DONE_STATES,
+                                    received_at=received_at),
+                        matches)
+
+def _jenkins_build(payload: Dict[str, Any], received_at: float) -> PushedStatus:
+    # "name" is only the job's own name; its URL also names the folders it is in
+    job_name = jenkins_full_name(payload.get("url") or "") or payload.get("name") or ""
+    build = payload["build"]
+    number = build.get("number")
+    phase = build.get("phase") or ""
+    url = build.get("full_url") or ""
+    if phase in ("COMPLETED", "FINALIZED") and build.get("status"):
+        state = JENKINS_RESULTS.get(build["status"], build["status"].title())
+        status = WatchStatus(state, f"{url}console" if state != "Success" and url else url, done=True,
+                             received_at=received_at)
+    elif phase == "QUEUED":
+        status = WatchStatus("Queued", "", received_at=received_at)
+    else:
+        status = WatchStatus("Running", url, received_at=received_at)
+    queue_suffix = f"/queue/item/{build.get('queue_id')}/"
+
+    def matches(watch: Watch) -> bool:
+        if not isinstance(watch, JenkinsBuildWatch) or watch.job_name != job_name:
+            return False
+        if watch.build_number is None and number is not None and watch.queue_url.endswith(queue_suffix):
+            # The event tells us which build the queue item became, saving a queue poll
+            watch.build_number = number
+            watch.label = f"{job_name} #{number}"
+        return watch.build_number == number
+
+    return PushedStatus("jenkins", f"jenkins:{job_name}:#{number}", f"{job_name} #{number}", status, matches)
+
+def _github_pull_request(payload: Dict[str, Any], received_at: float) -> PushedStatus:
+    pr = payload.get("pull_request") or {}
+    repo = (payload.get("repository") or {}).get("full_name", "")
+    action = payload.get("action") or "updated"
+    state = "Merged" if action == "closed" and pr.get("merged") else action.replace("_", " ").title()
+    return PushedStatus("github", f"github:{repo}#{pr.get('number')}", f"{repo} #{pr.get('number')}",
+                        WatchStatus(state, pr.get("html_url", ""), done=action == "closed", received_at=received_at))
+
+def _github_check_run(payload: Dict[str, Any], received_at: float) -> PushedStatus:
+    check = payload.get("check_run") or {}
+    repo = (payload.get("repository") or {}).get("full_name", "")
+    done = check.get("status") == "completed"
+    conclusion = check.get("conclusion") or ""
+    state = (GITHUB_CONCLUSIONS.get(conclusion, conclusion.replace("_", " ").title()) if done
+             else (check.get("status") or "queued").replace("_", " ").title())
+    sha = (check.get("head_sha") or "")[:7]
+    return PushedStatus("github", f"github-check:{repo}:{check.get('id')}", f"{repo} {check.get('name')} ({sha})",
+                        WatchStatus(state, check.get("html_url", ""), done=done, received_at=received_at))
+
+
+class WebhookServer:
+    """
+    A threaded HTTP server for /hooks/<backend>. Verified events are
+    answered with 202 first and then passed to on_event(backend, kind,
+    payload, received_at) on the request's thread.
+    """
+    def __init__(self, bind: str, port: int, secret: str,
+                 on_event: Callable[[str, str, Dict[str, Any], float], None]):
+        self.bind = bind
+        self.requested_port = port
+        self.secret = secret
+        self.on_event = on_event
+        self.stats = {"accepted": 0, "rejected": 0, "invalid": 0}
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, message: str):
+                payload = json.dumps({"message": message}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                received_at = time.perf_counter()
+                url = urlparse(self.path)
+                backend = url.path.rstrip("/").rpartition("/")[2]
+                if not url.path.startswith("/hooks/") or backend not in HOOK_BACKENDS:
+                    self._reply(404, "Not Found")
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    server._count("invalid")
+                    self._reply(400, "Invalid Content-Length")
+                    return
+                if length > MAX_BODY_BYTES:
+                    server._count("invalid")
+                    self._reply(413, "Payload too large")
+                    return
+                body = self.rfile.read(length)
+                if not verify(backend, server.secret, self.headers, body, url.query):
+                    server._count("rejected")
+                    self._reply(401, "Invalid signature or token")
+                    return
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    server._count("invalid")
+                    self._reply(400, "Body is not JSON")
+                    return
+                server._count("accepted")
+                self._reply(202, "Accepted")
+                kind = self.headers.get("X-GitHub-Event") or self.headers.get("X-Gitlab-Event") or ""
+                server.on_event(backend, kind, payload, received_at)
+
+        self.httpd = ThreadingHTTPServer((bind, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_port  # The actual port when 0 was requested
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="UniCI-webhooks", daemon=True)
+        self._thread.start()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,455 @@
+"""
+UniCI Workflow Engine
+Runs workflow macros: a DAG of steps defined in YAML or JSON, e.g.
+
+    name: Promote to Staging
+    max_parallel: 3
+    fail_fast: true
+    steps:
+      - id: build
+        action: jenkins.build
+        params: {job: app-build}
+        timeout: 1800
+        retries: 1
+      - id: deploy-eu
+        action: gitlab.pipeline
+        needs: [build]
+        params: {project: "12", ref: "release-${build.build_number}"}
+
+Steps whose dependencies have finished run concurrently, up to
+max_parallel at a time, as background work that the rate governor paces
+like polling. ${step.output} placeholders in params are filled from the
+outputs of earlier steps. Progress is checkpointed to disk after
+every change, so an interrupted run can be resumed without re-triggering
+steps that already succeeded; a step that was waiting on a build it had
+already triggered resumes waiting on that same build.
+It knows nothing about the GUI or the Controller.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import yaml
+except ImportError:  # Optional dependency, only needed for .yaml workflows
+    yaml = None
+
+from app.config_manager import write_json_atomic
+from app.monitor import MAX_ERROR_SECONDS, MIN_INTERVAL, GitLabPipelineWatch, JenkinsBuildWatch, Watch, next_interval
+from app.scheduler import PRIORITY_BACKGROUND, run_with_priority
+
+DEFAULT_MAX_PARALLEL = 4
+DEFAULT_RETRY_DELAY = 10.0
+WORKFLOW_EXTENSIONS = (".yaml", ".yml", ".json")
+
+# Step states
+PENDING = "Pending"
+RUNNING = "Running"
+SUCCESS = "Success"
+FAILED = "Failed"
+SKIPPED = "Skipped"
+CANCELLED = "Cancelled"
+DONE_STATES = (SUCCESS, FAILED, SKIPPED, CANCELLED)
+
+PLACEHOLDER = re.compile(r"\$\{([\w-]+)\.([\w-]+)\}")
+
+
+class WorkflowError(ValueError):
+    """The workflow definition is invalid."""
+
+class StepFailed(Exception):
+    """A step ran but did not succeed (e.g. the build it waited on failed)."""
+
+class StepCancelled(Exception):
+    """The run was cancelled while the step was waiting."""
+
+
+# --- Definitions ---
+
+class Step:
+    """One node of the workflow DAG."""
+    def __init__(self, data: Dict[str, Any]):
+        self.id = str(data.get("id") or "")
+        self.action = data.get("action", "")
+        self.params: Dict[str, Any] = data.get("params") or {}
+        self.needs: List[str] = [str(need) for need in data.get("needs") or []]
+        self.timeout: Optional[float] = data.get("timeout")
+        self.retries = int(data.get("retries", 0))
+        self.retry_delay = float(data.get("retry_delay", DEFAULT_RETRY_DELAY))
+        self.continue_on_error = bool(data.get("continue_on_error", False))
+
+
+class Workflow:
+    """A validated workflow definition."""
+    def __init__(self, data: Dict[str, Any]):
+        if not isinstance(data, dict) or not isinstance(data.get("steps"), list):
+            raise WorkflowError("A workflow needs a 'steps' list.")
+        self.name = data.get("name", "workflow")
+        self.max_parallel = max(1, int(data.get("max_parallel", DEFAULT_MAX_PARALLEL)))
+        self.fail_fast = bool(data.get("fail_fast", True))
+        self.steps: Dict[str, Step] = {}
+        for step_data in data["steps"]:
+            step = Step(step_data)
+            if not step.id:
+                raise WorkflowError("Every step needs an 'id'.")
+            if step.id in self.steps:
+                raise WorkflowError(f"Duplicate step id '{step.id}'.")
+            if step.action not in ACTIONS:
+                raise WorkflowError(f"Step '{step.id}': unknown action '{step.action}'.")
+            missing = [name for name in ACTION_PARAMS[step.action] if name not in step.params]
+            if missing:
+                raise WorkflowError(f"Step '{step.id}': {step.action} needs params: {', '.join(missing)}.")
+            self.steps[step.id] = step
+        self._validate_graph()
+        # Identifies the definition, so a checkpoint is only resumed by the same workflow
+        self.digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+    def _validate_graph(self):
+        """Checks that every dependency exists and that there are no cycles."""
+        for step in self.steps.values():
+            for need in step.needs:
+                if need not in self.steps:
+                    raise WorkflowError(f"Step '{step.id}' needs unknown step '{need}'.")
+        remaining = {step_id: set(step.needs) for step_id, step in self.steps.items()}
+        while remaining:
+            ready = [step_id for step_id, needs in remaining.items() if not needs]
+            if not ready:
+                raise WorkflowError(f"Dependency cycle between steps: {', '.join(sorted(remaining))}.")
+            for step_id in ready:
+                del remaining[step_id]
+            for needs in remaining.values():
+                needs.difference_update(ready)
+
+
+def load_workflow(path: str) -> Workflow:
+    """Parses a .yaml/.yml or .json workflow file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            data = json.load(f)
+        else:
+            if yaml is None:
+                raise WorkflowError("YAML workflows require PyYAML. Install it with: pip install pyyaml")
+            data = yaml.safe_load(f)
+    return Workflow(data)
+
+def list_workflows(directory: str) -> List[str]:
+    """Workflow files in a directory, sorted by name."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory) if name.endswith(WORKFLOW_EXTENSIONS))
+
+
+# --- Actions ---
+
+class StepContext:
+    """What an action sees while it runs: the service, its saved state, and cancellable sleeps."""
+    def __init__(self, runner: "WorkflowRunner", step: Step, state: Dict[str, Any]):
+        self.runner = runner
+        self.service = runner.service
+        self.step = step
+        self.state = state          # Persisted in the checkpoint; survives a resume
+        self.deadline = time.monotonic() + step.timeout if step.timeout else None
+
+    def save(self):
+        """Checkpoints the step's state right away (e.g. right after triggering a build)."""
+        self.runner.save_checkpoint()
+
+    def report(self, detail: str):
+        self.runner.report(self.step.id, RUNNING, detail)
+
+    def sleep(self, seconds: float):
+        """Sleeps; raises StepCancelled on cancel and StepFailed once the step's timeout has passed."""
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise StepFailed(f"Timed out after {self.step.timeout:g} s")
+            seconds = min(seconds, remaining)
+        if self.runner.cancelled.wait(seconds):
+            raise StepCancelled("Cancelled")
+
+    def follow(self, watch: Watch) -> Any:
+        """
+        Polls a monitor watch until it is done, backing off like the
+        BuildMonitor does. Failed polls are retried with backoff; the step
+        only fails once they have kept failing for MAX_ERROR_SECONDS.
+        """
+        interval = MIN_INTERVAL
+        previous = None
+        failing_since = None
+        while True:
+            try:
+                status = watch.poll(self.service)
+            except Exception as e:
+                if failing_since is None:
+                    failing_since = time.monotonic()
+                    self.report(f"Poll error, retrying: {e}")
+                elif time.monotonic() - failing_since >= MAX_ERROR_SECONDS:
+                    raise StepFailed(f"Polls kept failing for {MAX_ERROR_SECONDS:g} s: {e}") from e
+                interval = next_interval(interval, False, None)
+                self.sleep(interval)
+                continue
+            if status.state != previous or failing_since is not None:
+                failing_since = None
+                self.report(f"{status.state} {status.detail}".strip())
+            if status.done:
+                return status
+            interval = next_interval(interval, status.state != previous, status.eta)
+            previous = status.state
+            self.sleep(interval)
+
+def _jenkins_trigger(ctx: StepContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    if "queue_url" not in ctx.state:
+        result = ctx.service.trigger_jenkins_build(params["job"])
+        if not result.get("queue_url"):
+            raise StepFailed("Jenkins did not return a queue item for the build.")
+        ctx.state["queue_url"] = result["queue_url"]
+        ctx.save()
+    return {"queue_url": ctx.state["queue_url"]}
+
+def _jenkins_wait(ctx: StepContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    watch = JenkinsBuildWatch(params["job"], params["queue_url"])
+    status = ctx.follow(watch)
+    outputs = {"build_number": watch.build_number, "result": status.state, "url": status.detail}
+    if status.state != SUCCESS:
+        raise StepFailed(f"{watch.label} finished: {status.state} {status.detail}".strip())
+    return outputs
+
+def _jenkins_build(ctx: StepContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    queued = _jenkins_trigger(ctx, params)
+    return dict(queued, **_jenkins_wait(ctx, dict(params, **queued)))
+
+def _gitlab_trigger(ctx: StepContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    if "pipeline_id" not in ctx.state:
+        pipeline = ctx.service.trigger_gitlab_pipeline(str(params["project"]), str(params["ref"]))
+        ctx.state["pipeline_id"] = str(pipeline["id"])
+        ctx.state["web_url"] = pipeline.get("web_url", "")
+        ctx.save()
+    return {"pipeline_id": ctx.state["pipeline_id"], "web_url": ctx.state["web_url"]}
+
+def _gitlab_wait(ctx: StepContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    status = ctx.follow(GitLabPipelineWatch(str(params["project"]), str(params["pipeline_id"])))
+    if status.state != SUCCESS:
+        raise StepFailed(f"Pipeline #{params['pipeline_id']} finished: {status.state} {status.detail}".strip())
+    return {"status": status.state}
+
+def _gitlab_pipeline(ctx: StepContext, params: Dict[str, Any]) -> Dict[str, Any]:
+    triggered = _gitlab_trigger(ctx, params)
+    return dict(triggered, **_gitlab_wait(ctx, dict(params, **triggered)))
+
+# action name -> function(ctx, params) returning the step's outputs
+ACTIONS: Dict[str, Callable[[StepContext, Dict[str, Any]], Dict[str, Any]]] = {
+    "jenkins.trigger": _jenkins_trigger,
+    "jenkins.wait": _jenkins_wait,
+    "jenkins.build": _jenkins_build,
+    "gitlab.trigger": _gitlab_trigger,
+    "gitlab.wait": _gitlab_wait,
+    "gitlab.pipeline": _gitlab_pipeline,
+}
+ACTION_PARAMS = {
+    "jenkins.trigger": ("job",),
+    "jenkins.wait": ("job", "queue_url"),
+    "jenkins.build": ("job",),
+    "gitlab.trigger": ("project", "ref"),
+    "gitlab.wait": ("project", "pipeline_id"),
+    "gitlab.pipeline": ("project", "ref"),
+}
+
+
+# --- Execution ---
+
+class WorkflowRunner:
+    """
+    Executes a Workflow. run() blocks until every step has finished, so
+    call it from a background thread; cancel() may be called from any
+    thread. on_event(step_id, state, detail) reports progress from
+    worker threads.
+    """
+    def __init__(self, workflow: Workflow, service, checkpoint_path: Optional[str] = None,
+                 on_event: Optional[Callable[[str, str, str], None]] = None):
+        self.workflow = workflow
+        self.service = service
+        self.checkpoint_path = checkpoint_path
+        self.on_event = on_event or (lambda step_id, state, detail: None)
+        self.cancelled = threading.Event()
+        self._lock = threading.RLock()
+        # step id -> {"state", "detail", "outputs", "state_data", "attempts"}
+        self.steps: Dict[str, Dict[str, Any]] = {
+            step_id: {"state": PENDING, "detail": "", "outputs": {}, "state_data": {}, "attempts": 0}
+            for step_id in workflow.steps
+        }
+
+    def resume_from_checkpoint(self) -> bool:
+        """
+        Loads progress from the checkpoint file if it belongs to this
+        workflow. Succeeded steps are kept; everything else runs again,
+        interrupted and cancelled steps with the state they had saved
+        (e.g. an already triggered build), failed ones from scratch.
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return False
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if checkpoint.get("digest") != self.workflow.digest:
+            return False
+        for step_id, saved in checkpoint.get("steps", {}).items():
+            if step_id not in self.steps:
+                continue
+            entry = self.steps[step_id]
+            entry["outputs"] = saved.get("outputs", {})
+            if saved.get("state") != FAILED:
+                # Only interrupted or cancelled steps resume their build; failed ones start over
+                entry["state_data"] = saved.get("state_data", {})
+            if saved.get("state") == SUCCESS:
+                entry["state"] = SUCCESS
+                entry["detail"] = "Completed in an earlier run"
+        return True
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def report(self, step_id: str, state: str, detail: str = ""):
+        with self._lock:
+            self.steps[step_id]["state"] = state
+            self.steps[step_id]["detail"] = detail
+        self.on_event(step_id, state, detail)
+
+    def save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+        with self._lock:
+            checkpoint = {
+                "workflow": self.workflow.name,
+                "digest": self.workflow.digest,
+                "saved_at": time.time(),
+                "steps": {
+                    step_id: {key: entry[key] for key in ("state", "outputs", "state_data")}
+                    for step_id, entry in self.steps.items()
+                },
+            }
+            os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+            write_json_atomic(self.checkpoint_path, checkpoint)
+
+    def run(self) -> bool:
+        """Runs every step. Returns True if the workflow succeeded."""
+        for step_id, entry in self.steps.items():
+            if entry["state"] == SUCCESS:
+                self.on_event(step_id, SUCCESS, entry["detail"])
+
+        running: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=self.workflow.max_parallel,
+                                thread_name_prefix="UniCI-workflow") as executor:
+            while True:
+                self._skip_blocked_steps()
+                if not self.cancelled.is_set():
+                    for step_id in self._ready_steps():
+                        if len(running) >= self.workflow.max_parallel:
+                            break
+                        self.report(step_id, RUNNING)
+                        # Steps mostly poll builds for minutes: background work for the rate governor
+                        running[executor.submit(run_with_priority, PRIORITY_BACKGROUND, self._run_step,
+                                                self.workflow.steps[step_id])] = step_id
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                self.save_checkpoint()
+
+        for step_id, entry in self.steps.items():
+            if entry["state"] == PENDING:
+                self.report(step_id, CANCELLED if self.cancelled.is_set() else SKIPPED)
+        succeeded = all(entry["state"] == SUCCESS or
+                        (entry["state"] == FAILED and self.workflow.steps[step_id].continue_on_error)
+                        for step_id, entry in self.steps.items())
+        self.save_checkpoint()
+        if succeeded and self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)  # Nothing left to resume
+        return succeeded
+
+    # --- Internals ---
+
+    def _ready_steps(self) -> List[str]:
+        """Pending steps whose dependencies all succeeded (or failed with continue_on_error)."""
+        with self._lock:
+            return [step_id for step_id, step in self.workflow.steps.items()
+                    if self.steps[step_id]["state"] == PENDING
+                    and all(self._satisfied(need) for need in step.needs)]
+
+    def _satisfied(self, step_id: str) -> bool:
+        state = self.steps[step_id]["state"]
+        return state == SUCCESS or (state == FAILED and self.workflow.steps[step_id].continue_on_error)
+
+    def _skip_blocked_steps(self):
+        """Skips pending steps that can never run because a dependency failed."""
+        changed = True
+        while changed:
+            changed = False
+            for step_id, step in self.workflow.steps.items():
+                if self.steps[step_id]["state"] != PENDING:
+                    continue
+                blocked = [need for need in step.needs
+                           if self.steps[need]["state"] in DONE_STATES and not self._satisfied(need)]
+                if blocked:
+                    self.report(step_id, SKIPPED, f"'{blocked[0]}' did not succeed")
+                    changed = True
+
+    def _run_step(self, step: Step):
+        """Runs one step with its retries. Runs on a workflow worker thread."""
+        entry = self.steps[step.id]
+        for attempt in range(step.retries + 1):
+            entry["attempts"] = attempt + 1
+            context = StepContext(self, step, entry["state_data"])
+            try:
+                params = self._resolve(step.params)
+                outputs = ACTIONS[step.action](context, params) or {}
+                with self._lock:
+                    entry["outputs"] = outputs
+                self.report(step.id, SUCCESS, ", ".join(f"{k}={v}" for k, v in outputs.items()))
+                return
+            except StepCancelled as e:
+                self.report(step.id, CANCELLED, str(e))
+                return
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+            # The attempt definitely failed: whatever runs next (a retry, or a
+            # resumed run) starts from scratch, e.g. it triggers a new build
+            with self._lock:
+                entry["state_data"].clear()
+            if attempt < step.retries:
+                if not self.cancelled.is_set():
+                    self.report(step.id, RUNNING, f"Attempt {attempt + 1} failed: {error}; retrying")
+                if self.cancelled.is_set() or self.cancelled.wait(step.retry_delay):
+                    self.report(step.id, CANCELLED, f"Cancelled before retrying: {error}")
+                    return
+        self.report(step.id, FAILED, error)
+        if self.workflow.fail_fast and not step.continue_on_error:
+            self.cancel()
+
+    def _resolve(self, value: Any) -> Any:
+        """Fills ${step.output} placeholders from earlier steps' outputs."""
+        if isinstance(value, dict):
+            return {key: self._resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._resolve(item) for item in value]
+        if not isinstance(value, str):
+            return value
+
+        def lookup(match):
+            step_id, key = match.groups()
+            outputs = self.steps.get(step_id, {}).get("outputs", {})
+            if key not in outputs:
+                raise WorkflowError(f"No output '{key}' from step '{step_id}'.")
+            return outputs[key]
+
+        whole = PLACEHOLDER.fullmatch(value)
+        if whole:
+            return lookup(whole)  # Keep the output's type, e.g. an int build number
+        return PLACEHOLDER.sub(lambda match: str(lookup(match)), value)
@@ -0,0 +1,3 @@
+# Benchmark scripts for UniCI. Run them from the repository root, e.g.:
+#   python -m benchmarks.bench_async_status
+# The regression suite (stored, comparable results) is python -m benchmarks.suite
@@ -0,0 +1,85 @@
+"""
+Benchmark: N concurrent status fetches, threaded path vs. async path.
+
+The threaded path is what the controller does today: one scheduler job per
+status call through ApiService. The async path is AsyncApiService.get_statuses
+on a single event loop thread.
+
+Usage:
+    python -m benchmarks.bench_async_status [N ...] [--latency SECONDS]
+"""
+import argparse
+import asyncio
+import time
+
+from app.async_service import AsyncApiService
+from app.scheduler import JobScheduler, PRIORITY_BACKGROUND
+from app.service import ApiService
+from benchmarks.fake_server import FakeServer
+
+
+def build_server(latency: float) -> FakeServer:
+    server = FakeServer(latency=latency)
+    server.route("GET", "/job/", lambda req, path: (200, {"number": 7, "building": False, "result": "SUCCESS"}))
+    server.route("GET", "/api/v4/projects/", lambda req, path: (200, {"id": 1, "status": "running"}))
+    return server
+
+
+def config_for(server: FakeServer) -> dict:
+    return {
+        "jenkins_url": server.url, "jenkins_user": "bench", "jenkins_token": "bench",
+        "gitlab_url": server.url, "gitlab_token": "bench",
+    }
+
+
+def run_threaded(config: dict, jobs, pipelines) -> float:
+    service = ApiService()
+    service.update_config(config)
+    scheduler = JobScheduler()
+    start = time.perf_counter()
+    futures = [scheduler.submit(service.get_jenkins_build_status, (job,), backend="jenkins",
+                                priority=PRIORITY_BACKGROUND) for job in jobs]
+    futures += [scheduler.submit(service.get_gitlab_pipeline_status, pipeline, backend="gitlab",
+                                 priority=PRIORITY_BACKGROUND) for pipeline in pipelines]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    scheduler.shutdown()
+    service.close()
+    return elapsed
+
+
+def run_async(config: dict, jobs, pipelines) -> float:
+    async def main():
+        service = AsyncApiService()
+        await service.update_config(config)
+        start = time.perf_counter()
+        results = await service.get_statuses([(job, "lastBuild") for job in jobs], pipelines)
+        elapsed = time.perf_counter() - start
+        await service.close()
+        errors = [r for group in results.values() for r in group.values() if isinstance(r, Exception)]
+        if errors:
+            raise errors[0]
+        return elapsed
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sizes", nargs="*", type=int, default=[10, 50, 100, 200])
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated server latency in seconds")
+    args = parser.parse_args()
+
+    print(f"{'N':>6} {'threaded (s)':>14} {'async (s)':>12} {'speedup':>9}")
+    with build_server(args.latency) as server:
+        config = config_for(server)
+        for n in args.sizes:
+            jobs = [f"job-{i}" for i in range(n // 2)]
+            pipelines = [("group%2Fproject", str(i)) for i in range(n - len(jobs))]
+            threaded = run_threaded(config, jobs, pipelines)
+            async_time = run_async(config, jobs, pipelines)
+            print(f"{n:>6} {threaded:>14.3f} {async_time:>12.3f} {threaded / async_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
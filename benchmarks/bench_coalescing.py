@@ -0,0 +1,111 @@
+"""
+Benchmark: single-flight GETs and the micro-cache.
+
+Several parts of the app follow the same resources: a watcher, a workflow
+step and the Monitor tab poll the same GitLab pipelines, and every open
+tab asks for the same branch list when the repository changes. This runs
+those consumers against FakeGitLab and FakeGitHub, once with every GET
+sent and once through the RequestCoalescer, and compares what reached
+the servers and how long the consumers waited.
+
+Usage:
+    python -m benchmarks.bench_coalescing [--seconds 5] [--consumers 3] [--pipelines 5] [--latency 0.08]
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from app.request_coalescer import RequestCoalescer
+from app.service import ApiService
+from benchmarks.fake_ci import FakeGitHub, FakeGitLab, config
+
+POLL_INTERVAL = 0.5
+BRANCH_REFRESH_EVERY = 1.0
+TABS = 4
+
+
+class Uncoalesced(RequestCoalescer):
+    """Sends every GET, like ApiService did before it had a coalescer."""
+    def fetch(self, backend, key, send, interactive=True, cacheable=None):
+        with self._lock:
+            self._stats[backend]["requests"] += 1
+            self._stats[backend]["sent"] += 1
+        return send()
+
+
+def run(coalesced, seconds, consumers, pipelines, latency):
+    with FakeGitLab(latency=latency, jitter=latency / 2) as gitlab, \
+            FakeGitHub(branches=250, latency=latency, jitter=latency / 2) as github:
+        ids = [gitlab.create_pipeline("42") for _ in range(pipelines)]
+        service = ApiService(coalescer=RequestCoalescer() if coalesced else Uncoalesced())
+        service.update_config(dict(config(gitlab, github), github_pr_source="rest"))
+        waits = {"status": [], "branches": []}
+        lock = threading.Lock()
+        end = time.monotonic() + seconds
+
+        def timed(kind, func, *args):
+            start = time.perf_counter()
+            func(*args)
+            with lock:
+                waits[kind].append((time.perf_counter() - start) * 1000)
+
+        def poller(seed):
+            rng = random.Random(seed)
+            time.sleep(rng.uniform(0, POLL_INTERVAL))
+            while time.monotonic() < end:
+                for pipeline in ids:
+                    timed("status", service.get_gitlab_pipeline_status, "42", str(pipeline))
+                time.sleep(POLL_INTERVAL)
+
+        def tab():
+            while time.monotonic() < end:
+                timed("branches", service.get_github_branches, "org/app")
+                time.sleep(BRANCH_REFRESH_EVERY)
+
+        def pusher():
+            # A push every refresh, so the listing really changes and ETags don't answer it
+            while time.monotonic() < end:
+                github.touch("org/app")
+                time.sleep(BRANCH_REFRESH_EVERY)
+
+        threads = [threading.Thread(target=poller, args=(i,)) for i in range(consumers)]
+        threads += [threading.Thread(target=tab) for _ in range(TABS)] + [threading.Thread(target=pusher)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        service.close()
+        return {
+            "gitlab_requests": gitlab.request_count,
+            "github_requests": github.request_count,
+            "status_p50": statistics.median(waits["status"]),
+            "branches_p50": statistics.median(waits["branches"]),
+            "calls": len(waits["status"]) + len(waits["branches"]),
+            "coalescing": service.coalescer.snapshot(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--consumers", type=int, default=3, help="Pollers following the same pipelines")
+    parser.add_argument("--pipelines", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.08)
+    args = parser.parse_args()
+
+    print(f"{args.consumers} pollers x {args.pipelines} pipelines every {POLL_INTERVAL * 1000:.0f} ms, "
+          f"{TABS} tabs refreshing one branch list every {BRANCH_REFRESH_EVERY:.0f} s, "
+          f"{args.latency * 1000:.0f} ms latency (+ jitter), {args.seconds:.0f} s")
+    for coalesced in (False, True):
+        r = run(coalesced, args.seconds, args.consumers, args.pipelines, args.latency)
+        dedup = ", ".join(f"{backend} {counts['dedup_ratio']:.0%}"
+                          for backend, counts in sorted(r["coalescing"].items()))
+        print(f"  {'coalesced' if coalesced else 'every GET':<10} {r['calls']:4d} calls -> "
+              f"GitLab {r['gitlab_requests']:4d}, GitHub {r['github_requests']:4d} requests | "
+              f"status p50 {r['status_p50']:6.1f} ms, branches p50 {r['branches_p50']:6.1f} ms | dedup {dedup}")
+
+
+if __name__ == "__main__":
+    main()
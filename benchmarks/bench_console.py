@@ -0,0 +1,58 @@
+"""
+Benchmark: console rendering under a flood of log messages.
+
+Pushes N messages into the GUI queue of a real App window and reports how
+long the GUI thread spends in each check_gui_queue tick, plus the total
+time until the queue is drained. Requires customtkinter and a display.
+
+Usage:
+    python -m benchmarks.bench_console [--messages 100000]
+"""
+import argparse
+import statistics
+import time
+
+import customtkinter as ctk
+
+from app.view import App
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=100000)
+    args = parser.parse_args()
+
+    app = App()
+    for i in range(args.messages):
+        app.gui_queue.put((f"[worker-{i % 8}] build log line {i}: compiling module_{i % 977}.py", "INFO"))
+
+    ticks = []
+    original_tick = app.check_gui_queue
+
+    def instrumented_tick():
+        original_tick()
+        ticks.append(app.last_tick_ms)
+        if app.gui_queue.empty():
+            app.after(0, app.quit)
+
+    # check_gui_queue reschedules itself through the instance attribute
+    app.check_gui_queue = instrumented_tick
+    start = time.perf_counter()
+    app.mainloop()
+    total = time.perf_counter() - start
+
+    busy = sorted(ticks)
+    print(f"messages:        {args.messages}")
+    print(f"ticks:           {len(ticks)}")
+    print(f"drain wall time: {total:.2f} s")
+    print(f"tick p50:        {statistics.median(busy):.2f} ms")
+    print(f"tick p95:        {busy[int(len(busy) * 0.95) - 1]:.2f} ms")
+    print(f"tick max:        {busy[-1]:.2f} ms")
+    print(f"console lines:   {app.console_textbox.line_count} (cap {app.console_textbox.max_lines})")
+    app.controller.shutdown()
+    app.destroy()
+
+
+if __name__ == "__main__":
+    ctk.set_appearance_mode("System")
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark: PR dashboard data over GraphQL vs. REST.
+
+The dashboard needs, per open PR, its head commit's check status, the
+review decision, mergeability and labels. Over REST that is the paginated
+PR listing plus three calls per PR (PR detail for mergeability, reviews,
+check runs); over GraphQL it is one query per 50 PRs. A FakeServer serves
+both APIs with the same data and a fixed per-request latency, and the
+number of calls and wall time of a full refresh are compared.
+
+Usage:
+    python -m benchmarks.bench_github_graphql [--prs 30 200] [--latency 0.03]
+"""
+import argparse
+import base64
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+from app.github_client import PAGE_FETCH_WORKERS, PER_PAGE
+from app.service import ApiService
+from benchmarks.fake_server import FakeServer
+
+REPO = "example/app"
+
+
+def make_prs(count):
+    """Newest first, like both APIs return them."""
+    return [
+        {
+            "number": number,
+            "title": f"Fix flaky test in module_{number % 97}",
+            "user": {"login": f"dev{number % 23}"},
+            "head": {"ref": f"feature/{number}", "sha": f"{number:040x}"},
+            "base": {"ref": "main", "repo": {"full_name": REPO}},
+            "labels": [{"name": "bug", "color": "d73a4a"}] if number % 3 == 0 else [],
+            "html_url": f"https://github.com/{REPO}/pull/{number}",
+            "draft": False,
+            "updated_at": "2026-10-18T09:00:00Z",
+            # Ground truth for the dashboard fields
+            "_checks": "FAILURE" if number % 7 == 0 else "SUCCESS",
+            "_approved": number % 2 == 0,
+        }
+        for number in range(count, 0, -1)
+    ]
+
+
+def add_rest_routes(server, prs):
+    by_number = {pr["number"]: pr for pr in prs}
+    by_sha = {pr["head"]["sha"]: pr for pr in prs}
+    public = [{key: value for key, value in pr.items() if not key.startswith("_")} for pr in prs]
+
+    def pulls(request, path):
+        url = urlparse(path)
+        rest = url.path[len(f"/repos/{REPO}/pulls"):].strip("/").split("/")
+        if rest == [""]:
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            last = max(1, -(-len(public) // PER_PAGE))
+            headers = {}
+            if last > 1:
+                base = f"{server.url}/repos/{REPO}/pulls?per_page={PER_PAGE}&state=open"
+                links = [f'<{base}&page={last}>; rel="last"']
+                if page < last:
+                    links.append(f'<{base}&page={page + 1}>; rel="next"')
+                headers["Link"] = ", ".join(links)
+            return 200, public[(page - 1) * PER_PAGE:page * PER_PAGE], headers
+        pr = by_number[int(rest[0])]
+        if len(rest) == 1:
+            return 200, dict(public[prs.index(pr)], mergeable=True, mergeable_state="clean")
+        reviews = [{"state": "APPROVED", "user": {"login": "reviewer"}}] if pr["_approved"] else []
+        return 200, reviews
+
+    def check_runs(request, path):
+        pr = by_sha[path.split("/")[5]]
+        conclusion = "failure" if pr["_checks"] == "FAILURE" else "success"
+        return 200, {"total_count": 1, "check_runs": [{"name": "ci", "status": "completed", "conclusion": conclusion}]}
+
+    server.route("GET", f"/repos/{REPO}/pulls", pulls)
+    server.route("GET", f"/repos/{REPO}/commits/", check_runs)
+
+
+def add_graphql_route(server, prs):
+    def graphql(request, path):
+        variables = json.loads(request.request_body)["variables"]
+        start = int(base64.b64decode(variables["cursor"])) if variables.get("cursor") else 0
+        page = prs[start:start + variables["first"]]
+        end = start + len(page)
+        nodes = [{
+            "number": pr["number"], "title": pr["title"], "url": pr["html_url"], "isDraft": False,
+            "updatedAt": pr["updated_at"], "mergeable": "MERGEABLE",
+            "reviewDecision": "APPROVED" if pr["_approved"] else "REVIEW_REQUIRED",
+            "author": pr["user"], "headRefName": pr["head"]["ref"], "headRefOid": pr["head"]["sha"],
+            "baseRefName": pr["base"]["ref"], "labels": {"nodes": pr["labels"]},
+            "commits": {"nodes": [{"commit": {"statusCheckRollup": {"state": pr["_checks"]}}}]},
+        } for pr in page]
+        server.graphql_points -= 1
+        return 200, {"data": {
+            "rateLimit": {"cost": 1, "limit": 5000, "remaining": server.graphql_points, "resetAt": "2026-10-18T10:00:00Z"},
+            "repository": {"pullRequests": {
+                "pageInfo": {"hasNextPage": end < len(prs), "endCursor": base64.b64encode(str(end).encode()).decode()},
+                "nodes": nodes,
+            }},
+        }}
+
+    server.graphql_points = 5000
+    server.route("POST", "/graphql", graphql)
+
+
+def make_service(server, source):
+    service = ApiService()
+    service.update_config({"github_token": "bench", "github_api_url": server.url, "github_pr_source": source})
+    return service
+
+
+def rest_dashboard(service):
+    """The N+1 approach: list, then PR detail, reviews and check runs for every PR."""
+    prs = service.get_github_pull_requests(REPO)
+
+    def details(pr):
+        number, sha = pr["number"], pr["head"]["sha"]
+        detail = service.github.get(f"/repos/{REPO}/pulls/{number}")
+        reviews = service.github.get(f"/repos/{REPO}/pulls/{number}/reviews")
+        checks = service.github.get(f"/repos/{REPO}/commits/{sha}/check-runs")
+        failed = any(run.get("conclusion") not in ("success", "skipped", "neutral") for run in checks["check_runs"])
+        return dict(pr, mergeable_state="MERGEABLE" if detail.get("mergeable") else "CONFLICTING",
+                    review_decision="APPROVED" if any(r["state"] == "APPROVED" for r in reviews) else "REVIEW_REQUIRED",
+                    checks_state="FAILURE" if failed else "SUCCESS")
+
+    with ThreadPoolExecutor(max_workers=PAGE_FETCH_WORKERS) as executor:
+        return list(executor.map(details, prs))
+
+
+def measure(count, latency):
+    prs = make_prs(count)
+    results = {}
+    for source in ("rest", "graphql"):
+        with FakeServer(latency=latency) as server:
+            add_rest_routes(server, prs)
+            add_graphql_route(server, prs)
+            service = make_service(server, source)
+            start = time.perf_counter()
+            dashboard = rest_dashboard(service) if source == "rest" else service.get_github_pull_requests(REPO)
+            elapsed = (time.perf_counter() - start) * 1000
+            results[source] = (server.request_count, elapsed, dashboard, service.get_github_graphql_rate_limit())
+            service.close()
+
+    rest, graphql = results["rest"], results["graphql"]
+    same = [(pr["number"], pr["checks_state"], pr["review_decision"]) for pr in rest[2]] == \
+           [(pr["number"], pr["checks_state"], pr["review_decision"]) for pr in graphql[2]]
+    print(f"{count} open PRs, {latency * 1000:.0f} ms per request:")
+    rest_label = f"REST (list + 3 calls per PR, {PAGE_FETCH_WORKERS} in parallel):"
+    print(f"  {rest_label:<46} {rest[0]:>4} calls, {rest[1]:8.0f} ms")
+    print(f"  {'GraphQL (one query per 50 PRs):':<46} {graphql[0]:>4} calls, {graphql[1]:8.0f} ms, "
+          f"cost {5000 - graphql[3]['remaining']} points")
+    print(f"  Same dashboard data: {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prs", type=int, nargs="+", default=[30, 200])
+    parser.add_argument("--latency", type=float, default=0.03, help="Seconds the fake server waits per request")
+    args = parser.parse_args()
+    for count in args.prs:
+        measure(count, args.latency)
+
+
+if __name__ == "__main__":
+    main()
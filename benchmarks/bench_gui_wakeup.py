@@ -0,0 +1,89 @@
+"""
+Benchmark: idle CPU use and enqueue-to-render latency of the GUI queue.
+
+1. Idle: runs the App with nothing to do and reports CPU time used.
+2. Latency: a worker thread logs a probe message every 50 ms and the time
+   from gui_queue.put() to the console insert is recorded.
+
+Requires customtkinter and a display.
+
+Usage:
+    python -m benchmarks.bench_gui_wakeup [--idle-seconds 10] [--probes 100]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import customtkinter as ctk
+
+from app.view import App
+
+
+def measure_idle(seconds: float) -> float:
+    """Returns the CPU seconds the process used while the App sat idle."""
+    app = App()
+    app.update()  # First paint is not part of the idle measurement
+    cpu_start = time.process_time()
+    app.after(int(seconds * 1000), app.quit)
+    app.mainloop()
+    cpu_used = time.process_time() - cpu_start
+    app.controller.shutdown()
+    app.destroy()
+    return cpu_used
+
+
+def measure_latency(probes: int, interval: float):
+    """Returns enqueue-to-render latencies in milliseconds."""
+    app = App()
+    sent = {}
+    latencies = []
+    original_append = app.console_textbox.append_messages
+
+    def instrumented_append(items):
+        original_append(items)
+        rendered = time.perf_counter()
+        for item in items:
+            message = item[0] if isinstance(item, tuple) else item
+            if message in sent:
+                latencies.append((rendered - sent.pop(message)) * 1000)
+        if len(latencies) >= probes:
+            app.after(0, app.quit)
+
+    app.console_textbox.append_messages = instrumented_append
+
+    def producer():
+        for i in range(probes):
+            time.sleep(interval)
+            message = f"latency probe {i}"
+            sent[message] = time.perf_counter()
+            app.controller.log_to_gui(message)
+
+    app.after(200, lambda: threading.Thread(target=producer, daemon=True).start())
+    app.mainloop()
+    app.gui_queue.set_waker(None)
+    app.controller.shutdown()
+    app.destroy()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--idle-seconds", type=float, default=10.0)
+    parser.add_argument("--probes", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    cpu = measure_idle(args.idle_seconds)
+    print(f"idle CPU:         {cpu * 1000:.1f} ms over {args.idle_seconds:.0f} s "
+          f"({cpu / args.idle_seconds * 100:.2f}% of one core)")
+
+    latencies = sorted(measure_latency(args.probes, args.interval))
+    print(f"render latency:   p50 {statistics.median(latencies):.2f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms, max {latencies[-1]:.2f} ms "
+          f"({len(latencies)} probes)")
+
+
+if __name__ == "__main__":
+    ctk.set_appearance_mode("System")
+    main()
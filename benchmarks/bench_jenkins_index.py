@@ -0,0 +1,173 @@
+"""
+Benchmark: Jenkins job index (folder crawl and autocomplete search).
+
+Crawl: a FakeServer serves a Jenkins instance of nested folders and
+multibranch projects. The index is crawled in full once, then refreshed
+incrementally (only expired folders are re-listed) and forced. The payload
+of a tree=-projected listing is compared with Jenkins' default one.
+
+Search: the crawled index (or a synthetic one of --index-jobs jobs) is
+searched the way the Jenkins tab does on every keystroke.
+
+Usage:
+    python -m benchmarks.bench_jenkins_index [--teams 20] [--services 25] [--branches 8] [--index-jobs 20000]
+"""
+import argparse
+import json
+import statistics
+import time
+from urllib.parse import parse_qs, unquote, urlparse
+
+from app import jenkins_index
+from app.jenkins_index import JobIndex
+from app.service import ApiService
+from benchmarks.fake_server import FakeServer
+
+FOLDER_CLASS = "com.cloudbees.hudson.plugins.folder.Folder"
+BRANCH_PROJECT_CLASS = "org.jenkinsci.plugins.workflow.multibranch.WorkflowMultiBranchProject"
+JOB_CLASS = "org.jenkinsci.plugins.workflow.job.WorkflowJob"
+
+
+class FakeJenkins:
+    """team-NN folders of service-NN multibranch projects of branch jobs, plus a few top-level jobs."""
+    def __init__(self, base_url, teams, services, branches):
+        self.base_url = base_url
+        self.tree = {}
+        self.default_bytes = 0
+        self.projected_bytes = 0
+        root = {f"deploy-{i}": None for i in range(5)}
+        for t in range(teams):
+            team = {}
+            for s in range(services):
+                team[f"service-{t:02d}-{s:02d}"] = {("main" if b == 0 else f"feature%2Fticket-{t * 100 + b}"): None
+                                                     for b in range(branches)}
+            root[f"team-{t:02d}"] = team
+        self.tree = root
+        self.job_count = self._count(root)
+
+    def _count(self, folder):
+        return sum(1 if child is None else self._count(child) for child in folder.values())
+
+    def _item(self, path, name, child, depth, projected):
+        url = f"{self.base_url}/{'/'.join(f'job/{part}' for part in path + [name])}/"
+        if child is None:
+            item = {"_class": JOB_CLASS, "name": name, "url": url, "color": "blue" if len(name) % 3 else "red",
+                    "lastBuild": {"number": len(name) * 7}}
+        else:
+            item = {"_class": BRANCH_PROJECT_CLASS if depth == 1 else FOLDER_CLASS, "name": name, "url": url}
+        if not projected:
+            # What Jenkins sends per item without a tree= projection
+            item.update({"description": None, "displayName": name, "fullName": "/".join(path + [name]),
+                         "buildable": child is None, "inQueue": False, "keepDependencies": False,
+                         "healthReport": [{"description": "Build stability: No recent builds failed.",
+                                           "iconUrl": "health-80plus.png", "score": 100}],
+                         "property": [], "actions": [{}, {"_class": "hudson.model.ParametersDefinitionProperty"}]})
+        return item
+
+    def handle(self, request, path):
+        parsed = urlparse(path)
+        parts = parsed.path.strip("/").split("/")[:-2]          # drop "api/json"
+        names = [unquote(parts[i + 1]) for i in range(0, len(parts), 2)]
+        folder = self.tree
+        for name in names:
+            folder = (folder or {}).get(name)
+        if folder is None:
+            return 404, {"message": "Not Found"}
+        projected = "tree" in parse_qs(parsed.query)
+        body = {"_class": FOLDER_CLASS, "jobs": [self._item(names, name, child, len(names), projected)
+                                                 for name, child in folder.items()]}
+        size = len(json.dumps(body))
+        if projected:
+            self.projected_bytes += size
+        else:
+            self.default_bytes += size
+        return 200, body
+
+
+def bench_crawl(teams, services, branches, latency):
+    with FakeServer(latency=latency) as server:
+        fake = FakeJenkins(server.url, teams, services, branches)
+        server.route("GET", "/", fake.handle)
+        service = ApiService()
+        service.update_config({"jenkins_url": server.url, "jenkins_user": "bench", "jenkins_token": "bench"})
+        index = JobIndex()
+
+        def run(label, force=False):
+            before, before_bytes = server.request_count, fake.projected_bytes
+            start = time.perf_counter()
+            stats = index.refresh(server.url, service.get_jenkins_folder, force=force)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"  {label:<36} {server.request_count - before:>5} listings, "
+                  f"{(fake.projected_bytes - before_bytes) / 1024:8.0f} KiB, {elapsed:7.0f} ms, "
+                  f"{stats['reused']:>4} folders reused, {len(index)} jobs")
+
+        print(f"Crawl of {fake.job_count} jobs in {teams} folders x {services} multibranch projects, "
+              f"{latency * 1000:.0f} ms per request, {jenkins_index.CRAWL_WORKERS} at a time:")
+        run("Full crawl")
+        run("Incremental, all folders fresh")
+        # Pretend the branch projects' listings have expired, as they do after a few minutes
+        for name, entry in index.folders.items():
+            if name.count("/") == 1:
+                entry["fetched_at"] -= jenkins_index.BRANCH_PROJECT_MAX_AGE + 1
+        run("Incremental, branch projects expired")
+        run("Forced", force=True)
+
+        # The same listings without the tree= projection
+        for name in list(index.folders)[:50]:
+            service._request("jenkins", "GET", f"{server.url}/{jenkins_index.jenkins_job_path(name) + '/' if name else ''}api/json")
+        sample = list(index.folders)[:50]
+        projected = sum(len(json.dumps({"jobs": index.folders[name]["items"]})) for name in sample)
+        print(f"  Payload of {len(sample)} folder listings: {projected / 1024:.0f} KiB projected vs "
+              f"{fake.default_bytes / 1024:.0f} KiB default ({fake.default_bytes / max(projected, 1):.1f}x)")
+        service.close()
+        return index
+
+
+def synthetic_index(count):
+    index = JobIndex()
+    per_folder = 50
+    folders = {"": {"fetched_at": time.time(), "items": []}}
+    for f in range(count // per_folder):
+        team, service = f"team-{f % 40:02d}", f"service-{f:04d}"
+        if f < 40:
+            folders[""]["items"].append({"name": team})
+            folders[team] = {"fetched_at": time.time(), "items": []}
+        folders[team]["items"].append({"name": service})
+        folders[f"{team}/{service}"] = {"fetched_at": time.time(), "items": [
+            {"name": "main" if b == 0 else f"feature%2Fticket-{f * per_folder + b}", "color": "blue"}
+            for b in range(per_folder)]}
+    index._set("synthetic", folders, time.time())
+    return index
+
+
+def bench_search(index, rounds):
+    cases = ["s", "serv", "service-01", "team-07/service-0287", "ticket-1234", "main", "tck12", "t07s28m", "ticketx", "nomatch"]
+    print(f"Searches over {len(index)} jobs (median of {rounds}, 8 suggestions):")
+    for query in cases:
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = index.search(query, 8)
+            timings.append((time.perf_counter() - start) * 1000)
+        first = result[0]["name"] if result else "-"
+        print(f"  {query!r:<24} {statistics.median(timings):6.2f} ms, {len(result)} found, first {first}")
+    start = time.perf_counter()
+    resolved = index.resolve('feature%2Fticket-14351')
+    print(f"  resolve('feature%2Fticket-14351') -> {resolved!r} in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--services", type=int, default=25)
+    parser.add_argument("--branches", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.03, help="Seconds the fake server waits per request")
+    parser.add_argument("--index-jobs", type=int, default=20000, help="Size of the synthetic index for the search benchmark")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    bench_crawl(args.teams, args.services, args.branches, args.latency)
+    bench_search(synthetic_index(args.index_jobs), args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: cost of the request/job instrumentation.
+
+Measures what recording adds per call (observe_request, observe_job and
+a GUI hop, with and without tracing), and the end-to-end time of a burst
+of requests to a FakeServer with metrics recorded, to show it is small
+next to even a local round trip. Prints a sample of the Prometheus output.
+
+Usage:
+    python -m benchmarks.bench_metrics [--calls 100000] [--requests 500]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app.metrics import Metrics, Tracer
+from app.service import ApiService
+from benchmarks.fake_server import FakeServer
+
+URLS = [f"https://ci.example.com/job/team-{i % 20}/job/service-{i % 50}/{i}/api/json?tree=number" for i in range(1000)]
+
+
+def per_call(label, func, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<44} {elapsed / calls * 1e6:6.2f} us per call")
+
+
+def bench_recording(calls):
+    print(f"Recording cost ({calls} calls):")
+    for traced in (False, True):
+        path = os.path.join(tempfile.gettempdir(), "unici-bench-trace.json")
+        metrics = Metrics(Tracer(path) if traced else None)
+        suffix = ", traced" if traced else ""
+        now = time.perf_counter()
+        per_call(f"observe_request{suffix}",
+                 lambda i: metrics.observe_request("jenkins", "GET", URLS[i % 1000], 200, now, 0.05, 0, 900), calls)
+        per_call(f"observe_job{suffix}",
+                 lambda i: metrics.observe_job("jenkins", "AppController._worker", now, 0.001, 0.05, "completed"), calls)
+        per_call(f"observe_gui (callback){suffix}", lambda i: metrics.observe_gui(0.002, "cb", now, 0.001), calls)
+        if traced:
+            start = time.perf_counter()
+            metrics.tracer.save()
+            print(f"  {'save trace':<44} {(time.perf_counter() - start) * 1000:6.0f} ms, "
+                  f"{os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+            os.remove(path)
+    metrics = Metrics()
+    hops = [0.001] * 1000
+    per_call("observe_gui_hops (1000 console messages)", lambda i: metrics.observe_gui_hops(hops), max(1, calls // 1000))
+
+
+def bench_requests(count):
+    with FakeServer() as server:
+        server.route("GET", "/job/", lambda request, path: (200, {"number": 1, "result": "SUCCESS"}))
+        service = ApiService()
+        service.update_config({"jenkins_url": server.url, "jenkins_user": "bench", "jenkins_token": "bench"})
+        start = time.perf_counter()
+        for i in range(count):
+            service.get_jenkins_build_status(f"team/service-{i % 50}", str(i))
+        elapsed = time.perf_counter() - start
+        snapshot = service.metrics.snapshot()
+        row = snapshot["requests"][0]
+        print(f"{count} requests to a local server: {elapsed / count * 1000:.2f} ms each, recorded as "
+              f"{len(snapshot['requests'])} endpoint ({row['endpoint']}), p50 {row['p50']:.2f} ms, "
+              f"p99 {row['p99']:.2f} ms")
+        print("Prometheus sample:")
+        for line in service.metrics.prometheus_text().splitlines():
+            if line.startswith(("unici_http_requests_total", "unici_http_request_duration_seconds_count",
+                                "unici_http_response_bytes_total")):
+                print(f"  {line}")
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    bench_recording(args.calls)
+    bench_requests(args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark: multi-repository PR inbox (sync and in-memory queries).
+
+Sync: a FakeServer serves GitHub's GraphQL API for N repositories. The
+inbox is synced in full once, then incrementally with nothing changed and
+with a few PRs updated, opened and merged; the number of queries, the
+GraphQL cost and the wall time of each sync are compared. The inbox must
+end up identical to a fresh full sync.
+
+Queries: the synced index (or a synthetic one of --index-prs PRs) is
+filtered and sorted the way the GitHub tab does on every keystroke.
+
+Usage:
+    python -m benchmarks.bench_pr_inbox [--repos 60] [--prs-per-repo 80] [--index-prs 5000]
+"""
+import argparse
+import base64
+import json
+import re
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.pr_inbox import PullRequestInbox, PullRequestIndex
+from app.service import ApiService
+from benchmarks.fake_server import FakeServer
+
+ALIAS = re.compile(r'(r\d+): repository\(owner: "([^"]+)", name: "([^"]+)"\) \{ pullRequests\(([^)]*\}[^)]*)\)')
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def iso(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeGitHub:
+    """Repositories of PRs served through an aliased GraphQL query, most recently updated first."""
+    def __init__(self, repos, prs_per_repo):
+        self.clock = 0
+        self.repos = {}
+        for r, repo in enumerate(repos):
+            self.repos[repo] = [self._pr(repo, number, r * prs_per_repo + number, open_=number % 5 != 0)
+                                for number in range(1, prs_per_repo + 1)]
+
+    def _pr(self, repo, number, minute, open_=True):
+        self.clock = max(self.clock, minute)
+        return {
+            "number": number, "title": f"Change {number} in {repo}", "url": f"https://github.com/{repo}/pull/{number}",
+            "isDraft": False, "state": "OPEN" if open_ else "MERGED",
+            "createdAt": iso(START + timedelta(minutes=minute - 1)), "updatedAt": iso(START + timedelta(minutes=minute)),
+            "mergeable": "MERGEABLE", "reviewDecision": ("APPROVED", "REVIEW_REQUIRED", None)[number % 3],
+            "author": {"login": f"dev{number % 17}"}, "headRefName": f"feature/{number}", "headRefOid": f"{number:040x}",
+            "baseRefName": "main" if number % 4 else "release", "labels": {"nodes": []},
+            "commits": {"nodes": [{"commit": {"statusCheckRollup": {"state": "SUCCESS"}}}]},
+        }
+
+    def touch(self, repo, number, state="OPEN", title=None):
+        """Updates (or opens) a PR now."""
+        self.clock += 1
+        prs = self.repos[repo]
+        existing = [pr for pr in prs if pr["number"] == number]
+        pr = existing[0] if existing else self._pr(repo, number, self.clock)
+        if not existing:
+            prs.append(pr)
+        pr.update(state=state, updatedAt=iso(START + timedelta(minutes=self.clock)))
+        if title:
+            pr["title"] = title
+
+    def handle(self, request, path):
+        query = json.loads(request.request_body)["query"]
+        data = {"rateLimit": {"cost": 1, "limit": 5000, "remaining": 4000, "resetAt": "2026-10-18T10:00:00Z"}}
+        for alias, owner, name, args in ALIAS.findall(query):
+            first = int(re.search(r"first: (\d+)", args).group(1))
+            after = re.search(r'after: "([^"]+)"', args)
+            start = int(base64.b64decode(after.group(1))) if after else 0
+            prs = sorted(self.repos[f"{owner}/{name}"], key=lambda pr: pr["updatedAt"], reverse=True)
+            if "states: OPEN" in args:
+                prs = [pr for pr in prs if pr["state"] == "OPEN"]
+            page = prs[start:start + first]
+            end = start + len(page)
+            data[alias] = {"pullRequests": {
+                "pageInfo": {"hasNextPage": end < len(prs), "endCursor": base64.b64encode(str(end).encode()).decode()},
+                "nodes": [dict(pr) for pr in page],
+            }}
+        return 200, {"data": data}
+
+
+def sync(service, inbox, repos):
+    """What the controller's sync worker does, without the GUI plumbing."""
+    inbox.set_repos("bench", "bench", repos)
+    updates = service.sync_github_pull_requests(dict(inbox.cursors))
+    return sum(inbox.apply("bench", repo, update) for repo, update in updates.items())
+
+
+def bench_sync(repo_count, prs_per_repo, latency):
+    repos = [f"org/service-{i:02d}" for i in range(repo_count)]
+    fake = FakeGitHub(repos, prs_per_repo)
+    with FakeServer(latency=latency) as server:
+        server.route("POST", "/graphql", fake.handle)
+        service = ApiService()
+        service.update_config({"github_token": "bench", "github_api_url": server.url})
+        inbox = PullRequestInbox()
+
+        def run(label):
+            before_requests, before_cost = server.request_count, service.github.stats["graphql_cost"]
+            start = time.perf_counter()
+            changed = sync(service, inbox, repos)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"  {label:<34} {server.request_count - before_requests:>3} queries, "
+                  f"cost {service.github.stats['graphql_cost'] - before_cost:>3}, {elapsed:7.0f} ms, "
+                  f"{changed:>4} PRs changed, {len(inbox.index)} open")
+
+        print(f"Sync of {repo_count} repositories x {prs_per_repo} PRs, {latency * 1000:.0f} ms per request:")
+        run("Full sync")
+        run("Incremental, nothing changed")
+        fake.touch(repos[3 % repo_count], 2, title="Retitled")
+        fake.touch(repos[7 % repo_count], 4, state="MERGED")
+        fake.touch(repos[7 % repo_count], prs_per_repo + 1)
+        for number in range(1, 13):             # More updates than fit the first incremental page
+            fake.touch(repos[11 % repo_count], number * 5)
+        run("Incremental, after 15 updates")
+
+        fresh = PullRequestInbox()
+        sync(service, fresh, repos)
+        same = inbox.index.query(sort="repo") == fresh.index.query(sort="repo")
+        print(f"  Same as a fresh full sync: {same}")
+        service.close()
+        return inbox.index
+
+
+def synthetic_index(count):
+    index = PullRequestIndex()
+    now = datetime.now(timezone.utc)
+    for r in range(60):
+        repo = f"org/service-{r:02d}"
+        index.replace_repo(repo, [{
+            "number": n, "title": f"Change {n} in {repo}", "state": "open",
+            "created_at": iso(now - timedelta(hours=(r * 37 + n * 11) % 2000)),
+            "updated_at": iso(now - timedelta(minutes=(r * 13 + n * 7) % 50000)),
+            "user": {"login": f"dev{(r + n) % 40}"}, "head": {"ref": f"feature/{n}"},
+            "base": {"ref": ("main", "release", "develop")[n % 3]},
+            "review_decision": ("APPROVED", "REVIEW_REQUIRED", "CHANGES_REQUESTED", None)[n % 4],
+        } for n in range(1, count // 60 + 1)])
+    return index
+
+
+def bench_queries(index, rounds):
+    cases = {
+        "everything, recently updated": {},
+        "everything, oldest first": {"sort": "created", "descending": False},
+        "one author": {"author": "dev7"},
+        "base + review state": {"base": "release", "review": "REVIEW_REQUIRED"},
+        "repo + author": {"repo": "org/service-05", "author": "dev10"},
+        "older than 30 days": {"min_age_days": 30, "sort": "created"},
+        "text 'service-4'": {"text": "service-4"},
+        "text + review + sort by author": {"text": "change 1", "review": "APPROVED", "sort": "author"},
+    }
+    print(f"Queries over {len(index)} PRs (median of {rounds}):")
+    index.update_repo("org/service-00", [], [1])    # Invalidate the presorted orders
+    start = time.perf_counter()
+    index.query()
+    print(f"  {'first query after a sync':<34} {(time.perf_counter() - start) * 1000:6.2f} ms (rebuilds the order)")
+    for label, filters in cases.items():
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            result = index.query(**filters)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"  {label:<34} {statistics.median(timings):6.2f} ms, {len(result)} PRs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=60)
+    parser.add_argument("--prs-per-repo", type=int, default=80)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the fake server waits per request")
+    parser.add_argument("--index-prs", type=int, default=5000, help="Size of the synthetic index for the query benchmark")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    bench_sync(args.repos, args.prs_per_repo, args.latency)
+    bench_queries(synthetic_index(args.index_prs), args.rounds)
+
+
+if __name__ == "__main__":
+    main()
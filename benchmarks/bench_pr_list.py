@@ -0,0 +1,105 @@
+"""
+Benchmark: rendering and refreshing a large pull request list.
+
+Renders N synthetic PRs into the GitHub tab's virtualized PullRequestList,
+then applies a refresh where a few PRs were opened, closed or retitled,
+and compares both against the previous approach of rebuilding one frame,
+two labels and a button per PR. Requires customtkinter and a display.
+
+Usage:
+    python -m benchmarks.bench_pr_list [--prs 1000] [--changes 10]
+"""
+import argparse
+import time
+
+import customtkinter as ctk
+
+from app.view_tabs.pr_list import PullRequestList
+
+
+def make_prs(count, start=1):
+    return [
+        {
+            "number": number,
+            "title": f"Fix flaky test in module_{number % 97}",
+            "user": {"login": f"dev{number % 23}"},
+            "head": {"ref": f"feature/{number}"},
+            "base": {"ref": "main"},
+        }
+        for number in range(start, start + count)
+    ]
+
+
+def refreshed(prs, changes):
+    """Closes `changes` PRs, retitles `changes` others and opens `changes` new ones."""
+    updated = [dict(pr) for pr in prs[changes:]]
+    for pr in updated[:changes]:
+        pr["title"] += " (rebased)"
+    return make_prs(changes, start=prs[-1]["number"] + 1)[::-1] + updated
+
+
+def rebuild_all(frame, prs):
+    """The old display_pull_requests: destroy everything, one widget tree per PR."""
+    for widget in frame.winfo_children():
+        widget.destroy()
+    for i, pr in enumerate(prs):
+        pr_frame = ctk.CTkFrame(frame, fg_color=("gray85", "gray17"))
+        pr_frame.grid(row=i, column=0, padx=5, pady=5, sticky="ew")
+        ctk.CTkLabel(pr_frame, text=f"#{pr['number']}: {pr['title']}").grid(row=0, column=0)
+        ctk.CTkLabel(pr_frame, text=f"by @{pr['user']['login']}").grid(row=1, column=0)
+        ctk.CTkButton(pr_frame, text="Approve", width=80).grid(row=0, column=2, rowspan=2)
+
+
+def timed(root, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    root.update()  # Include geometry and drawing
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--prs", type=int, default=1000)
+    parser.add_argument("--changes", type=int, default=10)
+    args = parser.parse_args()
+
+    prs = make_prs(args.prs)
+    next_prs = refreshed(prs, args.changes)
+
+    root = ctk.CTk()
+    root.geometry("900x700")
+    root.grid_columnconfigure(0, weight=1)
+    root.grid_rowconfigure(0, weight=1)
+
+    frame = ctk.CTkFrame(root)
+    frame.grid(row=0, column=0, sticky="nsew")
+    root.update()
+    pr_list = PullRequestList(frame, lambda pr: None)
+    root.update()
+
+    render_ms, _ = timed(root, pr_list.set_items, prs)
+    refresh_ms, (added, removed, changed) = timed(root, pr_list.set_items, next_prs)
+    refresh_rows = pr_list.rows_configured
+    scroll_ms, _ = timed(root, pr_list.scroll_to, args.prs // 2)
+    widgets = len(pr_list.rows)
+    frame.destroy()
+
+    legacy = ctk.CTkScrollableFrame(root)
+    legacy.grid(row=0, column=0, sticky="nsew")
+    legacy_render_ms, _ = timed(root, rebuild_all, legacy, prs)
+    legacy_refresh_ms, _ = timed(root, rebuild_all, legacy, next_prs)
+
+    print(f"pull requests:        {args.prs}")
+    print(f"refresh diff:         +{len(added)} -{len(removed)} ~{len(changed)}")
+    print(f"virtual rows:         {widgets}")
+    print(f"virtual render:       {render_ms:8.1f} ms")
+    print(f"virtual refresh:      {refresh_ms:8.1f} ms  ({refresh_rows} rows reconfigured)")
+    print(f"virtual scroll:       {scroll_ms:8.1f} ms")
+    print(f"rebuild render:       {legacy_render_ms:8.1f} ms")
+    print(f"rebuild refresh:      {legacy_refresh_ms:8.1f} ms")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    ctk.set_appearance_mode("System")
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: rate-limit pacing with and without the RateGovernor.
+
+Budget: background jobs keep fetching GitHub branches from a FakeGitHub
+with a small budget (rate_limit requests per window) while an interactive
+fetch is issued every quarter second. Unpaced, the background work burns
+the budget in the first seconds and everything after that, the
+interactive fetches included, gets a rate-limit 403. Paced, background
+work is spread over the window and the interactive reserve keeps
+interactive fetches answering.
+
+Retry-After: sequential GitLab status polls against a server that answers
+a share of them with 429 + Retry-After. Unpaced, each 429 is an error;
+paced, it is waited out and retried.
+
+Usage:
+    python -m benchmarks.bench_rate_governor [--window 10] [--limit 200] [--polls 40]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from app.rate_governor import RateGovernor
+from app.scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, JobScheduler
+from app.service import ApiService
+from benchmarks.fake_ci import FakeGitHub, FakeGitLab, config
+
+BACKGROUND_QUEUE = 16   # Background jobs kept waiting in the scheduler
+INTERACTIVE_EVERY = 0.25
+
+
+class Unpaced(RateGovernor):
+    """Sends everything at once and ignores what the server reports."""
+    def reserve(self, url, interactive):
+        return 0.0
+
+    def background_delay(self, url):
+        return 0.0
+
+    def observe(self, url, status, headers, text=""):
+        return None
+
+
+def make_service(governor, *fakes):
+    service = ApiService(governor=governor)
+    service.update_config(dict(config(*fakes), github_pr_source="rest", max_retries="0"))
+    return service
+
+
+def run_budget(paced, window, limit):
+    with FakeGitHub(branches=20, latency=0.02, rate_limit=limit, rate_window=window) as fake:
+        service = make_service(RateGovernor() if paced else Unpaced(), fake)
+        scheduler = JobScheduler(admission=service.background_delay)
+        background = {"ok": 0, "failed": 0}
+        interactive = []   # (latency, ok)
+        lock = threading.Lock()
+
+        def background_done(future):
+            if future.cancelled():
+                return
+            with lock:
+                background["ok" if future.exception() is None else "failed"] += 1
+
+        def interactive_fetch(repo):
+            fake.touch(repo)
+            start = time.perf_counter()
+            try:
+                service.get_github_branches(repo)
+                ok = True
+            except Exception:
+                ok = False
+            interactive.append((time.perf_counter() - start, ok))
+
+        end = time.monotonic() + window
+        next_interactive = time.monotonic()
+        i = 0
+        while time.monotonic() < end:
+            while scheduler.stats()["queued"] < BACKGROUND_QUEUE:
+                future = scheduler.submit(service.get_github_branches, (f"org/repo-{i}",),
+                                          backend="github", priority=PRIORITY_BACKGROUND)
+                future.add_done_callback(background_done)
+                i += 1
+            if time.monotonic() >= next_interactive:
+                scheduler.submit(interactive_fetch, ("org/app",), backend="github", priority=PRIORITY_INTERACTIVE)
+                next_interactive += INTERACTIVE_EVERY
+            time.sleep(0.01)
+        scheduler.shutdown(cancel_pending=True, timeout=window)
+        service.close()
+
+        ok_latencies = [latency * 1000 for latency, ok in interactive if ok]
+        return {
+            "background_ok": background["ok"],
+            "background_failed": background["failed"],
+            "interactive_ok": len(ok_latencies),
+            "interactive_failed": len(interactive) - len(ok_latencies),
+            "interactive_p50": statistics.median(ok_latencies) if ok_latencies else 0.0,
+            "interactive_max": max(ok_latencies) if ok_latencies else 0.0,
+            "refused": fake.budget.refused,
+        }
+
+
+def bench_budget(window, limit):
+    print(f"Budget: {limit} requests per {window:.0f} s window, background queue of {BACKGROUND_QUEUE}, "
+          f"an interactive fetch every {INTERACTIVE_EVERY * 1000:.0f} ms")
+    for paced in (False, True):
+        r = run_budget(paced, window, limit)
+        print(f"  {'paced' if paced else 'unpaced':<8} background {r['background_ok']:4d} ok {r['background_failed']:5d} failed"
+              f" | interactive {r['interactive_ok']:3d} ok {r['interactive_failed']:3d} failed,"
+              f" p50 {r['interactive_p50']:6.1f} ms, max {r['interactive_max']:7.1f} ms"
+              f" | refused by server {r['refused']}")
+
+
+def bench_retry_after(polls):
+    print(f"Retry-After: {polls} GitLab status polls, 15% answered 429 with Retry-After: 1")
+    for paced in (False, True):
+        with FakeGitLab(failure_rate=0.15, failure_status=429, retry_after=1) as fake:
+            pipeline = fake.create_pipeline("42")
+            service = make_service(RateGovernor() if paced else Unpaced(), fake)
+            errors = 0
+            start = time.perf_counter()
+            for _ in range(polls):
+                try:
+                    service.get_gitlab_pipeline_status("42", str(pipeline))
+                except Exception:
+                    errors += 1
+            elapsed = time.perf_counter() - start
+            service.close()
+        print(f"  {'paced' if paced else 'unpaced':<8} {errors:3d} errors, {fake.failure_count:3d} 429s, "
+              f"{elapsed:5.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--window", type=float, default=10.0)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--polls", type=int, default=40)
+    args = parser.parse_args()
+    bench_budget(args.window, args.limit)
+    bench_retry_after(args.polls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: time to first frame.
+
+Launches `run.py --profile-startup --quit-after-startup` several times in
+fresh interpreters and reports the startup timeline phases, with the time
+from launch to the first painted frame as the headline number. Pass
+--max-ms to fail (exit code 1) when the median regresses past a budget.
+Requires customtkinter and a display.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--max-ms 1500]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(env):
+    """Returns {phase: (start_ms, duration_ms)} parsed from the printed timeline."""
+    output = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "run.py"), "--profile-startup", "--quit-after-startup"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120, check=True,
+    ).stdout
+    phases = {}
+    for line in output.splitlines():
+        parts = line.split(None, 2)
+        if len(parts) == 3:
+            try:
+                phases[parts[2]] = (float(parts[0]), float(parts[1]))
+            except ValueError:
+                continue
+    return phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if the median time to first frame exceeds this")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    durations = defaultdict(list)
+    for _ in range(args.runs):
+        for phase, (_, duration) in run_once(env).items():
+            durations[phase].append(duration)
+
+    print(f"runs: {args.runs}")
+    for phase, values in sorted(durations.items(), key=lambda item: statistics.median(item[1])):
+        print(f"  {phase:<24} median {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms")
+
+    first_frame = statistics.median(durations["first paint"])
+    print(f"time to first frame: {first_frame:.1f} ms (median)")
+    if args.max_ms is not None and first_frame > args.max_ms:
+        print(f"REGRESSION: over the {args.max_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
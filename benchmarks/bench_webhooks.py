@@ -0,0 +1,221 @@
+"""
+Benchmark: build status latency with webhooks vs. polling.
+
+A FakeServer stands in for Jenkins and GitLab. The recorded payloads in
+benchmarks/webhook_payloads/ are replayed to the controller's webhook
+listener, signed the way each server signs them, and the time from event
+arrival to the status reaching a (simulated) GUI listener is recorded.
+For comparison, a second build is only polled and the time from its
+state change to the GUI update is measured. Forged events must be
+rejected.
+
+No display is needed: the GUI queue is drained by a plain thread.
+
+Usage:
+    python -m benchmarks.bench_webhooks [--settle 10] [--rounds 20]
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import queue
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.fake_server import FakeServer
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(__file__), "webhook_payloads")
+SECRET = "bench-secret"
+
+
+def load_payload(name: str) -> bytes:
+    with open(os.path.join(PAYLOAD_DIR, name), "rb") as f:
+        return f.read()
+
+
+def post(url: str, body: bytes, headers: dict) -> int:
+    request = urllib.request.Request(url, data=body, method="POST",
+                                     headers=dict(headers, **{"Content-Type": "application/json"}))
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def signed_headers(backend: str, body: bytes, event: str = "", secret: str = SECRET) -> dict:
+    if backend == "github":
+        signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return {"X-GitHub-Event": event, "X-Hub-Signature-256": signature}
+    if backend == "gitlab":
+        return {"X-Gitlab-Event": "Pipeline Hook", "X-Gitlab-Token": secret}
+    return {"X-UniCI-Token": secret}
+
+
+def make_fake_ci(server: FakeServer, finished: dict):
+    """Jenkins job app-build (queue item 7 -> builds 18, 19) and GitLab project 1 (pipelines 31, 32)."""
+    def queue_item(request, path):
+        number = 18 if "/item/7/" in path else 19
+        return 200, {"executable": {"number": number}}
+
+    def jenkins_build(request, path):
+        number = int(path.split("/")[3])
+        url = f"{server.url}/job/app-build/{number}/"
+        if finished.get(("jenkins", number)):
+            return 200, {"number": number, "building": False, "result": "SUCCESS", "url": url}
+        return 200, {"number": number, "building": True, "url": url}
+
+    def gitlab_pipeline(request, path):
+        pipeline_id = int(path.split("/")[6].split("?")[0])
+        done = finished.get(("gitlab", pipeline_id))
+        return 200, {"id": pipeline_id, "status": "success" if done else "running",
+                     "web_url": f"https://gitlab.example.com/group/service-a/-/pipelines/{pipeline_id}"}
+
+    server.route("GET", "/queue/item/", queue_item)
+    server.route("GET", "/job/app-build/", jenkins_build)
+    server.route("GET", "/api/v4/projects/1/pipelines/", gitlab_pipeline)
+    server.route("GET", "/api/v4/projects/1/pipelines/31/jobs", lambda request, path: (200, []))
+    server.route("GET", "/api/v4/projects/1/pipelines/32/jobs", lambda request, path: (200, []))
+
+
+class StatusRecorder:
+    """Stands in for the tabs: records when each status reaches the 'GUI'."""
+    def __init__(self):
+        self.seen = {}
+        self.cond = threading.Condition()
+
+    def __call__(self, key, label, state, detail):
+        with self.cond:
+            self.seen[(key, state)] = time.perf_counter()
+            self.cond.notify_all()
+
+    def wait_for(self, key_part: str, state: str, timeout: float) -> float:
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while True:
+                for (key, seen_state), at in self.seen.items():
+                    if key_part in key and seen_state == state:
+                        return at
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"{key_part} never reached {state}")
+                self.cond.wait(remaining)
+
+
+def run(settle: float, rounds: int):
+    config_home = tempfile.mkdtemp(prefix="unici-bench-")
+    os.environ["UNICI_CONFIG_DIR"] = config_home
+    from app.controller import AppController
+    from app.monitor import GitLabPipelineWatch, JenkinsBuildWatch
+
+    finished = {}
+    with FakeServer() as server:
+        make_fake_ci(server, finished)
+        with open(os.path.join(config_home, "config.json"), "w") as f:
+            json.dump({"jenkins_url": server.url, "jenkins_user": "bench", "gitlab_url": server.url,
+                       "webhook_enabled": True, "webhook_port": 0}, f)
+
+        gui_queue = queue.Queue()
+        controller = AppController(gui_queue)
+
+        def drain():
+            while True:
+                item = gui_queue.get()
+                if item is None:
+                    return
+                if callable(item):
+                    item()
+
+        threading.Thread(target=drain, daemon=True).start()
+        recorder = StatusRecorder()
+        for backend in ("jenkins", "gitlab", "github"):
+            controller.add_status_listener(backend, recorder)
+        controller.load_api_config({"jenkins_token": "t", "gitlab_token": "t", "webhook_secret": SECRET})
+        hooks = f"http://127.0.0.1:{controller.get_webhook_stats()['listening']}/hooks"
+
+        # --- Polling only (before any event, so polls aren't stretched) ---
+        controller.monitor.watch(JenkinsBuildWatch("app-build", f"{server.url}/queue/item/8/"))
+        controller.monitor.watch(GitLabPipelineWatch("1", "32"))
+        recorder.wait_for(":app-build:", "Running", 30)
+        recorder.wait_for("gitlab:1:32", "Running", 30)
+        print(f"Polling: letting the watches back off for {settle:.0f} s...")
+        time.sleep(settle)
+        changed_at = time.perf_counter()
+        finished[("jenkins", 19)] = finished[("gitlab", 32)] = True
+        poll_latencies = [
+            (recorder.wait_for("queue/item/8/", "Success", 120) - changed_at) * 1000,
+            (recorder.wait_for("gitlab:1:32", "Success", 120) - changed_at) * 1000,
+        ]
+
+        # --- Webhooks ---
+        controller.monitor.watch(JenkinsBuildWatch("app-build", f"{server.url}/queue/item/7/"))
+        controller.monitor.watch(GitLabPipelineWatch("1", "31"))
+        recorder.wait_for("queue/item/7/", "Running", 30)
+        recorder.wait_for("gitlab:1:31", "Running", 30)
+
+        replay = [
+            ("jenkins", "jenkins_started.json", ""),
+            ("gitlab", "gitlab_pipeline_running.json", ""),
+            ("github", "github_pull_request.json", "pull_request"),
+            ("github", "github_check_run.json", "check_run"),
+            ("jenkins", "jenkins_completed.json", ""),
+            ("gitlab", "gitlab_pipeline_success.json", ""),
+        ]
+        end_to_end = []
+        for backend, name, event in replay:
+            body = load_payload(name)
+            sent_at = time.perf_counter()
+            status = post(f"{hooks}/{backend}", body, signed_headers(backend, body, event))
+            assert status == 202, f"{name}: HTTP {status}"
+            if name == "jenkins_completed.json":
+                end_to_end.append((recorder.wait_for("queue/item/7/", "Success", 10) - sent_at) * 1000)
+            elif name == "gitlab_pipeline_success.json":
+                end_to_end.append((recorder.wait_for("gitlab:1:31", "Success", 10) - sent_at) * 1000)
+
+        # Repeated GitHub events measure the listener -> GUI path in bulk
+        body = load_payload("github_check_run.json")
+        for i in range(rounds):
+            round_body = body.replace(b"128620228", str(900000 + i).encode())
+            sent_at = time.perf_counter()
+            post(f"{hooks}/github", round_body, signed_headers("github", round_body, "check_run"))
+            end_to_end.append((recorder.wait_for(f":{900000 + i}", "Success", 10) - sent_at) * 1000)
+
+        forged = [
+            post(f"{hooks}/github", body, signed_headers("github", body, "check_run", secret="wrong")),
+            post(f"{hooks}/gitlab", body, signed_headers("gitlab", body, secret="wrong")),
+            post(f"{hooks}/jenkins", body, {}),
+        ]
+        time.sleep(0.2)  # Let the last latency samples land
+        stats = controller.get_webhook_stats()
+        controller.shutdown()
+        gui_queue.put(None)
+    shutil.rmtree(config_home, ignore_errors=True)
+
+    print(f"Polling:  state change -> GUI: {', '.join(f'{ms:.0f} ms' for ms in poll_latencies)}")
+    print(f"Webhooks: POST -> GUI: median {statistics.median(end_to_end):.1f} ms, "
+          f"max {max(end_to_end):.1f} ms over {len(end_to_end)} events")
+    latency = stats.get("latency_ms", {})
+    print(f"Webhooks: arrival -> GUI (controller stats): p50 {latency.get('p50', 0):.1f} ms, "
+          f"p95 {latency.get('p95', 0):.1f} ms, max {latency.get('max', 0):.1f} ms")
+    print(f"Accepted {stats['accepted']}, rejected {stats['rejected']}, invalid {stats['invalid']}; "
+          f"forged events answered with {forged}")
+    assert forged == [401, 401, 401], "Forged events must be rejected"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settle", type=float, default=10.0,
+                        help="Seconds the polled watches run (and back off) before their builds finish")
+    parser.add_argument("--rounds", type=int, default=20, help="Extra GitHub events replayed for latency stats")
+    args = parser.parse_args()
+    run(args.settle, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+"""
+Stateful stand-ins for the CI servers UniCI talks to, built on FakeServer.
+
+FakeJenkins: the crumb issuer (POSTs without the crumb get a 403), build
+and buildWithParameters (201 with the queue item in Location), queue
+items that turn into builds, build status and progressiveText console
+logs that grow while the build runs.
+FakeGitHub: branches and pulls listings, paginated with Link headers and
+answered with 304 (not counted against the rate limit) while the ETag
+still matches. X-RateLimit-* headers report a budget of rate_limit
+requests per rate_window seconds; past it requests get a 403.
+FakeGitLab: pipeline create, pipeline status and pipeline jobs. With a
+rate_limit, RateLimit-* headers are sent and requests past the budget
+get a 429 with Retry-After.
+
+Runs follow the wall clock: a build leaves the queue after queue_delay
+and finishes build_duration later, so pollers see the real progression.
+Every fake takes FakeServer's latency, jitter and failure_rate; payload
+size is set with `padding` (filler bytes per object) and the sizes of the
+lists and logs. config(*fakes) returns the config keys (tokens included)
+that point UniCI at them.
+"""
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+from benchmarks.fake_server import FakeServer
+
+CRUMB_FIELD = "Jenkins-Crumb"
+JOB_CLASS = "org.jenkinsci.plugins.workflow.job.WorkflowJob"
+
+
+def split_path(path: str) -> Tuple[List[str], Dict[str, str]]:
+    """('/a/b?x=1') -> (['a', 'b'], {'x': '1'})."""
+    parsed = urlparse(path)
+    query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+    return [part for part in parsed.path.split("/") if part], query
+
+
+def make_log(size: int) -> bytes:
+    """A console log of about `size` bytes, the same for every build."""
+    lines = []
+    total = 0
+    i = 0
+    while total < size:
+        line = f"[{i:06d}] step {i % 17}: compiling module_{i % 977}.py ... ok\n"
+        lines.append(line)
+        total += len(line)
+        i += 1
+    return "".join(lines).encode()[:size]
+
+
+class RateWindow:
+    """A fixed-window request budget, like GitHub's and GitLab's."""
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset_at = time.time() + window
+        self.refused = 0
+        self._lock = threading.Lock()
+
+    def take(self, cost: int = 1) -> bool:
+        """Spends `cost` requests of the budget; False if it is used up."""
+        with self._lock:
+            now = time.time()
+            if now >= self.reset_at:
+                self.remaining = self.limit
+                self.reset_at = now + self.window
+            if self.remaining < cost:
+                self.refused += 1
+                return False
+            self.remaining -= cost
+            return True
+
+    def headers(self, prefix: str) -> Dict[str, str]:
+        with self._lock:
+            return {f"{prefix}Limit": str(self.limit), f"{prefix}Remaining": str(self.remaining),
+                    f"{prefix}Reset": str(int(self.reset_at + 0.999))}
+
+
+def config(*fakes) -> Dict[str, str]:
+    """Config keys (URLs and tokens) that point UniCI at the given fakes."""
+    merged: Dict[str, str] = {}
+    for fake in fakes:
+        merged.update(fake.config())
+    return merged
+
+
+class FakeJenkins(FakeServer):
+    """
+    Jenkins with any number of jobs (including jobs in folders, e.g.
+    team/service). Jobs need not be declared: triggering one creates it.
+    `jobs` only populates the top-level listing.
+    """
+    def __init__(self, jobs: Tuple[str, ...] = (), queue_delay: float = 0.5, build_duration: float = 3.0,
+                 result: str = "SUCCESS", log_bytes: int = 64 * 1024, padding: int = 0, **server_options):
+        super().__init__(**server_options)
+        self.jobs = list(jobs)
+        self.queue_delay = queue_delay
+        self.build_duration = build_duration
+        self.result = result
+        self.padding = "x" * padding
+        self.log = make_log(log_bytes)
+        self.crumb = "bench-crumb-0001"
+        self.builds: Dict[str, List[Dict[str, Any]]] = {}   # Job full name -> builds, oldest first
+        self.queue: Dict[int, Dict[str, Any]] = {}
+        self.stats = {"crumbs_issued": 0, "crumb_rejections": 0, "triggers": 0}
+        self._next_queue_id = 1
+        self._state_lock = threading.Lock()
+
+        self.route("GET", "/crumbIssuer/api/json", self._crumb)
+        self.route("GET", "/api/json", self._listing)
+        self.route("GET", "/queue/item/", self._queue_item)
+        self.route("GET", "/job/", self._job_get)
+        self.route("POST", "/job/", self._job_post)
+
+    def config(self) -> Dict[str, str]:
+        return {"jenkins_url": self.url, "jenkins_user": "bench", "jenkins_token": "bench"}
+
+    # --- Direct access (no HTTP), for setting up scenarios ---
+
+    def start_build(self, job: str, params: Optional[Dict[str, str]] = None) -> str:
+        """Queues a build as if it was triggered; returns the queue item URL."""
+        with self._state_lock:
+            queue_id = self._next_queue_id
+            self._next_queue_id += 1
+            self.queue[queue_id] = {"id": queue_id, "job": job, "params": params or {},
+                                    "queued_at": time.time(), "build": None}
+            self.stats["triggers"] += 1
+        return f"{self.url}/queue/item/{queue_id}/"
+
+    def finished_at(self, job: str, number: int) -> float:
+        """Wall-clock time the build finishes (or finished)."""
+        with self._state_lock:
+            build = self.builds[job][number - 1]
+            return build["started"] + build["duration"]
+
+    def _advance(self, now: float):
+        """Starts the queued builds whose queue_delay is up. Called with the state lock held."""
+        for item in self.queue.values():
+            if item["build"] is None and now - item["queued_at"] >= self.queue_delay:
+                builds = self.builds.setdefault(item["job"], [])
+                build = {"number": len(builds) + 1, "job": item["job"],
+                         "started": item["queued_at"] + self.queue_delay, "duration": self.build_duration}
+                builds.append(build)
+                item["build"] = build
+
+    def _build_json(self, build: Dict[str, Any], now: float) -> Dict[str, Any]:
+        building = now < build["started"] + build["duration"]
+        body = {
+            "_class": "org.jenkinsci.plugins.workflow.job.WorkflowRun",
+            "number": build["number"],
+            "building": building,
+            "result": None if building else self.result,
+            "timestamp": int(build["started"] * 1000),
+            "duration": 0 if building else int(build["duration"] * 1000),
+            "estimatedDuration": int(self.build_duration * 1000),
+            "url": f"{self.url}/{self._job_path(build['job'])}/{build['number']}/",
+        }
+        if self.padding:
+            body["description"] = self.padding
+        return body
+
+    def _job_path(self, job: str) -> str:
+        return "/".join(f"job/{part}" for part in job.split("/"))
+
+    # --- Routes ---
+
+    def _crumb(self, request, path):
+        with self._state_lock:
+            self.stats["crumbs_issued"] += 1
+        return 200, {"_class": "hudson.security.csrf.DefaultCrumbIssuer", "crumb": self.crumb,
+                     "crumbRequestField": CRUMB_FIELD}, {"Set-Cookie": "JSESSIONID.bench=node01; Path=/"}
+
+    def _listing(self, request, path):
+        jobs = [{"_class": JOB_CLASS, "name": name, "url": f"{self.url}/job/{name}/", "color": "blue"}
+                for name in self.jobs]
+        return 200, {"_class": "hudson.model.Hudson", "jobs": jobs}
+
+    def _queue_item(self, request, path):
+        parts, _ = split_path(path)
+        with self._state_lock:
+            now = time.time()
+            self._advance(now)
+            item = self.queue.get(int(parts[2])) if len(parts) > 2 and parts[2].isdigit() else None
+            if item is None:
+                return 404, {"message": "Not Found"}
+            body: Dict[str, Any] = {"_class": "hudson.model.Queue$WaitingItem", "id": item["id"],
+                                    "task": {"name": item["job"].rsplit("/", 1)[-1]}}
+            if item["build"] is None:
+                body["why"] = "Waiting for next available executor"
+            else:
+                body["_class"] = "hudson.model.Queue$LeftItem"
+                body["executable"] = {"number": item["build"]["number"],
+                                      "url": self._build_json(item["build"], now)["url"]}
+            return 200, body
+
+    @staticmethod
+    def _parse_job(parts: List[str]) -> Tuple[str, List[str]]:
+        """['job', 'a', 'job', 'b', 'build'] -> ('a/b', ['build'])."""
+        names = []
+        i = 0
+        while i + 1 < len(parts) and parts[i] == "job":
+            names.append(unquote(parts[i + 1]))
+            i += 2
+        return "/".join(names), parts[i:]
+
+    def _job_get(self, request, path):
+        parts, query = split_path(path)
+        job, rest = self._parse_job(parts)
+        with self._state_lock:
+            now = time.time()
+            self._advance(now)
+            builds = self.builds.get(job, [])
+            if rest == ["api", "json"]:
+                last = self._build_json(builds[-1], now) if builds else None
+                return 200, {"_class": JOB_CLASS, "name": job.rsplit("/", 1)[-1], "fullName": job,
+                             "url": f"{self.url}/{self._job_path(job)}/", "buildable": True, "lastBuild": last}
+            if not rest or not builds:
+                return 404, {"message": "Not Found"}
+            if rest[0] == "lastBuild":
+                build = builds[-1]
+            elif rest[0].isdigit() and 0 < int(rest[0]) <= len(builds):
+                build = builds[int(rest[0]) - 1]
+            else:
+                return 404, {"message": "Not Found"}
+            if rest[1:] == ["api", "json"]:
+                return 200, self._build_json(build, now)
+            if rest[1:] == ["logText", "progressiveText"]:
+                return self._progressive_text(build, now, int(query.get("start", 0)))
+        return 404, {"message": "Not Found"}
+
+    def _progressive_text(self, build: Dict[str, Any], now: float, start: int):
+        """The log grows linearly over the build; X-More-Data stays true until it ends."""
+        building = now < build["started"] + build["duration"]
+        progress = min(1.0, max(0.0, (now - build["started"]) / build["duration"])) if build["duration"] else 1.0
+        end = len(self.log) if not building else int(len(self.log) * progress)
+        start = min(start, end)
+        return 200, self.log[start:end], {"Content-Type": "text/plain;charset=UTF-8", "X-Text-Size": str(end),
+                                          "X-More-Data": "true" if building else "false"}
+
+    def _job_post(self, request, path):
+        parts, query = split_path(path)
+        job, rest = self._parse_job(parts)
+        if request.headers.get(CRUMB_FIELD) != self.crumb:
+            with self._state_lock:
+                self.stats["crumb_rejections"] += 1
+            return 403, b"No valid crumb was included in the request", {"Content-Type": "text/html"}
+        if rest not in (["build"], ["buildWithParameters"]):
+            return 404, {"message": "Not Found"}
+        params = dict(query)
+        if rest == ["buildWithParameters"] and request.request_body:
+            params.update({key: values[-1] for key, values in parse_qs(request.request_body.decode()).items()})
+        queue_url = self.start_build(job, params)
+        return 201, b"", {"Location": queue_url, "Content-Type": "text/plain"}
+
+
+class FakeGitHub(FakeServer):
+    """
+    GitHub's REST API for the branch and open PR listings of any repository,
+    each with `branches` and `pulls` entries. touch(repo) changes a
+    repository so its ETags no longer match.
+    """
+    def __init__(self, branches: int = 300, pulls: int = 150, padding: int = 0, rate_limit: int = 5000,
+                 rate_window: float = 3600.0, **server_options):
+        super().__init__(**server_options)
+        self.branch_count = branches
+        self.pull_count = pulls
+        self.padding = "x" * padding
+        self.budget = RateWindow(rate_limit, rate_window)
+        self.versions: Dict[str, int] = {}
+        self.stats = {"not_modified": 0, "pages": 0}
+        self._state_lock = threading.Lock()
+        self._listings: Dict[Tuple[str, str, int], List[Dict[str, Any]]] = {}
+
+        self.route("GET", "/repos/", self._repos)
+
+    def config(self) -> Dict[str, str]:
+        return {"github_api_url": self.url, "github_token": "bench"}
+
+    def touch(self, repo: str):
+        """Retitles the repository's newest PR, which changes every ETag of the repository."""
+        with self._state_lock:
+            self.versions[repo] = self.versions.get(repo, 0) + 1
+
+    def _listing(self, repo: str, resource: str, version: int) -> List[Dict[str, Any]]:
+        key = (repo, resource, version)
+        listing = self._listings.get(key)
+        if listing is not None:
+            return listing
+        if resource == "branches":
+            listing = [{"name": "main" if i == 0 else f"feature/{i}",
+                        "commit": {"sha": f"{i:040x}", "url": f"{self.url}/repos/{repo}/commits/{i:040x}"},
+                        "protected": i == 0}
+                       for i in range(self.branch_count)]
+        else:
+            listing = [self._pull(repo, number, version) for number in range(self.pull_count, 0, -1)]
+        self._listings[key] = listing
+        return listing
+
+    def _pull(self, repo: str, number: int, version: int) -> Dict[str, Any]:
+        retitled = " (updated)" * version if number == self.pull_count else ""
+        return {
+            "number": number,
+            "title": f"Fix flaky test in module_{number % 97}{retitled}",
+            "state": "open",
+            "draft": number % 11 == 0,
+            "html_url": f"https://github.example.com/{repo}/pull/{number}",
+            "user": {"login": f"dev{number % 23}"},
+            "head": {"ref": f"feature/{number}", "sha": f"{number:040x}"},
+            "base": {"ref": "main"},
+            "created_at": f"2026-01-{1 + number % 28:02d}T10:00:00Z",
+            "updated_at": f"2026-02-{1 + number % 28:02d}T10:00:00Z",
+            "body": self.padding,
+        }
+
+    def _repos(self, request, path):
+        parts, query = split_path(path)
+        if len(parts) != 4 or parts[3] not in ("branches", "pulls"):
+            return 404, {"message": "Not Found"}
+        repo, resource = f"{parts[1]}/{parts[2]}", parts[3]
+        per_page = min(100, int(query.get("per_page", 30)))
+        page = max(1, int(query.get("page", 1)))
+        with self._state_lock:
+            version = self.versions.get(repo, 0)
+            listing = self._listing(repo, resource, version)
+            etag = f'W/"{repo}-{resource}-{version}-{page}-{per_page}"'
+            if request.headers.get("If-None-Match") == etag:
+                self.stats["not_modified"] += 1
+                return 304, b"", dict(self.budget.headers("X-RateLimit-"), ETag=etag)
+            if not self.budget.take():
+                return 403, {"message": "API rate limit exceeded for user ID 1."}, self.budget.headers("X-RateLimit-")
+            self.stats["pages"] += 1
+            headers = dict(self.budget.headers("X-RateLimit-"), ETag=etag)
+
+        last_page = max(1, -(-len(listing) // per_page))
+        links = []
+        base = f"{self.url}/repos/{repo}/{resource}"
+        extra = "&state=open" if resource == "pulls" else ""
+        if page < last_page:
+            links.append(f'<{base}?per_page={per_page}&page={page + 1}{extra}>; rel="next"')
+            links.append(f'<{base}?per_page={per_page}&page={last_page}{extra}>; rel="last"')
+        if page > 1:
+            links.append(f'<{base}?per_page={per_page}&page={page - 1}{extra}>; rel="prev"')
+            links.append(f'<{base}?per_page={per_page}&page=1{extra}>; rel="first"')
+        if links:
+            headers["Link"] = ", ".join(links)
+        body = json.dumps(listing[(page - 1) * per_page:page * per_page]).encode()
+        return 200, body, headers
+
+
+class FakeGitLab(FakeServer):
+    """
+    GitLab pipelines of any project. A pipeline is pending for queue_delay,
+    then runs `jobs` jobs one after another over build_duration.
+    """
+    def __init__(self, jobs: int = 4, queue_delay: float = 0.5, build_duration: float = 3.0,
+                 padding: int = 0, rate_limit: Optional[int] = None, rate_window: float = 60.0,
+                 **server_options):
+        super().__init__(**server_options)
+        self.budget = RateWindow(rate_limit, rate_window) if rate_limit else None
+        self.job_count = jobs
+        self.queue_delay = queue_delay
+        self.build_duration = build_duration
+        self.padding = "x" * padding
+        self.pipelines: Dict[int, Dict[str, Any]] = {}
+        self.stats = {"pipelines_created": 0}
+        self._next_id = 1000
+        self._state_lock = threading.Lock()
+
+        self.route("POST", "/api/v4/projects/", self._metered(self._create))
+        self.route("GET", "/api/v4/projects/", self._metered(self._get))
+
+    def config(self) -> Dict[str, str]:
+        return {"gitlab_url": self.url, "gitlab_token": "bench"}
+
+    # --- Direct access (no HTTP), for setting up scenarios ---
+
+    def create_pipeline(self, project: str, ref: str = "main") -> int:
+        """Creates a pipeline as if it was triggered; returns its ID."""
+        with self._state_lock:
+            pipeline_id = self._next_id
+            self._next_id += 1
+            self.pipelines[pipeline_id] = {"id": pipeline_id, "project": project, "ref": ref,
+                                           "created": time.time()}
+            self.stats["pipelines_created"] += 1
+        return pipeline_id
+
+    def finished_at(self, pipeline_id: int) -> float:
+        with self._state_lock:
+            return self.pipelines[pipeline_id]["created"] + self.queue_delay + self.build_duration
+
+    def _job_states(self, pipeline: Dict[str, Any], now: float) -> List[str]:
+        elapsed = now - pipeline["created"] - self.queue_delay
+        if elapsed < 0:
+            return ["pending"] * self.job_count
+        step = self.build_duration / self.job_count if self.job_count else 0
+        return ["success" if elapsed >= step * (i + 1) else "running" if elapsed >= step * i else "created"
+                for i in range(self.job_count)]
+
+    def _pipeline_json(self, pipeline: Dict[str, Any], now: float) -> Dict[str, Any]:
+        elapsed = now - pipeline["created"]
+        if elapsed < self.queue_delay:
+            status = "pending"
+        elif elapsed < self.queue_delay + self.build_duration:
+            status = "running"
+        else:
+            status = "success"
+        body = {
+            "id": pipeline["id"],
+            "project_id": pipeline["project"],
+            "ref": pipeline["ref"],
+            "status": status,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(pipeline["created"])),
+            "web_url": f"{self.url}/{unquote(pipeline['project'])}/-/pipelines/{pipeline['id']}",
+        }
+        if self.padding:
+            body["description"] = self.padding
+        return body
+
+    # --- Routes ---
+
+    def _metered(self, route):
+        """Wraps a route with the RateLimit-* budget, if there is one."""
+        def metered(request, path):
+            if self.budget is None:
+                return route(request, path)
+            if not self.budget.take():
+                headers = self.budget.headers("RateLimit-")
+                headers["Retry-After"] = str(max(1, int(self.budget.reset_at - time.time() + 0.999)))
+                return 429, {"message": "429 Too Many Requests"}, headers
+            result = route(request, path)
+            headers = dict(result[2]) if len(result) > 2 else {}
+            headers.update(self.budget.headers("RateLimit-"))
+            return result[0], result[1], headers
+        return metered
+
+    def _create(self, request, path):
+        parts, query = split_path(path)
+        if len(parts) != 5 or parts[4] != "pipeline":
+            return 404, {"message": "404 Not Found"}
+        data = json.loads(request.request_body or b"{}")
+        ref = data.get("ref") or query.get("ref")
+        if not ref:
+            return 400, {"message": "ref is missing"}
+        pipeline_id = self.create_pipeline(parts[3], ref)
+        with self._state_lock:
+            return 201, self._pipeline_json(self.pipelines[pipeline_id], time.time())
+
+    def _get(self, request, path):
+        parts, _ = split_path(path)
+        # api/v4/projects/<id>/pipelines/<pipeline_id>[/jobs]
+        if len(parts) not in (6, 7) or parts[4] != "pipelines" or not parts[5].isdigit():
+            return 404, {"message": "404 Not Found"}
+        with self._state_lock:
+            pipeline = self.pipelines.get(int(parts[5]))
+            if pipeline is None or pipeline["project"] != parts[3]:
+                return 404, {"message": "404 Not Found"}
+            now = time.time()
+            if len(parts) == 6:
+                return 200, self._pipeline_json(pipeline, now)
+            if parts[6] != "jobs":
+                return 404, {"message": "404 Not Found"}
+            return 200, [{"id": pipeline["id"] * 100 + i, "name": f"job-{i}", "stage": "test", "status": state,
+                          "web_url": f"{self.url}/-/jobs/{pipeline['id'] * 100 + i}"}
+                         for i, state in enumerate(self._job_states(pipeline, now))]
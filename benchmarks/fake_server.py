@@ -0,0 +1,105 @@
+"""
+Minimal in-process HTTP server used by the benchmarks.
+Routes are matched by (method, path prefix) and answered with JSON after a
+configurable delay, so that UniCI can be measured without live servers.
+Latency can be given a random jitter, and a share of requests can be
+failed (503 by default, or e.g. 429 with a Retry-After) to exercise
+retries. Random draws come from a seeded generator, so a run with the
+same settings fails the same requests.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+
+class FakeServer:
+    """
+    A threaded HTTP server on 127.0.0.1 with a random port.
+    Handlers take (handler, path) and return (status, body, headers).
+    """
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0,
+                 failure_status: int = 503, retry_after: Optional[float] = None, seed: Optional[int] = 0):
+        self.latency = latency
+        self.jitter = jitter                # Up to this many seconds are added to each delay
+        self.failure_rate = failure_rate    # Share of requests failed before routing
+        self.failure_status = failure_status
+        self.retry_after = retry_after      # Sent as Retry-After with injected failures
+        self.routes: Dict[Tuple[str, str], Callable] = {}
+        self.request_count = 0
+        self.failure_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; without this, delayed ACKs
+            # add ~40 ms to every local round trip and swamp what is measured
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self, method):
+                with server._lock:
+                    server.request_count += 1
+                    delay = server.latency + (server._random.uniform(0, server.jitter) if server.jitter else 0.0)
+                    fail = server.failure_rate and server._random.random() < server.failure_rate
+                    if fail:
+                        server.failure_count += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                self.request_body = self.rfile.read(length) if length else b""
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    status, body, headers = server.failure_status, {"message": "Injected failure"}, {}
+                    if server.retry_after is not None:
+                        headers["Retry-After"] = str(server.retry_after)
+                else:
+                    status, body, headers = server.handle(method, self)
+                payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", headers.pop("Content-Type", "application/json"))
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+        ThreadingHTTPServer.request_queue_size = 1024
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def route(self, method: str, prefix: str, handler: Callable):
+        """Registers a handler for requests whose path starts with prefix."""
+        self.routes[(method, prefix)] = handler
+
+    def handle(self, method: str, request) -> Tuple[int, object, Dict[str, str]]:
+        """Finds the longest matching route for the request."""
+        matches = [p for (m, p) in self.routes if m == method and request.path.startswith(p)]
+        if not matches:
+            return 404, {"message": "Not Found"}, {}
+        result = self.routes[(method, max(matches, key=len))](request, request.path)
+        if len(result) == 2:
+            return result[0], result[1], {}
+        return result
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
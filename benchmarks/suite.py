@@ -0,0 +1,396 @@
+"""
+Benchmark suite: the end-to-end numbers to watch for regressions.
+
+Runs UniCI's controller and services against the stateful fakes in
+benchmarks/fake_ci.py (no live servers needed) and measures:
+
+  trigger     trigger throughput, one scheduler job per trigger and bulk
+  polling     N-way concurrent polling of running builds and pipelines
+  large_list  large GitHub listings, fetched cold and revalidated, and
+              rendered into the PR list (the rendering needs a display)
+  startup     headless CLI startup to a first answer, and the GUI's time
+              to first frame (needs a display)
+
+Each run is stored as JSON in benchmarks/results/. --compare checks it
+against the previous run with the same settings (or a given file) and exits with 1 if a metric
+got worse by more than --tolerance. Metrics ending in _per_s are better
+higher, all others lower.
+
+Usage:
+    python -m benchmarks.suite [--only trigger polling] [--quick] [--latency 0.02]
+                               [--failure-rate 0.0] [--compare [BASELINE]] [--tolerance 0.25]
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import queue
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fake_ci import FakeGitHub, FakeGitLab, FakeJenkins, config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+HIGHER_IS_BETTER = ("_per_s",)
+
+
+class Skipped(Exception):
+    """A scenario (or part of one) can't run here, e.g. without a display."""
+
+
+# --- Helpers ---
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))] if ordered else 0.0
+
+
+def has_display() -> bool:
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+        return True
+    except Exception:
+        return False
+
+
+def server_options(options) -> Dict[str, float]:
+    return {"latency": options.latency, "jitter": options.jitter, "failure_rate": options.failure_rate}
+
+
+@contextmanager
+def running_controller(*fakes):
+    """
+    An AppController configured for the fakes, with its own config
+    directory and a plain thread standing in for the GUI loop.
+    """
+    config_home = tempfile.mkdtemp(prefix="unici-suite-")
+    previous = os.environ.get("UNICI_CONFIG_DIR")
+    os.environ["UNICI_CONFIG_DIR"] = config_home
+    settings = config(*fakes)
+    tokens = {key: settings.pop(key) for key in list(settings) if key.endswith("_token")}
+    with open(os.path.join(config_home, "config.json"), "w") as f:
+        json.dump(settings, f)
+
+    from app.controller import AppController
+    gui_queue: queue.Queue = queue.Queue()
+    controller = AppController(gui_queue)
+
+    def drain():
+        while True:
+            item = gui_queue.get()
+            if item is None:
+                return
+            if callable(item):
+                item()
+
+    threading.Thread(target=drain, daemon=True).start()
+    controller.load_api_config(tokens)
+    try:
+        yield controller
+    finally:
+        controller.shutdown()
+        gui_queue.put(None)
+        if previous is None:
+            os.environ.pop("UNICI_CONFIG_DIR", None)
+        else:
+            os.environ["UNICI_CONFIG_DIR"] = previous
+        shutil.rmtree(config_home, ignore_errors=True)
+
+
+def timed_futures(submit: Callable[[int], Any], count: int):
+    """Submits `count` jobs and waits for them all; returns (seconds, errors)."""
+    start = time.perf_counter()
+    futures = [submit(i) for i in range(count)]
+    errors = sum(1 for future in futures if future.exception() is not None)
+    return time.perf_counter() - start, errors
+
+
+# --- Scenarios ---
+
+def bench_trigger(options) -> Dict[str, float]:
+    """Triggers N runs, half Jenkins builds and half GitLab pipelines, both ways the app can."""
+    from app.bulk import BulkTarget
+    count = options.triggers
+    with FakeJenkins(**server_options(options)) as jenkins, FakeGitLab(**server_options(options)) as gitlab, \
+            running_controller(jenkins, gitlab) as controller:
+        service = controller.api_service
+        # Crumb, connections and worker threads are set up outside the timing
+        service.trigger_jenkins_build("warm-up")
+        service.trigger_gitlab_pipeline("warm-up", "main")
+        controller.run_in_thread(time.sleep, 0.0).result()
+
+        def submit(i):
+            if i % 2:
+                return controller.run_in_thread(service.trigger_jenkins_build, f"team-{i % 10}/service-{i}",
+                                                 backend="jenkins")
+            return controller.run_in_thread(service.trigger_gitlab_pipeline, f"group%2Fservice-{i}", "main",
+                                            backend="gitlab")
+
+        elapsed, errors = timed_futures(submit, count)
+        backends = controller.get_diagnostics()["backends"]
+        request_p95 = max(backends[name]["latency"]["p95"] for name in ("jenkins", "gitlab"))
+
+        targets = [BulkTarget("jenkins", f"team-{i % 10}/bulk-{i}") if i % 2
+                   else BulkTarget("gitlab", f"group%2Fbulk-{i}", "main") for i in range(count)]
+        start = time.perf_counter()
+        results = controller.handle_bulk_trigger(targets, monitor=False).result()
+        bulk_elapsed = time.perf_counter() - start
+        errors += sum(1 for result in results if not result.ok)
+        landed = jenkins.stats["triggers"] + gitlab.stats["pipelines_created"]
+
+    return {
+        "threaded_triggers_per_s": count / elapsed,
+        "request_p95_ms": request_p95,
+        "bulk_triggers_per_s": count / bulk_elapsed,
+        "errors": errors,
+        "missing": 2 * count + 2 - errors - landed,
+    }
+
+
+def bench_polling(options) -> Dict[str, float]:
+    """
+    Follows N running builds and pipelines until they finish. Reports how
+    long after each one finished the app noticed, and what it cost.
+    """
+    from app.monitor import GitLabPipelineWatch, JenkinsBuildWatch
+    count = options.watches
+    timing = {"queue_delay": 1.0, "build_duration": options.build_duration}
+    with FakeJenkins(**timing, **server_options(options)) as jenkins, \
+            FakeGitLab(**timing, **server_options(options)) as gitlab, \
+            running_controller(jenkins, gitlab) as controller:
+        watches = []
+        for i in range(count):
+            if i % 2:
+                job = f"team-{i % 10}/service-{i}"
+                watches.append(JenkinsBuildWatch(job, jenkins.start_build(job)))
+            else:
+                project = f"group%2Fservice-{i}"
+                watches.append(GitLabPipelineWatch(project, str(gitlab.create_pipeline(project))))
+
+        detected: Dict[str, float] = {}
+        start = time.time()
+        futures = []
+        for watch in watches:
+            future = controller.wait_for_watch(watch)
+            future.add_done_callback(lambda _, key=watch.key: detected.setdefault(key, time.time()))
+            futures.append(future)
+        statuses = [future.result(timeout=options.build_duration * 10 + 120) for future in futures]
+        wall = max(detected.values()) - start
+
+        lags = []
+        for watch in watches:
+            if isinstance(watch, JenkinsBuildWatch):
+                finished = jenkins.finished_at(watch.job_name, watch.build_number)
+            else:
+                finished = gitlab.finished_at(int(watch.pipeline_id))
+            lags.append(max(0.0, detected[watch.key] - finished))
+        requests = jenkins.request_count + gitlab.request_count
+        waits = [job["wait"]["p95"] for job in controller.get_diagnostics()["jobs"].values()]
+
+    return {
+        "wall_s": wall,
+        "detect_lag_p50_ms": percentile(lags, 0.5) * 1000,
+        "detect_lag_p95_ms": percentile(lags, 0.95) * 1000,
+        "detect_lag_max_ms": max(lags) * 1000,
+        "requests_per_watch": requests / count,
+        "poll_queue_wait_p95_ms": max(waits, default=0.0),
+        "failed": sum(1 for status in statuses if status.state != "Success"),
+    }
+
+
+def bench_large_list(options) -> Dict[str, float]:
+    """Fetches big branch and PR listings cold, unchanged and after a change; renders the PRs."""
+    size = options.list_size
+    repo = "example/monorepo"
+    with FakeGitHub(branches=size, pulls=size, padding=options.padding, **server_options(options)) as github, \
+            running_controller(github) as controller:
+        service = controller.api_service
+        results = {}
+        for name, fetch in (("branches", service.get_github_branches), ("pulls", service.get_github_pull_requests)):
+            for phase in ("cold", "revalidate"):
+                start = time.perf_counter()
+                items = fetch(repo)
+                results[f"{name}_{phase}_ms"] = (time.perf_counter() - start) * 1000
+                assert len(items) == size, f"{name}: got {len(items)} of {size}"
+        github.touch(repo)
+        start = time.perf_counter()
+        prs = service.get_github_pull_requests(repo)
+        results["pulls_changed_ms"] = (time.perf_counter() - start) * 1000
+
+    if not options.display:
+        raise Skipped("rendering needs a display", results)
+    import customtkinter as ctk
+    from app.view_tabs.pr_list import PullRequestList
+    from benchmarks.bench_pr_list import refreshed, timed
+
+    root = ctk.CTk()
+    root.geometry("900x700")
+    root.grid_columnconfigure(0, weight=1)
+    root.grid_rowconfigure(0, weight=1)
+    frame = ctk.CTkFrame(root)
+    frame.grid(row=0, column=0, sticky="nsew")
+    pr_list = PullRequestList(frame, lambda pr: None)
+    root.update()
+    results["render_ms"], _ = timed(root, pr_list.set_items, prs)
+    results["rerender_ms"], _ = timed(root, pr_list.set_items, refreshed(prs, 10))
+    results["scroll_ms"], _ = timed(root, pr_list.scroll_to, len(prs) // 2)
+    root.destroy()
+    return results
+
+
+def bench_startup(options) -> Dict[str, float]:
+    """Median wall time of `cli.py status` (a fresh process per run) and the GUI's first frame."""
+    results = {}
+    config_home = tempfile.mkdtemp(prefix="unici-suite-")
+    with FakeJenkins(queue_delay=0.0, build_duration=0.0, **server_options(options)) as jenkins:
+        jenkins.start_build("app-build")
+        settings = config(jenkins)
+        with open(os.path.join(config_home, "config.json"), "w") as f:
+            json.dump({"jenkins_url": settings["jenkins_url"], "jenkins_user": settings["jenkins_user"]}, f)
+        env = dict(os.environ, UNICI_CONFIG_DIR=config_home, UNICI_JENKINS_TOKEN=settings["jenkins_token"],
+                   PYTHONDONTWRITEBYTECODE="1")
+        command = [sys.executable, os.path.join(ROOT, "cli.py"), "--no-daemon", "status", "jenkins", "app-build"]
+        durations = []
+        for _ in range(options.runs):
+            start = time.perf_counter()
+            output = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+            durations.append((time.perf_counter() - start) * 1000)
+            events = [json.loads(line) for line in output.stdout.splitlines() if line.startswith("{")]
+            if output.returncode != 0 or not any(event.get("event") == "status" for event in events):
+                raise RuntimeError(f"cli.py status failed: {output.stdout}{output.stderr}")
+    shutil.rmtree(config_home, ignore_errors=True)
+    results["cli_status_ms"] = statistics.median(durations)
+
+    if not options.display:
+        raise Skipped("the GUI's first frame needs a display", results)
+    from benchmarks.bench_startup import run_once
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    first_paint = [run_once(env)["first paint"][1] for _ in range(options.runs)]
+    results["gui_first_frame_ms"] = statistics.median(first_paint)
+    return results
+
+
+SCENARIOS = {
+    "trigger": bench_trigger,
+    "polling": bench_polling,
+    "large_list": bench_large_list,
+    "startup": bench_startup,
+}
+
+
+# --- Results ---
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def latest_result(settings: Dict[str, Any]) -> Optional[str]:
+    """The most recent stored run with the same settings, else the most recent one."""
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")), reverse=True)
+    for path in paths:
+        with open(path) as f:
+            if json.load(f)["meta"]["settings"] == settings:
+                return path
+    return paths[0] if paths else None
+
+
+def compare(baseline: Dict[str, Any], run: Dict[str, Any], tolerance: float) -> List[str]:
+    """Prints each metric next to the baseline; returns the ones that got worse by more than tolerance."""
+    if baseline["meta"]["settings"] != run["meta"]["settings"]:
+        print("Note: the baseline was run with different settings; differences may not be regressions.")
+    regressions = []
+    print(f"\n{'metric':<42} {'baseline':>10} {'now':>10} {'change':>8}")
+    for scenario, metrics in run["results"].items():
+        for name, value in metrics.items():
+            old = baseline["results"].get(scenario, {}).get(name)
+            if old is None:
+                continue
+            change = (value - old) / old if old else (0.0 if value == old else float("inf"))
+            worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+            flag = "  REGRESSION" if worse > tolerance else ""
+            if flag:
+                regressions.append(f"{scenario}.{name}")
+            print(f"{scenario + '.' + name:<42} {old:>10.1f} {value:>10.1f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--quick", action="store_true", help="Small sizes, for checking the suite itself")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Random extra latency, up to this many seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with a 503")
+    parser.add_argument("--padding", type=int, default=2048, help="Filler bytes per PR, GitHub's are large")
+    parser.add_argument("--compare", nargs="?", const="latest", default=None, metavar="BASELINE",
+                        help="Compare with a stored result (default: the latest with the same settings)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a metric fails")
+    parser.add_argument("--no-save", action="store_true", help="Don't store this run in benchmarks/results/")
+    options = parser.parse_args()
+    sizes = ({"triggers": 100, "watches": 20, "build_duration": 2.0, "list_size": 500, "runs": 1} if options.quick
+             else {"triggers": 400, "watches": 200, "build_duration": 5.0, "list_size": 3000, "runs": 5})
+    for key, value in sizes.items():
+        setattr(options, key, value)
+    options.display = has_display()
+
+    settings = {key: value for key, value in vars(options).items()
+                if key not in ("only", "compare", "tolerance", "no_save", "display")}
+    baseline_path = latest_result(settings) if options.compare == "latest" else options.compare
+    run = {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(),
+                    "python": platform.python_version(), "platform": platform.platform(),
+                    "settings": settings},
+           "results": {}, "skipped": {}}
+    for name in options.only:
+        print(f"Running {name}...", flush=True)
+        start = time.perf_counter()
+        try:
+            run["results"][name] = SCENARIOS[name](options)
+        except Skipped as e:
+            reason, partial = e.args
+            run["results"][name] = partial
+            run["skipped"][name] = reason
+        for metric, value in run["results"][name].items():
+            print(f"  {metric:<28} {value:10.1f}")
+        if name in run["skipped"]:
+            print(f"  (partly skipped: {run['skipped'][name]})")
+        print(f"  [{time.perf_counter() - start:.1f} s]")
+
+    if not options.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{run['meta']['commit']}.json")
+        with open(path, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"Saved {os.path.relpath(path, ROOT)}")
+
+    if options.compare:
+        if not baseline_path:
+            print("No stored result to compare with yet.")
+            return
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        print(f"Baseline: {os.path.relpath(baseline_path, ROOT)} ({baseline['meta']['commit']})")
+        regressions = compare(baseline, run, options.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {options.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
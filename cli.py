@@ -0,0 +1,12 @@
+"""
+Headless Entry Point for the CI/CD Utility
+
+Runs UniCI's triggers and monitors without a display, printing JSON Lines.
+See app/headless.py, or run: python cli.py --help
+"""
+import sys
+from app.headless import main
+
+# --- Main execution ---
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,16 @@
 Main Entry Point for the CI/CD Utility
 
 This file initializes and runs the main application.
+Pass --profile-startup to print a timeline of the startup phases, or
+--profile [trace.json] to trace requests, jobs and GUI updates until exit.
 """
 
+from app.startup_profile import PROFILE  # First, so the timeline starts at launch
+
+PROFILE.begin("import")
 import customtkinter as ctk
 from app.view import App  # Import the main App class from our package
+PROFILE.end("import")
 
 # --- Main execution ---
 if __name__ == "__main__":